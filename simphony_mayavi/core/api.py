@@ -5,14 +5,31 @@ from .doc_utils import mergedocs
 from .constants import CELL2VTKCELL, FACE2VTKCELL, EDGE2VTKCELL
 from .constants import VTKCELLTYPES, VTKFACETYPES, VTKEDGETYPES
 from .constants import ELEMENT2VTKCELLTYPES, VTKCELLTYPE2ELEMENT
-from .cell_array_tools import cell_array_slicer
+from .cell_array_tools import (
+    cell_array_slicer, cell_connectivity, vtk_array_view, update_vtk_array,
+    append_vtk_array, mark_vtk_array_modified)
 from .cuba_data_accumulator import CUBADataAccumulator, gather_cells
 from .cuba_data_extractor import CUBADataExtractor
+from .chunk_tools import (
+    DEFAULT_CHUNK_SIZE, Cancelled, chunk_slices, mapped_array, cancellable,
+    check_cancelled)
+from .version_counter import next_version, collect_changes
+from .cuds_fingerprint import cuds_fingerprint
+from .conversion_cache import ConversionCache, cuds_cache_key
+from .regions import (
+    ELEMENT_SELECTIONS, Region, BoxRegion, SphereRegion, PlanesRegion)
 
 __all__ = [
     "CubaData", "supported_cuba", "CellCollection", "mergedocs",
     "CELL2VTKCELL", "FACE2VTKCELL", "EDGE2VTKCELL",
     "VTKCELLTYPES", "VTKFACETYPES", "VTKEDGETYPES",
     "ELEMENT2VTKCELLTYPES", "VTKCELLTYPE2ELEMENT",
-    "cell_array_slicer", "CUBADataAccumulator", "CUBADataExtractor",
-    "gather_cells"]
+    "cell_array_slicer", "cell_connectivity", "vtk_array_view",
+    "update_vtk_array", "append_vtk_array", "mark_vtk_array_modified",
+    "CUBADataAccumulator", "CUBADataExtractor",
+    "gather_cells", "DEFAULT_CHUNK_SIZE", "chunk_slices", "mapped_array",
+    "Cancelled", "cancellable", "check_cancelled",
+    "next_version", "collect_changes", "cuds_fingerprint",
+    "ConversionCache", "cuds_cache_key",
+    "ELEMENT_SELECTIONS", "Region", "BoxRegion", "SphereRegion",
+    "PlanesRegion"]
@@ -1,3 +1,9 @@
+import numpy
+from tvtk.api import tvtk
+from tvtk.array_handler import _array_cache
+from vtk.util import numpy_support
+
+
 def cell_array_slicer(data):
     """ Iterate over cell components on a vtk cell array
 
@@ -21,3 +27,146 @@ def cell_array_slicer(data):
             count -= 1
             if count == 0:
                 yield collection
+
+
+def cell_connectivity(counts, indices):
+    """ Return the vtk cell array connectivity of cells from their point
+    counts and point indices.
+
+    This is the inverse of :func:`cell_array_slicer`, every cell is
+    stored as its point count followed by its point indices.
+
+    Parameters
+    ----------
+    counts : array_like
+        The number of points of each cell.
+
+    indices : array_like
+        The point indices of the cells, one cell after the other.
+
+    """
+    counts = numpy.asarray(counts, dtype=numpy.int64)
+    indices = numpy.asarray(indices, dtype=numpy.int64)
+    offsets = numpy.cumsum(counts) - counts
+    return numpy.insert(indices, offsets, counts)
+
+
+def vtk_array_view(array):
+    """ Return a numpy view of the current contents of a tvtk data array.
+
+    Differently from ``array.to_array()`` the tvtk array cache is not
+    used, since it can be out of date after the vtk array has been
+    extended (see https://github.com/enthought/mayavi/issues/197). The
+    view is only valid until the next modification of the array.
+
+    Parameters
+    ----------
+    array : tvtk.DataArray
+        The array to view. Bit arrays are not supported.
+
+    """
+    return numpy_support.vtk_to_numpy(tvtk.to_vtk(array))
+
+
+def update_vtk_array(array, values, indices=None, notify=True):
+    """ Write values into a tvtk data array in place.
+
+    The array is marked as modified afterwards, unless the stored
+    values are already equal to ``values``.
+
+    Parameters
+    ----------
+    array : tvtk.DataArray
+        The array to update. Bit arrays are not supported.
+
+    values : array_like
+        The new values (or a single value to broadcast).
+
+    indices : slice or array_like
+        The tuples to update. Default is None which updates all of them.
+
+    notify : bool
+        When False the array is not marked as modified and its tvtk
+        numpy cache is kept, the caller has to call
+        :func:`mark_vtk_array_modified` later. Default is True.
+
+    Returns
+    -------
+    changed : bool
+        False if the array was left untouched.
+
+    """
+    if indices is None:
+        indices = slice(None)
+    view = vtk_array_view(array)
+    values = numpy.asarray(values, dtype=view.dtype)
+    if numpy.array_equal(view[indices], values):
+        return False
+    if view.flags.writeable:
+        view[indices] = values
+    else:
+        view = numpy.array(view)
+        view[indices] = values
+        array.from_array(view)
+    if notify:
+        mark_vtk_array_modified(array)
+    return True
+
+
+def append_vtk_array(array, values, notify=True):
+    """ Append tuples to a tvtk data array in place.
+
+    The vtk array object is kept, so the references held by the pipeline
+    stay valid. The storage of the array grows geometrically (as with
+    ``InsertNextTuple``), thus appending blocks repeatedly costs amortized
+    time proportional to the size of the blocks.
+
+    Parameters
+    ----------
+    array : tvtk.DataArray
+        The array to extend. Bit arrays are not supported.
+
+    values : array_like
+        The new values, one row per tuple.
+
+    notify : bool
+        When False the array is not marked as modified and its tvtk
+        numpy cache is kept (see :func:`update_vtk_array`). Default is
+        True.
+
+    """
+    vtk_array = tvtk.to_vtk(array)
+    components = vtk_array.GetNumberOfComponents()
+    values = numpy.asarray(values).reshape(-1, components)
+    if len(values) == 0:
+        return
+    start = vtk_array.GetNumberOfTuples()
+    stop = start + len(values)
+    # Inserting the last tuple extends the storage and keeps the values
+    vtk_array.InsertTuple(stop - 1, [float(value) for value in values[-1]])
+    view = numpy_support.vtk_to_numpy(vtk_array)
+    if components == 1:
+        values = values.ravel()
+    if view.flags.writeable:
+        view[start:stop] = values
+    else:
+        view = numpy.array(view)
+        view[start:stop] = values
+        array.from_array(view)
+    if notify:
+        mark_vtk_array_modified(array)
+
+
+def mark_vtk_array_modified(array):
+    """ Mark a tvtk data array as modified and drop its numpy cache.
+
+    Parameters
+    ----------
+    array : tvtk.DataArray
+        The array that has been changed in place.
+
+    """
+    array.modified()
+    # invalidate the numpy cache, see issue
+    # https://github.com/enthought/mayavi/issues/197
+    _array_cache._remove_array(tvtk.to_vtk(array).__this__)
@@ -0,0 +1,97 @@
+import threading
+from contextlib import contextmanager
+
+import numpy
+
+#: The default number of items per block when iterating in chunks.
+DEFAULT_CHUNK_SIZE = 65536
+
+# The cancellation test of the task running on each thread.
+_task = threading.local()
+
+
+class Cancelled(Exception):
+    """ Raised between two chunks when the running task is cancelled
+    (see :func:`cancellable`). """
+
+
+def chunk_slices(length, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Iterate over the consecutive slices that cover ``length`` items.
+
+    Parameters
+    ----------
+    length : int
+        The total number of items.
+
+    chunk_size : int
+        The maximum number of items per slice.
+
+    Raises
+    ------
+    ValueError :
+        When ``chunk_size`` is not a positive number.
+
+    """
+    if chunk_size < 1:
+        message = "Expected a positive chunk size, got {}"
+        raise ValueError(message.format(chunk_size))
+    for start in xrange(0, length, chunk_size):
+        check_cancelled()
+        yield slice(start, min(start + chunk_size, length))
+
+
+@contextmanager
+def cancellable(cancelled):
+    """ Make the chunked loops of the block cancellable.
+
+    The loops over :func:`chunk_slices` (and any code calling
+    :func:`check_cancelled`) on the current thread raise
+    :class:`Cancelled` at the next chunk once ``cancelled()`` returns
+    True.
+
+    Parameters
+    ----------
+    cancelled : callable
+        Returns True when the task should stop. It is called once per
+        chunk, thus it should be cheap.
+
+    """
+    previous = getattr(_task, 'cancelled', None)
+    _task.cancelled = cancelled
+    try:
+        yield
+    finally:
+        _task.cancelled = previous
+
+
+def check_cancelled():
+    """ Raise :class:`Cancelled` if the task running on the current
+    thread is cancelled (see :func:`cancellable`). """
+    cancelled = getattr(_task, 'cancelled', None)
+    if cancelled is not None and cancelled():
+        raise Cancelled()
+
+
+def mapped_array(mapping, indices):
+    """ Translate a sequence of indices through a mapping.
+
+    Parameters
+    ----------
+    mapping : dict
+        The mapping to use (e.g. index2point).
+
+    indices : slice or sequence
+        The indices to translate. A slice needs to have an explicit
+        ``stop`` value.
+
+    Returns
+    -------
+    values : ndarray
+        An object array with the mapped values.
+
+    """
+    if isinstance(indices, slice):
+        indices = xrange(*indices.indices(indices.stop))
+    values = numpy.empty(len(indices), dtype=object)
+    values[:] = [mapping[index] for index in indices]
+    return values
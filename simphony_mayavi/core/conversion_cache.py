@@ -0,0 +1,227 @@
+import threading
+from collections import OrderedDict
+
+from simphony_mayavi.core.cuds_fingerprint import cuds_fingerprint
+
+#: The default memory limit of a ConversionCache in bytes.
+DEFAULT_CACHE_MEMORY = 256 * 1024 ** 2
+
+
+class ConversionCache(object):
+    """ A least recently used cache of converted VTK containers.
+
+    The cache stores the VTK containers (i.e. ``VTKMesh``,
+    ``VTKParticles`` and ``VTKLattice``) created from CUDS containers so
+    that a previously converted dataset can be reused instead of being
+    converted again. The containers are evicted, least recently used
+    first, when the memory of their datasets exceeds ``max_memory``.
+
+    The version of a container (see ``VTKMesh.version``) is recorded when
+    it is added. A container that has been modified since (e.g. by an
+    in place update) is dropped on lookup.
+
+    The cache can be shared by several sources and accessed from
+    different threads.
+
+    """
+
+    def __init__(self, max_memory=DEFAULT_CACHE_MEMORY):
+        """ Constructor
+
+        Parameters
+        ----------
+        max_memory : int
+            The memory limit in bytes.
+
+        """
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._memory = 0
+        self._max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_memory(self):
+        """ The memory limit in bytes. Lowering it evicts containers.
+        """
+        return self._max_memory
+
+    @max_memory.setter
+    def max_memory(self, value):
+        with self._lock:
+            self._max_memory = value
+            self._evict()
+
+    @property
+    def memory(self):
+        """ The memory used by the cached containers in bytes.
+        """
+        return self._memory
+
+    @property
+    def statistics(self):
+        """ A dictionary with the number of ``hits``, ``misses`` and
+        ``evictions``, the number of cached ``items`` and their ``memory``.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'items': len(self._entries),
+                'memory': self._memory}
+
+    def get(self, key):
+        """ Return the cached container of ``key``.
+
+        Parameters
+        ----------
+        key : hashable
+            The cache key (e.g. from :func:`cuds_cache_key`).
+
+        Returns
+        -------
+        vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+            The cached container or None.
+
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                vtk_cuds, version, size = entry
+                if vtk_cuds.version == version:
+                    # move to the most recently used end
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return vtk_cuds
+                self._memory -= size
+            self.misses += 1
+            return None
+
+    def put(self, key, vtk_cuds):
+        """ Add a converted container to the cache.
+
+        Containers larger than ``max_memory`` are not cached.
+
+        Parameters
+        ----------
+        key : hashable
+            The cache key (e.g. from :func:`cuds_cache_key`).
+
+        vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+            The converted container.
+
+        """
+        size = memory_size(vtk_cuds)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._memory -= entry[2]
+            if size > self._max_memory:
+                return
+            self._entries[key] = (vtk_cuds, vtk_cuds.version, size)
+            self._memory += size
+            self._evict()
+
+    def clear(self):
+        """ Remove all the cached containers.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._memory = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _evict(self):
+        """ Drop the least recently used containers above the limit.
+        """
+        entries = self._entries
+        while self._memory > self._max_memory and entries:
+            _, (_, _, size) = entries.popitem(last=False)
+            self._memory -= size
+            self.evictions += 1
+
+
+def cuds_cache_key(cuds, point_keys=None, cell_keys=None, sample_size=None,
+                   fingerprint=None, region=None, element_selection='all',
+                   implicit=False, lattice_step=None):
+    """ Return a cache key for the conversion of a CUDS container.
+
+    The key is made of the type and name of the container, its
+    fingerprint, the converted CUBA keys and the selected region.
+    Containers that keep track of their changes with a ``version``
+    (i.e. the VTK containers) are identified by their id and version
+    instead of a fingerprint, so they are not scanned.
+
+    Parameters
+    ----------
+    cuds : ABCParticles, ABCMesh or ABCLattice
+        The converted container.
+
+    point_keys, cell_keys : iterable
+        The converted point and cell CUBA keys. Default is None for all
+        the keys.
+
+    sample_size : int
+        The sample size of the fingerprint of the container (see
+        :func:`~simphony_mayavi.core.cuds_fingerprint.cuds_fingerprint`).
+        Default is None which includes all the items.
+
+    fingerprint : tuple
+        A fingerprint of the container that is already available.
+        Default is None which computes it.
+
+    region : Region
+        The region of the converted items (see
+        :class:`~simphony_mayavi.core.regions.Region`). Default is None
+        for all the items.
+
+    element_selection : str
+        The selection of the elements in ``region``, one of
+        :data:`~simphony_mayavi.core.regions.ELEMENT_SELECTIONS`.
+
+    implicit : bool
+        True when lattices are converted with implicit node coordinates
+        (see :attr:`~simphony_mayavi.cuds.vtk_lattice.VTKLattice.implicit`).
+
+    lattice_step : tuple
+        The stride of the converted lattice nodes along each axis.
+        Default is None for all the nodes.
+
+    Returns
+    -------
+    key : tuple
+
+    """
+    if fingerprint is None:
+        version = getattr(cuds, 'version', None)
+        if version is None:
+            fingerprint = cuds_fingerprint(cuds, sample_size=sample_size)
+        else:
+            fingerprint = (id(cuds), version)
+    key = (
+        type(cuds).__name__, cuds.name, fingerprint,
+        _frozen(point_keys), _frozen(cell_keys))
+    if region is not None:
+        key += (region.key, element_selection)
+    if implicit:
+        key += ('implicit',)
+    if lattice_step is not None:
+        key += (('step',) + tuple(lattice_step),)
+    return key
+
+
+def memory_size(vtk_cuds):
+    """ Return the memory used by the dataset of a VTK container in bytes.
+    """
+    return vtk_cuds.data_set.actual_memory_size * 1024
+
+
+def _frozen(keys):
+    return None if keys is None else frozenset(keys)
@@ -1,3 +1,4 @@
+import contextlib
 from collections import MutableSequence
 
 import numpy
@@ -10,6 +11,9 @@ from simphony.core.data_container import DataContainer
 
 from simphony_mayavi.core.cuba_utils import (
     supported_cuba, default_cuba_value, empty_array)
+from simphony_mayavi.core.cell_array_tools import (
+    update_vtk_array, append_vtk_array, mark_vtk_array_modified)
+from simphony_mayavi.core.version_counter import next_version
 
 
 class AttributeSetType(Enum):
@@ -48,6 +52,10 @@ class CubaData(MutableSequence):
        attribute arrays named "<CUBA.name>-mask" as ``0`` while
        present values are designated with a ``1``.
 
+    Every modification through the sequence api bumps the version
+    of the affected columns (see :meth:`column_version`). Changes made
+    directly on the wrapped tvtk container are not tracked.
+
     """
     def __init__(
             self, attribute_data, stored_cuba=None, size=None, masks=None):
@@ -89,10 +97,28 @@ class CubaData(MutableSequence):
             stored_cuba = supported_cuba()
         self._stored_cuba = stored_cuba
         self.masks = self._initialize_masks(masks)
+        # numpy copies of the mask bit arrays, cleared on every mutation.
+        self._mask_cache = {}
+        # packed numpy storage shared with the mask bit arrays written by
+        # the bulk methods, cleared when vtk may reallocate the arrays.
+        self._mask_buffers = {}
         self._defaults = {
             cuba: default_cuba_value(cuba)
             for cuba in stored_cuba}
         self._virtual_size = size
+        # bumped when rows are inserted or removed (i.e. all the columns
+        # change).
+        self._rows_version = next_version()
+        # bumped when the values of a single column change.
+        self._column_versions = {}
+        # bumped when vtk arrays are added, removed or replaced.
+        self._arrays_version = self._rows_version
+        # The depth of nested batch blocks, if the numpy cache of the
+        # arrays needs to be invalidated at the end of the batch and the
+        # arrays changed in place that are marked as modified then.
+        self._batch_depth = 0
+        self._stale_cache = False
+        self._changed_arrays = {}
 
     @property
     def cubas(self):
@@ -105,6 +131,63 @@ class CubaData(MutableSequence):
         """
         return {CUBA[name] for name in self._names}
 
+    @property
+    def version(self):
+        """ The version of the last modification of any column.
+        """
+        return max(
+            [self._rows_version] + self._column_versions.values())
+
+    def column_version(self, cuba):
+        """ Return the version of the last modification of a column.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            The CUBA key of the column.
+
+        Returns
+        -------
+        version : int
+            A number that increases (see
+            :func:`~simphony_mayavi.core.version_counter.next_version`)
+            every time the values of the column or the number of rows
+            change.
+
+        """
+        return max(self._rows_version, self._column_versions.get(cuba, 0))
+
+    @property
+    def arrays_version(self):
+        """ The version of the last change of the wrapped vtk arrays.
+
+        The version is bumped when attribute arrays are added to or
+        removed from the vtk container (e.g. when a new CUBA key is
+        stored), while changes of the array values are tracked by
+        :meth:`column_version`.
+
+        """
+        return self._arrays_version
+
+    def changed_since(self, version):
+        """ Return the CUBA keys of the columns modified after ``version``.
+
+        Parameters
+        ----------
+        version : int
+            A version number previously returned by :attr:`version`.
+
+        Returns
+        -------
+        cubas : set
+            The modified columns, including the ones that have been
+            removed.
+
+        """
+        return {
+            cuba for cuba in self.cubas.union(self._column_versions)
+            if self.column_version(cuba) > version}
+
     @property
     def _names(self):
         data = self._data
@@ -132,6 +215,7 @@ class CubaData(MutableSequence):
         ignored.
 
         """
+        self._clear_mask_cache()
         length = len(self)
         if 0 <= index < length:
             data = self._data
@@ -153,6 +237,9 @@ class CubaData(MutableSequence):
                 array[index] = (value_to_set
                                 if value_to_set is not None else 0.0)
                 mask[index] = (cuba in value, value_to_set is None)
+            # the masks of the new keys have changed through vtk
+            self._clear_mask_cache()
+            self._touch(self.cubas)
         else:
             raise IndexError('{} is out of index range'.format(index))
 
@@ -181,9 +268,12 @@ class CubaData(MutableSequence):
         """ Remove the values from the attribute arrays at row=``index``.
 
         """
+        self._clear_mask_cache()
+        self._flush_array_cache()
         length = len(self)
         if abs(index) > length:
             raise IndexError('{} is out of index range'.format(index))
+        self._rows_version = next_version()
         data = self._data
         masks = self.masks
         n = data.number_of_arrays
@@ -206,6 +296,7 @@ class CubaData(MutableSequence):
                     name = data.get_array_name(array_id)
                     data.remove_array(name)
                     masks.remove_array(name)
+                self._arrays_version = self._rows_version
 
     def insert(self, index, value):
         """ Insert the values of the DataContainer in the arrays at
@@ -223,6 +314,7 @@ class CubaData(MutableSequence):
             will be less efficient.
 
         """
+        self._clear_mask_cache()
         data = self._data
         masks = self.masks
         cubas = self.cubas
@@ -231,6 +323,7 @@ class CubaData(MutableSequence):
         new_cubas = (set(value.keys()) & stored_cuba) - cubas
         length = len(self)
         if 0 <= index < length:
+            self._flush_array_cache()
             n = data.number_of_arrays
             arrays = []
             mask_arrays = []
@@ -286,17 +379,20 @@ class CubaData(MutableSequence):
                 cuba = CUBA[array.name]
                 value_to_set = value.get(cuba, self._defaults[cuba])
                 array.append(value_to_set if value_to_set is not None else 0.0)
-                # invalidate the numpy cache, see issue
-                # https://github.com/enthought/mayavi/issues/197
-                _array_cache._remove_array(tvtk.to_vtk(array).__this__)
                 array = masks.get_array(array_id)
                 array.append((cuba in value, value_to_set is None))
-                # invalidate the numpy cache, see issue
-                # https://github.com/enthought/mayavi/issues/197
-                _array_cache._remove_array(tvtk.to_vtk(array).__this__)
+            # vtk reallocates the extended masks
+            self._clear_mask_cache()
+            # invalidate the numpy cache, see issue
+            # https://github.com/enthought/mayavi/issues/197
+            self._stale_cache = True
+            if self._batch_depth == 0:
+                self._flush_array_cache()
         else:
             raise IndexError('{} is out of index range'.format(index))
 
+        self._rows_version = next_version()
+
         # make sure that virtual_size is properly updated
         n = data.number_of_arrays
         if n == 0:
@@ -312,6 +408,318 @@ class CubaData(MutableSequence):
     def __str__(self):
         return u"[{}]".format(",".join(str(item) for item in self))
 
+    @contextlib.contextmanager
+    def batch(self):
+        """ Defer the invalidation of the numpy array cache.
+
+        Appending a row invalidates the cached numpy views of all the
+        attribute arrays. Inside the ``with`` block the invalidation is
+        done once, either on exit of the outermost block or before the
+        next bulk read (e.g. :meth:`get_column`). The arrays updated in
+        place by the bulk methods are marked as modified on exit of the
+        outermost block.
+
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_array_cache()
+                self._flush_changed_arrays()
+
+    def get_column(self, cuba, indices=None):
+        """ Return the values of the ``cuba`` attribute array.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            The CUBA key of the column to return.
+
+        indices : slice or array_like
+            The rows to return. Default is None which returns all the rows.
+
+        Returns
+        -------
+        values : ndarray
+            A copy of the requested rows. Rows without a value (or with a
+            ``None`` value) hold the default value of the CUBA key. The
+            same applies to all the rows when the CUBA key is not stored.
+
+        """
+        self._flush_array_cache()
+        if indices is None:
+            indices = slice(None)
+        if cuba not in self.cubas:
+            values = empty_array(cuba, self._count(indices))
+            # vtk returns single component arrays as one dimensional
+            return values[:, 0] if values.shape[1] == 1 else values
+
+        array = self._data.get_array(cuba.name)
+        values = numpy.array(array.to_array()[indices])
+        mask = self._get_mask(cuba.name)[indices]
+        missing = (mask[..., 0] == 0) | (mask[..., 1] == 1)
+        if missing.any():
+            values[missing] = self._defaults[cuba]
+        return values
+
+    def get_missing(self, cuba, indices=None):
+        """ Return which rows of the ``cuba`` attribute array have no value.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            The CUBA key of the column.
+
+        indices : slice or array_like
+            The rows to check. Default is None which checks all the rows.
+
+        Returns
+        -------
+        missing : ndarray
+            Boolean array, one item per row. All the rows are missing when
+            the CUBA key is not stored.
+
+        """
+        self._flush_array_cache()
+        if indices is None:
+            indices = slice(None)
+        if cuba not in self.cubas:
+            return numpy.ones(self._count(indices), dtype=bool)
+        mask = self._get_mask(cuba.name)[indices]
+        return (mask[..., 0] == 0) | (mask[..., 1] == 1)
+
+    def copy_columns(self, other, keys=None):
+        """ Overwrite the columns in place with the columns of ``other``.
+
+        Both containers should have the same number of rows. As with
+        :meth:`set_column` only the columns that change are modified.
+
+        Parameters
+        ----------
+        other : CubaData
+            The container to copy the values from.
+
+        keys : iterable
+            The CUBA keys of the columns to copy. Default is None which
+            copies all the columns of ``other``, while the columns that
+            are not stored in ``other`` are marked as missing.
+
+        """
+        cubas = self.cubas | other.cubas if keys is None else set(keys)
+        with self.batch():
+            for cuba in cubas & self._stored_cuba:
+                if cuba in other.cubas:
+                    self.set_column(
+                        cuba, other.get_column(cuba),
+                        missing=other.get_missing(cuba))
+                elif cuba in self.cubas:
+                    self.set_column(
+                        cuba, default_cuba_value(cuba),
+                        missing=numpy.ones(len(self), dtype=bool))
+
+    def set_column(self, cuba, values, indices=None, missing=None):
+        """ Set the values of the ``cuba`` attribute array.
+
+        The values are written in place and the updated rows are marked
+        as present (unless stated otherwise in ``missing``). A new
+        attribute array is created if ``cuba`` is not yet stored, where
+        the rest of the rows are marked as missing. The column (and its
+        version) is left untouched when nothing changes.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            The CUBA key of the column to update.
+
+        values : array_like
+            The new values (or a single value to broadcast).
+
+        indices : slice or array_like
+            The rows to update. Default is None which updates all the rows.
+
+        missing : array_like
+            Boolean array, one item per updated row, of the rows to mark
+            as missing. Default is None which marks all of them as present.
+
+        Raises
+        ------
+        ValueError :
+            When ``cuba`` is not a supported CUBA key.
+
+        """
+        if cuba not in self._stored_cuba:
+            message = "{} is not a supported CUBA key"
+            raise ValueError(message.format(cuba))
+        self._flush_array_cache()
+        if indices is None:
+            indices = slice(None)
+        if cuba not in self.cubas:
+            self._add_new_arrays([cuba], len(self))
+            self._virtual_size = None
+
+        name = cuba.name
+        values = numpy.asarray(values, dtype=KEYWORDS[name].dtype)
+        array = self._data.get_array(name)
+        changed = update_vtk_array(array, values, indices, notify=False)
+        if changed:
+            self._array_changed(array)
+
+        mask = self._get_mask(name)
+        rows = _row_indices(indices, len(mask))
+        new_mask = numpy.zeros((len(rows), 2), dtype=numpy.int8)
+        if missing is None:
+            new_mask[:, 0] = 1
+        else:
+            new_mask[:, 0] = numpy.logical_not(missing)
+        if len(rows) != 0 and not numpy.array_equal(mask[rows], new_mask):
+            # only the bits of the range of the updated rows are written
+            first = rows.min()
+            block = numpy.array(mask[first:rows.max() + 1])
+            block[rows - first] = new_mask
+            self._write_mask(name, block, first)
+            changed = True
+        if changed:
+            self._touch([cuba])
+
+    def remove_column(self, cuba):
+        """ Remove the ``cuba`` attribute array.
+
+        The number of rows is not affected, even when the last attribute
+        array is removed.
+
+        Parameters
+        ----------
+        cuba : CUBA
+            The CUBA key of the column to remove.
+
+        Raises
+        ------
+        KeyError :
+            When ``cuba`` is not stored.
+
+        """
+        if cuba not in self.cubas:
+            raise KeyError(cuba)
+        self._flush_array_cache()
+        length = len(self)
+        name = cuba.name
+        self._data.remove_array(name)
+        self.masks.remove_array(name)
+        self._mask_cache.pop(name, None)
+        self._mask_buffers.pop(name, None)
+        if self._data.number_of_arrays == 0:
+            self._virtual_size = length
+        self._touch([cuba])
+        self._arrays_version = next_version()
+
+    def get_rows(self, indices):
+        """ Reconstruct the DataContainers of a block of rows.
+
+        The result is equivalent to ``[self[index] for index in indices]``
+        but every attribute array is only accessed once.
+
+        Parameters
+        ----------
+        indices : slice or array_like
+            The rows to return.
+
+        Returns
+        -------
+        rows : list
+            The list of DataContainers.
+
+        """
+        self._flush_array_cache()
+        data = self._data
+        columns = []
+        for name in self._names:
+            columns.append((
+                CUBA[name],
+                KEYWORDS[name].dtype,
+                data.get_array(name).to_array()[indices],
+                self._get_mask(name)[indices]))
+        rows = []
+        for row in xrange(self._count(indices)):
+            rows.append(DataContainer({
+                cuba: dtype(values[row]) if mask[row, 1] == 0 else None
+                for cuba, dtype, values, mask in columns
+                if mask[row, 0] == 1}))
+        return rows
+
+    def extend_columns(self, columns, length):
+        """ Append ``length`` rows given as one array per CUBA key.
+
+        The attribute arrays are extended in place at once instead of
+        row by row.
+        New (but supported) CUBA keys create new arrays where the existing
+        rows are marked as missing. Stored keys that are not in
+        ``columns`` are marked as missing in the new rows. Unsupported
+        CUBA keys are ignored.
+
+        Parameters
+        ----------
+        columns : dict
+            The mapping from CUBA key to the array of ``length`` values.
+
+        length : int
+            The number of rows to append.
+
+        Raises
+        ------
+        ValueError :
+            When a column cannot be reshaped to ``length`` values.
+
+        """
+        self._flush_array_cache()
+        if length == 0:
+            return
+        columns = {
+            cuba: values for cuba, values in columns.iteritems()
+            if cuba in self._stored_cuba}
+        self._add_new_arrays(set(columns) - self.cubas, len(self))
+        start = len(self)
+
+        data = self._data
+        rows = []
+        for name in self._names:
+            cuba = CUBA[name]
+            description = KEYWORDS[name]
+            shape = (-1,) if description.shape == [1] else (-1, 3)
+            mask = numpy.zeros(shape=(length, 2), dtype=numpy.int8)
+            if cuba in columns:
+                values = numpy.asarray(columns[cuba], description.dtype)
+                mask[:, 0] = 1
+            else:
+                values = empty_array(cuba, length)
+            try:
+                values = values.reshape((length,) + shape[1:])
+            except ValueError:
+                message = "Expected {} values for {}, got {}"
+                raise ValueError(message.format(length, cuba, values.shape))
+            rows.append((name, values, mask))
+
+        # Extend the vtk arrays in place, so that the arrays held by the
+        # pipeline stay valid.
+        for name, values, mask in rows:
+            array = data.get_array(name)
+            append_vtk_array(array, values, notify=False)
+            self._array_changed(array)
+            self._write_mask(name, mask, start)
+        self._stale_cache = True
+        if self._batch_depth == 0:
+            self._flush_array_cache()
+        self._rows_version = next_version()
+
+        # make sure that virtual_size is properly updated
+        if data.number_of_arrays == 0:
+            virtual_size = self._virtual_size
+            self._virtual_size = length + (
+                0 if virtual_size is None else virtual_size)
+        else:
+            self._virtual_size = None
+
     @classmethod
     def empty(cls, type_=AttributeSetType.POINTS, size=0):
         """ Return an empty sequence based wrapping a vtkAttributeDataSet.
@@ -332,11 +740,120 @@ class CubaData(MutableSequence):
 
     # Private methods ######################################################
 
+    def _count(self, indices):
+        """ Return the number of rows selected by ``indices``.
+        """
+        if isinstance(indices, slice):
+            return len(xrange(*indices.indices(len(self))))
+        else:
+            return len(indices)
+
+    def _touch(self, cubas):
+        """ Bump the version of the ``cubas`` columns.
+        """
+        version = next_version()
+        for cuba in cubas:
+            self._column_versions[cuba] = version
+
+    def _array_changed(self, array):
+        """ Mark ``array`` as modified, on exit of the outermost batch
+        when batching. """
+        self._changed_arrays[tvtk.to_vtk(array).__this__] = array
+        if self._batch_depth == 0:
+            self._flush_changed_arrays()
+
+    def _flush_changed_arrays(self):
+        changed, self._changed_arrays = self._changed_arrays, {}
+        for array in changed.itervalues():
+            mark_vtk_array_modified(array)
+
+    def _flush_array_cache(self):
+        """ Invalidate the numpy cache of the arrays if they have changed.
+        """
+        if not self._stale_cache:
+            return
+        self._stale_cache = False
+        for container in (self._data, self.masks):
+            for array_id in range(container.number_of_arrays):
+                array = container.get_array(array_id)
+                _array_cache._remove_array(tvtk.to_vtk(array).__this__)
+
+    def _get_mask(self, name):
+        """ Return the mask of the ``name`` array as a (N, 2) numpy array.
+
+        The BitArray to numpy conversion always creates a copy, thus the
+        result is cached until the next modification.
+
+        """
+        mask = self._mask_cache.get(name)
+        if mask is None:
+            buffer = self._mask_buffers.get(name)
+            if buffer is None:
+                mask = self.masks.get_array(name).to_array()
+            else:
+                length = self.masks.get_array(name).number_of_tuples
+                bits = numpy.unpackbits(buffer[:(2 * length + 7) // 8])
+                mask = bits[:2 * length].reshape(length, 2).astype(
+                    numpy.int8)
+            self._mask_cache[name] = mask
+        return mask
+
+    def _write_mask(self, name, rows, start=0):
+        """ Write the (M, 2) mask ``rows`` of the ``name`` array from row
+        ``start`` on, extending the bit array if needed.
+
+        Bit arrays have no numpy view, so the bits are packed with numpy
+        into a buffer that is handed to the bit array, and only the bytes
+        of the written rows change. The buffer grows geometrically, thus
+        appending blocks repeatedly costs amortized time proportional to
+        the size of the blocks.
+
+        """
+        rows = numpy.asarray(rows).reshape(-1, 2)
+        if len(rows) == 0:
+            return
+        bit_array = self.masks.get_array(name)
+        vtk_array = tvtk.to_vtk(bit_array)
+        old_length = vtk_array.GetNumberOfTuples()
+        length = max(old_length, start + len(rows))
+        buffer = self._mask_buffers.get(name)
+        resized = length != old_length
+        if buffer is None or 8 * len(buffer) < 2 * length:
+            new_buffer = numpy.zeros(
+                (4 * max(length, 2 * old_length) + 7) // 8,
+                dtype=numpy.uint8)
+            if buffer is not None:
+                new_buffer[:len(buffer)] = buffer
+            elif old_length != 0:
+                packed = numpy.packbits(self._get_mask(name).ravel() != 0)
+                new_buffer[:len(packed)] = packed
+            buffer = self._mask_buffers[name] = new_buffer
+            resized = True
+        _write_bits(buffer, 2 * start, rows.ravel() != 0)
+        if resized:
+            vtk_array.SetVoidArray(buffer, 2 * length, 1)
+            # the bit array does not own the buffer
+            vtk_array._numpy_reference = buffer
+        self._array_changed(bit_array)
+
+        cache = self._mask_cache.get(name)
+        if cache is not None and len(cache) == length:
+            cache[start:start + len(rows)] = rows
+        else:
+            self._mask_cache.pop(name, None)
+
+    def _clear_mask_cache(self):
+        """ Forget the numpy copies and storage of the masks, when the bit
+        arrays are modified through the vtk api. """
+        self._mask_cache.clear()
+        self._mask_buffers.clear()
+
     def _add_arrays(self, arrays):
         data = self._data
         for name, array in arrays:
             array_id = data.add_array(array)
             data.get_array(array_id).name = name
+            self._arrays_version = next_version()
 
     def _add_masks(self, arrays):
         masks = self.masks
@@ -344,8 +861,10 @@ class CubaData(MutableSequence):
             bit_array = tvtk.BitArray()
             bit_array.number_of_components = 2
             bit_array.name = name
-            bit_array.from_array(array)
             masks.add_array(bit_array)
+            self._mask_cache.pop(name, None)
+            self._mask_buffers.pop(name, None)
+            self._write_mask(name, array)
 
     def _add_new_arrays(self, cubas, length):
         new_arrays = []
@@ -437,3 +956,34 @@ def check_masks(masks):
         mask = masks.get_array(index)
         if mask.number_of_components != 2:
             raise ValueError("Mask must have two components")
+
+
+def _row_indices(indices, length):
+    """ Return the rows selected by ``indices`` (a slice, or an array of
+    indices or of booleans) as an array of non-negative indices. """
+    if isinstance(indices, slice):
+        return numpy.arange(*indices.indices(length))
+    rows = numpy.asarray(indices)
+    if rows.dtype == bool:
+        return numpy.flatnonzero(rows)
+    rows = rows.astype(numpy.int64).ravel()
+    return numpy.where(rows < 0, rows + length, rows)
+
+
+def _write_bits(buffer, start, bits):
+    """ Write the boolean ``bits`` into a packed uint8 ``buffer`` from
+    bit ``start`` on.
+
+    As in numpy.packbits, vtk bit arrays keep the first bit of every
+    byte in the most significant bit. Only the bytes holding the written
+    bits are changed.
+
+    """
+    if len(bits) == 0:
+        return
+    first = start // 8
+    stop = (start + len(bits) + 7) // 8
+    unpacked = numpy.unpackbits(buffer[first:stop])
+    offset = start - 8 * first
+    unpacked[offset:offset + len(bits)] = bits
+    buffer[first:stop] = numpy.packbits(unpacked)
@@ -2,8 +2,12 @@ import warnings
 
 import numpy
 
+from simphony.core.keywords import KEYWORDS
 from simphony.testing.utils import dummy_cuba_value
 
+from simphony_mayavi.core.cuba_utils import (
+    supported_cuba, default_cuba_value)
+
 
 class CUBADataAccumulator(object):
     """ Accumulate data information per CUBA key.
@@ -151,6 +155,42 @@ class CUBADataAccumulator(object):
                 message = 'property {!r} is currently ignored'
                 warnings.warn(message.format(cuba))
 
+    def load_onto_cuba_data(self, cuba_data, indices=None, partial=False):
+        """ Overwrite rows of a CubaData container in place.
+
+        Parameters
+        ----------
+        cuba_data : CubaData
+            The container to update.
+
+        indices : slice or array_like
+            The rows of ``cuba_data`` that correspond to the stored
+            records. Default is None which uses the records in order for
+            all the rows.
+
+        partial : bool
+            When True only the columns of the stored keys are updated.
+            Default is False.
+
+        The columns of the stored keys are updated and values that are
+        ``None`` are marked as missing. Unless ``partial`` is True,
+        columns already in ``cuba_data`` for which there are no stored
+        values are marked as missing for the updated rows. Keys that are
+        not supported by vtk are ignored.
+
+        """
+        size = self._record_size
+        cubas = self._keys if partial else self._keys | cuba_data.cubas
+        for cuba in cubas & supported_cuba():
+            values = self._data.get(cuba, [None] * size)
+            missing = numpy.fromiter(
+                (value is None for value in values), dtype=bool, count=size)
+            default = default_cuba_value(cuba)
+            column = numpy.array(
+                [default if value is None else value for value in values],
+                dtype=KEYWORDS[cuba.name].dtype)
+            cuba_data.set_column(cuba, column, indices, missing=missing)
+
     def __len__(self):
         """ The number of values that are stored per key
 
@@ -0,0 +1,253 @@
+import hashlib
+import uuid
+from itertools import chain, islice
+
+import numpy
+from simphony.core.cuba import CUBA
+from simphony.cuds.abc_lattice import ABCLattice
+from simphony.cuds.abc_mesh import ABCMesh
+from simphony.cuds.abc_particles import ABCParticles
+
+#: The item types that are part of the fingerprint of each container type.
+FINGERPRINT_ITEM_TYPES = (
+    (ABCParticles, (CUBA.PARTICLE, CUBA.BOND)),
+    (ABCMesh, (CUBA.POINT, CUBA.EDGE, CUBA.FACE, CUBA.CELL)),
+    (ABCLattice, (CUBA.NODE,)))
+
+#: The table of each item type in the HDF5 group of a file based
+#: container (see :mod:`simphony.io`).
+H5_ITEM_TABLES = {
+    CUBA.PARTICLE: 'particles', CUBA.BOND: 'bonds', CUBA.POINT: 'points',
+    CUBA.EDGE: 'edges', CUBA.FACE: 'faces', CUBA.CELL: 'cells'}
+
+
+def cuds_fingerprint(cuds, keys=None, sample_size=None):
+    """ Return a fingerprint of the content of a CUDS container.
+
+    Two fingerprints of the same container are equal when the container
+    has not been modified in between. The fingerprint is made of the
+    number of items of each type and of an md5 checksum of the uids,
+    coordinates, connectivity and data of the items. Containers that
+    provide an ``iter_chunks`` method (e.g. the VTK containers) are
+    checksummed through the numpy arrays of the blocks of items instead
+    of item by item.
+
+    Parameters
+    ----------
+    cuds : ABCParticles, ABCMesh or ABCLattice
+        The container to inspect.
+
+    keys : iterable
+        The CUBA keys of the item data to include in the checksum.
+        Default is None which includes all the item data.
+
+    sample_size : int
+        The maximum number of items of each type to include in the
+        checksum. The sampled items are spread evenly over the items of
+        each type, i.e. every n-th item in iteration order (or in row
+        order for the tables of the file based containers). Default is
+        None which includes all the items.
+
+    Returns
+    -------
+    fingerprint : tuple
+        The item counts followed by the hex digest of the checksum.
+
+    Raises
+    ------
+    TypeError :
+        When ``cuds`` is not a supported container.
+
+    .. note::
+
+       With ``sample_size`` modifications of the items that are not
+       sampled are only detected if the item counts change. Only the
+       sampled nodes of lattices and the sampled rows of the HDF5 tables
+       of file based containers are read, while the items of the other
+       containers are all visited to pick the sample.
+
+    """
+    for container_type, item_types in FINGERPRINT_ITEM_TYPES:
+        if isinstance(cuds, container_type):
+            break
+    else:
+        message = 'Provided object {} is not of any known cuds type'
+        raise TypeError(message.format(type(cuds)))
+
+    keys = None if keys is None else sorted(keys, key=lambda key: key.name)
+    digest = hashlib.md5()
+    counts = []
+    for item_type in item_types:
+        count = cuds.count_of(item_type)
+        counts.append(count)
+        if count == 0:
+            continue
+        if item_type == CUBA.NODE:
+            _update_with_lattice(digest, cuds)
+        step = _sample_step(count, sample_size)
+        table = _h5_table(cuds, item_type, count) if step > 1 else None
+        if table is not None:
+            records = table.read_coordinates(numpy.arange(0, count, step))
+            _update_with_records(digest, records, keys)
+            continue
+        blocks = _iter_blocks(cuds, item_type, keys)
+        if blocks is not None:
+            _update_with_blocks(digest, blocks, step, keys)
+            continue
+        if item_type == CUBA.NODE:
+            items = _sample_nodes(cuds, count, sample_size)
+        else:
+            items = islice(cuds.iter(item_type=item_type), 0, None, step)
+        for item in items:
+            _update_with_item(digest, item, keys)
+    return tuple(counts) + (digest.hexdigest(),)
+
+
+def _sample_step(count, sample_size):
+    """ Return the stride that picks at most ``sample_size`` of ``count``
+    items. """
+    if sample_size is None or sample_size >= count:
+        return 1
+    return -(-count // max(sample_size, 1))
+
+
+def _h5_table(cuds, item_type, count):
+    """ Return the HDF5 table of the ``count`` items of ``item_type`` of
+    a file based container, or None if ``cuds`` has no such table. """
+    # simphony.io keeps the HDF5 group of the dataset in ``_group``
+    group = getattr(cuds, '_group', None)
+    name = H5_ITEM_TABLES.get(item_type)
+    if group is None or name is None or name not in group:
+        return None
+    table = group._f_get_child(name)
+    if not hasattr(table, 'read_coordinates') or table.nrows != count:
+        return None
+    return table
+
+
+def _iter_blocks(cuds, item_type, keys):
+    """ Return an iterator over the ``iter_chunks`` blocks of
+    ``item_type`` or None if the container does not provide them.
+    """
+    iter_chunks = getattr(cuds, 'iter_chunks', None)
+    if iter_chunks is None:
+        return None
+    blocks = iter_chunks(keys=keys, item_type=item_type)
+    try:
+        first = next(blocks)
+    except StopIteration:
+        return iter(())
+    except ValueError:
+        # the item type has no chunked access
+        return None
+    return chain([first], blocks)
+
+
+def _update_with_blocks(digest, blocks, step, keys):
+    """ Add the (ids, coordinates, data) blocks of items to the checksum,
+    keeping every ``step``-th item. """
+    offset = 0
+    for ids, coordinates, data in blocks:
+        length = len(ids)
+        selection = slice((-offset) % step, None, step)
+        offset += length
+        for values in (ids, coordinates):
+            digest.update(_array_to_bytes(values[selection]))
+        if keys is None:
+            cubas = sorted(data, key=lambda key: key.name)
+        else:
+            cubas = keys
+        for cuba in cubas:
+            digest.update(cuba.name)
+            digest.update(_array_to_bytes(data[cuba][selection]))
+
+
+def _update_with_records(digest, records, keys):
+    """ Add rows of an HDF5 table of items to the checksum. """
+    names = records.dtype.names
+    for name in names:
+        if name != 'data' or keys is None:
+            digest.update(name)
+            digest.update(_array_to_bytes(records[name]))
+    if 'data' in names and keys is not None:
+        data = records['data']
+        for cuba in keys:
+            if cuba.name.lower() in data.dtype.names:
+                digest.update(cuba.name)
+                digest.update(_array_to_bytes(data[cuba.name.lower()]))
+
+
+def _sample_nodes(lattice, count, sample_size):
+    """ Iterate over the nodes of a lattice or an even sample of them.
+    """
+    if sample_size is None or sample_size >= count:
+        return lattice.iter(item_type=CUBA.NODE)
+    positions = numpy.unique(
+        numpy.linspace(0, count - 1, max(sample_size, 1)).astype(int))
+    indices = numpy.column_stack(
+        numpy.unravel_index(positions, lattice.size, order='F'))
+    return (lattice.get(tuple(index)) for index in indices.tolist())
+
+
+def _update_with_lattice(digest, lattice):
+    """ Add the lattice geometry to the checksum.
+    """
+    primitive_cell = lattice.primitive_cell
+    digest.update(_to_bytes(lattice.size))
+    digest.update(_to_bytes(lattice.origin))
+    for vector in (primitive_cell.p1, primitive_cell.p2, primitive_cell.p3):
+        digest.update(_to_bytes(vector))
+
+
+def _update_with_item(digest, item, keys):
+    """ Add the information of a CUDS item to the checksum.
+    """
+    uid = getattr(item, 'uid', None)
+    if uid is not None:
+        digest.update(uid.bytes)
+    for attribute in ('index', 'coordinates'):
+        value = getattr(item, attribute, None)
+        if value is not None:
+            digest.update(_to_bytes(value))
+    for attribute in ('particles', 'points'):
+        uids = getattr(item, attribute, None)
+        if uids is not None:
+            digest.update(b''.join(uid.bytes for uid in uids))
+    data = item.data
+    if keys is None:
+        cubas = sorted(data.keys(), key=lambda key: key.name)
+    else:
+        cubas = [key for key in keys if key in data]
+    for cuba in cubas:
+        digest.update(cuba.name)
+        digest.update(_to_bytes(data[cuba]))
+
+
+def _array_to_bytes(array):
+    """ Return a byte representation of a block of item values.
+    """
+    array = numpy.asarray(array)
+    if array.dtype.kind != 'O':
+        return numpy.ascontiguousarray(array).tobytes()
+    # uids or lists of uids
+    return b''.join(_object_to_bytes(value) for value in array.ravel())
+
+
+def _object_to_bytes(value):
+    """ Return a byte representation of a uid or of a list of uids.
+    """
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, (list, tuple)):
+        return b''.join(_object_to_bytes(item) for item in value)
+    return _to_bytes(value)
+
+
+def _to_bytes(value):
+    """ Return a byte representation of a CUBA value.
+    """
+    array = numpy.asarray(value)
+    if array.dtype.kind in 'biufc':
+        return array.tobytes()
+    else:
+        return repr(value)
@@ -0,0 +1,187 @@
+import numpy
+
+#: The ways to select the elements (i.e. bonds, edges, faces and cells)
+#: of the points in a region. With ``'all'`` an element is kept when all
+#: its points are inside the region, with ``'any'`` when at least one of
+#: them is (the points outside the region are then kept as well).
+ELEMENT_SELECTIONS = ('all', 'any')
+
+
+class Region(object):
+    """ Base class of the spatial regions used to select the items of a
+    CUDS container.
+
+    Subclasses implement :meth:`contains` and :meth:`_parameters`. Two
+    regions are equal when they are of the same type and have the same
+    parameters, so that they can be part of a cache key.
+
+    """
+
+    def contains(self, points):
+        """ Test which points are inside the region.
+
+        Parameters
+        ----------
+        points : array_like
+            The (N, 3) coordinates of the points.
+
+        Returns
+        -------
+        inside : ndarray
+            The (N,) boolean array, True for the points inside the region
+            (including its boundary).
+
+        """
+        raise NotImplementedError()
+
+    @property
+    def key(self):
+        """ A hashable description of the region.
+        """
+        return (type(self).__name__,) + self._parameters()
+
+    def _parameters(self):
+        """ Return the parameters of the region as nested tuples of
+        floats. """
+        raise NotImplementedError()
+
+    def __eq__(self, other):
+        return isinstance(other, Region) and self.key == other.key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return '{}{!r}'.format(type(self).__name__, self._parameters())
+
+
+class BoxRegion(Region):
+    """ An axis aligned box.
+    """
+
+    def __init__(self, lower, upper):
+        """ Constructor
+
+        Parameters
+        ----------
+        lower : sequence
+            The lower corner of the box.
+
+        upper : sequence
+            The upper corner of the box.
+
+        Raises
+        ------
+        ValueError :
+            When the corners are not 3D points or ``lower`` is above
+            ``upper`` on any axis.
+
+        """
+        self.lower = _point(lower)
+        self.upper = _point(upper)
+        if (self.lower > self.upper).any():
+            message = 'The lower corner {} is above the upper corner {}'
+            raise ValueError(message.format(lower, upper))
+
+    def contains(self, points):
+        points = _points(points)
+        return ((points >= self.lower) & (points <= self.upper)).all(axis=1)
+
+    def _parameters(self):
+        return tuple(self.lower), tuple(self.upper)
+
+
+class SphereRegion(Region):
+    """ A sphere.
+    """
+
+    def __init__(self, center, radius):
+        """ Constructor
+
+        Parameters
+        ----------
+        center : sequence
+            The center of the sphere.
+
+        radius : float
+            The radius of the sphere.
+
+        Raises
+        ------
+        ValueError :
+            When the center is not a 3D point or the radius is negative.
+
+        """
+        if radius < 0:
+            message = 'Expected a non negative radius, got {}'
+            raise ValueError(message.format(radius))
+        self.center = _point(center)
+        self.radius = float(radius)
+
+    def contains(self, points):
+        offsets = _points(points) - self.center
+        return (offsets * offsets).sum(axis=1) <= self.radius ** 2
+
+    def _parameters(self):
+        return tuple(self.center), (self.radius,)
+
+
+class PlanesRegion(Region):
+    """ The intersection of the half spaces of clipping planes.
+
+    A point is inside when it is on the side of every plane that the
+    normal of the plane points to (or on the plane).
+
+    """
+
+    def __init__(self, origins, normals):
+        """ Constructor
+
+        Parameters
+        ----------
+        origins : array_like
+            The (M, 3) points on the planes.
+
+        normals : array_like
+            The (M, 3) normals of the planes.
+
+        Raises
+        ------
+        ValueError :
+            When the shapes of the arguments do not match or a normal is
+            zero.
+
+        """
+        self.origins = _points(origins)
+        self.normals = _points(normals)
+        if self.origins.shape != self.normals.shape:
+            message = 'Expected as many origins as normals, got {} and {}'
+            raise ValueError(message.format(
+                len(self.origins), len(self.normals)))
+        if (self.normals == 0).all(axis=1).any():
+            raise ValueError('Expected non zero normals')
+
+    def contains(self, points):
+        offsets = (self.origins * self.normals).sum(axis=1)
+        distances = numpy.dot(_points(points), self.normals.T)
+        return (distances >= offsets).all(axis=1)
+
+    def _parameters(self):
+        return (
+            tuple(map(tuple, self.origins)), tuple(map(tuple, self.normals)))
+
+
+def _point(value):
+    point = numpy.array(value, dtype=numpy.float64)
+    if point.shape != (3,):
+        message = 'Expected a 3D point, got {}'
+        raise ValueError(message.format(value))
+    return point
+
+
+def _points(values):
+    points = numpy.asarray(values, dtype=numpy.float64)
+    return points.reshape(-1, 3)
@@ -2,8 +2,11 @@ import unittest
 
 import numpy
 from numpy.testing import assert_array_equal
+from tvtk.api import tvtk
 
-from simphony_mayavi.core.api import cell_array_slicer
+from simphony_mayavi.core.api import (
+    cell_array_slicer, cell_connectivity, update_vtk_array, append_vtk_array,
+    mark_vtk_array_modified)
 
 
 class TestCellArrayTools(unittest.TestCase):
@@ -12,3 +15,65 @@ class TestCellArrayTools(unittest.TestCase):
         data = numpy.array([2, 0, 1, 2, 0, 3, 3, 1, 3, 2])
         slices = [slice for slice in cell_array_slicer(data)]
         assert_array_equal(slices, [[0, 1], [0, 3], [1, 3, 2]])
+
+    def test_cell_connectivity(self):
+        data = cell_connectivity([2, 2, 3], [0, 1, 0, 3, 1, 3, 2])
+        assert_array_equal(data, [2, 0, 1, 2, 0, 3, 3, 1, 3, 2])
+        self.assertEqual(len(cell_connectivity([], [])), 0)
+
+    def test_update_vtk_array(self):
+        array = tvtk.DoubleArray()
+        array.from_array(numpy.zeros(4))
+
+        changed = update_vtk_array(array, [1.0, 2.0], [1, 3])
+
+        self.assertTrue(changed)
+        assert_array_equal(array.to_array(), [0.0, 1.0, 0.0, 2.0])
+
+    def test_update_vtk_array_with_same_values(self):
+        array = tvtk.DoubleArray()
+        array.from_array(numpy.arange(4.0))
+        m_time = tvtk.to_vtk(array).GetMTime()
+
+        changed = update_vtk_array(array, [1.0, 2.0], slice(1, 3))
+
+        self.assertFalse(changed)
+        self.assertEqual(tvtk.to_vtk(array).GetMTime(), m_time)
+
+    def test_update_vtk_array_without_notification(self):
+        array = tvtk.DoubleArray()
+        array.from_array(numpy.zeros(4))
+        m_time = tvtk.to_vtk(array).GetMTime()
+
+        changed = update_vtk_array(array, [1.0], [2], notify=False)
+
+        self.assertTrue(changed)
+        self.assertEqual(tvtk.to_vtk(array).GetMTime(), m_time)
+
+        mark_vtk_array_modified(array)
+
+        self.assertGreater(tvtk.to_vtk(array).GetMTime(), m_time)
+        assert_array_equal(array.to_array(), [0.0, 0.0, 1.0, 0.0])
+
+    def test_append_vtk_array(self):
+        array = tvtk.DoubleArray(number_of_components=3)
+        array.from_array(numpy.zeros((2, 3)))
+        vtk_array = tvtk.to_vtk(array)
+
+        for index in range(1, 5):
+            append_vtk_array(array, numpy.full((index, 3), index))
+
+        self.assertIs(tvtk.to_vtk(array), vtk_array)
+        self.assertEqual(array.number_of_tuples, 12)
+        assert_array_equal(
+            array.to_array()[:, 0],
+            [0, 0, 1, 2, 2, 3, 3, 3, 4, 4, 4, 4])
+
+    def test_append_vtk_array_with_single_component(self):
+        array = tvtk.IdTypeArray()
+        array.from_array(numpy.arange(3))
+
+        append_vtk_array(array, [3, 4])
+        append_vtk_array(array, [])
+
+        assert_array_equal(array.to_array(), numpy.arange(5))
@@ -0,0 +1,39 @@
+import unittest
+import uuid
+
+from numpy.testing import assert_array_equal
+
+from simphony_mayavi.core.api import (
+    Cancelled, cancellable, check_cancelled, chunk_slices, mapped_array)
+
+
+class TestChunkTools(unittest.TestCase):
+
+    def test_chunk_slices(self):
+        slices = list(chunk_slices(10, 4))
+        self.assertEqual(
+            slices, [slice(0, 4), slice(4, 8), slice(8, 10)])
+
+    def test_chunk_slices_on_empty(self):
+        self.assertEqual(list(chunk_slices(0, 4)), [])
+
+    def test_chunk_slices_with_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(chunk_slices(10, 0))
+
+    def test_cancellable(self):
+        slices = []
+        with cancellable(lambda: len(slices) == 2):
+            with self.assertRaises(Cancelled):
+                for rows in chunk_slices(10, 4):
+                    slices.append(rows)
+        self.assertEqual(slices, [slice(0, 4), slice(4, 8)])
+        # no task outside of the block
+        check_cancelled()
+        self.assertEqual(len(list(chunk_slices(10, 4))), 3)
+
+    def test_mapped_array(self):
+        uids = [uuid.uuid4() for _ in range(5)]
+        mapping = dict(enumerate(uids))
+        assert_array_equal(mapped_array(mapping, slice(1, 4)), uids[1:4])
+        assert_array_equal(mapped_array(mapping, [4, 0]), [uids[4], uids[0]])
@@ -0,0 +1,241 @@
+import unittest
+
+from mock import patch
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particles, Particle
+
+from simphony_mayavi.core.api import (
+    ConversionCache, cuds_cache_key, BoxRegion, SphereRegion)
+from simphony_mayavi.core.conversion_cache import memory_size
+from simphony_mayavi.cuds.api import VTKParticles
+
+
+def create_particles(name, count=10):
+    particles = Particles(name)
+    particles.add([
+        Particle(coordinates=(index, 0.0, 0.0),
+                 data=DataContainer(TEMPERATURE=index, MASS=1.0))
+        for index in range(count)])
+    return particles
+
+
+class TestConversionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.containers = [
+            VTKParticles.from_particles(create_particles(str(index)))
+            for index in range(3)]
+        self.size = max(memory_size(container)
+                        for container in self.containers)
+
+    def test_get_and_put(self):
+        # given
+        cache = ConversionCache()
+        container = self.containers[0]
+
+        # when
+        missing = cache.get('a')
+        cache.put('a', container)
+
+        # then
+        self.assertIsNone(missing)
+        self.assertIs(cache.get('a'), container)
+        self.assertIn('a', cache)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.memory, memory_size(container))
+        self.assertEqual(cache.statistics, {
+            'hits': 1, 'misses': 1, 'evictions': 0, 'items': 1,
+            'memory': memory_size(container)})
+
+    def test_evict_least_recently_used(self):
+        # given
+        cache = ConversionCache(max_memory=2 * self.size)
+        cache.put('a', self.containers[0])
+        cache.put('b', self.containers[1])
+
+        # when
+        cache.get('a')
+        cache.put('c', self.containers[2])
+
+        # then
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.memory, cache.max_memory)
+
+    def test_lower_max_memory(self):
+        # given
+        cache = ConversionCache()
+        for key, container in zip('abc', self.containers):
+            cache.put(key, container)
+
+        # when
+        cache.max_memory = self.size
+
+        # then
+        self.assertEqual(len(cache), 1)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.evictions, 2)
+
+    def test_container_larger_than_limit(self):
+        # given
+        cache = ConversionCache(max_memory=0)
+
+        # when
+        cache.put('a', self.containers[0])
+
+        # then
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.memory, 0)
+
+    def test_modified_container_is_dropped(self):
+        # given
+        cache = ConversionCache()
+        container = self.containers[0]
+        cache.put('a', container)
+
+        # when
+        particle = next(container.iter(item_type=CUBA.PARTICLE))
+        particle.data[CUBA.TEMPERATURE] = -1.0
+        container.update([particle])
+
+        # then
+        self.assertIsNone(cache.get('a'))
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.memory, 0)
+
+    def test_clear(self):
+        # given
+        cache = ConversionCache()
+        cache.put('a', self.containers[0])
+
+        # when
+        cache.clear()
+
+        # then
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.memory, 0)
+
+
+class TestCUDSCacheKey(unittest.TestCase):
+
+    def test_same_content(self):
+        # given
+        key = cuds_cache_key(create_particles('test'))
+
+        # when/then
+        self.assertEqual(cuds_cache_key(create_particles('test')), key)
+
+    def test_different_content(self):
+        # given
+        particles = create_particles('test')
+        key = cuds_cache_key(particles)
+
+        # when
+        particles.add([Particle(coordinates=(1.0, 1.0, 1.0))])
+
+        # then
+        self.assertNotEqual(cuds_cache_key(particles), key)
+
+    def test_vtk_container(self):
+        # given
+        container = VTKParticles.from_particles(create_particles('test'))
+        key = cuds_cache_key(container)
+
+        # when/then
+        with patch(
+                'simphony_mayavi.core.conversion_cache.cuds_fingerprint') \
+                as fingerprint:
+            self.assertEqual(cuds_cache_key(container), key)
+            self.assertFalse(fingerprint.called)
+        self.assertNotEqual(
+            cuds_cache_key(
+                VTKParticles.from_particles(create_particles('test'))), key)
+
+        # when
+        particle = next(container.iter(item_type=CUBA.PARTICLE))
+        particle.data[CUBA.TEMPERATURE] = 20.0
+        container.update([particle])
+
+        # then
+        self.assertNotEqual(cuds_cache_key(container), key)
+
+    def test_sampled_key(self):
+        # given
+        particles = create_particles('test')
+        key = cuds_cache_key(particles, sample_size=2)
+
+        # when
+        particle = list(particles.iter(item_type=CUBA.PARTICLE))[9]
+        particle.data[CUBA.TEMPERATURE] = 20.0
+        particles.update([particle])
+
+        # then
+        self.assertEqual(cuds_cache_key(particles, sample_size=2), key)
+        self.assertNotEqual(
+            cuds_cache_key(particles),
+            cuds_cache_key(create_particles('test')))
+
+    def test_keys(self):
+        # given
+        particles = create_particles('test')
+
+        # when
+        key = cuds_cache_key(particles, [CUBA.MASS, CUBA.TEMPERATURE], [])
+
+        # then
+        self.assertEqual(
+            cuds_cache_key(particles, [CUBA.TEMPERATURE, CUBA.MASS], []), key)
+        self.assertNotEqual(cuds_cache_key(particles, [CUBA.MASS], []), key)
+        self.assertNotEqual(cuds_cache_key(particles), key)
+
+    def test_region(self):
+        # given
+        particles = create_particles('test')
+        region = BoxRegion((0.0, 0.0, 0.0), (2.0, 1.0, 1.0))
+
+        # when
+        key = cuds_cache_key(particles, region=region)
+
+        # then
+        self.assertEqual(
+            cuds_cache_key(
+                particles, region=BoxRegion((0, 0, 0), (2, 1, 1))), key)
+        self.assertNotEqual(
+            cuds_cache_key(particles, region=region, element_selection='any'),
+            key)
+        self.assertNotEqual(
+            cuds_cache_key(
+                particles, region=SphereRegion((0.0, 0.0, 0.0), 2.0)), key)
+        self.assertNotEqual(cuds_cache_key(particles), key)
+
+    def test_implicit(self):
+        # given
+        particles = create_particles('test')
+
+        # when
+        key = cuds_cache_key(particles, implicit=True)
+
+        # then
+        self.assertEqual(cuds_cache_key(particles, implicit=True), key)
+        self.assertNotEqual(cuds_cache_key(particles), key)
+
+    def test_lattice_step(self):
+        # given
+        particles = create_particles('test')
+
+        # when
+        key = cuds_cache_key(particles, lattice_step=(2, 2, 1))
+
+        # then
+        self.assertEqual(
+            cuds_cache_key(particles, lattice_step=(2, 2, 1)), key)
+        self.assertNotEqual(
+            cuds_cache_key(particles, lattice_step=(1, 2, 2)), key)
+        self.assertNotEqual(cuds_cache_key(particles), key)
+
+if __name__ == '__main__':
+    unittest.main()
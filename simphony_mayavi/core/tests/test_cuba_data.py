@@ -3,6 +3,7 @@ from functools import partial
 
 
 import numpy
+from numpy.testing import assert_array_equal
 from tvtk.api import tvtk
 from simphony.core.cuba import CUBA
 from simphony.core.data_container import DataContainer
@@ -869,6 +870,370 @@ class TestCubaData(unittest.TestCase):
         for index in range(1, 5):
             self.assertEqual(data[index], DataContainer(STATUS=index))
 
+    def test_get_column(self):
+        # given
+        data = self.data
+
+        # when
+        values = data.get_column(CUBA.VELOCITY, slice(1, 3))
+
+        # then
+        assert_array_equal(
+            values, [[3.0, 2.0, 5.0], [4.0, 5.0, 1.0]])
+
+    def test_get_column_with_missing_values(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=1.0))
+        data.append(DataContainer(TEMPERATURE=None))
+        data.append(DataContainer(MASS=3.0))
+
+        # when
+        values = data.get_column(CUBA.TEMPERATURE)
+
+        # then
+        self.assertEqual(values[0], 1.0)
+        self.assertTrue(numpy.isnan(values[1:]).all())
+
+    def test_get_column_not_stored(self):
+        # given
+        data = self.data
+
+        # when
+        values = data.get_column(CUBA.STATUS, [0, 2])
+
+        # then
+        assert_array_equal(values, [-1, -1])
+
+    def test_set_column(self):
+        # given
+        data = self.data
+
+        # when
+        data.set_column(CUBA.VELOCITY, [(1, 1, 1), (2, 2, 2)], [0, 2])
+
+        # then
+        values = data.get_column(CUBA.VELOCITY)
+        assert_array_equal(values[[0, 2]], [(1, 1, 1), (2, 2, 2)])
+        assert_array_equal(data[0][CUBA.VELOCITY], (1, 1, 1))
+
+    def test_set_column_for_new_key(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        for index in range(3):
+            data.append(DataContainer(MASS=index))
+
+        # when
+        data.set_column(CUBA.TEMPERATURE, 5.0, slice(1, 3))
+
+        # then
+        self._assert_len(data, 3)
+        self.assertEqual(data[0], DataContainer(MASS=0))
+        self.assertEqual(data[1], DataContainer(MASS=1, TEMPERATURE=5.0))
+        self.assertEqual(data[2], DataContainer(MASS=2, TEMPERATURE=5.0))
+
+    def test_set_column_with_missing_values(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        for index in range(3):
+            data.append(DataContainer(TEMPERATURE=index))
+
+        # when
+        data.set_column(
+            CUBA.TEMPERATURE, [5.0, 6.0], [0, 2], missing=[False, True])
+
+        # then
+        self._assert_len(data, 3)
+        self.assertEqual(data[0], DataContainer(TEMPERATURE=5.0))
+        self.assertEqual(data[1], DataContainer(TEMPERATURE=1))
+        self.assertEqual(data[2], DataContainer())
+
+    def test_get_missing(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=1.0))
+        data.append(DataContainer(TEMPERATURE=None))
+        data.append(DataContainer(MASS=3.0))
+
+        # when/then
+        assert_array_equal(
+            data.get_missing(CUBA.TEMPERATURE), [False, True, True])
+        assert_array_equal(data.get_missing(CUBA.MASS, [2]), [False])
+        assert_array_equal(data.get_missing(CUBA.STATUS), [True] * 3)
+
+    def test_copy_columns(self):
+        # given
+        data = CubaData(attribute_data=tvtk.PointData())
+        other = CubaData(attribute_data=tvtk.PointData())
+        for index in range(3):
+            data.append(DataContainer(TEMPERATURE=index, STATUS=index))
+            other.append(DataContainer(TEMPERATURE=-index))
+        other[1] = DataContainer(MASS=1.0)
+
+        # when
+        data.copy_columns(other)
+
+        # then
+        self._assert_len(data, 3)
+        self.assertEqual(data[0], DataContainer(TEMPERATURE=0))
+        self.assertEqual(data[1], DataContainer(MASS=1.0))
+        self.assertEqual(data[2], DataContainer(TEMPERATURE=-2))
+
+    def test_copy_selected_columns(self):
+        # given
+        data = CubaData(attribute_data=tvtk.PointData())
+        other = CubaData(attribute_data=tvtk.PointData())
+        for index in range(3):
+            data.append(DataContainer(TEMPERATURE=index, STATUS=index))
+            other.append(DataContainer(TEMPERATURE=-index, MASS=1.0))
+        version = data.column_version(CUBA.STATUS)
+
+        # when
+        data.copy_columns(other, keys=[CUBA.TEMPERATURE])
+
+        # then
+        for index in range(3):
+            self.assertEqual(
+                data[index], DataContainer(TEMPERATURE=-index, STATUS=index))
+        self.assertEqual(data.column_version(CUBA.STATUS), version)
+
+    def test_column_versions(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(MASS=1.0, TEMPERATURE=2.0))
+        mass = data.column_version(CUBA.MASS)
+        temperature = data.column_version(CUBA.TEMPERATURE)
+
+        # when
+        data.set_column(CUBA.MASS, [3.0])
+
+        # then
+        self.assertGreater(data.column_version(CUBA.MASS), mass)
+        self.assertEqual(
+            data.column_version(CUBA.TEMPERATURE), temperature)
+        self.assertEqual(data.version, data.column_version(CUBA.MASS))
+
+        # when
+        mass = data.column_version(CUBA.MASS)
+        data[0] = DataContainer(TEMPERATURE=4.0)
+
+        # then
+        self.assertGreater(data.column_version(CUBA.MASS), mass)
+        self.assertGreater(
+            data.column_version(CUBA.TEMPERATURE), temperature)
+
+        # when
+        version = data.version
+        data.append(DataContainer())
+
+        # then
+        self.assertGreater(data.column_version(CUBA.VELOCITY), version)
+        self.assertGreater(data.column_version(CUBA.MASS), version)
+
+    def test_changed_since(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(MASS=1.0, TEMPERATURE=2.0))
+        version = data.version
+        arrays_version = data.arrays_version
+
+        # when
+        data.set_column(CUBA.MASS, [1.0])
+
+        # then
+        self.assertEqual(data.changed_since(version), set())
+
+        # when
+        data.set_column(CUBA.TEMPERATURE, [3.0])
+
+        # then
+        self.assertEqual(data.changed_since(version), {CUBA.TEMPERATURE})
+        self.assertEqual(data.arrays_version, arrays_version)
+
+        # when
+        data.set_column(CUBA.VELOCITY, [(1, 1, 1)])
+
+        # then
+        self.assertEqual(
+            data.changed_since(version), {CUBA.TEMPERATURE, CUBA.VELOCITY})
+        self.assertGreater(data.arrays_version, arrays_version)
+
+    def test_append_in_batch(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=0.0))
+        data.get_column(CUBA.TEMPERATURE)
+
+        # when
+        with data.batch():
+            for index in range(1, 4):
+                data.append(DataContainer(TEMPERATURE=index))
+            values = data.get_column(CUBA.TEMPERATURE)
+            data.append(DataContainer(TEMPERATURE=4.0))
+
+        # then
+        assert_array_equal(values, [0.0, 1.0, 2.0, 3.0])
+        assert_array_equal(
+            data.get_column(CUBA.TEMPERATURE), [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_set_column_in_batch(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        for index in range(3):
+            data.append(DataContainer(TEMPERATURE=0.0))
+        array = tvtk.to_vtk(point_data.get_array(CUBA.TEMPERATURE.name))
+        m_time = array.GetMTime()
+
+        # when
+        with data.batch():
+            data.set_column(CUBA.TEMPERATURE, [1.0, 2.0], [0, 2])
+            data.extend_columns({CUBA.TEMPERATURE: [3.0]}, 1)
+
+            # then
+            self.assertEqual(array.GetMTime(), m_time)
+            assert_array_equal(
+                data.get_column(CUBA.TEMPERATURE), [1.0, 0.0, 2.0, 3.0])
+
+        # then
+        self.assertGreater(array.GetMTime(), m_time)
+
+    def test_set_column_with_unsupported_key(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(
+            attribute_data=point_data, stored_cuba={CUBA.MASS}, size=2)
+
+        # when/then
+        with self.assertRaises(ValueError):
+            data.set_column(CUBA.TEMPERATURE, [1.0, 2.0])
+
+    def test_remove_column(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        for index in range(3):
+            data.append(DataContainer(MASS=index, TEMPERATURE=index))
+        version = data.version
+        arrays_version = data.arrays_version
+
+        # when
+        data.remove_column(CUBA.MASS)
+
+        # then
+        self._assert_len(data, 3)
+        self.assertEqual(data.cubas, {CUBA.TEMPERATURE})
+        self.assertEqual(data[1], DataContainer(TEMPERATURE=1))
+        self.assertEqual(data.changed_since(version), {CUBA.MASS})
+        self.assertGreater(data.arrays_version, arrays_version)
+
+        # when
+        data.remove_column(CUBA.TEMPERATURE)
+
+        # then
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data.cubas, set())
+
+        # when/then
+        with self.assertRaises(KeyError):
+            data.remove_column(CUBA.MASS)
+
+    def test_get_rows(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=1.0, VELOCITY=(1, 2, 3)))
+        data.append(DataContainer(TEMPERATURE=None))
+        data.append(DataContainer(MASS=3.0))
+
+        # when
+        rows = data.get_rows(slice(0, 3))
+
+        # then
+        self.assertEqual(len(rows), 3)
+        for index, row in enumerate(rows):
+            self.assertEqual(row, data[index])
+
+    def test_extend_columns(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=1.0))
+
+        # when
+        data.extend_columns(
+            {CUBA.TEMPERATURE: [2.0, 3.0],
+             CUBA.VELOCITY: [(1, 2, 3), (4, 5, 6)]},
+            2)
+
+        # then
+        self.assertEqual(len(data), 3)
+        self._assert_len(data, 3)
+        self.assertEqual(data[0], DataContainer(TEMPERATURE=1.0))
+        self.assertEqual(
+            data[1], DataContainer(TEMPERATURE=2.0, VELOCITY=(1, 2, 3)))
+        self.assertEqual(
+            data[2], DataContainer(TEMPERATURE=3.0, VELOCITY=(4, 5, 6)))
+
+    def test_extend_columns_then_set_column(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=1.0))
+        for _ in range(3):
+            data.extend_columns({CUBA.VELOCITY: numpy.ones((5, 3))}, 5)
+
+        # when
+        data.set_column(CUBA.TEMPERATURE, 2.0, [11, 13])
+        data.set_column(
+            CUBA.VELOCITY, numpy.zeros((2, 3)), [4, 5], missing=[True, False])
+        data.append(DataContainer(TEMPERATURE=3.0))
+
+        # then
+        self._assert_len(data, 17)
+        self.assertEqual(data[0], DataContainer(TEMPERATURE=1.0))
+        self.assertEqual(data[4], DataContainer())
+        self.assertEqual(data[5], DataContainer(VELOCITY=(0, 0, 0)))
+        self.assertEqual(
+            data[11], DataContainer(TEMPERATURE=2.0, VELOCITY=(1, 1, 1)))
+        self.assertEqual(data[16], DataContainer(TEMPERATURE=3.0))
+        assert_array_equal(
+            numpy.flatnonzero(data.get_missing(CUBA.TEMPERATURE)),
+            [index for index in range(17) if index not in (0, 11, 13, 16)])
+        assert_array_equal(
+            numpy.flatnonzero(data.get_missing(CUBA.VELOCITY)),
+            [0, 4, 16])
+
+    def test_extend_columns_with_missing_columns(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+        data.append(DataContainer(TEMPERATURE=1.0))
+
+        # when
+        data.extend_columns({}, 2)
+
+        # then
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[1], DataContainer())
+        self.assertEqual(data[2], DataContainer())
+
+    def test_extend_columns_with_invalid_length(self):
+        # given
+        point_data = tvtk.PointData()
+        data = CubaData(attribute_data=point_data)
+
+        # when/then
+        with self.assertRaises(ValueError):
+            data.extend_columns({CUBA.TEMPERATURE: [1.0, 2.0]}, 3)
+
     def _assert_len(self, data, length):
         n = data._data.number_of_arrays
         for array_id in range(n):
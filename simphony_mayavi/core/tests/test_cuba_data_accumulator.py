@@ -5,9 +5,10 @@ from numpy.testing import assert_array_equal
 from tvtk.api import tvtk
 
 from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
 from simphony.testing.utils import create_data_container, dummy_cuba_value
 
-from simphony_mayavi.core.api import CUBADataAccumulator
+from simphony_mayavi.core.api import CUBADataAccumulator, CubaData
 
 
 class TestCUBADataAccumulator(unittest.TestCase):
@@ -108,3 +109,36 @@ class TestCUBADataAccumulator(unittest.TestCase):
         vtk_data = tvtk.PointData()
         accumulator.load_onto_vtk(vtk_data)
         self.assertEqual(vtk_data.number_of_arrays, 0)
+
+    def test_load_onto_cuba_data(self):
+        point_data = tvtk.PointData()
+        cuba_data = CubaData(attribute_data=point_data)
+        for index in range(3):
+            cuba_data.append(DataContainer(MASS=index, TEMPERATURE=index))
+        accumulator = CUBADataAccumulator()
+        accumulator.append(DataContainer(TEMPERATURE=10.0))
+        accumulator.append(DataContainer(TEMPERATURE=None, MASS=7.0))
+
+        accumulator.load_onto_cuba_data(cuba_data, [2, 0])
+
+        self.assertEqual(len(cuba_data), 3)
+        self.assertEqual(
+            cuba_data[0], DataContainer(MASS=7.0))
+        self.assertEqual(
+            cuba_data[1], DataContainer(MASS=1, TEMPERATURE=1))
+        self.assertEqual(cuba_data[2], DataContainer(TEMPERATURE=10.0))
+
+    def test_load_onto_cuba_data_partial(self):
+        point_data = tvtk.PointData()
+        cuba_data = CubaData(attribute_data=point_data)
+        for index in range(3):
+            cuba_data.append(DataContainer(MASS=index, TEMPERATURE=index))
+        accumulator = CUBADataAccumulator(keys=[CUBA.TEMPERATURE])
+        accumulator.append(DataContainer(TEMPERATURE=10.0))
+
+        accumulator.load_onto_cuba_data(cuba_data, [2], partial=True)
+
+        self.assertEqual(
+            cuba_data[1], DataContainer(MASS=1, TEMPERATURE=1))
+        self.assertEqual(
+            cuba_data[2], DataContainer(MASS=2, TEMPERATURE=10.0))
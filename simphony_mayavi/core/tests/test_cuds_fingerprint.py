@@ -0,0 +1,257 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import closing
+
+from mock import patch
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.lattice import make_cubic_lattice
+from simphony.cuds.mesh import Mesh, Point, Face
+from simphony.cuds.particles import Particles, Particle
+from simphony.io.h5_cuds import H5CUDS
+
+from simphony_mayavi.core.api import cuds_fingerprint
+from simphony_mayavi.cuds.api import VTKParticles, VTKMesh
+
+
+class TestCUDSFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.particles = Particles('test')
+        self.uids = self.particles.add([
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(10)])
+
+    def test_unchanged_particles(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles)
+
+        # when
+        particle = self.particles.get(self.uids[3])
+        self.particles.update([particle])
+
+        # then
+        self.assertEqual(cuds_fingerprint(self.particles), fingerprint)
+
+    def test_particle_data_changed(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles)
+
+        # when
+        particle = self.particles.get(self.uids[3])
+        particle.data[CUBA.TEMPERATURE] = 30.0
+        self.particles.update([particle])
+
+        # then
+        self.assertNotEqual(cuds_fingerprint(self.particles), fingerprint)
+
+    def test_particle_coordinates_changed(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles)
+
+        # when
+        particle = self.particles.get(self.uids[3])
+        particle.coordinates = (3.0, 1.0, 0.0)
+        self.particles.update([particle])
+
+        # then
+        self.assertNotEqual(cuds_fingerprint(self.particles), fingerprint)
+
+    def test_keys(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles, keys=[CUBA.MASS])
+
+        # when
+        particle = self.particles.get(self.uids[3])
+        particle.data[CUBA.TEMPERATURE] = 30.0
+        self.particles.update([particle])
+
+        # then
+        self.assertEqual(
+            cuds_fingerprint(self.particles, keys=[CUBA.MASS]), fingerprint)
+
+    def test_sampled_fingerprint(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles, sample_size=2)
+
+        # when
+        particles = list(self.particles.iter(item_type=CUBA.PARTICLE))
+        first, last = particles[0], particles[-1]
+        last.data[CUBA.TEMPERATURE] = 30.0
+        self.particles.update([last])
+
+        # then
+        self.assertEqual(
+            cuds_fingerprint(self.particles, sample_size=2), fingerprint)
+
+        # when
+        first.data[CUBA.TEMPERATURE] = 30.0
+        self.particles.update([first])
+
+        # then
+        self.assertNotEqual(
+            cuds_fingerprint(self.particles, sample_size=2), fingerprint)
+
+    def test_sampled_fingerprint_is_spread_over_the_items(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles, sample_size=2)
+
+        # when
+        particle = list(self.particles.iter(item_type=CUBA.PARTICLE))[5]
+        particle.data[CUBA.TEMPERATURE] = 30.0
+        self.particles.update([particle])
+
+        # then
+        self.assertNotEqual(
+            cuds_fingerprint(self.particles, sample_size=2), fingerprint)
+
+    def test_vtk_particles(self):
+        # given
+        container = VTKParticles.from_particles(self.particles)
+        fingerprint = cuds_fingerprint(container)
+        sampled = cuds_fingerprint(container, sample_size=2)
+
+        # when
+        with patch.object(VTKParticles, 'iter') as iter_items:
+            # then
+            self.assertEqual(cuds_fingerprint(container), fingerprint)
+            self.assertFalse(iter_items.called)
+
+        # when
+        particle = container.get(self.uids[9])
+        particle.data[CUBA.TEMPERATURE] = 30.0
+        container.update([particle])
+
+        # then
+        self.assertNotEqual(cuds_fingerprint(container), fingerprint)
+        self.assertEqual(cuds_fingerprint(container, sample_size=2), sampled)
+        self.assertEqual(
+            cuds_fingerprint(container, keys=[CUBA.MASS]),
+            cuds_fingerprint(
+                VTKParticles.from_particles(self.particles),
+                keys=[CUBA.MASS]))
+
+    def test_sampled_fingerprint_with_new_items(self):
+        # given
+        fingerprint = cuds_fingerprint(self.particles, sample_size=2)
+
+        # when
+        self.particles.add([Particle(coordinates=(0.0, 1.0, 0.0))])
+
+        # then
+        self.assertNotEqual(
+            cuds_fingerprint(self.particles, sample_size=2), fingerprint)
+
+    def test_sampled_h5_particles(self):
+        # given
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        handle = H5CUDS.open(os.path.join(temp_dir, 'test.cuds'), mode='w')
+        with closing(handle):
+            handle.add_dataset(self.particles)
+            particles = handle.get_dataset('test')
+            fingerprint = cuds_fingerprint(particles, sample_size=2)
+
+            # when
+            with patch.object(particles, 'iter') as iter_items:
+                sampled = cuds_fingerprint(particles, sample_size=2)
+
+            # then
+            # only the sampled rows are read
+            self.assertFalse(iter_items.called)
+            self.assertEqual(sampled, fingerprint)
+            self.assertEqual(sampled[:2], (10, 0))
+
+            # when
+            particle = particles.get(self.uids[3])
+            particle.data[CUBA.TEMPERATURE] = 30.0
+            particles.update([particle])
+
+            # then
+            self.assertEqual(
+                cuds_fingerprint(particles, sample_size=2), fingerprint)
+
+            # when
+            particle = particles.get(self.uids[5])
+            particle.data[CUBA.TEMPERATURE] = 30.0
+            particles.update([particle])
+
+            # then
+            self.assertNotEqual(
+                cuds_fingerprint(particles, sample_size=2), fingerprint)
+
+    def test_mesh(self):
+        # given
+        mesh = Mesh('test')
+        uids = mesh.add([
+            Point(coordinates=(0.0, 0.0, 0.0)),
+            Point(coordinates=(1.0, 0.0, 0.0)),
+            Point(coordinates=(0.0, 1.0, 0.0))])
+        face_uids = mesh.add([
+            Face(points=uids, data=DataContainer(TEMPERATURE=1.0))])
+        fingerprint = cuds_fingerprint(mesh)
+
+        # when
+        face = mesh.get(face_uids[0])
+        face.data[CUBA.TEMPERATURE] = 2.0
+        mesh.update([face])
+
+        # then
+        self.assertNotEqual(cuds_fingerprint(mesh), fingerprint)
+        self.assertEqual(cuds_fingerprint(mesh)[:4], (3, 0, 1, 0))
+
+    def test_vtk_mesh(self):
+        # given
+        mesh = Mesh('test')
+        uids = mesh.add([
+            Point(coordinates=(0.0, 0.0, 0.0)),
+            Point(coordinates=(1.0, 0.0, 0.0)),
+            Point(coordinates=(0.0, 1.0, 0.0))])
+        mesh.add([Face(points=uids, data=DataContainer(TEMPERATURE=1.0))])
+        container = VTKMesh.from_mesh(mesh)
+        fingerprint = cuds_fingerprint(container)
+
+        # when
+        face = next(container.iter(item_type=CUBA.FACE))
+        face.points = [uids[1], uids[0], uids[2]]
+        container.update([face])
+
+        # then
+        self.assertNotEqual(cuds_fingerprint(container), fingerprint)
+        self.assertEqual(cuds_fingerprint(container)[:4], (3, 0, 1, 0))
+
+    def test_lattice(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (4, 5, 6))
+        fingerprint = cuds_fingerprint(lattice)
+        sampled = cuds_fingerprint(lattice, sample_size=10)
+
+        # when
+        node = lattice.get((1, 2, 3))
+        node.data[CUBA.TEMPERATURE] = 2.0
+        lattice.update([node])
+
+        # then
+        self.assertNotEqual(cuds_fingerprint(lattice), fingerprint)
+        self.assertEqual(cuds_fingerprint(lattice, sample_size=10), sampled)
+
+        # when
+        node = lattice.get((3, 4, 5))
+        node.data[CUBA.TEMPERATURE] = 2.0
+        lattice.update([node])
+
+        # then
+        self.assertNotEqual(
+            cuds_fingerprint(lattice, sample_size=10), sampled)
+
+    def test_unknown_container(self):
+        with self.assertRaises(TypeError):
+            cuds_fingerprint(object())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy
+from numpy.testing import assert_array_equal
+
+from simphony_mayavi.core.api import BoxRegion, SphereRegion, PlanesRegion
+
+
+class TestBoxRegion(unittest.TestCase):
+
+    def test_contains(self):
+        # given
+        region = BoxRegion((0.0, 0.0, 0.0), (1.0, 2.0, 1.0))
+        points = [(0.5, 0.5, 0.5), (1.0, 2.0, 0.0), (1.5, 0.5, 0.5),
+                  (0.5, -0.1, 0.5)]
+
+        # when
+        inside = region.contains(points)
+
+        # then
+        assert_array_equal(inside, [True, True, False, False])
+
+    def test_contains_on_empty(self):
+        # given
+        region = BoxRegion((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+
+        # when
+        inside = region.contains(numpy.empty((0, 3)))
+
+        # then
+        self.assertEqual(inside.shape, (0,))
+
+    def test_invalid_corners(self):
+        with self.assertRaises(ValueError):
+            BoxRegion((0.0, 2.0, 0.0), (1.0, 1.0, 1.0))
+        with self.assertRaises(ValueError):
+            BoxRegion((0.0, 0.0), (1.0, 1.0))
+
+    def test_equality(self):
+        # given
+        region = BoxRegion((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+
+        # then
+        self.assertEqual(region, BoxRegion([0, 0, 0], [1, 1, 1]))
+        self.assertEqual(hash(region), hash(BoxRegion([0, 0, 0], [1, 1, 1])))
+        self.assertNotEqual(region, BoxRegion((0, 0, 0), (1, 1, 2)))
+        self.assertNotEqual(region, SphereRegion((0, 0, 0), 1.0))
+
+
+class TestSphereRegion(unittest.TestCase):
+
+    def test_contains(self):
+        # given
+        region = SphereRegion((1.0, 0.0, 0.0), 1.0)
+        points = numpy.array(
+            [(1.0, 0.0, 0.0), (2.0, 0.0, 0.0), (1.0, 0.8, 0.8),
+             (-0.5, 0.0, 0.0)])
+
+        # when
+        inside = region.contains(points)
+
+        # then
+        assert_array_equal(inside, [True, True, False, False])
+
+    def test_invalid_radius(self):
+        with self.assertRaises(ValueError):
+            SphereRegion((0.0, 0.0, 0.0), -1.0)
+
+
+class TestPlanesRegion(unittest.TestCase):
+
+    def test_contains(self):
+        # given
+        region = PlanesRegion(
+            origins=[(0.0, 0.0, 0.0), (1.0, 0.0, 0.0)],
+            normals=[(1.0, 0.0, 0.0), (-1.0, 0.0, 0.0)])
+        points = [(0.5, 10.0, -3.0), (0.0, 0.0, 0.0), (1.5, 0.0, 0.0),
+                  (-0.5, 0.0, 0.0)]
+
+        # when
+        inside = region.contains(points)
+
+        # then
+        assert_array_equal(inside, [True, True, False, False])
+
+    def test_invalid_planes(self):
+        with self.assertRaises(ValueError):
+            PlanesRegion([(0.0, 0.0, 0.0)], [(1.0, 0.0, 0.0)] * 2)
+        with self.assertRaises(ValueError):
+            PlanesRegion([(0.0, 0.0, 0.0)], [(0.0, 0.0, 0.0)])
+
+    def test_equality(self):
+        # given
+        region = PlanesRegion([(0.0, 0.0, 0.0)], [(0.0, 0.0, 1.0)])
+
+        # then
+        self.assertEqual(
+            region, PlanesRegion([(0.0, 0.0, 0.0)], [(0.0, 0.0, 1.0)]))
+        self.assertNotEqual(
+            region, PlanesRegion([(0.0, 0.0, 1.0)], [(0.0, 0.0, 1.0)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,10 @@
+import unittest
+
+from simphony_mayavi.core.api import next_version
+
+
+class TestVersionCounter(unittest.TestCase):
+
+    def test_next_version_is_increasing(self):
+        versions = [next_version() for _ in range(5)]
+        self.assertEqual(versions, sorted(set(versions)))
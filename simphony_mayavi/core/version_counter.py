@@ -0,0 +1,64 @@
+from itertools import count
+
+# A single counter is shared by all the containers so that a version
+# number is never reused, even when a container is replaced by another.
+_counter = count(1)
+
+
+def next_version():
+    """ Return a new version number.
+
+    The numbers are increasing for the lifetime of the process and
+    are shared by all the containers, thus a consumer can compare a
+    stored version number with the current one to find out if there
+    has been a modification in between.
+
+    Returns
+    -------
+    version : int
+
+    """
+    return next(_counter)
+
+
+def collect_changes(version, geometry_version, topology_version,
+                    point_data, cell_data=None):
+    """ Summarise the modifications of a container after ``version``.
+
+    Parameters
+    ----------
+    version : int
+        The version to compare against.
+
+    geometry_version, topology_version : int
+        The current geometry and topology versions of the container.
+
+    point_data : CubaData
+        The point (or node) data of the container.
+
+    cell_data : CubaData
+        The cell (i.e. bond or element) data of the container, if any.
+
+    Returns
+    -------
+    changes : dict
+        A dictionary with the following items:
+
+        - ``geometry``: True if the point coordinates have changed.
+        - ``topology``: True if items or connectivity have changed.
+        - ``point_data``: the set of modified point CUBA columns.
+        - ``cell_data``: the set of modified cell CUBA columns.
+        - ``arrays``: True if vtk attribute arrays have been added,
+          removed or replaced.
+
+    """
+    attributes = [point_data]
+    if cell_data is not None:
+        attributes.append(cell_data)
+    return {
+        'geometry': geometry_version > version,
+        'topology': topology_version > version,
+        'point_data': point_data.changed_since(version),
+        'cell_data': (
+            set() if cell_data is None else cell_data.changed_since(version)),
+        'arrays': any(data.arrays_version > version for data in attributes)}
@@ -1,5 +1,10 @@
 from .vtk_particles import VTKParticles
 from .vtk_lattice import VTKLattice
 from .vtk_mesh import VTKMesh
+from .vtk_cuds_io import save_vtk_cuds, load_vtk_cuds
+from .streaming_conversion import stream_particles, stream_mesh
+from .uid_mappings import UIDToIndex, IndexToUID
 
-__all__ = ['VTKParticles', 'VTKLattice', 'VTKMesh']
+__all__ = ['VTKParticles', 'VTKLattice', 'VTKMesh', 'save_vtk_cuds',
+           'load_vtk_cuds', 'stream_particles', 'stream_mesh', 'UIDToIndex',
+           'IndexToUID']
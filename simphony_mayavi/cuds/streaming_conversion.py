@@ -0,0 +1,530 @@
+import tempfile
+from itertools import compress, islice
+
+import numpy
+from tvtk.api import tvtk
+
+from simphony.core.cuba import CUBA
+from simphony_mayavi.core.api import (
+    supported_cuba, chunk_slices, check_cancelled, cell_connectivity,
+    EDGE2VTKCELL, FACE2VTKCELL, CELL2VTKCELL, ELEMENT_SELECTIONS)
+from simphony_mayavi.core.cuba_utils import default_cuba_value
+
+from .uid_mappings import UID_SIZE, IndexToUID, UIDToIndex, uids_to_array
+from .vtk_mesh import VTKMesh
+from .vtk_particles import VTKParticles
+
+#: The default peak memory budget of the streaming conversion in bytes.
+DEFAULT_MEMORY_BUDGET = 512 * 1024 ** 2
+
+#: The estimated transient memory of an item that is read from the
+#: source container (i.e. the python item, its DataContainer and the
+#: gathered values) in bytes.
+ITEM_MEMORY = 2048
+
+
+def stream_particles(particles, particle_keys=None, bond_keys=None,
+                     memory_budget=DEFAULT_MEMORY_BUDGET, directory=None,
+                     region=None, element_selection='all'):
+    """ Convert a CUDS particles container in bounded chunks.
+
+    Like :meth:`VTKParticles.from_particles`, but the items are read in
+    chunks of about ``memory_budget`` bytes and their coordinates and
+    data are written directly into preallocated arrays that become the
+    arrays of the vtk dataset, instead of gathering the whole dataset
+    in python lists first. When the converted arrays do not fit in
+    ``memory_budget`` they are backed by memory mapped temporary files,
+    so datasets larger than the available memory can be converted.
+
+    With a ``region`` only the particles inside the region are
+    converted. The coordinates of each chunk are tested at once and the
+    data of the particles outside the region are not read. The retained
+    particles are numbered consecutively.
+
+    The uids of the items are stored in arrays of 16 bytes per uid, in
+    the same store as the converted arrays, and they are looked up with
+    a hash table that is built on the first lookup (see
+    :class:`~simphony_mayavi.cuds.uid_mappings.UIDToIndex`).
+
+    Parameters
+    ----------
+    particles : ABCParticles
+        The container to convert.
+
+    particle_keys : list
+        A list of point CUBA keys that we want to copy, and only those.
+        If None, all available and compatible keys will be copied.
+
+    bond_keys : list
+        A list of cell CUBA keys that we want to copy, and only those.
+        If None, all available and compatible keys will be copied.
+
+    memory_budget : int
+        The memory in bytes to use for the chunks of items in flight and
+        for the converted arrays.
+
+    directory : str
+        The directory of the memory mapped files. Default is None which
+        uses memory mapped files in the temporary directory only when
+        the converted arrays do not fit in ``memory_budget``.
+
+    region : Region
+        The region of the particles to convert (see
+        :class:`~simphony_mayavi.core.regions.Region`). Default is None
+        which converts all the particles.
+
+    element_selection : str
+        ``'all'`` keeps the bonds with all their particles in ``region``
+        while ``'any'`` keeps the bonds with at least one particle in
+        ``region`` together with their other particles.
+
+    Returns
+    -------
+    vtk_particles : VTKParticles
+
+    Raises
+    ------
+    ValueError :
+        When ``element_selection`` is not one of
+        :data:`~simphony_mayavi.core.regions.ELEMENT_SELECTIONS`.
+
+    """
+    _check_selection(element_selection)
+    particle_count = particles.count_of(CUBA.PARTICLE)
+    bond_count = particles.count_of(CUBA.BOND)
+    estimated_size = _estimate_size(
+        particle_count, bond_count, 3,
+        _value_count(particle_keys, particles, CUBA.PARTICLE),
+        _value_count(bond_keys, particles, CUBA.BOND))
+    store = _ArrayStore(estimated_size, memory_budget, directory)
+    chunk_size = _chunk_size(memory_budget)
+    if region is not None:
+        # The number of retained items is not known in advance
+        particle_count = bond_count = None
+
+    points = _ArrayWriter(store, numpy.float64, (3,), particle_count)
+    particle_data = _ColumnWriter(particle_keys, store, particle_count)
+    particle_uids = _ArrayWriter(
+        store, numpy.uint8, (UID_SIZE,), particle_count)
+    for chunk in _chunks(particles.iter(item_type=CUBA.PARTICLE), chunk_size):
+        chunk = _append_points(chunk, region, points, particle_data)
+        particle_uids.append(uids_to_array(item.uid for item in chunk))
+    particle2index, index2particle = _mappings(particle_uids.finish(), store)
+
+    connectivity = _ArrayWriter(store, numpy.int64)
+    bond_data = _ColumnWriter(bond_keys, store, bond_count)
+    bond_uids = _ArrayWriter(store, numpy.uint8, (UID_SIZE,), bond_count)
+    for chunk in _chunks(particles.iter(item_type=CUBA.BOND), chunk_size):
+        chunk, counts, point_ids = _link_elements(
+            chunk, 'particles', particles, region, element_selection,
+            points, particle_data, particle2index, index2particle)
+        connectivity.append(cell_connectivity(counts, point_ids))
+        bond_uids.append(uids_to_array(bond.uid for bond in chunk))
+        bond_data.append([bond.data for bond in chunk])
+    bond2index, index2bond = _mappings(bond_uids.finish(), store)
+
+    if len(points) != 0:
+        data_set = tvtk.PolyData(points=points.finish())
+        lines = tvtk.CellArray()
+        lines.set_cells(len(bond2index), connectivity.finish())
+        data_set.lines = lines
+        particle_data.load_onto_vtk(data_set.point_data)
+        bond_data.load_onto_vtk(data_set.cell_data)
+    else:
+        data_set = None
+
+    mappings = {
+        'index2particle': index2particle,
+        'particle2index': particle2index,
+        'index2bond': index2bond,
+        'bond2index': bond2index}
+    return VTKParticles(
+        name=particles.name, data=particles.data, data_set=data_set,
+        mappings=mappings)
+
+
+def stream_mesh(mesh, point_keys=None, cell_keys=None,
+                memory_budget=DEFAULT_MEMORY_BUDGET, directory=None,
+                region=None, element_selection='all'):
+    """ Convert a CUDS mesh in bounded chunks.
+
+    Like :meth:`VTKMesh.from_mesh`, but the items are read in chunks
+    and their coordinates, connectivity and data are written directly
+    into preallocated arrays that are shared with the vtk dataset (see
+    :func:`stream_particles`).
+
+    Parameters
+    ----------
+    mesh : ABCMesh
+        The container to convert.
+
+    point_keys : list
+        A list of point CUBA keys that we want to copy, and only those.
+        If None, all available and compatible keys will be copied.
+
+    cell_keys : list
+        A list of cell CUBA keys that we want to copy, and only those.
+        If None, all available and compatible keys will be copied.
+
+    memory_budget : int
+        The memory in bytes to use for the chunks of items in flight and
+        for the converted arrays.
+
+    directory : str
+        The directory of the memory mapped files. Default is None which
+        uses memory mapped files in the temporary directory only when
+        the converted arrays do not fit in ``memory_budget``.
+
+    region : Region
+        The region of the points to convert. Default is None which
+        converts the whole mesh.
+
+    element_selection : str
+        ``'all'`` keeps the elements with all their points in ``region``
+        while ``'any'`` keeps the elements with at least one point in
+        ``region`` together with their other points.
+
+    Returns
+    -------
+    vtk_mesh : VTKMesh
+
+    Raises
+    ------
+    ValueError :
+        When ``element_selection`` is not one of
+        :data:`~simphony_mayavi.core.regions.ELEMENT_SELECTIONS`.
+
+    """
+    _check_selection(element_selection)
+    point_count = mesh.count_of(CUBA.POINT)
+    element_types = (
+        (CUBA.EDGE, EDGE2VTKCELL),
+        (CUBA.FACE, FACE2VTKCELL),
+        (CUBA.CELL, CELL2VTKCELL))
+    element_count = sum(
+        mesh.count_of(item_type) for item_type, _ in element_types)
+    estimated_size = _estimate_size(
+        point_count, element_count, 5,
+        _value_count(point_keys, mesh, CUBA.POINT),
+        max(_value_count(cell_keys, mesh, item_type)
+            for item_type, _ in element_types))
+    store = _ArrayStore(estimated_size, memory_budget, directory)
+    chunk_size = _chunk_size(memory_budget)
+    if region is not None:
+        # The number of retained items is not known in advance
+        point_count = element_count = None
+
+    points = _ArrayWriter(store, numpy.float64, (3,), point_count)
+    point_data = _ColumnWriter(point_keys, store, point_count)
+    point_uids = _ArrayWriter(store, numpy.uint8, (UID_SIZE,), point_count)
+    for chunk in _chunks(mesh.iter(item_type=CUBA.POINT), chunk_size):
+        chunk = _append_points(chunk, region, points, point_data)
+        point_uids.append(uids_to_array(item.uid for item in chunk))
+    point2index, index2point = _mappings(point_uids.finish(), store)
+
+    connectivity = _ArrayWriter(store, numpy.int64)
+    locations = _ArrayWriter(store, numpy.int64, length=element_count)
+    cell_types = _ArrayWriter(store, numpy.uint8, length=element_count)
+    cell_data = _ColumnWriter(cell_keys, store, element_count)
+    element_uids = _ArrayWriter(
+        store, numpy.uint8, (UID_SIZE,), element_count)
+    for item_type, mapping in element_types:
+        for chunk in _chunks(mesh.iter(item_type=item_type), chunk_size):
+            chunk, counts, point_ids = _link_elements(
+                chunk, 'points', mesh, region, element_selection, points,
+                point_data, point2index, index2point)
+            # every element is stored as its point count and point ids
+            offsets = numpy.cumsum(counts) - counts
+            locations.append(
+                len(connectivity) + offsets + numpy.arange(len(counts)))
+            cell_types.append([mapping[count] for count in counts])
+            connectivity.append(cell_connectivity(counts, point_ids))
+            element_uids.append(
+                uids_to_array(element.uid for element in chunk))
+            cell_data.append([element.data for element in chunk])
+    element2index, index2element = _mappings(element_uids.finish(), store)
+
+    if len(points) != 0:
+        data_set = tvtk.UnstructuredGrid(points=points.finish())
+        cells = tvtk.CellArray()
+        cells.set_cells(len(element2index), connectivity.finish())
+        data_set.set_cells(cell_types.finish(), locations.finish(), cells)
+        point_data.load_onto_vtk(data_set.point_data)
+        cell_data.load_onto_vtk(data_set.cell_data)
+    else:
+        data_set = None
+
+    mappings = {
+        'index2point': index2point,
+        'point2index': point2index,
+        'index2element': index2element,
+        'element2index': element2index}
+    return VTKMesh(
+        name=mesh.name, data=mesh.data, data_set=data_set,
+        mappings=mappings)
+
+
+class _ArrayStore(object):
+    """ Allocate the converted arrays in memory or in memory mapped
+    temporary files. """
+
+    def __init__(self, estimated_size, memory_budget, directory):
+        self.memory_mapped = (
+            directory is not None or estimated_size > memory_budget)
+        self.directory = directory
+
+    def empty(self, shape, dtype, fill=None):
+        if self.memory_mapped and numpy.prod(shape) != 0:
+            # The file is removed when the mapping is released
+            handle = tempfile.TemporaryFile(dir=self.directory)
+            array = numpy.memmap(handle, dtype=dtype, mode='w+', shape=shape)
+        else:
+            array = numpy.empty(shape, dtype=dtype)
+        if fill is not None:
+            array.fill(fill)
+        return array
+
+
+class _ArrayWriter(object):
+    """ An array that is written in consecutive blocks of rows.
+
+    When the number of rows is known the array is preallocated,
+    otherwise the blocks are gathered (in memory or in a temporary file)
+    and joined by :meth:`finish`.
+
+    """
+
+    def __init__(self, store, dtype, shape=(), length=None, fill=None):
+        self._dtype = dtype
+        self._shape = shape
+        self._fill = fill
+        self._length = 0
+        self._array = None
+        self._chunks = []
+        self._file = None
+        if length is not None:
+            self._array = store.empty((length,) + shape, dtype, fill=fill)
+        elif store.memory_mapped:
+            self._file = tempfile.TemporaryFile(dir=store.directory)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, values):
+        values = numpy.asarray(values, dtype=self._dtype)
+        values = values.reshape((-1,) + self._shape)
+        stop = self._length + len(values)
+        if self._array is not None:
+            self._array[self._length:stop] = values
+        elif self._file is not None:
+            values.tofile(self._file)
+        else:
+            self._chunks.append(values)
+        self._length = stop
+
+    def skip(self, count):
+        """ Leave the next ``count`` rows to the fill value.
+        """
+        if self._array is not None:
+            self._length += count
+            return
+        for rows in chunk_slices(count):
+            self.append(numpy.full(
+                (rows.stop - rows.start,) + self._shape, self._fill,
+                dtype=self._dtype))
+
+    def finish(self):
+        """ Return the array of all the rows.
+        """
+        shape = (self._length,) + self._shape
+        if self._array is not None:
+            return self._array
+        elif self._length == 0:
+            return numpy.empty(shape, dtype=self._dtype)
+        elif self._file is not None:
+            self._file.flush()
+            return numpy.memmap(
+                self._file, dtype=self._dtype, mode='r+', shape=shape)
+        else:
+            array = numpy.concatenate(self._chunks)
+            self._chunks = []
+            return array
+
+
+class _ColumnWriter(object):
+    """ Write the CUBA values of consecutive blocks of items into
+    columns. """
+
+    def __init__(self, keys, store, length=None):
+        self._length = length
+        self._count = 0
+        self._store = store
+        self._expand = keys is None
+        self._columns = {}
+        for cuba in set(keys or ()) & supported_cuba():
+            self._add_column(cuba)
+
+    def append(self, data_containers):
+        """ Write the values of the DataContainers of the next rows.
+        """
+        if self._expand:
+            keys = set()
+            for data in data_containers:
+                keys.update(data)
+            for cuba in (keys & supported_cuba()) - set(self._columns):
+                self._add_column(cuba)
+        for cuba, (column, missing) in self._columns.iteritems():
+            values = [data.get(cuba) for data in data_containers]
+            column.append(
+                [missing if value is None else value for value in values])
+        self._count += len(data_containers)
+
+    def load_onto_vtk(self, vtk_data):
+        """ Add the columns as arrays of a vtkPointData or vtkCellData.
+        """
+        for cuba, (column, _) in self._columns.iteritems():
+            index = vtk_data.add_array(column.finish())
+            vtk_data.get_array(index).name = cuba.name
+
+    def _add_column(self, cuba):
+        default = default_cuba_value(cuba)
+        if isinstance(default, numpy.ndarray):
+            shape = default.shape
+        else:
+            shape = ()
+        column = _ArrayWriter(
+            self._store, numpy.float64, shape, self._length, fill=numpy.nan)
+        # the previous rows have no value
+        column.skip(self._count)
+        self._columns[cuba] = column, numpy.full(shape, numpy.nan)
+
+
+def _append_points(items, region, points, data):
+    """ Write the coordinates and data of the items inside ``region`` (or
+    of all the items when None) and return these items. """
+    coordinates = numpy.array(
+        [item.coordinates for item in items], dtype=numpy.float64)
+    coordinates = coordinates.reshape(-1, 3)
+    if region is not None:
+        inside = region.contains(coordinates)
+        items = list(compress(items, inside))
+        coordinates = coordinates[inside]
+    points.append(coordinates)
+    data.append([item.data for item in items])
+    return items
+
+
+def _link_elements(elements, attribute, container, region, selection,
+                   points, data, item2index, index2item):
+    """ Return the elements to convert with the number and the indices
+    of their points.
+
+    Without a ``region`` all the elements are converted. Otherwise only
+    the elements with all (or any) of their points converted are kept,
+    and their other points are converted and added to the mappings.
+
+    Returns
+    -------
+    elements : list
+        The elements to convert.
+
+    counts : numpy.ndarray
+        The number of points of each element.
+
+    indices : numpy.ndarray
+        The point indices of the elements, one after the other.
+
+    """
+    links = [getattr(element, attribute) for element in elements]
+    counts = numpy.array([len(link) for link in links], dtype=numpy.int64)
+    uids = [item_uid for link in links for item_uid in link]
+    indices = item2index.indices(uids)
+    missing = indices < 0
+    if region is None:
+        if missing.any():
+            raise KeyError(uids[numpy.flatnonzero(missing)[0]])
+        return elements, counts, indices
+
+    owners = numpy.repeat(numpy.arange(len(elements)), counts)
+    missing_counts = numpy.bincount(
+        owners[missing], minlength=len(elements))
+    if selection == 'all':
+        keep = missing_counts == 0
+    else:
+        keep = missing_counts < counts
+    kept = numpy.repeat(keep, counts)
+    elements = list(compress(elements, keep))
+    uids = list(compress(uids, kept))
+    counts, indices = counts[keep], indices[kept]
+
+    # the points outside of the region of the kept elements
+    outside = []
+    found = set()
+    for position in numpy.flatnonzero(indices < 0):
+        uid = uids[position]
+        if uid not in found:
+            found.add(uid)
+            outside.append(uid)
+    if len(outside) != 0:
+        start = len(points)
+        _append_points(map(container.get, outside), None, points, data)
+        for index, uid in enumerate(outside, start):
+            item2index[uid] = index
+            index2item[index] = uid
+        indices = item2index.indices(uids)
+    return elements, counts, indices
+
+
+def _mappings(uids, store):
+    """ Return the uid to index and index to uid mappings of an array of
+    uids. """
+    return UIDToIndex(uids, allocate=store.empty), IndexToUID(uids)
+
+
+def _check_selection(selection):
+    if selection not in ELEMENT_SELECTIONS:
+        message = 'Expected an element selection in {}, got {!r}'
+        raise ValueError(message.format(ELEMENT_SELECTIONS, selection))
+
+
+def _chunks(iterable, chunk_size):
+    """ Iterate over lists of at most ``chunk_size`` items. """
+    iterator = iter(iterable)
+    while True:
+        check_cancelled()
+        chunk = list(islice(iterator, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def _chunk_size(memory_budget):
+    """ The number of items to read at a time within ``memory_budget``.
+    """
+    return max(int(memory_budget // ITEM_MEMORY), 1)
+
+
+def _estimate_size(point_count, cell_count, cell_width, point_values=0,
+                   cell_values=0):
+    """ A lower bound of the size in bytes of the converted arrays.
+
+    ``point_values`` and ``cell_values`` are the number of float values
+    of the data columns per point and per cell. The uids and the hash
+    tables of the mappings take 48 bytes per item.
+
+    """
+    return (8 * (point_count * (3 + point_values) +
+                 cell_count * (cell_width + cell_values)) +
+            48 * (point_count + cell_count))
+
+
+def _value_count(keys, container, item_type):
+    """ Return the number of float values per item of the data columns
+    of ``keys``, or of the keys of the first item when None. """
+    if keys is None:
+        item = next(iter(container.iter(item_type=item_type)), None)
+        keys = () if item is None else item.data
+    count = 0
+    for cuba in set(keys) & supported_cuba():
+        count += numpy.size(default_cuba_value(cuba))
+    return count
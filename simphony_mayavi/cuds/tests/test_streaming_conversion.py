@@ -0,0 +1,349 @@
+import shutil
+import sys
+import tempfile
+import unittest
+import uuid
+
+import numpy
+from numpy.testing import assert_array_almost_equal
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.mesh import Mesh, Point, Edge, Face, Cell
+from simphony.cuds.particles import Particles, Particle, Bond
+
+from simphony_mayavi.cuds.api import (
+    VTKParticles, VTKMesh, stream_particles, stream_mesh, UIDToIndex,
+    IndexToUID)
+from simphony_mayavi.core.api import BoxRegion
+from simphony_mayavi.cuds.streaming_conversion import ITEM_MEMORY
+
+
+def create_particles(count=20):
+    particles = Particles('test')
+    uids = particles.add([
+        Particle(coordinates=(index, 0.0, 0.0),
+                 data=DataContainer(TEMPERATURE=index))
+        for index in range(count)])
+    # keys that appear late and missing values
+    particles.add([Particle(
+        coordinates=(-1.0, 0.0, 0.0),
+        data=DataContainer(VELOCITY=(1.0, 2.0, 3.0)))])
+    particles.add([
+        Bond(particles=uids[index:index + 2], data=DataContainer(MASS=index))
+        for index in range(count - 1)])
+    particles.add([Bond(particles=uids[:3])])
+    return particles
+
+
+def create_mesh():
+    mesh = Mesh('test')
+    uids = mesh.add([
+        Point(coordinates=coordinates, data=DataContainer(TEMPERATURE=index))
+        for index, coordinates in enumerate([
+            (0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 1)])])
+    mesh.add([Edge(points=uids[:2], data=DataContainer(MASS=1.0))])
+    mesh.add([
+        Face(points=uids[:3], data=DataContainer(MASS=2.0)),
+        Face(points=uids[1:5])])
+    mesh.add([Cell(points=uids[:4], data=DataContainer(MASS=3.0))])
+    return mesh
+
+
+class SyntheticParticles(object):
+    """ A particle container that creates its items when they are read,
+    with a chain of bonds between consecutive particles. """
+
+    def __init__(self, count):
+        self.name = 'synthetic'
+        self.data = DataContainer()
+        self.count = count
+
+    def count_of(self, item_type):
+        if item_type == CUBA.PARTICLE:
+            return self.count
+        return self.count - 1
+
+    def iter(self, item_type):
+        if item_type == CUBA.PARTICLE:
+            return (self.particle(index) for index in xrange(self.count))
+        return (self.bond(index) for index in xrange(self.count - 1))
+
+    def get(self, uid):
+        return self.particle(uid.int - 1)
+
+    def particle(self, index):
+        return Particle(
+            uid=uuid.UUID(int=index + 1), coordinates=(index, 0.0, 0.0),
+            data=DataContainer(TEMPERATURE=index))
+
+    def bond(self, index):
+        return Bond(
+            uid=uuid.UUID(int=(1 << 64) + index),
+            particles=(uuid.UUID(int=index + 1), uuid.UUID(int=index + 2)))
+
+
+def resident_size(mapping):
+    """ The size in bytes of the arrays of a uid mapping that are not
+    memory mapped. """
+    arrays = [mapping.uids, getattr(mapping, '_table', None)]
+    return sum(
+        array.nbytes for array in arrays
+        if array is not None and not isinstance(array, numpy.memmap))
+
+
+class TestStreamParticles(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_in_memory(self):
+        # given
+        particles = create_particles()
+
+        # when
+        container = stream_particles(particles)
+
+        # then
+        self.assertIsInstance(container, VTKParticles)
+        self.assert_same_particles(container, particles)
+
+    def test_small_chunks_memory_mapped(self):
+        # given
+        particles = create_particles()
+
+        # when
+        container = stream_particles(
+            particles, memory_budget=3 * ITEM_MEMORY)
+
+        # then
+        self.assert_same_particles(container, particles)
+
+    def test_directory(self):
+        # given
+        particles = create_particles()
+
+        # when
+        container = stream_particles(particles, directory=self.temp_dir)
+
+        # then
+        self.assert_same_particles(container, particles)
+
+    def test_selected_keys(self):
+        # given
+        particles = create_particles()
+
+        # when
+        container = stream_particles(
+            particles, particle_keys=[CUBA.TEMPERATURE], bond_keys=[])
+
+        # then
+        self.assertEqual(container.point_data.cubas, {CUBA.TEMPERATURE})
+        self.assertEqual(container.bond_data.cubas, set())
+
+    def test_region(self):
+        # given
+        particles = create_particles()
+        region = BoxRegion((4.5, -1.0, -1.0), (8.5, 1.0, 1.0))
+
+        # when
+        container = stream_particles(
+            particles, memory_budget=3 * ITEM_MEMORY, region=region)
+
+        # then
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 4)
+        self.assertEqual(
+            sorted(container.index2particle), [0, 1, 2, 3])
+        for particle in container.iter(item_type=CUBA.PARTICLE):
+            self.assertTrue(4.5 <= particle.coordinates[0] <= 8.5)
+            self.assertEqual(
+                particle.data, particles.get(particle.uid).data)
+        # the bonds between 5-6, 6-7 and 7-8
+        self.assertEqual(container.count_of(CUBA.BOND), 3)
+        for bond in container.iter(item_type=CUBA.BOND):
+            self.assertEqual(bond.particles, particles.get(bond.uid).particles)
+            self.assertEqual(bond.data, particles.get(bond.uid).data)
+
+    def test_region_with_any_bond_particle(self):
+        # given
+        particles = create_particles()
+        region = BoxRegion((4.5, -1.0, -1.0), (8.5, 1.0, 1.0))
+
+        # when
+        container = stream_particles(
+            particles, region=region, element_selection='any')
+
+        # then
+        # the bonds 4-5 and 8-9 bring the particles 4 and 9
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 6)
+        self.assertEqual(container.count_of(CUBA.BOND), 5)
+        self.assertEqual(
+            sorted(container.index2particle), range(6))
+        for bond in container.iter(item_type=CUBA.BOND):
+            for uid in bond.particles:
+                self.assertEqual(
+                    container.get(uid).data, particles.get(uid).data)
+
+    def test_invalid_element_selection(self):
+        # given
+        region = BoxRegion((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+
+        # when/then
+        with self.assertRaises(ValueError):
+            stream_particles(
+                create_particles(), region=region, element_selection='some')
+
+    def test_empty(self):
+        # when
+        container = stream_particles(Particles('empty'))
+
+        # then
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 0)
+        self.assertEqual(container.name, 'empty')
+
+    def test_memory_budget_of_a_large_container(self):
+        # given
+        count = 100000
+        particles = SyntheticParticles(count)
+        memory_budget = 1024 ** 2
+
+        # when
+        container = stream_particles(particles, memory_budget=memory_budget)
+
+        # then
+        self.assertEqual(container.count_of(CUBA.PARTICLE), count)
+        self.assertEqual(container.count_of(CUBA.BOND), count - 1)
+        for index in (0, count // 2, count - 1):
+            particle = particles.particle(index)
+            self.assertEqual(
+                container.get(particle.uid).data, particle.data)
+        bond = particles.bond(count - 2)
+        self.assertEqual(container.get(bond.uid).particles, bond.particles)
+        mappings = (
+            container.particle2index, container.index2particle,
+            container.bond2index, container.index2bond)
+        for mapping in mappings:
+            self.assertIsInstance(mapping, (UIDToIndex, IndexToUID))
+        self.assertLessEqual(
+            sum(resident_size(mapping) for mapping in mappings),
+            memory_budget)
+        self.assertLessEqual(
+            sys.getsizeof(container.particle2index._changed), memory_budget)
+
+    def test_modify_converted_container(self):
+        # given
+        particles = create_particles()
+        container = stream_particles(particles)
+        bond = next(particles.iter(item_type=CUBA.BOND))
+        particle = Particle(coordinates=(5.0, 5.0, 5.0))
+
+        # when
+        container.remove([bond.uid])
+        container.add([particle])
+
+        # then
+        self.assertFalse(container.has(bond.uid))
+        self.assertEqual(
+            container.count_of(CUBA.BOND), particles.count_of(CUBA.BOND) - 1)
+        assert_array_almost_equal(
+            container.get(particle.uid).coordinates, particle.coordinates)
+        self.assertEqual(
+            container.count_of(CUBA.PARTICLE),
+            particles.count_of(CUBA.PARTICLE) + 1)
+
+    def assert_same_particles(self, container, particles):
+        self.assertEqual(
+            container.count_of(CUBA.PARTICLE),
+            particles.count_of(CUBA.PARTICLE))
+        self.assertEqual(
+            container.count_of(CUBA.BOND), particles.count_of(CUBA.BOND))
+        for particle in particles.iter(item_type=CUBA.PARTICLE):
+            result = container.get(particle.uid)
+            assert_array_almost_equal(
+                result.coordinates, particle.coordinates)
+            self.assertEqual(result.data, particle.data)
+        for bond in particles.iter(item_type=CUBA.BOND):
+            result = container.get(bond.uid)
+            self.assertEqual(result.particles, bond.particles)
+            self.assertEqual(result.data, bond.data)
+
+
+class TestStreamMesh(unittest.TestCase):
+
+    def test_in_memory(self):
+        # given
+        mesh = create_mesh()
+
+        # when
+        container = stream_mesh(mesh)
+
+        # then
+        self.assertIsInstance(container, VTKMesh)
+        self.assert_same_mesh(container, mesh)
+
+    def test_small_chunks_memory_mapped(self):
+        # given
+        mesh = create_mesh()
+
+        # when
+        container = stream_mesh(mesh, memory_budget=ITEM_MEMORY)
+
+        # then
+        self.assert_same_mesh(container, mesh)
+
+    def test_region(self):
+        # given
+        mesh = create_mesh()
+        region = BoxRegion((-0.5, -0.5, -0.5), (1.5, 1.5, 0.5))
+
+        # when
+        container = stream_mesh(mesh, region=region)
+
+        # then
+        self.assertEqual(container.count_of(CUBA.POINT), 3)
+        self.assertEqual(sorted(container.index2point), [0, 1, 2])
+        self.assertEqual(container.count_of(CUBA.EDGE), 1)
+        self.assertEqual(container.count_of(CUBA.FACE), 1)
+        self.assertEqual(container.count_of(CUBA.CELL), 0)
+        for item_type in (CUBA.EDGE, CUBA.FACE):
+            for element in container.iter(item_type=item_type):
+                self.assertEqual(
+                    element.points, mesh.get(element.uid).points)
+
+    def test_region_with_any_element_point(self):
+        # given
+        mesh = create_mesh()
+        region = BoxRegion((-0.5, -0.5, -0.5), (0.5, 0.5, 0.5))
+
+        # when
+        container = stream_mesh(
+            mesh, region=region, element_selection='any')
+
+        # then
+        # the edge, the first face and the cell share the first point
+        self.assertEqual(container.count_of(CUBA.POINT), 4)
+        self.assertEqual(container.count_of(CUBA.EDGE), 1)
+        self.assertEqual(container.count_of(CUBA.FACE), 1)
+        self.assertEqual(container.count_of(CUBA.CELL), 1)
+        for point in container.iter(item_type=CUBA.POINT):
+            self.assertEqual(point.data, mesh.get(point.uid).data)
+
+    def assert_same_mesh(self, container, mesh):
+        for point in mesh.iter(item_type=CUBA.POINT):
+            result = container.get(point.uid)
+            assert_array_almost_equal(result.coordinates, point.coordinates)
+            self.assertEqual(result.data, point.data)
+        for item_type in (CUBA.EDGE, CUBA.FACE, CUBA.CELL):
+            self.assertEqual(
+                container.count_of(item_type), mesh.count_of(item_type))
+            for element in mesh.iter(item_type=item_type):
+                result = container.get(element.uid)
+                self.assertEqual(result.points, element.points)
+                self.assertEqual(result.data, element.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
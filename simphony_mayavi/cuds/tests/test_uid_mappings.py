@@ -0,0 +1,120 @@
+import tempfile
+import unittest
+import uuid
+
+import numpy
+from numpy.testing import assert_array_equal
+
+from simphony_mayavi.cuds.api import UIDToIndex, IndexToUID
+from simphony_mayavi.cuds.uid_mappings import uids_to_array, hex_to_array
+
+
+def memory_mapped(shape, dtype, fill=None):
+    array = numpy.memmap(
+        tempfile.TemporaryFile(), dtype=dtype, mode='w+', shape=shape)
+    if fill is not None:
+        array.fill(fill)
+    return array
+
+
+class TestUIDMappings(unittest.TestCase):
+
+    def setUp(self):
+        self.uids = [uuid.uuid4() for _ in range(1000)]
+        self.array = uids_to_array(self.uids)
+
+    def test_uids_to_array(self):
+        # then
+        self.assertEqual(self.array.shape, (1000, 16))
+        self.assertEqual(self.array[3].tobytes(), self.uids[3].bytes)
+        self.assertEqual(uids_to_array([]).shape, (0, 16))
+
+    def test_hex_to_array(self):
+        # given
+        values = numpy.array([uid.hex for uid in self.uids])
+
+        # when
+        array = hex_to_array(values)
+
+        # then
+        assert_array_equal(array, self.array)
+        self.assertEqual(
+            hex_to_array(values[:4].reshape(2, 2)).shape, (2, 2, 16))
+        self.assertEqual(hex_to_array(values[:0]).shape, (0, 16))
+        with self.assertRaises(ValueError):
+            hex_to_array(numpy.array(['', self.uids[0].hex]))
+
+    def test_lookup(self):
+        # given
+        uid2index = UIDToIndex(self.array, allocate=memory_mapped)
+        index2uid = IndexToUID(self.array)
+
+        # then
+        self.assertEqual(len(uid2index), 1000)
+        self.assertEqual(len(index2uid), 1000)
+        for index, uid in enumerate(self.uids):
+            self.assertEqual(uid2index[uid], index)
+            self.assertEqual(index2uid[index], uid)
+        self.assertNotIn(uuid.uuid4(), uid2index)
+        self.assertNotIn(1000, index2uid)
+        self.assertNotIn('1', index2uid)
+        self.assertEqual(list(uid2index), self.uids)
+        self.assertEqual(list(index2uid), range(1000))
+
+    def test_indices(self):
+        # given
+        uid2index = UIDToIndex(self.array)
+        missing = uuid.uuid4()
+
+        # when
+        indices = uid2index.indices(self.uids[::-1] + [missing])
+        from_array = uid2index.indices(uids_to_array([missing] + self.uids))
+
+        # then
+        assert_array_equal(indices, range(999, -1, -1) + [-1])
+        assert_array_equal(from_array, [-1] + range(1000))
+
+    def test_colliding_uids(self):
+        # given
+        uids = [uuid.UUID(int=(7 << 64) + index * 64) for index in range(500)]
+        uid2index = UIDToIndex(uids_to_array(uids))
+
+        # when
+        indices = uid2index.indices(uids)
+
+        # then
+        assert_array_equal(indices, range(500))
+
+    def test_changes(self):
+        # given
+        uid2index = UIDToIndex(self.array)
+        index2uid = IndexToUID(self.array)
+        uid, last = self.uids[10], self.uids[-1]
+        new = uuid.uuid4()
+
+        # when
+        uid2index[last], uid2index[uid] = 10, 999
+        index2uid[10], index2uid[999] = last, uid
+        del uid2index[uid]
+        del index2uid[999]
+        uid2index[new] = 999
+        index2uid[999] = new
+
+        # then
+        self.assertEqual(len(uid2index), 1000)
+        self.assertNotIn(uid, uid2index)
+        self.assertEqual(uid2index[last], 10)
+        self.assertEqual(uid2index[new], 999)
+        self.assertEqual(index2uid[10], last)
+        self.assertEqual(index2uid[999], new)
+        assert_array_equal(uid2index.indices([new, uid, last]), [999, -1, 10])
+        self.assertItemsEqual(
+            uid2index, self.uids[:10] + self.uids[11:] + [new])
+        self.assertEqual(
+            dict(uid2index),
+            {uid: index for index, uid in index2uid.iteritems()})
+        self.assertFalse(uid2index.unchanged)
+
+
+if __name__ == '__main__':
+    unittest.main()
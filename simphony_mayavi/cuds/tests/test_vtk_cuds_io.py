@@ -0,0 +1,111 @@
+import unittest
+import shutil
+import tempfile
+
+from numpy.testing import assert_array_almost_equal
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.lattice import make_cubic_lattice, make_hexagonal_lattice
+from simphony.cuds.mesh import Mesh, Point, Face
+from simphony.cuds.particles import Particles, Particle, Bond
+
+from simphony_mayavi.cuds.api import (
+    VTKParticles, VTKMesh, VTKLattice, save_vtk_cuds, load_vtk_cuds)
+
+
+class TestVTKCUDSIO(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_particles(self):
+        # given
+        particles = Particles('test')
+        particles.data = DataContainer(TIME_STEP=0.1)
+        uids = particles.add([
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(4)])
+        # a missing value
+        particles.add([Particle(coordinates=(5.0, 0.0, 0.0))])
+        bond_uids = particles.add([
+            Bond(particles=uids[:2], data=DataContainer(MASS=1.0))])
+        container = VTKParticles.from_particles(particles)
+
+        # when
+        save_vtk_cuds(container, self.temp_dir)
+        loaded = load_vtk_cuds(self.temp_dir)
+
+        # then
+        self.assertIsInstance(loaded, VTKParticles)
+        self.assertEqual(loaded.name, 'test')
+        self.assertEqual(loaded.data, DataContainer(TIME_STEP=0.1))
+        self.assertEqual(loaded.count_of(CUBA.PARTICLE), 5)
+        for particle in particles.iter(item_type=CUBA.PARTICLE):
+            result = loaded.get(particle.uid)
+            assert_array_almost_equal(
+                result.coordinates, particle.coordinates)
+            self.assertEqual(result.data, particle.data)
+        bond = loaded.get(bond_uids[0])
+        self.assertEqual(bond.particles, tuple(uids[:2]))
+        self.assertEqual(bond.data, DataContainer(MASS=1.0))
+
+    def test_mesh(self):
+        # given
+        mesh = Mesh('test')
+        uids = mesh.add([
+            Point(coordinates=coordinates,
+                  data=DataContainer(TEMPERATURE=1.0))
+            for coordinates in ((0, 0, 0), (1, 0, 0), (0, 1, 0))])
+        face_uids = mesh.add([
+            Face(points=uids, data=DataContainer(MASS=2.0))])
+        container = VTKMesh.from_mesh(mesh)
+
+        # when
+        save_vtk_cuds(container, self.temp_dir)
+        loaded = load_vtk_cuds(self.temp_dir)
+
+        # then
+        self.assertIsInstance(loaded, VTKMesh)
+        for uid in uids:
+            self.assertEqual(loaded.get(uid).data, mesh.get(uid).data)
+        face = loaded.get(face_uids[0])
+        self.assertEqual(face.points, tuple(uids))
+        self.assertEqual(face.data, DataContainer(MASS=2.0))
+
+    def test_lattices(self):
+        for lattice in (
+                make_cubic_lattice('test', 0.1, (3, 6, 5)),
+                make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 6))):
+            # given
+            for node in lattice.iter(item_type=CUBA.NODE):
+                node.data = DataContainer(TEMPERATURE=sum(node.index))
+                lattice.update([node])
+            container = VTKLattice.from_lattice(lattice)
+            directory = tempfile.mkdtemp(dir=self.temp_dir)
+
+            # when
+            save_vtk_cuds(container, directory)
+            loaded = load_vtk_cuds(directory)
+
+            # then
+            self.assertIsInstance(loaded, VTKLattice)
+            self.assertEqual(loaded.size, container.size)
+            assert_array_almost_equal(loaded.origin, container.origin)
+            self.assertEqual(
+                loaded.primitive_cell.bravais_lattice,
+                container.primitive_cell.bravais_lattice)
+            for node in lattice.iter(item_type=CUBA.NODE):
+                self.assertEqual(loaded.get(node.index).data, node.data)
+
+    def test_unsupported_container(self):
+        with self.assertRaises(TypeError):
+            save_vtk_cuds(Particles('test'), self.temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 from functools import partial
 
-from numpy.testing import assert_array_equal
+from mock import patch
+
+import numpy
+from numpy.testing import assert_array_equal, assert_array_almost_equal
 from hypothesis import given
 from hypothesis.strategies import sampled_from
 from tvtk.api import tvtk
@@ -238,6 +241,462 @@ class TestVTKLattice(unittest.TestCase):
             with self.assertRaises(ValueError):
                 VTKLattice.from_lattice(lattice)
 
+    @given(lattice_types)
+    def test_iter_chunks(self, lattice):
+        # given
+        self.add_velocity(lattice)
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+
+        # when
+        chunks = list(vtk_lattice.iter_chunks(7, keys=[CUBA.VELOCITY]))
+
+        # then
+        self.assertEqual(
+            sum(len(chunk[0]) for chunk in chunks),
+            vtk_lattice.count_of(CUBA.NODE))
+        for indices, coordinates, data in chunks:
+            self.assertLessEqual(len(indices), 7)
+            assert_array_equal(data[CUBA.VELOCITY], indices)
+            for index, coordinate in zip(indices, coordinates):
+                assert_array_almost_equal(
+                    coordinate, lattice.get_coordinate(tuple(index)))
+
+    @given(lattice_types)
+    def test_get_node_arrays(self, lattice):
+        # given
+        self.add_velocity(lattice)
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        indices = [(0, 0, 0), (2, 1, 3), (1, 3, 0)]
+
+        # when
+        data = vtk_lattice.get_node_arrays(indices, keys=[CUBA.VELOCITY])
+
+        # then
+        self.assertEqual(data.keys(), [CUBA.VELOCITY])
+        assert_array_equal(data[CUBA.VELOCITY], indices)
+
+    def test_versions(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (3, 6, 5))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        geometry = vtk_lattice.geometry_version
+        topology = vtk_lattice.topology_version
+        version = vtk_lattice.point_data.column_version(CUBA.TEMPERATURE)
+
+        # when
+        vtk_lattice.update_node_arrays(
+            {CUBA.TEMPERATURE: [1.0]}, [(0, 0, 0)])
+
+        # then
+        self.assertEqual(vtk_lattice.geometry_version, geometry)
+        self.assertEqual(vtk_lattice.topology_version, topology)
+        self.assertGreater(
+            vtk_lattice.point_data.column_version(CUBA.TEMPERATURE), version)
+
+    def test_get_node_arrays_out_of_range(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (3, 6, 5))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+
+        # when/then
+        with self.assertRaises(IndexError):
+            vtk_lattice.get_node_arrays([(3, 0, 0)])
+
+    def test_update_node_arrays(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (3, 6, 5))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        indices = [(0, 0, 0), (2, 1, 3)]
+
+        # when
+        vtk_lattice.update_node_arrays(
+            {CUBA.TEMPERATURE: [1.0, 2.0]}, indices)
+
+        # then
+        self.assertEqual(
+            vtk_lattice.get((2, 1, 3)),
+            LatticeNode((2, 1, 3), data=DataContainer(TEMPERATURE=2.0)))
+        self.assertEqual(
+            vtk_lattice.get((1, 1, 1)), LatticeNode((1, 1, 1)))
+
+    @given(lattice_types)
+    def test_creating_a_vtk_lattice_from_vtk_lattice(self, lattice):
+        # given
+        self.add_velocity(lattice)
+        source = VTKLattice.from_lattice(lattice)
+
+        # when
+        vtk_lattice = VTKLattice.from_lattice(source)
+
+        # then
+        self.assertEqual(vtk_lattice.size, source.size)
+        for node in source.iter(item_type=CUBA.NODE):
+            self.assertEqual(vtk_lattice.get(node.index), node)
+
+    def test_creating_a_vtk_lattice_from_vtk_lattice_keeps_missing_values(
+            self):
+        # given
+        source = VTKLattice.from_lattice(
+            make_cubic_lattice('test', 0.1, (3, 6, 5)))
+        source.update_node_arrays({CUBA.TEMPERATURE: [1.0]}, [(1, 2, 3)])
+
+        # when
+        vtk_lattice = VTKLattice.from_lattice(source)
+
+        # then
+        self.assertEqual(
+            vtk_lattice.get((1, 2, 3)),
+            LatticeNode((1, 2, 3), data=DataContainer(TEMPERATURE=1.0)))
+        self.assertEqual(vtk_lattice.get((1, 1, 3)), LatticeNode((1, 1, 3)))
+
+    def test_creating_a_vtk_lattice_from_lattice_with_missing_values(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 6))
+        node = lattice.get((4, 3, 5))
+        node.data = DataContainer(TEMPERATURE=2.0)
+        lattice.update([node])
+
+        # when
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+
+        # then
+        self.assertEqual(vtk_lattice.point_data.cubas, {CUBA.TEMPERATURE})
+        for node in lattice.iter(item_type=CUBA.NODE):
+            self.assertEqual(vtk_lattice.get(node.index), node)
+
+    def test_update_nodes_in_blocks(self):
+        # given
+        vtk_lattice = VTKLattice.from_lattice(
+            make_cubic_lattice('test', 0.1, (3, 6, 5)))
+        nodes = []
+        for node in vtk_lattice.iter(item_type=CUBA.NODE):
+            if node.index[0] == 1:
+                node.data = DataContainer(TEMPERATURE=float(node.index[2]))
+            else:
+                node.data = DataContainer(VELOCITY=node.index)
+            nodes.append(node)
+
+        # when
+        with patch('simphony_mayavi.cuds.vtk_lattice.DEFAULT_CHUNK_SIZE', 7):
+            vtk_lattice.update(nodes)
+
+        # then
+        for node in nodes:
+            self.assertEqual(vtk_lattice.get(node.index), node)
+        with self.assertRaises(IndexError):
+            vtk_lattice.update([LatticeNode((3, 0, 0))])
+
+    @given(lattice_types)
+    def test_update_from_lattice(self, lattice):
+        # given
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        data_set = vtk_lattice.data_set
+        self.add_velocity(lattice)
+
+        # when
+        updated = vtk_lattice.update_from_lattice(lattice)
+
+        # then
+        self.assertTrue(updated)
+        self.assertIs(vtk_lattice.data_set, data_set)
+        for node in lattice.iter(item_type=CUBA.NODE):
+            self.assertEqual(vtk_lattice.get(node.index), node)
+
+    def test_patch_from_lattice(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (4, 5, 6))
+        self.add_velocity(lattice)
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        nodes = []
+        for node in lattice.iter(item_type=CUBA.NODE):
+            node.data[CUBA.VELOCITY] = (-1.0, -1.0, -1.0)
+            nodes.append(node)
+        lattice.update(nodes)
+
+        # when
+        updated = vtk_lattice.patch_from_lattice(
+            lattice, [(1, 2, 3), (3, 4, 5)])
+
+        # then
+        self.assertTrue(updated)
+        for index in [(1, 2, 3), (3, 4, 5)]:
+            self.assertEqual(vtk_lattice.get(index), lattice.get(index))
+        self.assertNotEqual(
+            tuple(vtk_lattice.get((0, 0, 0)).data[CUBA.VELOCITY]),
+            (-1.0, -1.0, -1.0))
+
+        # when
+        updated = vtk_lattice.patch_from_lattice(lattice, [(4, 0, 0)])
+
+        # then
+        self.assertFalse(updated)
+
+    def test_update_from_vtk_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 6))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        self.add_velocity(lattice)
+        source = VTKLattice.from_lattice(lattice)
+
+        # when
+        updated = vtk_lattice.update_from_lattice(source)
+
+        # then
+        self.assertTrue(updated)
+        for node in source.iter(item_type=CUBA.NODE):
+            self.assertEqual(vtk_lattice.get(node.index), node)
+
+    def test_update_from_lattice_with_different_geometry(self):
+        # given
+        vtk_lattice = VTKLattice.from_lattice(
+            make_cubic_lattice('test', 0.1, (3, 6, 5)))
+        lattices = [
+            make_cubic_lattice('test', 0.1, (3, 6, 4)),
+            make_cubic_lattice('test', 0.2, (3, 6, 5)),
+            make_cubic_lattice('test', 0.1, (3, 6, 5), (1, 0, 0)),
+            make_tetragonal_lattice('test', 0.1, 0.1, (3, 6, 5))]
+
+        for lattice in lattices:
+            self.add_velocity(lattice)
+
+            # when
+            updated = vtk_lattice.update_from_lattice(lattice)
+
+            # then
+            self.assertFalse(updated)
+            self.assertNotIn(CUBA.VELOCITY, vtk_lattice.point_data.cubas)
+
+    @given(lattice_types)
+    def test_creating_an_implicit_vtk_lattice(self, lattice):
+        # given
+        self.add_velocity(lattice)
+
+        # when
+        vtk_lattice = VTKLattice.from_lattice(lattice, implicit=True)
+
+        # then
+        self.assertIsInstance(vtk_lattice.data_set, tvtk.ImageData)
+        self.assertEqual(vtk_lattice.size, lattice.size)
+        for node in lattice.iter(item_type=CUBA.NODE):
+            self.assertEqual(vtk_lattice.get(node.index), node)
+            assert_array_almost_equal(
+                vtk_lattice.get_coordinate(node.index),
+                lattice.get_coordinate(node.index))
+
+    def test_render_data_set_of_implicit_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 6))
+        self.add_velocity(lattice)
+        vtk_lattice = VTKLattice.from_lattice(lattice, implicit=True)
+
+        # when
+        data_set = vtk_lattice.render_data_set
+
+        # then
+        self.assertTrue(vtk_lattice.implicit)
+        self.assertIsInstance(data_set, tvtk.StructuredGrid)
+        self.assertEqual(data_set.number_of_points, 120)
+        points = data_set.points.to_array()
+        for node in lattice.iter(item_type=CUBA.NODE):
+            point_id = vtk_lattice._get_point_id(node.index)
+            assert_array_almost_equal(
+                points[point_id], lattice.get_coordinate(node.index))
+        assert_array_equal(
+            data_set.point_data.get_array(CUBA.VELOCITY.name).to_array(),
+            vtk_lattice.data_set.point_data.get_array(
+                CUBA.VELOCITY.name).to_array())
+        self.assertIsInstance(vtk_lattice.data_set, tvtk.ImageData)
+
+    def test_render_data_set_of_implicit_lattice_follows_updates(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 6))
+        vtk_lattice = VTKLattice.from_lattice(lattice, implicit=True)
+        data_set = vtk_lattice.render_data_set
+
+        # when
+        with vtk_lattice.batch():
+            vtk_lattice.update_node_arrays(
+                {CUBA.TEMPERATURE: numpy.arange(120.0)})
+
+        # then
+        self.assertIs(vtk_lattice.render_data_set, data_set)
+        assert_array_equal(
+            data_set.point_data.get_array(CUBA.TEMPERATURE.name).to_array(),
+            numpy.arange(120.0))
+
+    def test_render_transform(self):
+        # given
+        lattice = make_hexagonal_lattice(
+            'test', 0.1, 0.2, (5, 4, 6), (1.0, 2.0, 3.0))
+        vtk_lattice = VTKLattice.from_lattice(lattice, implicit=True)
+        transform = vtk_lattice.render_transform
+
+        # when/then
+        for index in [(0, 0, 0), (4, 3, 5), (2, 1, 3)]:
+            assert_array_almost_equal(
+                transform.transform_point(
+                    numpy.add(index, lattice.origin)),
+                lattice.get_coordinate(index))
+        self.assertIsNone(VTKLattice.from_lattice(lattice).render_transform)
+
+    def test_render_data_set_of_explicit_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 6))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+
+        # when/then
+        self.assertFalse(vtk_lattice.implicit)
+        self.assertIs(vtk_lattice.render_data_set, vtk_lattice.data_set)
+
+    def test_create_empty_implicit_lattice(self):
+        # given
+        primitive_cell = PrimitiveCell.for_hexagonal_lattice(0.1, 0.2)
+
+        # when
+        vtk_lattice = VTKLattice.empty(
+            'test', primitive_cell, (5, 4, 6), (1.0, 0.0, 0.0),
+            implicit=True)
+
+        # then
+        self.assertTrue(vtk_lattice.implicit)
+        self.assertEqual(vtk_lattice.count_of(CUBA.NODE), 120)
+        assert_array_almost_equal(
+            vtk_lattice.get_coordinate((1, 1, 0)),
+            numpy.add((1.0, 0.0, 0.0), numpy.add(
+                primitive_cell.p1, primitive_cell.p2)))
+
+    @given(lattice_types)
+    def test_get_point_ids(self, lattice):
+        # given
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        nx, ny, nz = lattice.size
+        indices = [
+            (0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1),
+            (nx - 1, ny - 1, nz - 1), (nx, 0, 0), (0, -1, 0)]
+
+        # when
+        point_ids = vtk_lattice.get_point_ids(indices)
+
+        # then
+        assert_array_equal(
+            point_ids, [0, 1, nx, nx * ny, nx * ny * nz - 1, -1, -1])
+
+    @given(lattice_types)
+    def test_get_coordinates(self, lattice):
+        # given
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        indices = [(0, 0, 0), (2, 1, 3), (1, 3, 0)]
+
+        # when
+        coordinates = vtk_lattice.get_coordinates(indices)
+
+        # then
+        for index, coordinate in zip(indices, coordinates):
+            assert_array_almost_equal(
+                coordinate, lattice.get_coordinate(index))
+
+    def test_get_coordinates_out_of_range(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (3, 6, 5))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+
+        # when/then
+        with self.assertRaises(IndexError):
+            vtk_lattice.get_coordinates([(0, 0, 0), (0, 6, 0)])
+
+    @given(lattice_types)
+    def test_sub_lattice_with_stride(self, lattice):
+        # given
+        self.add_velocity(lattice)
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        start = numpy.array((1, 0, 1))
+        step = numpy.array((2, 1, 2))
+
+        # when
+        sub_lattice = vtk_lattice.sub_lattice(start=start, step=step)
+
+        # then
+        expected_size = tuple(
+            (numpy.array(lattice.size) - start + step - 1) // step)
+        self.assertEqual(sub_lattice.size, expected_size)
+        for node in sub_lattice.iter(item_type=CUBA.NODE):
+            index = tuple(start + step * node.index)
+            self.assertEqual(
+                node,
+                LatticeNode(node.index, data=lattice.get(index).data))
+            assert_array_almost_equal(
+                sub_lattice.get_coordinate(node.index),
+                lattice.get_coordinate(index))
+
+    @given(lattice_types)
+    def test_sub_lattice_of_planes(self, lattice):
+        # given
+        self.add_velocity(lattice)
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        nx, ny, nz = lattice.size
+
+        # when
+        sub_lattice = vtk_lattice.sub_lattice(
+            start=(0, 0, 1), stop=(nx, ny, 3))
+
+        # then
+        self.assertEqual(sub_lattice.size, (nx, ny, 2))
+        for node in sub_lattice.iter(item_type=CUBA.NODE):
+            index = (node.index[0], node.index[1], node.index[2] + 1)
+            self.assertEqual(
+                node,
+                LatticeNode(node.index, data=lattice.get(index).data))
+            assert_array_almost_equal(
+                sub_lattice.get_coordinate(node.index),
+                lattice.get_coordinate(index))
+
+    def test_sub_lattice_does_not_share_the_data(self):
+        # given
+        vtk_lattice = VTKLattice.from_lattice(
+            make_cubic_lattice('test', 0.1, (3, 6, 5)))
+        vtk_lattice.update_node_arrays({CUBA.TEMPERATURE: numpy.zeros(90)})
+        sub_lattice = vtk_lattice.sub_lattice(
+            start=(0, 0, 1), stop=(3, 6, 3))
+
+        # when
+        vtk_lattice.update_node_arrays({CUBA.TEMPERATURE: numpy.ones(90)})
+
+        # then
+        assert_array_equal(
+            sub_lattice.get_node_arrays(
+                keys=[CUBA.TEMPERATURE])[CUBA.TEMPERATURE],
+            numpy.zeros(36))
+
+    def test_sub_lattice_keeps_missing_values(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (3, 6, 5))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+        vtk_lattice.update_node_arrays(
+            {CUBA.TEMPERATURE: [1.0]}, [(1, 2, 3)])
+
+        # when
+        sub_lattice = vtk_lattice.sub_lattice(start=(1, 0, 0), stop=(2, 6, 5))
+
+        # then
+        self.assertEqual(sub_lattice.size, (1, 6, 5))
+        self.assertEqual(
+            sub_lattice.get((0, 2, 3)),
+            LatticeNode((0, 2, 3), data=DataContainer(TEMPERATURE=1.0)))
+        self.assertEqual(sub_lattice.get((0, 1, 3)), LatticeNode((0, 1, 3)))
+
+    def test_sub_lattice_with_invalid_range(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (3, 6, 5))
+        vtk_lattice = VTKLattice.from_lattice(lattice)
+
+        # when/then
+        with self.assertRaises(ValueError):
+            vtk_lattice.sub_lattice(stop=(4, 6, 5))
+        with self.assertRaises(ValueError):
+            vtk_lattice.sub_lattice(start=(2, 0, 0), stop=(2, 6, 5))
+        with self.assertRaises(ValueError):
+            vtk_lattice.sub_lattice(step=(0, 1, 1))
+
     def add_velocity(self, lattice):
         new_nodes = []
         for node in lattice.iter(item_type=CUBA.NODE):
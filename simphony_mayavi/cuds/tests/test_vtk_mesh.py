@@ -2,7 +2,10 @@ import unittest
 import itertools
 from functools import partial
 
+from mock import patch
+
 import numpy
+from numpy.testing import assert_array_equal
 from tvtk.api import tvtk
 
 from simphony.cuds.mesh import Mesh, Point, Face, Edge, Cell
@@ -168,6 +171,248 @@ class TestVTKMesh(unittest.TestCase):
         for cell in cells:
             self.assertEqual(vtk_container.get(cell.uid), cell)
 
+    def test_update_from_mesh(self):
+        # given
+        points = [
+            Point(coordinates=point, data=DataContainer(TEMPERATURE=index))
+            for index, point in enumerate(self.points)]
+        container = Mesh('test')
+        container.add(points)
+        elements = [
+            Edge(points=[points[index].uid for index in edge])
+            for edge in self.edges]
+        elements.extend(
+            Face(points=[points[index].uid for index in face])
+            for face in self.faces)
+        elements.extend(
+            Cell(points=[points[index].uid for index in cell])
+            for cell in self.cells)
+        container.add(elements)
+        vtk_container = VTKMesh.from_mesh(container)
+        data_set = vtk_container.data_set
+        for point in points:
+            point.coordinates = (1.0, 2.0, 3.0)
+            point.data = DataContainer(TEMPERATURE=-1.0)
+        container.update(points)
+        for index, element in enumerate(elements):
+            element.data = DataContainer(MASS=index)
+        container.update(elements)
+
+        # when
+        updated = vtk_container.update_from_mesh(container)
+
+        # then
+        self.assertTrue(updated)
+        self.assertIs(vtk_container.data_set, data_set)
+        for point in points:
+            self.assertEqual(vtk_container.get(point.uid), point)
+        for element in elements:
+            self.assertEqual(vtk_container.get(element.uid), element)
+
+    def test_patch_from_mesh(self):
+        # given
+        points = [
+            Point(coordinates=point, data=DataContainer(TEMPERATURE=index))
+            for index, point in enumerate(self.points)]
+        container = Mesh('test')
+        container.add(points)
+        faces = [
+            Face(points=[points[index].uid for index in face],
+                 data=DataContainer(MASS=index))
+            for index, face in enumerate(self.faces)]
+        container.add(faces)
+        vtk_container = VTKMesh.from_mesh(container)
+        for point in points:
+            point.coordinates = (1.0, 2.0, 3.0)
+            point.data = DataContainer(TEMPERATURE=-1.0)
+        container.update(points)
+        for face in faces:
+            face.data = DataContainer(MASS=-1.0)
+        container.update(faces)
+
+        # when
+        updated = vtk_container.patch_from_mesh(
+            container, [points[1].uid, faces[0].uid])
+
+        # then
+        self.assertTrue(updated)
+        self.assertEqual(vtk_container.get(points[1].uid), points[1])
+        self.assertEqual(vtk_container.get(faces[0].uid), faces[0])
+        self.assertEqual(
+            vtk_container.get(points[0].uid).data[CUBA.TEMPERATURE], 0)
+        self.assertEqual(
+            vtk_container.get(faces[1].uid).data[CUBA.MASS], 1)
+
+        # when
+        updated = vtk_container.patch_from_mesh(
+            container, [points[2].uid], coordinates=False)
+
+        # then
+        self.assertTrue(updated)
+        point = vtk_container.get(points[2].uid)
+        self.assertEqual(point.data, points[2].data)
+        assert_array_equal(point.coordinates, self.points[2])
+
+    def test_update_from_vtk_mesh(self):
+        # given
+        points = [
+            Point(coordinates=point, data=DataContainer(TEMPERATURE=index))
+            for index, point in enumerate(self.points)]
+        container = Mesh('test')
+        container.add(points)
+        container.add(
+            Face(points=[points[index].uid for index in face])
+            for face in self.faces)
+        vtk_container = VTKMesh.from_mesh(container)
+        data_set = vtk_container.data_set
+        for point in points:
+            point.coordinates = (1.0, 2.0, 3.0)
+            point.data = DataContainer(MASS=-1.0)
+        container.update(points)
+        frame = VTKMesh.from_mesh(container)
+
+        # when
+        with patch.object(frame, 'iter') as iterate:
+            updated = vtk_container.update_from_mesh(frame)
+
+        # then
+        self.assertTrue(updated)
+        self.assertFalse(iterate.called)
+        self.assertIs(vtk_container.data_set, data_set)
+        for point in points:
+            self.assertEqual(vtk_container.get(point.uid), point)
+
+    def test_update_from_mesh_with_different_topology(self):
+        # given
+        points = [
+            Point(coordinates=point, data=DataContainer(TEMPERATURE=index))
+            for index, point in enumerate(self.points)]
+        container = Mesh('test')
+        container.add(points)
+        edge = Edge(points=[points[0].uid, points[1].uid])
+        container.add([edge])
+        vtk_container = VTKMesh.from_mesh(container)
+        edge.points = [points[0].uid, points[2].uid]
+        container.update([edge])
+        points[0].data = DataContainer(TEMPERATURE=-1.0)
+        container.update(points[:1])
+
+        # when
+        updated = vtk_container.update_from_mesh(container)
+
+        # then
+        self.assertFalse(updated)
+        self.assertEqual(vtk_container.get(points[0].uid).data, DataContainer(
+            TEMPERATURE=0))
+
+        # given
+        container.add([Face(points=[point.uid for point in points[:3]])])
+
+        # when
+        updated = vtk_container.update_from_mesh(container)
+
+        # then
+        self.assertFalse(updated)
+
+    def test_versions(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=(0.0, 0.0, index)) for index in range(3)])
+        geometry = container.geometry_version
+        topology = container.topology_version
+
+        # when
+        container.add([Face(points=uids)])
+
+        # then
+        self.assertEqual(container.geometry_version, geometry)
+        self.assertGreater(container.topology_version, topology)
+
+        # when
+        topology = container.topology_version
+        point = container.get(uids[0])
+        point.coordinates = (1.0, 1.0, 1.0)
+        container.update([point])
+
+        # then
+        self.assertGreater(container.geometry_version, geometry)
+        self.assertEqual(container.topology_version, topology)
+
+        # when
+        container.add_element_block(CUBA.EDGE, [[0, 1], [1, 2]])
+
+        # then
+        self.assertGreater(container.topology_version, topology)
+
+    def test_changes_since(self):
+        # given
+        container = Mesh('test')
+        uids = container.add(
+            Point(coordinates=(0.0, 0.0, index))
+            for index in range(3))
+        container.add([Face(points=uids)])
+        vtk_container = VTKMesh.from_mesh(container)
+        version = vtk_container.version
+        point = container.get(uids[0])
+        point.coordinates = (1.0, 0.0, 0.0)
+        container.update([point])
+
+        # when
+        vtk_container.update_from_mesh(container)
+        changes = vtk_container.changes_since(version)
+
+        # then
+        self.assertTrue(changes['geometry'])
+        self.assertFalse(changes['topology'])
+        self.assertFalse(changes['arrays'])
+        self.assertEqual(changes['point_data'], set())
+        self.assertEqual(changes['cell_data'], set())
+
+    def test_batch(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=(0.0, 0.0, index)) for index in range(3)])
+        container.add([Edge(points=uids[:2])])
+        self.assertEqual(container.count_of(CUBA.EDGE), 1)
+
+        # when
+        with container.batch():
+            self.assertTrue(container.batching)
+            container.add([Edge(points=uids[1:])])
+            container.add([Face(points=uids)])
+
+        # then
+        self.assertFalse(container.batching)
+        self.assertEqual(container.count_of(CUBA.EDGE), 2)
+        self.assertEqual(container.count_of(CUBA.FACE), 1)
+
+    def test_batch_defers_the_modified_events(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=(0.0, 0.0, index)) for index in range(3)])
+        container.add([Edge(points=uids[:2])])
+        points = tvtk.to_vtk(container.data_set.points.data)
+        cells = tvtk.to_vtk(container.data_set.get_cells().data)
+        m_times = points.GetMTime(), cells.GetMTime()
+
+        # when
+        with container.batch():
+            container.add(
+                [Point(coordinates=(1.0, 0.0, index)) for index in range(3)])
+            container.add_element_block(CUBA.EDGE, [[0, 2], [1, 2]])
+
+            # then
+            self.assertEqual((points.GetMTime(), cells.GetMTime()), m_times)
+
+        # then
+        self.assertGreater(points.GetMTime(), m_times[0])
+        self.assertGreater(cells.GetMTime(), m_times[1])
+        self.assertEqual(container.data_set.points.to_array().shape, (6, 3))
+        self.assertEqual(container.count_of(CUBA.EDGE), 3)
+
     def test_initialization_from_empty_cuds(self):
         # given
         container = Mesh('test')
@@ -260,6 +505,205 @@ class TestVTKMesh(unittest.TestCase):
                     points=[index2point[i] for i in self.cells[index]],
                     data=DataContainer(TEMPERATURE=index + 3.0)))
 
+    def test_element_counts_after_adding_to_data_set(self):
+        # given
+        data_set = tvtk.UnstructuredGrid()
+        data_set.points = self.points
+        cell_array = tvtk.CellArray()
+        cells = [4] + self.cells[0] + [3] + self.faces[0]
+        cell_types = numpy.array(
+            [tvtk.Tetra().cell_type, tvtk.Triangle().cell_type])
+        cell_array.set_cells(2, cells)
+        data_set.set_cells(cell_types, numpy.array([0, 5]), cell_array)
+        container = VTKMesh.from_dataset('test', data_set=data_set)
+        self.assertEqual(container.count_of(CUBA.EDGE), 0)
+        self.assertFalse(container.has_type(CUBA.EDGE))
+        index2point = container.index2point
+
+        # when
+        edges = [
+            Edge(points=[index2point[index] for index in edge])
+            for edge in self.edges]
+        container.add(edges)
+
+        # then
+        self.assertEqual(container.count_of(CUBA.EDGE), 2)
+        self.assertEqual(container.count_of(CUBA.FACE), 1)
+        self.assertEqual(container.count_of(CUBA.CELL), 1)
+        self.assertTrue(container.has_type(CUBA.EDGE))
+        iterated = list(container.iter(item_type=CUBA.EDGE))
+        self.assertEqual(len(iterated), 2)
+        for edge, expected in zip(iterated, edges):
+            self.assertEqual(edge, expected)
+
+    def test_add_element_block(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=point) for point in self.points])
+        container.add(
+            [Edge(points=[uids[index] for index in self.edges[0]])])
+
+        # when
+        face_uids = container.add_element_block(
+            CUBA.FACE, [[0, 1, 2], [2, 7, 11]],
+            data={CUBA.TEMPERATURE: [1.0, 2.0]})
+        cell_uids = container.add_element_block(
+            CUBA.CELL, [self.cells[1]])
+
+        # then
+        self.assertEqual(container.count_of(CUBA.EDGE), 1)
+        self.assertEqual(container.count_of(CUBA.FACE), 2)
+        self.assertEqual(container.count_of(CUBA.CELL), 1)
+        self.assertEqual(
+            container.get(face_uids[1]),
+            Face(
+                uid=face_uids[1],
+                points=[uids[index] for index in [2, 7, 11]],
+                data=DataContainer(TEMPERATURE=2.0)))
+        self.assertEqual(
+            container.get(cell_uids[0]),
+            Cell(
+                uid=cell_uids[0],
+                points=[uids[index] for index in self.cells[1]]))
+        faces = list(container.iter(item_type=CUBA.FACE))
+        self.assertEqual([face.uid for face in faces], face_uids)
+
+    def test_add_element_block_with_mapping(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=point) for point in self.points])
+        container.add_element_block(CUBA.EDGE, self.edges)
+        data_set = container.data_set
+        cell_array = data_set.get_cells()
+        types_array = data_set.cell_types_array
+
+        # when
+        cell_uids = container.add_element_block(
+            CUBA.CELL, {8: [self.cells[1]], 4: [self.cells[0]]},
+            data={CUBA.TEMPERATURE: [1.0, 2.0]})
+
+        # then
+        self.assertEqual(container.count_of(CUBA.EDGE), 2)
+        self.assertEqual(container.count_of(CUBA.CELL), 2)
+        self.assertEqual(
+            container.get(cell_uids[0]),
+            Cell(
+                uid=cell_uids[0],
+                points=[uids[index] for index in self.cells[0]],
+                data=DataContainer(TEMPERATURE=1.0)))
+        self.assertEqual(
+            container.get(cell_uids[1]),
+            Cell(
+                uid=cell_uids[1],
+                points=[uids[index] for index in self.cells[1]],
+                data=DataContainer(TEMPERATURE=2.0)))
+        self.assertIs(
+            data_set.get_cells()._vtk_obj, cell_array._vtk_obj)
+        self.assertIs(
+            data_set.cell_types_array._vtk_obj, types_array._vtk_obj)
+        self.assertEqual(data_set.number_of_cells, 4)
+
+    def test_add_element_block_with_invalid_input(self):
+        # given
+        container = VTKMesh('test')
+        container.add([Point(coordinates=point) for point in self.points])
+        uids = container.add_element_block(CUBA.EDGE, self.edges)
+
+        # when/then
+        with self.assertRaises(ValueError):
+            container.add_element_block(CUBA.POINT, self.edges)
+        with self.assertRaises(ValueError):
+            container.add_element_block(CUBA.CELL, [[0, 1, 2]])
+        with self.assertRaises(ValueError):
+            container.add_element_block(CUBA.EDGE, [[0, 12]])
+        with self.assertRaises(ValueError):
+            container.add_element_block(CUBA.EDGE, [[0, 1]], uids=uids[:1])
+        with self.assertRaises(ValueError):
+            container.add_element_block(CUBA.FACE, {4: [[0, 1, 2]]})
+        self.assertEqual(container.count_of(CUBA.EDGE), 2)
+
+    def test_iter_chunks_of_points(self):
+        # given
+        container = VTKMesh('test')
+        points = [
+            Point(coordinates=point, data=DataContainer(TEMPERATURE=index))
+            for index, point in enumerate(self.points)]
+        uids = container.add(points)
+
+        # when
+        chunks = list(container.iter_chunks(5))
+
+        # then
+        self.assertEqual([len(chunk[0]) for chunk in chunks], [5, 5, 2])
+        self.assertEqual(
+            [uid for chunk in chunks for uid in chunk[0]], uids)
+        coordinates = numpy.concatenate([chunk[1] for chunk in chunks])
+        assert_array_equal(coordinates, self.points)
+        temperature = numpy.concatenate(
+            [chunk[2][CUBA.TEMPERATURE] for chunk in chunks])
+        assert_array_equal(temperature, range(12))
+
+    def test_iter_chunks_of_cells(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=point) for point in self.points])
+        cells = [
+            Cell(
+                points=[uids[index] for index in cell],
+                data=DataContainer(TEMPERATURE=index))
+            for index, cell in enumerate(self.cells * 3)]
+        container.add(
+            [Edge(points=[uids[index] for index in edge])
+             for edge in self.edges])
+        cell_uids = container.add(cells)
+
+        # when
+        chunks = list(container.iter_chunks(4, item_type=CUBA.CELL))
+
+        # then
+        self.assertEqual([len(chunk[0]) for chunk in chunks], [4, 2])
+        self.assertEqual(
+            [uid for chunk in chunks for uid in chunk[0]], cell_uids)
+        self.assertEqual(
+            [list(points) for chunk in chunks for points in chunk[1]],
+            [cell.points for cell in cells])
+        temperature = numpy.concatenate(
+            [chunk[2][CUBA.TEMPERATURE] for chunk in chunks])
+        assert_array_equal(temperature, range(6))
+
+    def test_update_element_with_different_number_of_points(self):
+        # given
+        container = VTKMesh('test')
+        uids = container.add(
+            [Point(coordinates=point) for point in self.points])
+        cells = [
+            Cell(
+                points=[uids[index] for index in cell],
+                data=DataContainer(TEMPERATURE=index))
+            for index, cell in enumerate(self.cells)]
+        faces = [
+            Face(points=[uids[index] for index in face])
+            for face in self.faces]
+        container.add(cells)
+        container.add(faces)
+
+        # when
+        cell = container.get(cells[0].uid)
+        cell.points = [uids[index] for index in self.cells[1]]
+        container.update([cell])
+
+        # then
+        self.assertEqual(container.get(cell.uid), cell)
+        self.assertEqual(container.get(cells[1].uid), cells[1])
+        self.assertEqual(container.get(faces[0].uid), faces[0])
+        iterated = list(container.iter(item_type=CUBA.CELL))
+        self.assertEqual(len(iterated), 2)
+        self.assertEqual(iterated[0], cell)
+        self.assertEqual(iterated[1], cells[1])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,8 @@ from functools import partial
 import random
 import uuid
 
+from mock import patch
+
 from tvtk.api import tvtk
 from simphony.cuds.particles import Particle, Bond, Particles
 from simphony.core.data_container import DataContainer
@@ -251,6 +253,268 @@ class TestVTKParticlesDataContainer(unittest.TestCase):
         for expected in reference.iter(item_type=CUBA.BOND):
             self.assertEqual(container.get(expected.uid), expected)
 
+    def test_update_from_particles(self):
+        # given
+        points = [
+            [0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+        bonds = [[0, 1], [0, 3], [1, 3, 2]]
+        reference = Particles('test')
+        point_uids = reference.add(
+            Particle(coordinates=point, data=DataContainer(TEMPERATURE=index))
+            for index, point in enumerate(points))
+        reference.add(
+            Bond(particles=[point_uids[index] for index in indices],
+                 data=DataContainer(MASS=index))
+            for index, indices in enumerate(bonds))
+        container = VTKParticles.from_particles(reference)
+        data_set = container.data_set
+        particles = []
+        for particle in reference.iter(item_type=CUBA.PARTICLE):
+            particle.coordinates = (1.0, 2.0, 3.0)
+            particle.data = DataContainer(TEMPERATURE=-1.0)
+            particles.append(particle)
+        reference.update(particles)
+        bonds = []
+        for bond in reference.iter(item_type=CUBA.BOND):
+            bond.data = DataContainer(MASS=-2.0)
+            bonds.append(bond)
+        reference.update(bonds)
+
+        # when
+        updated = container.update_from_particles(reference)
+
+        # then
+        self.assertTrue(updated)
+        self.assertIs(container.data_set, data_set)
+        for expected in reference.iter(item_type=CUBA.PARTICLE):
+            self.assertEqual(container.get(expected.uid), expected)
+        for expected in reference.iter(item_type=CUBA.BOND):
+            self.assertEqual(container.get(expected.uid), expected)
+
+    def test_update_from_vtk_particles(self):
+        # given
+        reference = Particles('test')
+        point_uids = reference.add(
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(4))
+        reference.add([Bond(particles=point_uids[:2])])
+        container = VTKParticles.from_particles(reference)
+        data_set = container.data_set
+        particles = []
+        for particle in reference.iter(item_type=CUBA.PARTICLE):
+            particle.coordinates = (1.0, 2.0, 3.0)
+            particle.data = DataContainer(MASS=-1.0)
+            particles.append(particle)
+        reference.update(particles)
+        frame = VTKParticles.from_particles(reference)
+
+        # when
+        with patch.object(frame, 'iter') as iterate:
+            updated = container.update_from_particles(frame)
+
+        # then
+        self.assertTrue(updated)
+        self.assertFalse(iterate.called)
+        self.assertIs(container.data_set, data_set)
+        for expected in reference.iter(item_type=CUBA.PARTICLE):
+            self.assertEqual(container.get(expected.uid), expected)
+        for expected in reference.iter(item_type=CUBA.BOND):
+            self.assertEqual(container.get(expected.uid), expected)
+
+    def test_update_from_particles_with_different_topology(self):
+        # given
+        reference = Particles('test')
+        point_uids = reference.add(
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(3))
+        bond_uid = reference.add(
+            [Bond(particles=point_uids[:2], data=DataContainer())])[0]
+        container = VTKParticles.from_particles(reference)
+        bond = reference.get(bond_uid)
+        bond.particles = point_uids[1:]
+        reference.update([bond])
+        particle = reference.get(point_uids[0])
+        particle.data = DataContainer(TEMPERATURE=-1.0)
+        reference.update([particle])
+
+        # when
+        updated = container.update_from_particles(reference)
+
+        # then
+        self.assertFalse(updated)
+        self.assertEqual(
+            container.get(point_uids[0]).data[CUBA.TEMPERATURE], 0)
+
+        # given
+        reference.add([Particle(coordinates=(0.0, 1.0, 0.0))])
+
+        # when
+        updated = container.update_from_particles(reference)
+
+        # then
+        self.assertFalse(updated)
+
+    def test_patch_from_particles(self):
+        # given
+        reference = Particles('test')
+        point_uids = reference.add(
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index, MASS=index))
+            for index in range(3))
+        bond_uid = reference.add(
+            [Bond(particles=point_uids[:2],
+                  data=DataContainer(MASS=1.0))])[0]
+        container = VTKParticles.from_particles(reference)
+        particles = []
+        for particle in reference.iter(item_type=CUBA.PARTICLE):
+            particle.coordinates = (1.0, 2.0, 3.0)
+            particle.data = DataContainer(TEMPERATURE=-1.0, MASS=-1.0)
+            particles.append(particle)
+        reference.update(particles)
+        bond = reference.get(bond_uid)
+        bond.data = DataContainer(MASS=-2.0)
+        reference.update([bond])
+
+        # when
+        updated = container.patch_from_particles(
+            reference, [point_uids[1], bond_uid])
+
+        # then
+        self.assertTrue(updated)
+        self.assertEqual(
+            container.get(point_uids[1]), reference.get(point_uids[1]))
+        self.assertEqual(container.get(bond_uid), reference.get(bond_uid))
+        self.assertEqual(
+            container.get(point_uids[0]).data[CUBA.TEMPERATURE], 0)
+
+        # when
+        updated = container.patch_from_particles(
+            reference, [point_uids[2]], particle_keys=[CUBA.TEMPERATURE],
+            coordinates=False)
+
+        # then
+        self.assertTrue(updated)
+        particle = container.get(point_uids[2])
+        self.assertEqual(
+            particle.data, DataContainer(TEMPERATURE=-1.0, MASS=2))
+        self.assertEqual(tuple(particle.coordinates), (2.0, 0.0, 0.0))
+
+        # when
+        updated = container.patch_from_particles(
+            reference, [point_uids[0], uuid.uuid4()])
+
+        # then
+        self.assertFalse(updated)
+        self.assertEqual(
+            container.get(point_uids[0]).data[CUBA.TEMPERATURE], 0)
+
+    def test_versions(self):
+        # given
+        container = VTKParticles('test')
+        uids = container.add(
+            [Particle(coordinates=(0.0, 0.0, index)) for index in range(3)])
+        bond = Bond(particles=uids[:2])
+        geometry = container.geometry_version
+        topology = container.topology_version
+
+        # when
+        container.add([bond])
+
+        # then
+        self.assertEqual(container.geometry_version, geometry)
+        self.assertGreater(container.topology_version, topology)
+
+        # when
+        topology = container.topology_version
+        particle = container.get(uids[0])
+        particle.coordinates = (1.0, 1.0, 1.0)
+        container.update([particle])
+
+        # then
+        self.assertGreater(container.geometry_version, geometry)
+        self.assertEqual(container.topology_version, topology)
+
+        # when
+        geometry = container.geometry_version
+        container.remove([uids[2]])
+
+        # then
+        self.assertGreater(container.geometry_version, geometry)
+        self.assertGreater(container.topology_version, topology)
+
+    def test_changes_since(self):
+        # given
+        reference = Particles('test')
+        point_uids = reference.add(
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index, MASS=1.0))
+            for index in range(3))
+        container = VTKParticles.from_particles(reference)
+        version = container.version
+        particle = reference.get(point_uids[1])
+        particle.data[CUBA.TEMPERATURE] = -1.0
+        reference.update([particle])
+
+        # when
+        container.update_from_particles(reference)
+        changes = container.changes_since(version)
+
+        # then
+        self.assertFalse(changes['geometry'])
+        self.assertFalse(changes['topology'])
+        self.assertFalse(changes['arrays'])
+        self.assertEqual(changes['point_data'], {CUBA.TEMPERATURE})
+        self.assertEqual(changes['cell_data'], set())
+        self.assertGreater(container.version, version)
+
+    def test_batch(self):
+        # given
+        container = VTKParticles('test')
+        particles = [
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(5)]
+
+        # when
+        with container.batch():
+            self.assertTrue(container.batching)
+            for particle in particles:
+                container.add([particle])
+
+        # then
+        self.assertFalse(container.batching)
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 5)
+        for particle in particles:
+            self.assertEqual(container.get(particle.uid), particle)
+
+    def test_batch_defers_the_modified_events(self):
+        # given
+        container = VTKParticles('test')
+        uids = container.add([Particle(coordinates=(0.0, 0.0, 0.0))])
+        points = tvtk.to_vtk(container.data_set.points.data)
+        m_time = points.GetMTime()
+
+        # when
+        with container.batch():
+            for index in range(1, 4):
+                container.add([Particle(coordinates=(index, 0.0, 0.0))])
+            particle = container.get(uids[0])
+            particle.coordinates = (0.0, 1.0, 0.0)
+            updated = Particles('test')
+            updated.add([particle])
+            container.patch_from_particles(updated, uids=uids)
+
+            # then
+            self.assertEqual(points.GetMTime(), m_time)
+
+        # then
+        self.assertGreater(points.GetMTime(), m_time)
+        self.assertEqual(container.get(uids[0]).coordinates, (0.0, 1.0, 0.0))
+        self.assertEqual(
+            container.data_set.points.to_array().shape, (4, 3))
+
     def test_initialization_with_empty_cuds(self):
         # given
         reference = Particles('test')
@@ -348,6 +612,63 @@ class TestVTKParticlesDataContainer(unittest.TestCase):
         with self.assertRaises(TypeError):
             VTKParticles.from_dataset(name='test', data_set=vtk)
 
+    def test_iter_chunks(self):
+        # given
+        container = VTKParticles(name='test')
+        particles = [
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(10)]
+        uids = container.add(particles)
+
+        # when
+        chunks = list(container.iter_chunks(4, keys=[CUBA.TEMPERATURE]))
+
+        # then
+        self.assertEqual([len(chunk[0]) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(
+            [uid for chunk in chunks for uid in chunk[0]], uids)
+        for chunk_uids, coordinates, data in chunks:
+            self.assertEqual(set(data), {CUBA.TEMPERATURE})
+            for uid, point, temperature in zip(
+                    chunk_uids, coordinates, data[CUBA.TEMPERATURE]):
+                particle = container.get(uid)
+                self.assertEqual(tuple(point), tuple(particle.coordinates))
+                self.assertEqual(
+                    temperature, particle.data[CUBA.TEMPERATURE])
+
+    def test_iter_chunks_of_bonds(self):
+        # given
+        container = VTKParticles(name='test')
+        particles = container.add(
+            [Particle(coordinates=(index, 0.0, 0.0)) for index in range(10)])
+        bonds = [
+            Bond(particles=particles[index:index + 2 + index % 2],
+                 data=DataContainer(TEMPERATURE=index))
+            for index in range(7)]
+        uids = container.add(bonds)
+
+        # when
+        chunks = list(container.iter_chunks(
+            3, keys=[CUBA.TEMPERATURE], item_type=CUBA.BOND))
+
+        # then
+        self.assertEqual([len(chunk[0]) for chunk in chunks], [3, 3, 1])
+        self.assertEqual(
+            [uid for chunk in chunks for uid in chunk[0]], uids)
+        for chunk_uids, bond_particles, data in chunks:
+            self.assertEqual(set(data), {CUBA.TEMPERATURE})
+            for uid, ids, temperature in zip(
+                    chunk_uids, bond_particles, data[CUBA.TEMPERATURE]):
+                bond = container.get(uid)
+                self.assertEqual(list(ids), list(bond.particles))
+                self.assertEqual(temperature, bond.data[CUBA.TEMPERATURE])
+
+    def test_iter_chunks_with_unsupported_item_type(self):
+        container = VTKParticles(name='test')
+        with self.assertRaises(ValueError):
+            list(container.iter_chunks(item_type=CUBA.POINT))
+
     def test_initialization_with_image_data(self):
         # given
         vtk = tvtk.ImageData()
@@ -0,0 +1,266 @@
+import binascii
+import uuid
+from collections import MutableMapping
+
+import numpy
+
+from simphony_mayavi.core.api import chunk_slices
+
+#: The width of a stored uid in bytes.
+UID_SIZE = 16
+
+
+def uids_to_array(uids):
+    """ Return the uids as a (N, 16) uint8 array of their bytes.
+    """
+    # the hex digits are much faster to gather than the bytes
+    data = binascii.unhexlify(''.join(uid.hex for uid in uids))
+    if len(data) == 0:
+        return numpy.empty((0, UID_SIZE), dtype=numpy.uint8)
+    return numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, UID_SIZE)
+
+
+def hex_to_array(values):
+    """ Return an array of uid hex strings (e.g. a uid column of a
+    table) as an array of their bytes, with an extra last axis of 16.
+
+    Raises
+    ------
+    ValueError :
+        When a value is not the 32 hex digits of a uid.
+
+    """
+    values = numpy.asarray(values)
+    shape = values.shape + (UID_SIZE,)
+    if values.size == 0:
+        return numpy.empty(shape, dtype=numpy.uint8)
+    values = numpy.ascontiguousarray(values, dtype='S{}'.format(2 * UID_SIZE))
+    try:
+        data = binascii.unhexlify(values.tobytes())
+    except (TypeError, binascii.Error):
+        raise ValueError('Expected the 32 hex digits of uids')
+    return numpy.frombuffer(data, dtype=numpy.uint8).reshape(shape)
+
+
+class _ArrayMapping(MutableMapping):
+    """ A mapping over an array of uids that records the later changes
+    in dictionaries.
+
+    Subclasses look up the keys of the array with :meth:`_lookup`,
+    which raises a KeyError for the keys that are not in the array, and
+    list them with :meth:`_array_keys`.
+
+    """
+
+    def __init__(self, uids):
+        self._uids = uids
+        # key -> value of the keys set after the construction
+        self._changed = {}
+        # the keys of the array that have been removed
+        self._removed = set()
+        self._length = len(uids)
+
+    @property
+    def uids(self):
+        """ The (N, 16) uint8 array of the uids of the initial items in
+        index order. """
+        return self._uids
+
+    @property
+    def unchanged(self):
+        """ True if no item has been set or removed since the
+        construction. """
+        return len(self._changed) == 0 and len(self._removed) == 0
+
+    def __getitem__(self, key):
+        if key in self._changed:
+            return self._changed[key]
+        elif key in self._removed:
+            raise KeyError(key)
+        return self._lookup(key)
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._length += 1
+        self._changed[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changed.pop(key, None)
+        if self._in_array(key):
+            self._removed.add(key)
+        self._length -= 1
+
+    def __iter__(self):
+        changed = self._changed
+        removed = self._removed
+        for key in self._array_keys():
+            if key not in removed:
+                yield key
+        for key in list(changed):
+            if not self._in_array(key):
+                yield key
+
+    def __len__(self):
+        return self._length
+
+    def _in_array(self, key):
+        try:
+            self._lookup(key)
+        except KeyError:
+            return False
+        return True
+
+
+class IndexToUID(_ArrayMapping):
+    """ The mapping from item index to uid of an array of uids.
+
+    The uid of index ``i`` is the ``i``-th row of the array, so the
+    mapping takes 16 bytes per item, and the array can be memory mapped.
+
+    """
+
+    def _lookup(self, index):
+        if not isinstance(index, (int, long, numpy.integer)) or \
+                not 0 <= index < len(self._uids):
+            raise KeyError(index)
+        return uuid.UUID(bytes=self._uids[index].tobytes())
+
+    def _array_keys(self):
+        return iter(xrange(len(self._uids)))
+
+
+class UIDToIndex(_ArrayMapping):
+    """ The mapping from uid to item index of an array of uids.
+
+    The uids are looked up in an open addressing hash table of the row
+    indices that is built on the first lookup, so the mapping takes
+    about 32 bytes per item. The table is allocated with ``allocate``
+    which can return a memory mapped array. :meth:`indices` looks up
+    many uids at once.
+
+    """
+
+    def __init__(self, uids, allocate=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        uids : numpy.ndarray
+            The (N, 16) uint8 array of the uids in index order.
+
+        allocate : callable
+            Called as ``allocate(shape, dtype, fill=value)`` to create
+            the hash table. Default is None which allocates it in
+            memory.
+
+        """
+        super(UIDToIndex, self).__init__(uids)
+        self._allocate = allocate
+        self._table = None
+
+    def indices(self, uids):
+        """ Return the indices of ``uids`` as an int64 array, with -1 for
+        the uids that are not in the mapping.
+
+        ``uids`` is an iterable of UUIDs or a (M, 16) uint8 array of
+        their bytes.
+
+        """
+        if isinstance(uids, numpy.ndarray):
+            indices = self._find(uids)
+            if self.unchanged:
+                return indices
+            uids = [uuid.UUID(bytes=row.tobytes()) for row in uids]
+        else:
+            uids = list(uids)
+            indices = self._find(uids_to_array(uids))
+        if not self.unchanged:
+            for position, uid in enumerate(uids):
+                if uid in self._changed:
+                    indices[position] = self._changed[uid]
+                elif uid in self._removed:
+                    indices[position] = -1
+        return indices
+
+    def _lookup(self, uid):
+        if not isinstance(uid, uuid.UUID):
+            raise KeyError(uid)
+        index = self._find(uids_to_array([uid]))[0]
+        if index < 0:
+            raise KeyError(uid)
+        return int(index)
+
+    def _array_keys(self):
+        uids = self._uids
+        width = 2 * UID_SIZE
+        for rows in chunk_slices(len(uids)):
+            digits = binascii.hexlify(uids[rows].tobytes())
+            for offset in xrange(0, len(digits), width):
+                yield uuid.UUID(hex=digits[offset:offset + width])
+
+    def _find(self, keys):
+        """ Return the rows of the (M, 16) ``keys`` or -1. """
+        table = self._get_table()
+        keys = _as_words(keys)
+        uids = _as_words(self._uids)
+        rows = numpy.full(len(keys), -1, dtype=numpy.int64)
+        mask = len(table) - 1
+        slots = _slots(keys, mask)
+        pending = numpy.arange(len(keys))
+        while len(pending) != 0:
+            found = table[slots[pending]]
+            occupied = found >= 0
+            # an empty slot ends the probing
+            pending, found = pending[occupied], found[occupied]
+            match = numpy.all(uids[found] == keys[pending], axis=1)
+            rows[pending[match]] = found[match]
+            pending = pending[~match]
+            slots[pending] = (slots[pending] + 1) & mask
+        return rows
+
+    def _get_table(self):
+        if self._table is None:
+            count = len(self._uids)
+            # at most half full
+            size = 1 << max(int(2 * count).bit_length(), 4)
+            if self._allocate is None:
+                table = numpy.full(size, -1, dtype=numpy.int64)
+            else:
+                table = self._allocate((size,), numpy.int64, fill=-1)
+            uids = _as_words(self._uids)
+            for rows in chunk_slices(count):
+                _insert(table, uids[rows], numpy.arange(rows.start, rows.stop))
+            self._table = table
+        return self._table
+
+
+def _as_words(uids):
+    """ View a (N, 16) uint8 array of uids as (N, 2) uint64 words. """
+    return numpy.ascontiguousarray(uids).view('>u8').reshape(-1, 2)
+
+
+def _slots(words, mask):
+    """ Return the hash table slots of the (N, 2) uint64 uid words. """
+    words = words.astype(numpy.uint64)
+    return ((words[:, 0] ^ words[:, 1]) & numpy.uint64(mask)).astype(
+        numpy.int64)
+
+
+def _insert(table, words, rows):
+    """ Insert the rows of the (N, 2) uid words with linear probing. """
+    mask = len(table) - 1
+    slots = _slots(words, mask)
+    pending = numpy.arange(len(words))
+    while len(pending) != 0:
+        free = numpy.flatnonzero(table[slots[pending]] < 0)
+        # the first pending row of each free slot takes it
+        taken, first = numpy.unique(
+            slots[pending[free]], return_index=True)
+        table[taken] = rows[pending[free[first]]]
+        placed = numpy.zeros(len(pending), dtype=bool)
+        placed[free[first]] = True
+        pending = pending[~placed]
+        slots[pending] = (slots[pending] + 1) & mask
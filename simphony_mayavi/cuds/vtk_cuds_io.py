@@ -0,0 +1,237 @@
+import os
+import pickle
+import uuid
+
+import numpy
+from tvtk.api import tvtk
+from tvtk.common import configure_input_data
+
+from simphony.cuds.primitive_cell import PrimitiveCell
+from simphony_mayavi.core.api import CubaData
+
+from .vtk_lattice import VTKLattice
+from .vtk_mesh import VTKMesh
+from .vtk_particles import VTKParticles
+
+#: The version of the stored layout.
+FORMAT_VERSION = 1
+
+#: The XML writer, reader and file extension of each dataset type.
+DATASET_FORMATS = (
+    (tvtk.PolyData, tvtk.XMLPolyDataWriter, tvtk.XMLPolyDataReader, 'vtp'),
+    (tvtk.UnstructuredGrid, tvtk.XMLUnstructuredGridWriter,
+     tvtk.XMLUnstructuredGridReader, 'vtu'),
+    (tvtk.ImageData, tvtk.XMLImageDataWriter, tvtk.XMLImageDataReader,
+     'vti'))
+
+_METADATA_FILE = 'metadata.pickle'
+_ITEMS_FILE = 'items.npz'
+
+
+def save_vtk_cuds(vtk_cuds, directory):
+    """ Store a VTK container into a directory.
+
+    The dataset is written as a binary VTK XML file while the item uids
+    and the masks of the missing values are written in a NumPy ``.npz``
+    file, so that :func:`load_vtk_cuds` restores the container without
+    any conversion.
+
+    Parameters
+    ----------
+    vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+        The container to store.
+
+    directory : str
+        The existing directory to store the container into.
+
+    Raises
+    ------
+    TypeError :
+        When ``vtk_cuds`` is not a VTK container.
+
+    ValueError :
+        When the item indices of the container are not contiguous.
+
+    """
+    metadata = {
+        'version': FORMAT_VERSION,
+        'name': vtk_cuds.name,
+        'data': dict(vtk_cuds.data)}
+    items = {}
+    if isinstance(vtk_cuds, VTKParticles):
+        metadata['kind'] = 'particles'
+        items['point_uids'] = _uids_to_array(vtk_cuds.index2particle)
+        items['cell_uids'] = _uids_to_array(vtk_cuds.index2bond)
+    elif isinstance(vtk_cuds, VTKMesh):
+        metadata['kind'] = 'mesh'
+        items['point_uids'] = _uids_to_array(vtk_cuds.index2point)
+        items['cell_uids'] = _uids_to_array(vtk_cuds.index2element)
+    elif isinstance(vtk_cuds, VTKLattice):
+        primitive_cell = vtk_cuds.primitive_cell
+        metadata['kind'] = 'lattice'
+        metadata['primitive_cell'] = (
+            tuple(primitive_cell.p1), tuple(primitive_cell.p2),
+            tuple(primitive_cell.p3), primitive_cell.bravais_lattice)
+    else:
+        message = 'Provided object {} is not a VTK container'
+        raise TypeError(message.format(type(vtk_cuds)))
+
+    point_data, cell_data = _attribute_data(vtk_cuds)
+    _collect_masks(items, 'point_mask:', point_data)
+    if cell_data is not None:
+        _collect_masks(items, 'cell_mask:', cell_data)
+
+    data_set = vtk_cuds.data_set
+    writer_type, extension = _dataset_format(data_set)
+    metadata['data_set'] = 'data_set.' + extension
+    writer = writer_type(
+        file_name=os.path.join(directory, metadata['data_set']),
+        data_mode='appended', encode_appended_data=False)
+    configure_input_data(writer, data_set)
+    writer.write()
+
+    numpy.savez(os.path.join(directory, _ITEMS_FILE), **items)
+    with open(os.path.join(directory, _METADATA_FILE), 'wb') as handle:
+        pickle.dump(metadata, handle, pickle.HIGHEST_PROTOCOL)
+
+
+def load_vtk_cuds(directory):
+    """ Load a VTK container stored by :func:`save_vtk_cuds`.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the stored container.
+
+    Returns
+    -------
+    vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+
+    Raises
+    ------
+    ValueError :
+        When the stored layout is not supported.
+
+    """
+    with open(os.path.join(directory, _METADATA_FILE), 'rb') as handle:
+        metadata = pickle.load(handle)
+    if metadata.get('version') != FORMAT_VERSION:
+        message = 'Unsupported stored container version {}'
+        raise ValueError(message.format(metadata.get('version')))
+
+    filename = os.path.join(directory, metadata['data_set'])
+    extension = os.path.splitext(filename)[1][1:]
+    for data_set_type, _, reader_type, format_extension in DATASET_FORMATS:
+        if extension == format_extension:
+            break
+    else:
+        message = 'Unsupported stored dataset {}'
+        raise ValueError(message.format(filename))
+    reader = reader_type(file_name=filename)
+    reader.update()
+    # detach the dataset from the reader
+    data_set = data_set_type()
+    data_set.shallow_copy(reader.output)
+
+    items = numpy.load(os.path.join(directory, _ITEMS_FILE))
+    name, data, kind = metadata['name'], metadata['data'], metadata['kind']
+    if kind == 'particles':
+        index2point = _array_to_uids(items['point_uids'])
+        index2cell = _array_to_uids(items['cell_uids'])
+        vtk_cuds = VTKParticles(name, data=data, data_set=data_set, mappings={
+            'index2particle': index2point,
+            'particle2index': _reverse(index2point),
+            'index2bond': index2cell,
+            'bond2index': _reverse(index2cell)})
+    elif kind == 'mesh':
+        index2point = _array_to_uids(items['point_uids'])
+        index2cell = _array_to_uids(items['cell_uids'])
+        vtk_cuds = VTKMesh(name, data=data, data_set=data_set, mappings={
+            'index2point': index2point,
+            'point2index': _reverse(index2point),
+            'index2element': index2cell,
+            'element2index': _reverse(index2cell)})
+    else:
+        vtk_cuds = VTKLattice(
+            name, PrimitiveCell(*metadata['primitive_cell']), data_set,
+            data=data)
+
+    # restore the masks of the missing values
+    supported_cuba = vtk_cuds.supported_cuba
+    if data_set.point_data.number_of_arrays != 0:
+        vtk_cuds.point_data = CubaData(
+            data_set.point_data, stored_cuba=supported_cuba,
+            masks=_masks(items, 'point_mask:'))
+    if kind != 'lattice' and data_set.cell_data.number_of_arrays != 0:
+        cell_data = CubaData(
+            data_set.cell_data, stored_cuba=supported_cuba,
+            masks=_masks(items, 'cell_mask:'))
+        if kind == 'particles':
+            vtk_cuds.bond_data = cell_data
+        else:
+            vtk_cuds.element_data = cell_data
+    return vtk_cuds
+
+
+def _dataset_format(data_set):
+    for data_set_type, writer, _, extension in DATASET_FORMATS:
+        if isinstance(data_set, data_set_type):
+            return writer, extension
+    message = 'Unsupported dataset {}'
+    raise TypeError(message.format(type(data_set)))
+
+
+def _attribute_data(vtk_cuds):
+    if isinstance(vtk_cuds, VTKParticles):
+        return vtk_cuds.point_data, vtk_cuds.bond_data
+    elif isinstance(vtk_cuds, VTKMesh):
+        return vtk_cuds.point_data, vtk_cuds.element_data
+    else:
+        return vtk_cuds.point_data, None
+
+
+def _collect_masks(items, prefix, cuba_data):
+    """ Add the mask arrays of a CubaData to the items to store. """
+    masks = cuba_data.masks
+    for array_id in range(masks.number_of_arrays):
+        mask = masks.get_array(array_id)
+        items[prefix + mask.name] = mask.to_array().astype(numpy.int8)
+
+
+def _masks(items, prefix):
+    """ Return the stored mask arrays as a tvtk.FieldData. """
+    masks = tvtk.FieldData()
+    for key in items.files:
+        if key.startswith(prefix):
+            mask = tvtk.BitArray()
+            mask.number_of_components = 2
+            mask.from_array(items[key])
+            mask.name = key[len(prefix):]
+            masks.add_array(mask)
+    return masks
+
+
+def _uids_to_array(index2uid):
+    """ Return the uids in index order as a (N, 16) uint8 array. """
+    try:
+        uids = [index2uid[index] for index in xrange(len(index2uid))]
+    except KeyError:
+        raise ValueError('The item indices are not contiguous')
+    array = numpy.empty((len(uids), 16), dtype=numpy.uint8)
+    if len(uids) != 0:
+        array[:] = numpy.frombuffer(
+            b''.join(uid.bytes for uid in uids),
+            dtype=numpy.uint8).reshape(-1, 16)
+    return array
+
+
+def _array_to_uids(array):
+    """ Return the index to uid mapping of a (N, 16) uint8 array. """
+    data = array.tobytes()
+    return {
+        index: uuid.UUID(bytes=data[offset:offset + 16])
+        for index, offset in enumerate(xrange(0, len(data), 16))}
+
+
+def _reverse(mapping):
+    return {value: key for key, value in mapping.iteritems()}
@@ -1,8 +1,10 @@
 from __future__ import division
-from itertools import izip
+import contextlib
+from itertools import islice, izip
 
 import numpy
 from tvtk.api import tvtk
+from tvtk.common import configure_input_data, configure_connection
 from simphony.cuds.abc_lattice import ABCLattice
 from simphony.cuds.lattice import LatticeNode
 from simphony.core.cuba import CUBA
@@ -11,6 +13,10 @@ from simphony.core.data_container import DataContainer
 
 from simphony_mayavi.core.api import CubaData, supported_cuba, mergedocs
 from simphony_mayavi.core.api import CUBADataAccumulator
+from simphony_mayavi.core.api import DEFAULT_CHUNK_SIZE, chunk_slices
+from simphony_mayavi.core.api import (
+    vtk_array_view, next_version, collect_changes)
+from simphony_mayavi.core.cuba_utils import default_cuba_value, empty_array
 
 from simphony.tools.lattice_tools import (vector_len, guess_primitive_vectors,
                                           find_lattice_type,
@@ -18,6 +24,12 @@ from simphony.tools.lattice_tools import (vector_len, guess_primitive_vectors,
 
 VTK_POLY_LINE = 4
 
+#: The lattice types that can be represented by a tvtk.ImageData
+ORTHOGONAL_LATTICES = (
+    BravaisLattice.CUBIC,
+    BravaisLattice.TETRAGONAL,
+    BravaisLattice.ORTHORHOMBIC)
+
 
 @mergedocs(ABCLattice)
 class VTKLattice(ABCLattice):
@@ -37,7 +49,9 @@ class VTKLattice(ABCLattice):
             The dataset to wrap in the CUDS api. If it is a tvtk.PolyData, the
             points are assumed to be arranged in C-contiguous order so that
             the first point is the origin and the last point is furthest away
-            from the origin
+            from the origin. A tvtk.ImageData combined with a non-orthogonal
+            primitive cell is assumed to be in index space (see
+            :attr:`implicit`).
 
         data : DataContainer
             The data attribute to attach to the container. Default is None.
@@ -51,6 +65,12 @@ class VTKLattice(ABCLattice):
         self._primitive_cell = primitive_cell
         self._data = DataContainer() if data is None else DataContainer(data)
         self.data_set = data_set
+        # The vtk pipeline that renders an implicit lattice
+        self._render_filter = None
+        # The nodes cannot be moved, added or removed
+        self._version = next_version()
+        # The depth of nested batch blocks
+        self._batch_depth = 0
 
         self._items_count = {
             CUBA.NODE: lambda: self.size
@@ -126,6 +146,97 @@ class VTKLattice(ABCLattice):
         """
         return self._primitive_cell
 
+    @property
+    def geometry_version(self):
+        """ The version of the node coordinates.
+
+        The lattice geometry cannot change thus the version is constant.
+        Changes of the node data are tracked per CUBA key by
+        :meth:`CubaData.column_version` of ``point_data``.
+
+        """
+        return self._version
+
+    @property
+    def topology_version(self):
+        """ The version of the lattice nodes.
+
+        The lattice nodes cannot be added or removed thus the version
+        is constant.
+
+        """
+        return self._version
+
+    @property
+    def version(self):
+        """ The version of the last tracked change of the container.
+        """
+        return max(self._version, self.point_data.version)
+
+    @property
+    def implicit(self):
+        """ True when the node coordinates are not stored in the dataset.
+
+        Non-orthogonal lattices created with ``implicit=True`` wrap a
+        tvtk.ImageData in index space (i.e. with unit spacing) and the
+        node coordinates are computed from the primitive cell when needed.
+
+        """
+        return (
+            isinstance(self.data_set, tvtk.ImageData) and
+            self._primitive_cell.bravais_lattice not in ORTHOGONAL_LATTICES)
+
+    @property
+    def render_transform(self):
+        """ The transform from the index space of an implicit lattice to
+        the node coordinates.
+
+        None when the lattice is not implicit.
+
+        """
+        if not self.implicit:
+            return None
+        primitive_cell = self._primitive_cell
+        vectors = numpy.array(
+            (primitive_cell.p1, primitive_cell.p2, primitive_cell.p3),
+            dtype='double').T
+        # The dataset origin is the lattice origin with unit spacing
+        origin = numpy.asarray(self.origin, dtype='double')
+        matrix = numpy.identity(4)
+        matrix[:3, :3] = vectors
+        matrix[:3, 3] = origin - numpy.dot(vectors, origin)
+        transform = tvtk.Transform()
+        transform.set_matrix(tuple(matrix.ravel()))
+        return transform
+
+    @property
+    def render_data_set(self):
+        """ The dataset to use for visualisation.
+
+        This is the ``data_set`` itself unless the lattice is implicit.
+        In that case the output of a vtk pipeline that applies
+        :attr:`render_transform` to the ``data_set`` is returned. The
+        node coordinates are not stored in the container, they are
+        computed by vtk when the pipeline executes, i.e. the first time
+        the property is accessed and again after the ``data_set`` has
+        been modified. The point data arrays are shared.
+
+        """
+        if not self.implicit:
+            return self.data_set
+        render_filter = self._render_filter
+        if render_filter is None:
+            # only the point set filters accept a transform
+            points = tvtk.ImageDataToPointSet()
+            configure_input_data(points, self.data_set)
+            render_filter = tvtk.TransformFilter(
+                transform=self.render_transform)
+            configure_connection(render_filter, points)
+            self._render_filter = render_filter
+        # executes only when the data_set has changed
+        render_filter.update()
+        return render_filter.output
+
     # Node operations ########################################################
 
     def _get_node(self, index):
@@ -133,14 +244,35 @@ class VTKLattice(ABCLattice):
         return LatticeNode(index, data=self.point_data[point_id])
 
     def _update_nodes(self, nodes):
-        for node in nodes:
-            point_id = self._get_point_id(node.index)
-            self.point_data[point_id] = node.data
+        # the nodes are written in blocks, one column at a time
+        nodes = iter(nodes)
+        point_data = self.point_data
+        with point_data.batch():
+            while True:
+                indices = []
+                node_data = CUBADataAccumulator()
+                for node in islice(nodes, DEFAULT_CHUNK_SIZE):
+                    indices.append(node.index)
+                    node_data.append(node.data)
+                if len(indices) == 0:
+                    break
+                node_data.load_onto_cuba_data(
+                    point_data, self._get_point_ids(indices))
 
     def _iter_nodes(self, indices=None):
         if indices is None:
-            for index in numpy.ndindex(*self.size):
-                yield self._get_node(index)
+            # visit the nodes in the same order as numpy.ndindex
+            # but read their data in blocks
+            size = self.size
+            point_data = self.point_data
+            for block in chunk_slices(int(numpy.prod(size))):
+                indices = numpy.unravel_index(
+                    numpy.arange(block.start, block.stop), size)
+                point_ids = numpy.ravel_multi_index(indices, size, order="F")
+                rows = point_data.get_rows(point_ids)
+                indices = izip(*[axis.tolist() for axis in indices])
+                for index, data in izip(indices, rows):
+                    yield LatticeNode(index, data=data)
         else:
             for index in indices:
                 yield self._get_node(index)
@@ -154,12 +286,437 @@ class VTKLattice(ABCLattice):
 
     def get_coordinate(self, ind):
         point_id = self._get_point_id(ind)
+        if self.implicit:
+            return tuple(self._get_coordinates(
+                numpy.asarray(ind, dtype=int).reshape(1, 3), point_id)[0])
         return self.data_set.get_point(point_id)
 
+    def get_point_ids(self, indices):
+        """ Return the vtk point ids of an array of lattice indices.
+
+        Parameters
+        ----------
+        indices : array_like
+            The (N, 3) array of lattice indices.
+
+        Returns
+        -------
+        point_ids : ndarray
+            The (N,) array of point ids. Indices that are out of range
+            are assigned ``-1``.
+
+        """
+        indices = numpy.asarray(indices, dtype=int).reshape(-1, 3)
+        valid = ((indices >= 0) & (indices < self.size)).all(axis=1)
+        point_ids = numpy.full(len(indices), -1, dtype=int)
+        point_ids[valid] = numpy.ravel_multi_index(
+            indices[valid].T, self.size, order="F")
+        return point_ids
+
+    def get_coordinates(self, indices):
+        """ Return the coordinates of an array of lattice indices.
+
+        Parameters
+        ----------
+        indices : array_like
+            The (N, 3) array of lattice indices.
+
+        Returns
+        -------
+        coordinates : ndarray
+            The (N, 3) array of node coordinates.
+
+        Raises
+        ------
+        IndexError :
+            When any of the indices is out of range.
+
+        """
+        indices = numpy.asarray(indices, dtype=int).reshape(-1, 3)
+        return self._get_coordinates(indices, self._get_point_ids(indices))
+
+    # Bulk node access #####################################################
+
+    def get_node_arrays(self, indices=None, keys=None):
+        """ Return the CUBA values of a block of nodes as numpy arrays.
+
+        Parameters
+        ----------
+        indices : array_like
+            The (N, 3) array of node indices. Default is None which
+            returns the values of all the nodes in the order they are
+            stored in the vtk dataset (i.e. the first index varies
+            fastest).
+
+        keys : iterable
+            The CUBA keys of the data columns to return. Default is None
+            which returns all the currently stored columns.
+
+        Returns
+        -------
+        data : dict
+            The mapping from CUBA key to the array of values. Missing
+            values are replaced by the default value of the CUBA key.
+
+        Raises
+        ------
+        IndexError :
+            When any of the node indices is out of range.
+
+        """
+        point_ids = self._get_point_ids(indices)
+        point_data = self.point_data
+        keys = point_data.cubas if keys is None else keys
+        return {cuba: point_data.get_column(cuba, point_ids) for cuba in keys}
+
+    def update_node_arrays(self, arrays, indices=None):
+        """ Update the CUBA values of a block of nodes from numpy arrays.
+
+        Parameters
+        ----------
+        arrays : dict
+            The mapping from CUBA key to the array of new values.
+
+        indices : array_like
+            The (N, 3) array of node indices. Default is None which
+            updates all the nodes in the order they are stored in the
+            vtk dataset (i.e. the first index varies fastest).
+
+        Raises
+        ------
+        IndexError :
+            When any of the node indices is out of range.
+
+        ValueError :
+            When a CUBA key is not supported.
+
+        """
+        point_ids = self._get_point_ids(indices)
+        point_data = self.point_data
+        for cuba, values in arrays.iteritems():
+            point_data.set_column(cuba, values, point_ids)
+
+    # Batch modifications ####################################################
+
+    @property
+    def batching(self):
+        """ True while the container is inside a :meth:`batch` block.
+        """
+        return self._batch_depth > 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ Group a sequence of modifications.
+
+        Inside the ``with`` block the invalidation of the numpy array
+        caches is deferred and the sources ignore the
+        modified events of the vtk dataset. On exit of the outermost
+        block the caches are invalidated once and the dataset is marked
+        as modified, so that the sources are notified once.
+
+        Examples
+        --------
+        >>> with container.batch():
+        ...     for item in items:
+        ...         container.add([item])
+
+        """
+        self._batch_depth += 1
+        try:
+            with self.point_data.batch():
+                yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.data_set.modified()
+                if self._render_filter is not None:
+                    self._render_filter.update()
+
+    # Change tracking ########################################################
+
+    def changes_since(self, version):
+        """ Return the modifications of the container after ``version``.
+
+        Parameters
+        ----------
+        version : int
+            A version number previously returned by :attr:`version`.
+
+        Returns
+        -------
+        changes : dict
+            The geometry, topology and data changes (see
+            :func:`~simphony_mayavi.core.version_counter.collect_changes`).
+
+        """
+        return collect_changes(
+            version, self._version, self._version, self.point_data)
+
+    # In place update ########################################################
+
+    def update_from_lattice(self, lattice, node_keys=None):
+        """ Update the node data in place from a CUDS lattice instance.
+
+        The data is overwritten in place when ``lattice`` has the same
+        size, origin and primitive cell as this container. Otherwise
+        nothing is changed and a new container should be created with
+        :meth:`from_lattice`. Only the vtk arrays whose values change
+        are marked as modified (see :meth:`changes_since`).
+
+        Parameters
+        ----------
+        lattice : ABCLattice
+            The lattice to copy the node data from.
+
+        node_keys : list
+            A list of point CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        Returns
+        -------
+        updated : bool
+            False when the lattice geometry is different and the container
+            has not been updated.
+
+        """
+        primitive_cell = self._primitive_cell
+        other = lattice.primitive_cell
+        if (tuple(lattice.size) != tuple(self.size) or
+                not numpy.allclose(lattice.origin, self.origin) or
+                other.bravais_lattice != primitive_cell.bravais_lattice or
+                not numpy.allclose(
+                    (other.p1, other.p2, other.p3),
+                    (primitive_cell.p1, primitive_cell.p2,
+                     primitive_cell.p3))):
+            return False
+
+        if isinstance(lattice, VTKLattice):
+            # Both lattices store the nodes in the same order, so the
+            # data (and their masks) can be copied column by column.
+            self.point_data.copy_columns(lattice.point_data, node_keys)
+        else:
+            self._set_node_columns(
+                _read_node_columns(lattice, self.size, node_keys))
+        return True
+
+    def patch_from_lattice(self, lattice, indices=None, node_keys=None):
+        """ Update the data of some of the nodes in place.
+
+        Only the given nodes are copied from ``lattice``, which is
+        assumed to have the same geometry as this container.
+
+        Parameters
+        ----------
+        lattice : ABCLattice
+            The lattice to copy the node data from.
+
+        indices : iterable
+            The lattice indices of the nodes to copy. Default is None
+            which copies all the nodes.
+
+        node_keys : list
+            A list of point CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        Returns
+        -------
+        updated : bool
+            False when some of the indices are out of range (or the size
+            of the lattice is different) and nothing has been updated.
+
+        """
+        node_data = CUBADataAccumulator(node_keys)
+        if indices is None:
+            if tuple(lattice.size) != tuple(self.size):
+                return False
+            indices = []
+            for node in lattice.iter(item_type=CUBA.NODE):
+                indices.append(node.index)
+                node_data.append(node.data)
+            point_ids = self.get_point_ids(indices)
+        else:
+            indices = [tuple(index) for index in indices]
+            point_ids = self.get_point_ids(indices)
+            if (point_ids < 0).any():
+                return False
+            for node in lattice.iter(indices):
+                node_data.append(node.data)
+        if len(indices) == 0:
+            return True
+        node_data.load_onto_cuba_data(
+            self.point_data, point_ids, partial=node_keys is not None)
+        return True
+
+    # Chunked access #########################################################
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, keys=None,
+                    item_type=CUBA.NODE):
+        """ Iterate over the lattice nodes in blocks of numpy arrays.
+
+        The nodes are visited in the order they are stored in the
+        vtk dataset (i.e. the first index varies fastest).
+
+        Parameters
+        ----------
+        chunk_size : int
+            The maximum number of nodes in each block.
+
+        keys : iterable
+            The CUBA keys of the data columns to return. Default is None
+            which returns all the currently stored columns.
+
+        item_type : CUBA
+            The type of the items to iterate over. Only CUBA.NODE is
+            supported.
+
+        Yields
+        ------
+        indices : ndarray
+            The (N, 3) array of the node indices in the block.
+
+        coordinates : ndarray
+            The (N, 3) array of the node coordinates.
+
+        data : dict
+            The mapping from CUBA key to the array of values.
+
+        Raises
+        ------
+        ValueError :
+            When ``item_type`` is not supported.
+
+        """
+        if item_type != CUBA.NODE:
+            message = "Chunked iteration is not supported for: {}"
+            raise ValueError(message.format(item_type))
+        point_data = self.point_data
+        keys = point_data.cubas if keys is None else set(keys)
+        size = self.size
+        for point_ids in chunk_slices(int(numpy.prod(size)), chunk_size):
+            indices = numpy.column_stack(numpy.unravel_index(
+                numpy.arange(point_ids.start, point_ids.stop),
+                size, order="F"))
+            yield (
+                indices,
+                self._get_coordinates(indices, point_ids),
+                {cuba: point_data.get_column(cuba, point_ids)
+                 for cuba in keys})
+
+    # Sub lattices ###########################################################
+
+    def sub_lattice(self, start=None, stop=None, step=None, name=None):
+        """ Return a lattice with a box (or plane) and/or stride of the nodes.
+
+        The node data, their masks (i.e. which values are missing) and
+        the points of PolyData lattices are copied, so that the new
+        lattice does not depend on this one. Only the selected nodes are
+        read, in a single pass when they are stored contiguously (e.g. a
+        range of planes along the last axis).
+
+        Parameters
+        ----------
+        start : sequence
+            The first node index (inclusive) along each axis. Default is
+            (0, 0, 0).
+
+        stop : sequence
+            The last node index (exclusive) along each axis. Default is
+            the lattice size.
+
+        step : sequence
+            The stride along each axis. Default is (1, 1, 1).
+
+        name : str
+            The name of the new lattice. Default is the name of this one.
+
+        Returns
+        -------
+        lattice : VTKLattice
+
+        Raises
+        ------
+        ValueError :
+            When the selection is empty or out of range.
+
+        """
+        size = numpy.array(self.size)
+        start = numpy.zeros(3, dtype=int) if start is None else \
+            numpy.asarray(start, dtype=int)
+        stop = size if stop is None else numpy.asarray(stop, dtype=int)
+        step = numpy.ones(3, dtype=int) if step is None else \
+            numpy.asarray(step, dtype=int)
+        if ((start < 0) | (stop > size) | (start >= stop) | (step < 1)).any():
+            message = "Invalid sub lattice start: {}, stop: {}, step: {}"
+            raise ValueError(message.format(start, stop, step))
+
+        # The point ids of the selected nodes in storage order
+        axes = numpy.meshgrid(
+            *[numpy.arange(*item) for item in zip(start, stop, step)],
+            indexing='ij')
+        point_ids = numpy.ravel_multi_index(
+            [axis.ravel(order="F") for axis in axes], self.size, order="F")
+        if point_ids[-1] - point_ids[0] + 1 == len(point_ids):
+            point_ids = slice(point_ids[0], point_ids[-1] + 1)
+
+        primitive_cell = self._primitive_cell
+        vectors = numpy.array(
+            (primitive_cell.p1, primitive_cell.p2, primitive_cell.p3),
+            dtype='double') * step[:, numpy.newaxis]
+        if (step == step[0]).all() or self.implicit:
+            bravais_lattice = primitive_cell.bravais_lattice
+        else:
+            bravais_lattice = find_lattice_type(*vectors)
+        primitive_cell = PrimitiveCell(
+            tuple(vectors[0]), tuple(vectors[1]), tuple(vectors[2]),
+            bravais_lattice)
+
+        data_set = self.data_set
+        origin = tuple(self.get_coordinates(start)[0])
+        nx, ny, nz = (stop - start + step - 1) // step
+        if self.implicit:
+            new_data_set = tvtk.ImageData(spacing=(1, 1, 1), origin=origin)
+            new_data_set.extent = 0, nx - 1, 0, ny - 1, 0, nz - 1
+        elif isinstance(data_set, tvtk.ImageData):
+            new_data_set = tvtk.ImageData(
+                spacing=tuple(numpy.multiply(data_set.spacing, step)),
+                origin=origin)
+            new_data_set.extent = 0, nx - 1, 0, ny - 1, 0, nz - 1
+        else:
+            new_data_set = tvtk.PolyData(points=numpy.array(
+                vtk_array_view(data_set.points.data)[point_ids]))
+
+        # Copy the point data and the related masks
+        source = data_set.point_data
+        target = new_data_set.point_data
+        masks = tvtk.FieldData()
+        for array_id in range(source.number_of_arrays):
+            array = source.get_array(array_id)
+            index = target.add_array(
+                numpy.array(vtk_array_view(array)[point_ids]))
+            target.get_array(index).name = array.name
+            mask_array = self.point_data.masks.get_array(array.name)
+            if mask_array is not None:
+                mask = tvtk.BitArray()
+                mask.number_of_components = 2
+                mask.from_array(mask_array.to_array()[point_ids])
+                mask.name = array.name
+                masks.add_array(mask)
+
+        lattice = VTKLattice(
+            name=self.name if name is None else name,
+            primitive_cell=primitive_cell,
+            data_set=new_data_set,
+            data=self.data)
+        if source.number_of_arrays != 0:
+            lattice.point_data = CubaData(
+                target, stored_cuba=lattice.supported_cuba, masks=masks)
+        return lattice
+
     # Alternative constructors ###############################################
 
     @classmethod
-    def empty(cls, name, primitive_cell, size, origin, data=None):
+    def empty(cls, name, primitive_cell, size, origin, data=None,
+              implicit=False):
         """ Create a new empty Lattice.
 
         Parameters
@@ -179,19 +736,25 @@ class VTKLattice(ABCLattice):
         data : DataContainer
             The data attribute to attach to the container. Default is None.
 
+        implicit : bool
+            If True non-orthogonal lattices do not store the node
+            coordinates (see :attr:`implicit`). Default is False.
+
         Returns
         -------
         lattice : VTKLattice
         """
         bravais_lattice = primitive_cell.bravais_lattice
-        if bravais_lattice in (BravaisLattice.CUBIC, BravaisLattice.TETRAGONAL,
-                               BravaisLattice.ORTHORHOMBIC):
+        if bravais_lattice in ORTHOGONAL_LATTICES:
             # Compute the spacing from the primitive cell
             spacing = tuple(vector_len(p) for p in (primitive_cell.p1,
                                                     primitive_cell.p2,
                                                     primitive_cell.p3))
             data_set = tvtk.ImageData(spacing=spacing, origin=origin)
             data_set.extent = 0, size[0] - 1, 0, size[1] - 1, 0, size[2] - 1
+        elif bravais_lattice in BravaisLattice and implicit:
+            data_set = tvtk.ImageData(spacing=(1, 1, 1), origin=origin)
+            data_set.extent = 0, size[0] - 1, 0, size[1] - 1, 0, size[2] - 1
         elif bravais_lattice in BravaisLattice:
             y, z, x = numpy.meshgrid(
                 range(size[1]), range(size[2]), range(size[0]))
@@ -211,7 +774,7 @@ class VTKLattice(ABCLattice):
                    data=data, data_set=data_set)
 
     @classmethod
-    def from_lattice(cls, lattice, node_keys=None):
+    def from_lattice(cls, lattice, node_keys=None, implicit=False):
         """ Create a new Lattice from the provided one.
 
         Parameters
@@ -222,6 +785,10 @@ class VTKLattice(ABCLattice):
             A list of point CUBA keys that we want to copy, and only those.
             If None, all available and compatible keys will be copied.
 
+        implicit : bool
+            If True non-orthogonal lattices do not store the node
+            coordinates (see :attr:`implicit`). Default is False.
+
         Returns
         -------
         lattice : VTKLattice
@@ -239,12 +806,9 @@ class VTKLattice(ABCLattice):
         lattice_type = primitive_cell.bravais_lattice
         size = lattice.size
         name = lattice.name
-        node_data = CUBADataAccumulator(node_keys)
         data = lattice.data
 
-        if lattice_type in (
-                BravaisLattice.CUBIC, BravaisLattice.TETRAGONAL,
-                BravaisLattice.ORTHORHOMBIC):
+        if lattice_type in ORTHOGONAL_LATTICES:
             # Cubic/Tetragonal/Orthorhombic lattice can be represented
             # by tvtk.ImageData, which is more efficient than PolyData
             # But we should make sure the primitive vectors do describe
@@ -266,11 +830,11 @@ class VTKLattice(ABCLattice):
             origin = origin
             data_set = tvtk.ImageData(spacing=spacing, origin=origin)
             data_set.extent = 0, size[0] - 1, 0, size[1] - 1, 0, size[2] - 1
-            # vtk ravels the point positions in a very weird way
-            # this setup has been supported by tests.
-            y, z, x = numpy.meshgrid(
-                range(size[1]), range(size[2]), range(size[0]))
-            indices = izip(x.ravel(), y.ravel(), z.ravel())
+        elif lattice_type in BravaisLattice and implicit:
+            # The node coordinates are computed from the primitive cell
+            # so an ImageData in index space is enough.
+            data_set = tvtk.ImageData(spacing=(1, 1, 1), origin=origin)
+            data_set.extent = 0, size[0] - 1, 0, size[1] - 1, 0, size[2] - 1
         elif lattice_type in BravaisLattice:
             # This includes any other BravaisLattice type that cannot be
             # represented by ImageData.  PolyData is required.
@@ -286,17 +850,21 @@ class VTKLattice(ABCLattice):
                 points[:, idim] += origin[idim]
 
             data_set = tvtk.PolyData(points=points)
-            indices = izip(x.ravel(), y.ravel(), z.ravel())
         else:
             message = 'Unknown lattice type: {}'.format(lattice_type)
             raise ValueError(message)
 
-        for node in lattice.iter(indices):
-            node_data.append(node.data)
-        node_data.load_onto_vtk(data_set.point_data)
-
-        return cls(name=name, primitive_cell=primitive_cell, data=data,
-                   data_set=data_set)
+        new_lattice = cls(
+            name=name, primitive_cell=primitive_cell, data=data,
+            data_set=data_set)
+        if isinstance(lattice, VTKLattice):
+            # Both lattices store the nodes in the same order, so the
+            # data (and their masks) can be copied column by column.
+            new_lattice.point_data.copy_columns(lattice.point_data, node_keys)
+        else:
+            new_lattice._set_node_columns(
+                _read_node_columns(lattice, size, node_keys))
+        return new_lattice
 
     @classmethod
     def from_dataset(cls, name, data_set, data=None):
@@ -364,6 +932,77 @@ class VTKLattice(ABCLattice):
 
     # Private methods ######################################################
 
+    def _set_node_columns(self, columns):
+        """ Overwrite the node data with the columns of all the nodes.
+
+        Parameters
+        ----------
+        columns : dict
+            The mapping from CUBA key to the (values, missing) arrays of
+            the nodes in storage order (see :func:`_read_node_columns`).
+            The stored columns that are not in ``columns`` are marked as
+            missing.
+
+        """
+        point_data = self.point_data
+        all_missing = numpy.ones(len(point_data), dtype=bool)
+        with point_data.batch():
+            for cuba in point_data.cubas - set(columns):
+                point_data.set_column(
+                    cuba, default_cuba_value(cuba), missing=all_missing)
+            for cuba, (values, missing) in columns.iteritems():
+                point_data.set_column(cuba, values, missing=missing)
+
+    def _get_coordinates(self, indices, point_ids):
+        """ Return the coordinates of a block of lattice nodes
+
+        Parameters
+        ----------
+        indices : ndarray
+            The (N, 3) array of node indices.
+
+        point_ids : slice or ndarray
+            The raveled indices of the same nodes.
+
+        Returns
+        -------
+        coordinates : ndarray
+        """
+        data_set = self.data_set
+        if self.implicit:
+            primitive_cell = self._primitive_cell
+            vectors = numpy.array(
+                (primitive_cell.p1, primitive_cell.p2, primitive_cell.p3),
+                dtype='double')
+            return (numpy.asarray(self.origin, dtype='double') +
+                    numpy.dot(indices, vectors))
+        elif isinstance(data_set, tvtk.ImageData):
+            return (numpy.asarray(self.origin, dtype='double') +
+                    indices * numpy.asarray(data_set.spacing, dtype='double'))
+        else:
+            return numpy.array(data_set.points.to_array()[point_ids])
+
+    def _get_point_ids(self, indices):
+        """ Return the raveled indices for an array of lattice indices
+
+        Parameters
+        ----------
+        indices : array_like
+            The (N, 3) array of lattice indices or None for all the nodes.
+
+        Returns
+        -------
+        point_ids : ndarray or slice
+        """
+        if indices is None:
+            return slice(None)
+        point_ids = self.get_point_ids(indices)
+        invalid = numpy.flatnonzero(point_ids < 0)
+        if len(invalid) != 0:
+            message = '{} indices are out of range, first at position {}'
+            raise IndexError(message.format(len(invalid), invalid[0]))
+        return point_ids
+
     def _get_point_id(self, index):
         """ Return a raveled index for a given indices in the lattice
 
@@ -375,11 +1014,62 @@ class VTKLattice(ABCLattice):
         -------
         index : int
         """
-        try:
-            point_id = self.data_set.compute_point_id(index)
-        except AttributeError:
-            point_id = int(
-                numpy.ravel_multi_index(index, self.size, order="F"))
-        if point_id < 0:
+        nx, ny, nz = self.size
+        i, j, k = index
+        if not (0 <= i < nx and 0 <= j < ny and 0 <= k < nz):
             raise IndexError('index:{} is out of range'.format(index))
-        return point_id
+        # the nodes are stored with the first index varying fastest
+        return int(i + nx * (j + ny * k))
+
+
+def _read_node_columns(lattice, size, keys=None):
+    """ Read the node data of a lattice into one array per CUBA key.
+
+    The nodes are requested from ``lattice`` in blocks of
+    :data:`DEFAULT_CHUNK_SIZE` indices, in the order they are stored in
+    a vtk dataset (i.e. the first index varies fastest), and their values
+    are written into arrays allocated once for all the nodes.
+
+    Parameters
+    ----------
+    lattice : ABCLattice
+        The lattice to read.
+
+    size : tuple
+        The lattice dimensions (nx, ny, nz).
+
+    keys : list
+        The CUBA keys to read. Default is None which reads all the keys
+        found in the nodes.
+
+    Returns
+    -------
+    columns : dict
+        The mapping from CUBA key to the tuple of the array of values and
+        the boolean array of the nodes without a value. Keys that are not
+        supported by vtk are ignored.
+
+    """
+    length = int(numpy.prod(size))
+    supported = supported_cuba()
+    columns = {}
+    for point_ids in chunk_slices(length):
+        indices = numpy.unravel_index(
+            numpy.arange(point_ids.start, point_ids.stop), size, order="F")
+        node_data = CUBADataAccumulator(keys)
+        for node in lattice.iter(izip(*[axis.tolist() for axis in indices])):
+            node_data.append(node.data)
+        for cuba in node_data.keys & supported:
+            if cuba not in columns:
+                values = empty_array(cuba, length)
+                if values.shape[1] == 1:
+                    values = values[:, 0]
+                columns[cuba] = values, numpy.ones(length, dtype=bool)
+            values, missing = columns[cuba]
+            block = node_data[cuba]
+            default = default_cuba_value(cuba)
+            missing[point_ids] = [value is None for value in block]
+            values[point_ids] = numpy.array(
+                [default if value is None else value for value in block],
+                dtype=values.dtype)
+    return columns
@@ -1,6 +1,6 @@
 import uuid
 import contextlib
-from itertools import count
+from itertools import chain, count, izip
 
 import numpy
 from tvtk.api import tvtk
@@ -13,7 +13,22 @@ from simphony_mayavi.core.api import (
     CubaData, CellCollection, supported_cuba, mergedocs,
     EDGE2VTKCELL, FACE2VTKCELL, CELL2VTKCELL,
     ELEMENT2VTKCELLTYPES, VTKCELLTYPE2ELEMENT,
-    CUBADataAccumulator, gather_cells)
+    CUBADataAccumulator, gather_cells, vtk_array_view, update_vtk_array,
+    append_vtk_array, mark_vtk_array_modified,
+    DEFAULT_CHUNK_SIZE, chunk_slices, mapped_array, next_version,
+    collect_changes)
+
+#: The mapping from element class to the vtk cell type mapping.
+ELEMENT2MAPPING = {
+    Edge: EDGE2VTKCELL,
+    Face: FACE2VTKCELL,
+    Cell: CELL2VTKCELL}
+
+#: The mapping from CUBA item type to element class.
+CUBA2ELEMENT = {
+    CUBA.EDGE: Edge,
+    CUBA.FACE: Face,
+    CUBA.CELL: Cell}
 
 
 @mergedocs(ABCMesh)
@@ -101,6 +116,21 @@ class VTKMesh(ABCMesh):
         # Elements cells
         self.elements = CellCollection(data_set.get_cells())
 
+        # The arrays of cell indices of each element type, built lazily
+        self._type_indices = None
+        # The indices of the elements added one at a time since the
+        # arrays were last updated
+        self._added_indices = {}
+
+        # Versions of the last change of the point coordinates and of
+        # the element connectivity.
+        self._geometry_version = self._topology_version = next_version()
+
+        # The depth of nested batch blocks and the vtk objects that have
+        # been changed in place since the start of the outermost block.
+        self._batch_depth = 0
+        self._changed_objects = {}
+
     @classmethod
     def from_mesh(cls, mesh, point_keys=None, cell_keys=None):
         """ Create a new VTKMesh copy from a CUDS mesh instance.
@@ -220,14 +250,39 @@ class VTKMesh(ABCMesh):
     def data(self, data):
         self._data = DataContainer(data)
 
+    @property
+    def geometry_version(self):
+        """ The version of the last change of the point coordinates.
+
+        The version is also bumped when points are added. Changes of
+        the point and element data are tracked per CUBA key by
+        :meth:`CubaData.column_version` of ``point_data`` and
+        ``element_data``.
+
+        """
+        return self._geometry_version
+
+    @property
+    def topology_version(self):
+        """ The version of the last change of the points and elements.
+
+        The version is bumped when points or elements are added and
+        when the points of an element are updated.
+
+        """
+        return self._topology_version
+
+    @property
+    def version(self):
+        """ The version of the last tracked change of the container.
+        """
+        return max(
+            self._geometry_version, self._topology_version,
+            self.point_data.version, self.element_data.version)
+
     def count_of(self, item_type):
         def count_element(type_):
-            # max value of cell_types_array is small enough for
-            # bincount to be efficient
-            counts = numpy.bincount(self.data_set.cell_types_array)
-            type_ids = numpy.array(ELEMENT2VTKCELLTYPES[type_])
-            type_ids = type_ids[type_ids < len(counts)]
-            return counts[type_ids].sum()
+            return len(self._get_type_indices()[type_])
 
         items_count = {
             CUBA.POINT: lambda: self.data_set.number_of_points,
@@ -256,6 +311,11 @@ class VTKMesh(ABCMesh):
                 self.index2point[index] = item.uid
                 self.point_data.append(item.data)
                 new_uids.append(item.uid)
+        if len(new_uids) != 0:
+            # invalidate the numpy cache, see issue
+            # https://github.com/enthought/mayavi/issues/197
+            self._vtk_object_changed(own_points.data)
+            self._geometry_version = self._topology_version = next_version()
         return new_uids
 
     def _get_point(self, uid):
@@ -276,11 +336,14 @@ class VTKMesh(ABCMesh):
                 raise ValueError(message.format(point.uid))
             self.data_set.points[index] = point.coordinates
             self.point_data[index] = point.data
+            self._geometry_version = next_version()
 
     def _iter_points(self, uids=None):
         if uids is None:
-            for uid in self.point2index:
-                yield self._get_point(uid)
+            # visit the points in storage order
+            index2point = self.index2point
+            for index in xrange(len(index2point)):
+                yield self._get_point(index2point[index])
         else:
             for uid in uids:
                 yield self._get_point(uid)
@@ -298,8 +361,9 @@ class VTKMesh(ABCMesh):
                 message = "{} with {} does not exist"
                 raise ValueError(message.format(type(element), element.uid))
             point_ids = [self.point2index[uid] for uid in element.points]
-            self.elements[index] = point_ids
+            self._set_element_points(index, point_ids)
             self.element_data[index] = element.data
+            self._topology_version = next_version()
 
     # Edge operations ########################################################
 
@@ -394,8 +458,476 @@ class VTKMesh(ABCMesh):
     def _update_cells(self, cells):
         return self._update_elements(cells)
 
+    # Bulk operations ########################################################
+
+    def add_element_block(self, item_type, connectivity, uids=None,
+                          data=None):
+        """ Add a block of elements of the same type.
+
+        The cells, cell types and attribute data of the whole block are
+        appended to the vtk dataset at once. The vtk arrays are extended
+        in place (see
+        :func:`~simphony_mayavi.core.cell_array_tools.append_vtk_array`),
+        so adding blocks repeatedly costs time proportional to the size
+        of the blocks and the arrays held by the pipeline stay valid.
+
+        Parameters
+        ----------
+        item_type : CUBA
+            The type of the elements (i.e. CUBA.EDGE, CUBA.FACE or
+            CUBA.CELL).
+
+        connectivity : array_like or dict
+            The (M, n) array of the point indices of elements with ``n``
+            points, or a dict from the number of points to such an array
+            to add elements with different numbers of points. The
+            indices refer to the points as stored in the vtk dataset
+            (see ``point2index``). The arrays of a dict are added in
+            increasing number of points.
+
+        uids : sequence
+            The uids of the new elements, in the order they are added.
+            Default is None which will generate new uids.
+
+        data : dict
+            The mapping from CUBA key to the array of values to attach
+            to the new elements, in the order they are added. Default is
+            None.
+
+        Returns
+        -------
+        uids : list
+            The uids of the new elements.
+
+        Raises
+        ------
+        ValueError :
+            When the item type or the number of points per element is not
+            supported, the point indices are out of range or the uids
+            are invalid.
+
+        """
+        try:
+            element = CUBA2ELEMENT[item_type]
+        except KeyError:
+            message = "Bulk insertion is not supported for: {}"
+            raise ValueError(message.format(item_type))
+        if isinstance(connectivity, dict):
+            blocks = sorted(connectivity.iteritems())
+        else:
+            blocks = [(None, connectivity)]
+
+        data_set = self.data_set
+        cell_blocks = []
+        for expected, block in blocks:
+            block = numpy.asarray(block, dtype=int)
+            if expected is not None and block.size == 0:
+                continue
+            if block.ndim != 2:
+                message = (
+                    "Expected a two dimensional connectivity array, got {}")
+                raise ValueError(message.format(block.shape))
+            npoints = block.shape[1]
+            if expected is not None and npoints != expected:
+                message = "Expected elements with {} points, got {}"
+                raise ValueError(message.format(expected, npoints))
+            try:
+                cell_type = ELEMENT2MAPPING[element][npoints]
+            except KeyError:
+                message = "{} with {} points is not supported"
+                raise ValueError(message.format(element.__name__, npoints))
+            if len(block) == 0:
+                continue
+            if block.min() < 0 or block.max() >= data_set.number_of_points:
+                raise ValueError("Point indices are out of range")
+            cell_blocks.append((block, cell_type))
+        length = sum(len(block) for block, _ in cell_blocks)
+        if length == 0:
+            return []
+
+        element2index = self.element2index
+        if uids is None:
+            uids = [uuid.uuid4() for _ in xrange(length)]
+        else:
+            uids = list(uids)
+            if len(uids) != length:
+                message = "Expected {} uids, got {}"
+                raise ValueError(message.format(length, len(uids)))
+            unique = set(uids)
+            if len(unique) != length:
+                raise ValueError("The provided uids are not unique")
+            for uid in unique.intersection(element2index):
+                message = "Item with id:{} already exists"
+                raise ValueError(message.format(uid))
+
+        # Build the new connectivity, locations and types
+        cell_array = data_set.get_cells()
+        types_array = data_set.cell_types_array
+        if cell_array is None or types_array is None:
+            offset = start = 0
+        else:
+            offset = cell_array.data.number_of_tuples
+            start = types_array.number_of_tuples
+        cells = []
+        locations = []
+        types = []
+        for block, cell_type in cell_blocks:
+            size, npoints = block.shape
+            block_cells = numpy.empty((size, npoints + 1), dtype=int)
+            block_cells[:, 0] = npoints
+            block_cells[:, 1:] = block
+            cells.append(block_cells.ravel())
+            locations.append(offset + numpy.arange(size) * (npoints + 1))
+            types.append(numpy.repeat(numpy.uint8(cell_type), size))
+            offset += block_cells.size
+        cells = numpy.concatenate(cells)
+        locations = numpy.concatenate(locations)
+        types = numpy.concatenate(types)
+
+        if start == 0:
+            cell_array = tvtk.CellArray()
+            cell_array.set_cells(length, cells)
+            data_set.set_cells(types, locations, cell_array)
+        else:
+            locations_array = data_set.cell_locations_array
+            for array, values in (
+                    (cell_array.data, cells),
+                    (types_array, types),
+                    (locations_array, locations)):
+                append_vtk_array(array, values, notify=False)
+                self._vtk_object_changed(array)
+            cell_array.set_cells(start + length, cell_array.data)
+            # reset the cell links of the dataset
+            data_set.set_cells(types_array, locations_array, cell_array)
+        self.elements = CellCollection(cell_array)
+
+        element2index.update(izip(uids, count(start)))
+        self.index2element.update(izip(count(start), uids))
+        self.element_data.extend_columns(
+            {} if data is None else data, length)
+        if self._type_indices is not None:
+            indices = self._get_type_indices()
+            indices[element] = numpy.concatenate((
+                indices[element],
+                numpy.arange(start, start + length, dtype=numpy.int64)))
+        self._topology_version = next_version()
+        return uids
+
+    # Batch modifications ####################################################
+
+    @property
+    def batching(self):
+        """ True while the container is inside a :meth:`batch` block.
+        """
+        return self._batch_depth > 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ Group a sequence of modifications.
+
+        Inside the ``with`` block the invalidation of the numpy array
+        caches and the maintenance of the element type index are
+        deferred and the sources ignore the modified events of the vtk
+        dataset. On exit of the outermost block the caches are
+        invalidated once and the dataset is marked as modified, so that
+        the sources are notified once.
+
+        Examples
+        --------
+        >>> with container.batch():
+        ...     for item in items:
+        ...         container.add([item])
+
+        """
+        self._batch_depth += 1
+        # The element type index is rebuilt on demand instead of being
+        # updated on every insertion.
+        self._type_indices = None
+        self._added_indices.clear()
+        try:
+            with self.point_data.batch(), self.element_data.batch():
+                yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_changed_objects()
+                self.data_set.modified()
+
+    # Change tracking ########################################################
+
+    def changes_since(self, version):
+        """ Return the modifications of the container after ``version``.
+
+        Parameters
+        ----------
+        version : int
+            A version number previously returned by :attr:`version`.
+
+        Returns
+        -------
+        changes : dict
+            The geometry, topology and data changes (see
+            :func:`~simphony_mayavi.core.version_counter.collect_changes`).
+
+        """
+        return collect_changes(
+            version, self._geometry_version, self._topology_version,
+            self.point_data, self.element_data)
+
+    # In place update ########################################################
+
+    def update_from_mesh(self, mesh, point_keys=None, cell_keys=None):
+        """ Update the container in place from a CUDS mesh instance.
+
+        The point coordinates and the data are overwritten in place when
+        ``mesh`` contains the same points and elements (i.e. the same uids
+        and connectivity) as this container. Otherwise nothing is changed
+        and a new container should be created with :meth:`from_mesh`.
+        Only the vtk arrays whose values change are marked as modified
+        (see :meth:`changes_since`).
+
+        Parameters
+        ----------
+        mesh : ABCMesh
+            The mesh to copy the coordinates and data from.
+
+        point_keys : list
+            A list of point CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        cell_keys : list
+            A list of cell CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        Returns
+        -------
+        updated : bool
+            False when the topology is different and the container has
+            not been updated.
+
+        """
+        point2index = self.point2index
+        element2index = self.element2index
+        for item_type in (CUBA.POINT, CUBA.EDGE, CUBA.FACE, CUBA.CELL):
+            if mesh.count_of(item_type) != self.count_of(item_type):
+                return False
+
+        if isinstance(mesh, VTKMesh) and self._has_same_layout(mesh):
+            # The items are stored in the same order, so the coordinates
+            # and the data can be copied array by array.
+            if len(point2index) != 0:
+                points = self.data_set.points.data
+                if update_vtk_array(
+                        points, vtk_array_view(mesh.data_set.points.data),
+                        notify=False):
+                    self._vtk_object_changed(points)
+                    self._geometry_version = next_version()
+            self.point_data.copy_columns(mesh.point_data, point_keys)
+            self.element_data.copy_columns(mesh.element_data, cell_keys)
+            return True
+
+        indices = []
+        coordinates = []
+        point_data = CUBADataAccumulator(point_keys)
+        for point in mesh.iter(item_type=CUBA.POINT):
+            index = point2index.get(point.uid)
+            if index is None:
+                return False
+            indices.append(index)
+            coordinates.append(point.coordinates)
+            point_data.append(point.data)
+
+        element_indices = []
+        links = []
+        cell_types = []
+        cell_data = CUBADataAccumulator(cell_keys)
+        for item_type, mapping in (
+                (CUBA.EDGE, EDGE2VTKCELL),
+                (CUBA.FACE, FACE2VTKCELL),
+                (CUBA.CELL, CELL2VTKCELL)):
+            for element in mesh.iter(item_type=item_type):
+                index = element2index.get(element.uid)
+                if index is None:
+                    return False
+                try:
+                    links.append([point2index[uid] for uid in element.points])
+                    cell_types.append(mapping[len(element.points)])
+                except KeyError:
+                    return False
+                element_indices.append(index)
+                cell_data.append(element.data)
+        if not self._has_same_elements(element_indices, links, cell_types):
+            return False
+
+        if len(indices) != 0:
+            points = self.data_set.points.data
+            if update_vtk_array(points, coordinates, indices, notify=False):
+                self._vtk_object_changed(points)
+                self._geometry_version = next_version()
+            point_data.load_onto_cuba_data(self.point_data, indices)
+        if len(element_indices) != 0:
+            cell_data.load_onto_cuba_data(self.element_data, element_indices)
+        return True
+
+    def patch_from_mesh(self, mesh, uids=None, point_keys=None,
+                        cell_keys=None, coordinates=True):
+        """ Update some of the points and elements in place.
+
+        Only the given items are copied from ``mesh``, which is assumed
+        to have the same points and elements (and connectivity) as this
+        container.
+
+        Parameters
+        ----------
+        mesh : ABCMesh
+            The mesh to copy the coordinates and data from.
+
+        uids : iterable
+            The uids of the points and elements to copy. Default is None
+            which copies all the items, skipping the item types for
+            which there is nothing to copy (i.e. an empty list of keys).
+
+        point_keys : list
+            A list of point CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        cell_keys : list
+            A list of cell CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        coordinates : bool
+            When False the point coordinates are not copied.
+
+        Returns
+        -------
+        updated : bool
+            False when some of the uids are not in this container (or
+            the number of items is different) and nothing has been
+            updated.
+
+        """
+        point2index = self.point2index
+        element2index = self.element2index
+        indices = []
+        points = []
+        point_data = CUBADataAccumulator(point_keys)
+        element_indices = []
+        cell_data = CUBADataAccumulator(cell_keys)
+        if uids is None:
+            for item_type in (CUBA.POINT, CUBA.EDGE, CUBA.FACE, CUBA.CELL):
+                if mesh.count_of(item_type) != self.count_of(item_type):
+                    return False
+            items = []
+            if coordinates or point_keys != []:
+                items.append(mesh.iter(item_type=CUBA.POINT))
+            if cell_keys != []:
+                items.extend(
+                    mesh.iter(item_type=item_type)
+                    for item_type in (CUBA.EDGE, CUBA.FACE, CUBA.CELL))
+            items = chain.from_iterable(items)
+        else:
+            items = (mesh.get(uid) for uid in uids)
+        for item in items:
+            uid = item.uid
+            if uid in point2index:
+                indices.append(point2index[uid])
+                points.append(item.coordinates)
+                point_data.append(item.data)
+            elif uid in element2index:
+                element_indices.append(element2index[uid])
+                cell_data.append(item.data)
+            else:
+                return False
+
+        if len(indices) != 0:
+            if coordinates and update_vtk_array(
+                    self.data_set.points.data, points, indices,
+                    notify=False):
+                self._vtk_object_changed(self.data_set.points.data)
+                self._geometry_version = next_version()
+            point_data.load_onto_cuba_data(
+                self.point_data, indices, partial=point_keys is not None)
+        if len(element_indices) != 0:
+            cell_data.load_onto_cuba_data(
+                self.element_data, element_indices,
+                partial=cell_keys is not None)
+        return True
+
+    # Chunked access #########################################################
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, keys=None,
+                    item_type=CUBA.POINT):
+        """ Iterate over the points or elements in blocks of numpy arrays.
+
+        The items are visited in the order they are stored in the
+        vtk dataset. The container should not be modified while iterating.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The maximum number of items in each block.
+
+        keys : iterable
+            The CUBA keys of the data columns to return. Default is None
+            which returns all the currently stored columns.
+
+        item_type : CUBA
+            The type of the items to iterate over (i.e. CUBA.POINT,
+            CUBA.EDGE, CUBA.FACE or CUBA.CELL). Default is CUBA.POINT.
+
+        Yields
+        ------
+        uids : ndarray
+            The uids of the items in the block.
+
+        coordinates : ndarray
+            The (N, 3) array of the point coordinates. For elements an
+            object array with the list of point uids of each element.
+
+        data : dict
+            The mapping from CUBA key to the array of values.
+
+        Raises
+        ------
+        ValueError :
+            When ``item_type`` is not supported.
+
+        """
+        if item_type == CUBA.POINT:
+            blocks = self._iter_point_blocks(chunk_size)
+            item_data = self.point_data
+        elif item_type in CUBA2ELEMENT:
+            blocks = self._iter_element_blocks(
+                CUBA2ELEMENT[item_type], chunk_size)
+            item_data = self.element_data
+        else:
+            message = "Chunked iteration is not supported for: {}"
+            raise ValueError(message.format(item_type))
+        keys = item_data.cubas if keys is None else set(keys)
+        for indices, uids, coordinates in blocks:
+            yield (
+                uids,
+                coordinates,
+                {cuba: item_data.get_column(cuba, indices) for cuba in keys})
+
     # Private interface ######################################################
 
+    def _vtk_object_changed(self, obj):
+        """ Mark a vtk array (or cell array) that has been changed in
+        place as modified, on exit of the outermost :meth:`batch` block
+        when batching. """
+        self._changed_objects[tvtk.to_vtk(obj).__this__] = obj
+        if self._batch_depth == 0:
+            self._flush_changed_objects()
+
+    def _flush_changed_objects(self):
+        changed, self._changed_objects = self._changed_objects, {}
+        for obj in changed.itervalues():
+            if isinstance(obj, tvtk.DataArray):
+                mark_vtk_array_modified(obj)
+            else:
+                obj.modified()
+
     @contextlib.contextmanager
     def _add_item(self, item, container):
         if item.uid is None:
@@ -406,12 +938,7 @@ class VTKMesh(ABCMesh):
         yield item
 
     def _has_elements(self, element):
-        cell_types = self.data_set.cell_types_array
-        for type_ in ELEMENT2VTKCELLTYPES[element]:
-            if type_ in cell_types:
-                return True
-        else:
-            return False
+        return len(self._get_type_indices()[element]) != 0
 
     def _get_element(self, index, type_=None):
         data_set = self.data_set
@@ -422,38 +949,196 @@ class VTKMesh(ABCMesh):
         if type_ != stored_type:
             raise IndexError("{}".format(index))
 
+        # Read the point ids from the connectivity array since
         # data_set.get_cell may return the wrong point ids
         # if the cell type is updated
-        # Use elements[index] to retrieve point ids instead
         # https://github.com/simphony/simphony-mayavi/issues/94
+        connectivity = self._connectivity()
+        start = self._element_locations()[index]
+        point_ids = connectivity[start + 1:start + 1 + connectivity[start]]
         return type_(
             uid=self.index2element[index],
-            points=[self.index2point[i] for i in self.elements[index]],
+            points=[self.index2point[i] for i in point_ids],
             data=self.element_data[index])
 
     def _iter_elements(self, type_):
-        cell_types = self.data_set.cell_types_array
-        types = ELEMENT2VTKCELLTYPES[type_]
-        index2point = self.index2point
-        index2element = self.index2element
         element_data = self.element_data
+        for indices, uids, points in self._iter_element_blocks(type_):
+            rows = element_data.get_rows(indices)
+            for uid, element_points, data in izip(uids, points, rows):
+                yield type_(uid=uid, points=element_points, data=data)
+
+    def _has_same_elements(self, indices, links, cell_types):
+        """ Check the element connectivity and types against the stored ones.
+
+        Parameters
+        ----------
+        indices : list
+            The element indices (a permutation of the stored elements).
+
+        links : list
+            The point indices of each element.
+
+        cell_types : list
+            The vtk cell type of each element.
+
+        """
+        order = numpy.argsort(indices)
+        expected = []
+        for position in order:
+            link = links[position]
+            expected.append(len(link))
+            expected.extend(link)
+        return (
+            numpy.array_equal(self._connectivity(), expected) and
+            numpy.array_equal(
+                self._cell_types(), numpy.take(cell_types, order)))
+
+    def _has_same_layout(self, other):
+        """ Check if a VTKMesh container stores the same points and
+        elements in the same order. """
+        return (
+            other.point2index == self.point2index and
+            other.element2index == self.element2index and
+            numpy.array_equal(other._connectivity(), self._connectivity()) and
+            numpy.array_equal(other._cell_types(), self._cell_types()))
+
+    def _iter_point_blocks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Iterate over the (indices, uids, coordinates) blocks of points.
+        """
+        length = self.data_set.number_of_points
+        points = (
+            vtk_array_view(self.data_set.points.data)
+            if length != 0 else None)
+        for indices in chunk_slices(length, chunk_size):
+            yield (
+                indices,
+                mapped_array(self.index2point, indices),
+                numpy.array(points[indices]))
+
+    def _iter_element_blocks(self, type_, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Iterate over the (indices, uids, points) blocks of elements.
+
+        The point ids of all the elements in a block are gathered from
+        the connectivity array at once, grouping the elements by
+        their number of points.
+
+        """
+        all_indices = self._get_type_indices()[type_]
+        if len(all_indices) == 0:
+            return
+        connectivity = self._connectivity()
+        locations = self._element_locations()
+        point_uids = mapped_array(
+            self.index2point, slice(0, self.data_set.number_of_points))
+        for block in chunk_slices(len(all_indices), chunk_size):
+            indices = all_indices[block]
+            starts = locations[indices]
+            sizes = connectivity[starts]
+            points = numpy.empty(len(indices), dtype=object)
+            for size in numpy.unique(sizes):
+                selected = numpy.flatnonzero(sizes == size)
+                offsets = numpy.arange(1, size + 1)
+                point_ids = connectivity[
+                    starts[selected, numpy.newaxis] + offsets]
+                for position, uids in izip(
+                        selected, point_uids[point_ids].tolist()):
+                    points[position] = uids
+            yield indices, mapped_array(self.index2element, indices), points
+
+    def _get_type_indices(self):
+        """ Return the int64 arrays of cell indices for each element type.
+
+        The arrays are generated from the vtk cell types the first time
+        they are needed and are then updated as elements are added.
+
+        """
+        if self._type_indices is None:
+            types = self._cell_types()
+            self._type_indices = {
+                element: numpy.flatnonzero(
+                    numpy.in1d(types, ELEMENT2VTKCELLTYPES[element])).astype(
+                        numpy.int64)
+                for element in ELEMENT2MAPPING}
+            self._added_indices.clear()
+        elif self._added_indices:
+            # the elements added one at a time are appended in one go
+            for element, added in self._added_indices.iteritems():
+                self._type_indices[element] = numpy.concatenate((
+                    self._type_indices[element],
+                    numpy.array(added, dtype=numpy.int64)))
+            self._added_indices.clear()
+        return self._type_indices
+
+    def _cell_types(self):
+        """ Return a numpy view of the vtk cell types.
+        """
+        types = self.data_set.cell_types_array
+        if types is None:
+            return numpy.empty(0, dtype=numpy.uint8)
+        return vtk_array_view(types)
+
+    def _element_locations(self):
+        """ Return a numpy view of the cell locations in the connectivity.
+        """
+        locations = self.data_set.cell_locations_array
+        if locations is None:
+            return numpy.empty(0, dtype=int)
+        return vtk_array_view(locations)
+
+    def _connectivity(self):
+        """ Return a numpy view of the vtk cell connectivity array.
+        """
+        cells = self.data_set.get_cells()
+        if cells is None:
+            return numpy.empty(0, dtype=int)
+        return vtk_array_view(cells.data)
+
+    def _set_element_points(self, index, point_ids):
+        """ Replace the point ids of the element at ``index``.
+
+        The cell locations and types are kept consistent with the
+        connectivity array when the number of points changes.
+
+        """
         data_set = self.data_set
-        for index, cell_type in enumerate(cell_types):
-            if cell_type in types:
-                element = data_set.get_cell(index)
-                yield type_(
-                    uid=index2element[index],
-                    points=[index2point[i] for i in element.point_ids],
-                    data=element_data[index])
+        cells = data_set.get_cells()
+        locations = self._element_locations()
+        start = locations[index]
+        connectivity = self._connectivity()
+        npoints = connectivity[start]
+        if npoints == len(point_ids):
+            data = cells.data
+            for position, point_id in enumerate(point_ids, start=start + 1):
+                data[position] = point_id
+            self._vtk_object_changed(cells)
+        else:
+            types = numpy.array(self._cell_types())
+            element = VTKCELLTYPE2ELEMENT[types[index]]
+            types[index] = ELEMENT2MAPPING[element][len(point_ids)]
+            locations = numpy.array(locations)
+            locations[index + 1:] += len(point_ids) - npoints
+            new_cell = numpy.array(
+                [len(point_ids)] + point_ids, connectivity.dtype)
+            connectivity = numpy.r_[
+                connectivity[:start],
+                new_cell,
+                connectivity[start + 1 + npoints:]]
+            cells.set_cells(len(types), connectivity)
+            data_set.set_cells(types, locations, cells)
 
     def _add_element(self, element, mapping):
         data_set = self.data_set
         element2index = self.element2index
         with self._add_item(element, element2index) as item:
             point_ids = [self.point2index[uid] for uid in item.points]
-            index = data_set.insert_next_cell(
-                mapping[len(point_ids)], point_ids)
+            cell_type = mapping[len(point_ids)]
+            index = data_set.insert_next_cell(cell_type, point_ids)
             element2index[item.uid] = index
             self.index2element[index] = item.uid
             self.element_data.append(item.data)
+            if self._type_indices is not None:
+                element_type = VTKCELLTYPE2ELEMENT[cell_type]
+                self._added_indices.setdefault(element_type, []).append(index)
+            self._topology_version = next_version()
             return item.uid
@@ -1,7 +1,8 @@
-import sys
 import uuid
+import itertools
 import contextlib
 
+import numpy
 from tvtk.api import tvtk
 
 from simphony.cuds.abc_particles import ABCParticles
@@ -10,7 +11,9 @@ from simphony.core.cuba import CUBA
 from simphony.core.data_container import DataContainer
 from simphony_mayavi.core.api import (
     CubaData, CellCollection, supported_cuba, mergedocs,
-    CUBADataAccumulator, VTKEDGETYPES)
+    CUBADataAccumulator, VTKEDGETYPES, vtk_array_view, update_vtk_array,
+    mark_vtk_array_modified, DEFAULT_CHUNK_SIZE, chunk_slices, mapped_array,
+    next_version, collect_changes)
 
 
 @mergedocs(ABCParticles)
@@ -55,6 +58,15 @@ class VTKParticles(ABCParticles):
             CUBA.BOND: lambda: self.bond2index
         }
 
+        # Versions of the last change of the coordinates and of the
+        # particle/bond connectivity.
+        self._geometry_version = self._topology_version = next_version()
+
+        # The depth of nested batch blocks and the vtk objects that have
+        # been changed in place since the start of the outermost block.
+        self._batch_depth = 0
+        self._changed_objects = {}
+
         # Setup the data_set
         if data_set is None:
             points = tvtk.Points()
@@ -123,6 +135,36 @@ class VTKParticles(ABCParticles):
     def data(self, value):
         self._data = DataContainer(value)
 
+    @property
+    def geometry_version(self):
+        """ The version of the last change of the particle coordinates.
+
+        The version is also bumped when particles are added or removed.
+        Changes of the particle and bond data are tracked per CUBA key
+        by :meth:`CubaData.column_version` of ``point_data`` and
+        ``bond_data``.
+
+        """
+        return self._geometry_version
+
+    @property
+    def topology_version(self):
+        """ The version of the last change of the particles and bonds.
+
+        The version is bumped when particles or bonds are added or
+        removed and when the particles of a bond are updated.
+
+        """
+        return self._topology_version
+
+    @property
+    def version(self):
+        """ The version of the last tracked change of the container.
+        """
+        return max(
+            self._geometry_version, self._topology_version,
+            self.point_data.version, self.bond_data.version)
+
     @classmethod
     def from_particles(cls, particles, particle_keys=None, bond_keys=None):
         """ Create a new VTKParticles copy from a CUDS particles instance.
@@ -248,21 +290,13 @@ class VTKParticles(ABCParticles):
                 self.point_data.append(item.data)
                 item_uids.append(item.uid)
 
-        # adding new points causes the cached array under
-        # tvtk.array_handler to be inconsistent with the
-        # points FloatArray, therefore we need to remove
-        # the reference in the tvtk.array_handler._array_cache
-        # for points.to_array() to work properly
-        _array_cache = None
-        for name in ['array_handler', 'tvtk.array_handler']:
-            if name in sys.modules:
-                mod = sys.modules[name]
-                if hasattr(mod, '_array_cache'):
-                    _array_cache = mod._array_cache
-                break
-        if _array_cache:
-            _array_cache._remove_array(tvtk.to_vtk(points.data).__this__)
-
+        if len(item_uids) != 0:
+            # adding new points causes the cached array under
+            # tvtk.array_handler to be inconsistent with the
+            # points FloatArray, see issue
+            # https://github.com/enthought/mayavi/issues/197
+            self._vtk_object_changed(points.data)
+            self._geometry_version = self._topology_version = next_version()
         return item_uids
 
     def _get_particle(self, uid):
@@ -293,9 +327,10 @@ class VTKParticles(ABCParticles):
             del particle2index[uid]
             del index2particle[index]
 
-        array = points.to_array()
-        self.data_set.points = array[:-count]
+        array = vtk_array_view(points.data)
+        self.data_set.points = numpy.array(array[:-count])
         assert len(self.data_set.points) == len(particle2index)
+        self._geometry_version = self._topology_version = next_version()
 
     def _update_particles(self, iterable):
         for particle in iterable:
@@ -306,11 +341,14 @@ class VTKParticles(ABCParticles):
                 raise ValueError(message.format(particle.uid))
             self.data_set.points[index] = particle.coordinates
             self.point_data[index] = particle.data
+            self._geometry_version = next_version()
 
     def _iter_particles(self, uids=None):
         if uids is None:
-            for uid in self.particle2index:
-                yield self._get_particle(uid)
+            # visit the particles in storage order
+            index2particle = self.index2particle
+            for index in xrange(len(index2particle)):
+                yield self._get_particle(index2particle[index])
         else:
             for uid in uids:
                 yield self._get_particle(uid)
@@ -350,6 +388,8 @@ class VTKParticles(ABCParticles):
                 self.index2bond[index] = item.uid
                 self.bond_data.append(item.data)
                 item_uids.append(item.uid)
+        if len(item_uids) != 0:
+            self._topology_version = next_version()
         return item_uids
 
     def _get_bond(self, uid):
@@ -377,6 +417,7 @@ class VTKParticles(ABCParticles):
             point_ids = [self.particle2index[uid] for uid in bond.particles]
             self.bonds[index] = point_ids
             self.bond_data[index] = bond.data
+            self._topology_version = next_version()
 
     def _has_bond(self, uid):
         return uid in self.bond2index
@@ -400,6 +441,7 @@ class VTKParticles(ABCParticles):
             # remove uid item from mappings
             del bond2index[uid]
             del index2bond[index]
+            self._topology_version = next_version()
 
     def _iter_bonds(self, uids=None):
         if uids is None:
@@ -416,8 +458,308 @@ class VTKParticles(ABCParticles):
             error_str = "Trying to obtain count a of non-supported item: {}"
             raise ValueError(error_str.format(item_type))
 
+    # Batch modifications ####################################################
+
+    @property
+    def batching(self):
+        """ True while the container is inside a :meth:`batch` block.
+        """
+        return self._batch_depth > 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ Group a sequence of modifications.
+
+        Inside the ``with`` block the invalidation of the numpy array
+        caches is deferred and the sources ignore the
+        modified events of the vtk dataset. On exit of the outermost
+        block the caches are invalidated once and the dataset is marked
+        as modified, so that the sources are notified once.
+
+        Examples
+        --------
+        >>> with container.batch():
+        ...     for item in items:
+        ...         container.add([item])
+
+        """
+        self._batch_depth += 1
+        try:
+            with self.point_data.batch(), self.bond_data.batch():
+                yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_changed_objects()
+                self.data_set.modified()
+
+    # Change tracking ########################################################
+
+    def changes_since(self, version):
+        """ Return the modifications of the container after ``version``.
+
+        Parameters
+        ----------
+        version : int
+            A version number previously returned by :attr:`version`.
+
+        Returns
+        -------
+        changes : dict
+            The geometry, topology and data changes (see
+            :func:`~simphony_mayavi.core.version_counter.collect_changes`).
+
+        """
+        return collect_changes(
+            version, self._geometry_version, self._topology_version,
+            self.point_data, self.bond_data)
+
+    # In place update ########################################################
+
+    def update_from_particles(self, particles, particle_keys=None,
+                              bond_keys=None):
+        """ Update the container in place from a CUDS particles instance.
+
+        The coordinates and the data are overwritten in place when
+        ``particles`` contains the same particles and bonds (i.e. the same
+        uids and bond connectivity) as this container. Otherwise nothing
+        is changed and a new container should be created with
+        :meth:`from_particles`. Only the vtk arrays whose values change
+        are marked as modified (see :meth:`changes_since`).
+
+        Parameters
+        ----------
+        particles : ABCParticles
+            CUDS Particles dataset
+
+        particle_keys : list
+            A list of point CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        bond_keys : list
+            A list of cell CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        Returns
+        -------
+        updated : bool
+            False when the topology is different and the container has
+            not been updated.
+
+        """
+        particle2index = self.particle2index
+        bond2index = self.bond2index
+        if (particles.count_of(CUBA.PARTICLE) != len(particle2index) or
+                particles.count_of(CUBA.BOND) != len(bond2index)):
+            return False
+
+        if isinstance(particles, VTKParticles) and \
+                self._has_same_layout(particles):
+            # The items are stored in the same order, so the coordinates
+            # and the data can be copied array by array.
+            if len(particle2index) != 0:
+                points = self.data_set.points.data
+                other = particles.data_set.points.data
+                if update_vtk_array(
+                        points, vtk_array_view(other), notify=False):
+                    self._vtk_object_changed(points)
+                    self._geometry_version = next_version()
+            self.point_data.copy_columns(particles.point_data, particle_keys)
+            self.bond_data.copy_columns(particles.bond_data, bond_keys)
+            return True
+
+        indices = []
+        coordinates = []
+        particle_data = CUBADataAccumulator(particle_keys)
+        for particle in particles.iter(item_type=CUBA.PARTICLE):
+            index = particle2index.get(particle.uid)
+            if index is None:
+                return False
+            indices.append(index)
+            coordinates.append(particle.coordinates)
+            particle_data.append(particle.data)
+
+        bond_indices = []
+        links = []
+        bond_data = CUBADataAccumulator(bond_keys)
+        for bond in particles.iter(item_type=CUBA.BOND):
+            index = bond2index.get(bond.uid)
+            if index is None:
+                return False
+            try:
+                links.append([particle2index[uid] for uid in bond.particles])
+            except KeyError:
+                return False
+            bond_indices.append(index)
+            bond_data.append(bond.data)
+        if not self._has_same_bonds(bond_indices, links):
+            return False
+
+        if len(indices) != 0:
+            points = self.data_set.points.data
+            if update_vtk_array(points, coordinates, indices, notify=False):
+                self._vtk_object_changed(points)
+                self._geometry_version = next_version()
+            particle_data.load_onto_cuba_data(self.point_data, indices)
+        if len(bond_indices) != 0:
+            bond_data.load_onto_cuba_data(self.bond_data, bond_indices)
+        return True
+
+    def patch_from_particles(self, particles, uids=None, particle_keys=None,
+                             bond_keys=None, coordinates=True):
+        """ Update some of the particles and bonds in place.
+
+        Only the given items are copied from ``particles``, which is
+        assumed to have the same particles and bonds (and bond
+        connectivity) as this container.
+
+        Parameters
+        ----------
+        particles : ABCParticles
+            CUDS Particles dataset
+
+        uids : iterable
+            The uids of the particles and bonds to copy. Default is None
+            which copies all the items, skipping the item types for
+            which there is nothing to copy (i.e. an empty list of keys).
+
+        particle_keys : list
+            A list of point CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        bond_keys : list
+            A list of cell CUBA keys that we want to copy, and only those.
+            If None, all available and compatible keys will be copied.
+
+        coordinates : bool
+            When False the particle coordinates are not copied.
+
+        Returns
+        -------
+        updated : bool
+            False when some of the uids are not in this container (or
+            the number of items is different) and nothing has been
+            updated.
+
+        """
+        particle2index = self.particle2index
+        bond2index = self.bond2index
+        indices = []
+        points = []
+        particle_data = CUBADataAccumulator(particle_keys)
+        bond_indices = []
+        bond_data = CUBADataAccumulator(bond_keys)
+        if uids is None:
+            if (particles.count_of(CUBA.PARTICLE) != len(particle2index) or
+                    particles.count_of(CUBA.BOND) != len(bond2index)):
+                return False
+            items = []
+            if coordinates or particle_keys != []:
+                items.append(particles.iter(item_type=CUBA.PARTICLE))
+            if bond_keys != []:
+                items.append(particles.iter(item_type=CUBA.BOND))
+            items = itertools.chain.from_iterable(items)
+        else:
+            items = (particles.get(uid) for uid in uids)
+        for item in items:
+            uid = item.uid
+            if uid in particle2index:
+                indices.append(particle2index[uid])
+                points.append(item.coordinates)
+                particle_data.append(item.data)
+            elif uid in bond2index:
+                bond_indices.append(bond2index[uid])
+                bond_data.append(item.data)
+            else:
+                return False
+
+        if len(indices) != 0:
+            if coordinates and update_vtk_array(
+                    self.data_set.points.data, points, indices,
+                    notify=False):
+                self._vtk_object_changed(self.data_set.points.data)
+                self._geometry_version = next_version()
+            particle_data.load_onto_cuba_data(
+                self.point_data, indices, partial=particle_keys is not None)
+        if len(bond_indices) != 0:
+            bond_data.load_onto_cuba_data(
+                self.bond_data, bond_indices, partial=bond_keys is not None)
+        return True
+
+    # Chunked access #########################################################
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, keys=None,
+                    item_type=CUBA.PARTICLE):
+        """ Iterate over the particles or bonds in blocks of numpy arrays.
+
+        The items are visited in the order they are stored in the
+        vtk dataset. The container should not be modified while iterating.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The maximum number of items in each block.
+
+        keys : iterable
+            The CUBA keys of the data columns to return. Default is None
+            which returns all the currently stored columns.
+
+        item_type : CUBA
+            The type of the items to iterate over (i.e. CUBA.PARTICLE or
+            CUBA.BOND). Default is CUBA.PARTICLE.
+
+        Yields
+        ------
+        uids : ndarray
+            The uids of the items in the block.
+
+        coordinates : ndarray
+            The (N, 3) array of the particle coordinates. For bonds an
+            object array with the list of particle uids of each bond.
+
+        data : dict
+            The mapping from CUBA key to the array of values.
+
+        Raises
+        ------
+        ValueError :
+            When ``item_type`` is not supported.
+
+        """
+        if item_type == CUBA.PARTICLE:
+            blocks = self._iter_particle_blocks(chunk_size)
+            item_data = self.point_data
+        elif item_type == CUBA.BOND:
+            blocks = self._iter_bond_blocks(chunk_size)
+            item_data = self.bond_data
+        else:
+            message = "Chunked iteration is not supported for: {}"
+            raise ValueError(message.format(item_type))
+        keys = item_data.cubas if keys is None else set(keys)
+        for indices, uids, coordinates in blocks:
+            yield (
+                uids,
+                coordinates,
+                {cuba: item_data.get_column(cuba, indices) for cuba in keys})
+
     # Private interface ######################################################
 
+    def _vtk_object_changed(self, obj):
+        """ Mark a vtk array (or cell array) that has been changed in
+        place as modified, on exit of the outermost :meth:`batch` block
+        when batching. """
+        self._changed_objects[tvtk.to_vtk(obj).__this__] = obj
+        if self._batch_depth == 0:
+            self._flush_changed_objects()
+
+    def _flush_changed_objects(self):
+        changed, self._changed_objects = self._changed_objects, {}
+        for obj in changed.itervalues():
+            if isinstance(obj, tvtk.DataArray):
+                mark_vtk_array_modified(obj)
+            else:
+                obj.modified()
+
     @contextlib.contextmanager
     def _add_item(self, item, container):
         if item.uid is None:
@@ -430,6 +772,108 @@ class VTKParticles(ABCParticles):
             raise AttributeError(message.format(item, item.uid))
         yield item
 
+    def _has_same_bonds(self, indices, links):
+        """ Check the bond connectivity against the stored one.
+
+        Parameters
+        ----------
+        indices : list
+            The bond indices (a permutation of the stored bonds).
+
+        links : list
+            The particle indices of each bond.
+
+        """
+        expected = []
+        for position in numpy.argsort(indices):
+            link = links[position]
+            expected.append(len(link))
+            expected.extend(link)
+        return numpy.array_equal(self._bond_connectivity(), expected)
+
+    def _has_same_layout(self, other):
+        """ Check if a VTKParticles container stores the same particles
+        and bonds in the same order. """
+        return (
+            other.particle2index == self.particle2index and
+            other.bond2index == self.bond2index and
+            numpy.array_equal(
+                other._bond_connectivity(), self._bond_connectivity()))
+
+    def _iter_particle_blocks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Iterate over the (indices, uids, coordinates) blocks of
+        particles. """
+        length = len(self.particle2index)
+        points = (
+            vtk_array_view(self.data_set.points.data)
+            if length != 0 else None)
+        for indices in chunk_slices(length, chunk_size):
+            yield (
+                indices,
+                mapped_array(self.index2particle, indices),
+                numpy.array(points[indices]))
+
+    def _iter_bond_blocks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Iterate over the (indices, uids, particles) blocks of bonds.
+
+        The particle ids of all the bonds in a block are gathered from
+        the connectivity array at once, grouping the bonds by their
+        number of particles.
+
+        """
+        connectivity = self._bond_connectivity()
+        locations = self._bond_locations()
+        if len(locations) == 0:
+            return
+        particle_uids = mapped_array(
+            self.index2particle, slice(0, self.data_set.number_of_points))
+        for indices in chunk_slices(len(locations), chunk_size):
+            starts = locations[indices]
+            sizes = connectivity[starts]
+            particles = numpy.empty(len(starts), dtype=object)
+            for size in numpy.unique(sizes):
+                selected = numpy.flatnonzero(sizes == size)
+                offsets = numpy.arange(1, size + 1)
+                point_ids = connectivity[
+                    starts[selected, numpy.newaxis] + offsets]
+                for position, uids in itertools.izip(
+                        selected, particle_uids[point_ids].tolist()):
+                    particles[position] = uids
+            yield (
+                indices, mapped_array(self.index2bond, indices), particles)
+
+    def _bond_locations(self):
+        """ Return the start of each bond in the connectivity array.
+        """
+        connectivity = self._bond_connectivity()
+        length = len(connectivity)
+        if length == 0:
+            return numpy.empty(0, dtype=int)
+        # usually all the bonds link the same number of particles
+        width = connectivity[0] + 1
+        if length % width == 0:
+            locations = numpy.arange(0, length, width)
+            if numpy.all(connectivity[locations] == width - 1):
+                return locations
+        locations = []
+        start = 0
+        while start < length:
+            locations.append(start)
+            start += connectivity[start] + 1
+        return numpy.array(locations, dtype=int)
+
+    def _bond_connectivity(self):
+        """ Return a numpy view of the vtk bond connectivity array.
+        """
+        data_set = self.data_set
+        if hasattr(data_set, 'lines'):
+            cells = data_set.lines
+        else:
+            cells = data_set.get_cells()
+        if cells is None:
+            return numpy.empty(0, dtype=int)
+        return vtk_array_view(cells.data)
+
     def _swap_with_last(self, uid, mapping, reverse_mapping, items, data):
         """ Swap the entries of uid item with the last item in the data_set
 
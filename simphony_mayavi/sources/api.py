@@ -2,9 +2,22 @@ from .cuds_file_source import CUDSFileSource
 from .cuds_source import CUDSSource
 from .engine_source import EngineSource
 from .slim_cuds_source import SlimCUDSSource
+from .time_series_source import TimeSeriesSource
+from .disk_conversion_cache import DiskConversionCache
+from .h5_file_pool import H5FilePool
+from .h5_metadata import (
+    DatasetInfo, read_cuds_file_metadata, read_cuds_dataset_keys,
+    read_cuds_item_keys)
 
 __all__ = [
     'CUDSSource',
     'CUDSFileSource',
     'EngineSource',
-    'SlimCUDSSource']
+    'SlimCUDSSource',
+    'TimeSeriesSource',
+    'DiskConversionCache',
+    'H5FilePool',
+    'DatasetInfo',
+    'read_cuds_file_metadata',
+    'read_cuds_dataset_keys',
+    'read_cuds_item_keys']
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+
+from pyface.api import GUI
+
+from simphony_mayavi.core.api import Cancelled, cancellable
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundConversion(object):
+    """ Run CUDS to VTK conversions on a worker thread.
+
+    A single worker thread evaluates the requests one at a time. Only
+    the latest request waits for the worker: every request supersedes
+    the previous ones, so a superseded request that has not started yet
+    is dropped, while a running one stops at its next chunk (see
+    :func:`~simphony_mayavi.core.chunk_tools.cancellable`). The result
+    of a request is handed to its callback on the GUI thread, unless the
+    request has been superseded or cancelled in the meantime.
+
+    The worker thread is started by a request and exits as soon as
+    there is no request left, so idle conversions hold no thread.
+
+    .. note::
+
+       The CUDS container is read on the worker thread, thus it should
+       not be modified while a conversion is pending.
+
+    """
+
+    def __init__(self):
+        # The id of the latest request, only modified on the GUI thread.
+        self._generation = 0
+        # True until the result of the latest request is delivered.
+        self._pending = False
+        # Guards the latest request waiting for the worker and the busy
+        # flag of the worker.
+        self._condition = threading.Condition()
+        self._request = None
+        self._busy = False
+        self._worker = None
+
+    @property
+    def pending(self):
+        """ True if the result of the latest request is not yet delivered.
+        """
+        return self._pending
+
+    def submit(self, callback, function, *args):
+        """ Evaluate ``function(*args)`` on the worker thread.
+
+        Parameters
+        ----------
+        callback : callable
+            Called on the GUI thread as ``callback(result, error)``, where
+            ``error`` is the raised exception (and ``result`` is None) if
+            the function has failed.
+
+        function : callable
+            The conversion function.
+
+        """
+        self._generation += 1
+        self._pending = True
+        with self._condition:
+            # replaces the previous request if it has not started yet
+            self._request = (self._generation, callback, function, args)
+            self._condition.notify_all()
+            if self._worker is None:
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                self._worker = worker
+                worker.start()
+
+    def cancel(self):
+        """ Discard the result of the pending request.
+        """
+        self._generation += 1
+        self._pending = False
+        with self._condition:
+            self._request = None
+            self._condition.notify_all()
+
+    def close(self):
+        """ Cancel the pending request and let the worker thread exit.
+
+        A running conversion stops at its next chunk. A later request
+        starts a new worker thread.
+
+        """
+        self.cancel()
+
+    def wait(self, timeout=None):
+        """ Wait for the worker thread to finish the latest request.
+
+        The callback is still invoked through the GUI event loop.
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._request is not None or self._busy:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return
+                    self._condition.wait(remaining)
+
+    def _work(self):
+        condition = self._condition
+        while True:
+            with condition:
+                request = self._request
+                if request is None:
+                    # the next request starts a new worker
+                    self._worker = None
+                    return
+                self._request = None
+                self._busy = True
+            try:
+                self._run(*request)
+            finally:
+                with condition:
+                    self._busy = False
+                    condition.notify_all()
+
+    def _run(self, generation, callback, function, args):
+        if generation != self._generation:
+            # superseded before it has started
+            return
+        try:
+            with cancellable(lambda: generation != self._generation):
+                result = function(*args)
+        except Cancelled:
+            logger.debug('Conversion in the background cancelled')
+            return
+        except Exception as exception:
+            logger.exception('Conversion in the background failed')
+            result, error = None, exception
+        else:
+            error = None
+        GUI.invoke_later(self._deliver, generation, callback, result, error)
+
+    def _deliver(self, generation, callback, result, error):
+        if generation != self._generation:
+            return
+        self._pending = False
+        callback(result, error)
@@ -1,22 +1,41 @@
-from contextlib import closing
 import logging
+import os
 
-from traits.api import ListStr, Instance, Bool, TraitError, HasTraits
+from traits.api import (
+    List, ListStr, Instance, Bool, Str, TraitError, HasTraits, Property,
+    Dict, cached_property)
 from traitsui.api import View, Group, Item, VGroup
 from apptools.persistence.file_path import FilePath
 from apptools.persistence.state_pickler import set_state
 from mayavi.core.common import handle_children_state
 from mayavi.core.trait_defs import DEnum
+from simphony.io.h5_lattice import H5Lattice
+from simphony.io.h5_mesh import H5Mesh
+from simphony.io.h5_particles import H5Particles
 
-from simphony.io.h5_cuds import H5CUDS
-
-from .cuds_source import CUDSSource
+from simphony_mayavi.cuds.api import VTKLattice
+from .cuds_source import CUDSSource, cuds_to_vtk
+from .disk_conversion_cache import DiskConversionCache
+from .h5_column_reader import read_h5_tables
+from .h5_file_pool import h5_file_pool
+from .h5_metadata import read_cuds_file_metadata, read_cuds_dataset_keys
 
 logger = logging.getLogger(__name__)
 
 
 class CUDSFileSource(CUDSSource):
     """ A mayavi source of a SimPhoNy CUDS File.
+
+    With a ``conversion_cache`` the loaded datasets are cached by file
+    path, modification time, size and dataset name, so switching back
+    to a dataset does not read the file again. A ``disk_cache`` keeps
+    the converted datasets with the same keys across sessions, so that
+    reopening a file reads the stored VTK datasets instead of converting
+    the HDF5 tables again.
+
+    The file handles are shared between the sources through a reference
+    counted pool (see :class:`~.H5FilePool`), so the file is opened once
+    while the source is running.
     """
 
     #: The version of this class. Used for persistence.
@@ -31,9 +50,25 @@ class CUDSFileSource(CUDSSource):
     #: The names of the contained datasets.
     datasets = ListStr
 
+    #: The description of the contained datasets (see
+    #: :func:`~.read_cuds_file_metadata`).
+    datasets_info = List
+
+    #: The CUBA keys with stored values in each item table of the
+    #: selected dataset (see :func:`~.read_cuds_dataset_keys`). The
+    #: tables are scanned on first access.
+    dataset_keys = Property(Dict, depends_on='file_path, dataset')
+
     #: whether the source is initialized
     initialized = Bool(False)
 
+    #: The persistent cache of converted datasets. Default is None
+    #: (no cache).
+    disk_cache = Instance(DiskConversionCache)
+
+    #: The file whose pooled handle is held by the source.
+    _pooled_file = Str
+
     view = View(
         VGroup(
             Group(Item(name='dataset')),
@@ -63,13 +98,18 @@ class CUDSFileSource(CUDSSource):
 
     def initialize(self, filename):
         """ Initialise the CUDS file source.
+
+        The datasets are listed from the file metadata, so no dataset is
+        loaded until one is selected.
         """
         self.file_path = FilePath(filename)
-        with closing(H5CUDS.open(filename)) as handle:
-            names = [container.name for container in handle.iter_datasets()]
-        if len(names) == 0:
+        if self.running:
+            self._hold_file(filename)
+        info = read_cuds_file_metadata(filename)
+        if len(info) == 0:
             logger.warning('No datasets found in: %s', self.file_path)
-        self.datasets = names
+        self.datasets_info = info
+        self.datasets = [dataset.name for dataset in info]
         self.initialized = True
 
     def start(self):
@@ -78,16 +118,65 @@ class CUDSFileSource(CUDSSource):
         # sources.  If the `initialized` flag is not checked,
         # `update` will error.
         if not self.running and self.initialized:
+            self._hold_file(str(self.file_path))
+            self._interrupted = False
             self.update()
         super(CUDSFileSource, self).start()
 
+    def stop(self):
+        super(CUDSFileSource, self).stop()
+        self._release_file()
+
     def update(self):
+        filename = str(self.file_path)
         dataset = self.dataset
-        with closing(H5CUDS.open(str(self.file_path))) as handle:
+        caches = self.conversion_cache, self.disk_cache
+        if self.asynchronous:
+            # The file is read in the background as well
+            self._start_conversion(
+                _load_dataset, filename, dataset, self.conversion_cache,
+                self.disk_cache, self.memory_budget, self.region,
+                self.element_selection, self.implicit, self.lattice_step)
+            return
+        if caches != (None, None):
             try:
-                self.cuds = handle.get_dataset(dataset)
+                vtk_cuds = _load_dataset(
+                    filename, dataset, self.conversion_cache,
+                    self.disk_cache, self.memory_budget, self.region,
+                    self.element_selection, self.implicit,
+                    self.lattice_step)
             except ValueError as exception:
                 logger.warning(exception.message)
+            else:
+                # As in the background loading the loaded data are used
+                # as the CUDS dataset.
+                self._cuds = vtk_cuds
+                self._set_vtk_cuds(vtk_cuds)
+            return
+        try:
+            cuds, build = _read_dataset(
+                filename, dataset, memory_budget=self.memory_budget,
+                region=self.region, element_selection=self.element_selection,
+                implicit=self.implicit, lattice_step=self.lattice_step)
+        except ValueError as exception:
+            logger.warning(exception.message)
+        else:
+            # The VTK container is built after the file is released
+            vtk_cuds = build()
+            self._cuds = cuds
+            self._set_vtk_cuds(vtk_cuds)
+
+    # Property getters/setters ################################################
+
+    @cached_property
+    def _get_dataset_keys(self):
+        if not self.initialized or not self.dataset:
+            return {}
+        try:
+            return read_cuds_dataset_keys(str(self.file_path), self.dataset)
+        except ValueError as exception:
+            logger.warning(exception.message)
+            return {}
 
     # Trait Change Handlers ################################################
 
@@ -96,6 +185,26 @@ class CUDSFileSource(CUDSSource):
 
     # Private interface ####################################################
 
+    def _conversion_done(self, vtk_cuds, error):
+        if error is None:
+            # The file is closed, so the loaded data are used as the
+            # CUDS dataset.
+            self._cuds = vtk_cuds
+        super(CUDSFileSource, self)._conversion_done(vtk_cuds, error)
+
+    def _hold_file(self, filename):
+        """ Keep the pooled handle of ``filename`` open, releasing the
+        previously held file. """
+        if self._pooled_file != filename:
+            self._release_file()
+            h5_file_pool.acquire(filename)
+            self._pooled_file = filename
+
+    def _release_file(self):
+        if self._pooled_file:
+            h5_file_pool.release(self._pooled_file)
+            self._pooled_file = ''
+
     def _get_name(self):
         """ Returns the name to display on the tree view.  Note that
         this is not a property getter.
@@ -103,6 +212,13 @@ class CUDSFileSource(CUDSSource):
         name = super(CUDSFileSource, self)._get_name()
         return 'CUDS File: ' + name
 
+    def __get_pure_state__(self):
+        state = super(CUDSFileSource, self).__get_pure_state__()
+        state.pop("disk_cache", None)
+        state.pop("_pooled_file", None)
+        state.pop("datasets_info", None)
+        return state
+
     def __set_pure_state__(self, state):
         """ Attempt to restore the reference to file path """
         # restore the file_path
@@ -135,3 +251,96 @@ class CUDSFileSource(CUDSSource):
             handle_children_state(self.children, state.children)
             # Set the children's state
             set_state(self, state, first=['children'], ignore=['*'])
+
+
+def _load_dataset(filename, name, cache=None, disk_cache=None,
+                  memory_budget=None, region=None, element_selection='all',
+                  implicit=False, lattice_step=None):
+    """ Read a dataset from a CUDS file into a VTK container, reusing
+    the container in ``cache`` or ``disk_cache`` if the file has not
+    changed. """
+    options = dict(
+        memory_budget=memory_budget, region=region,
+        element_selection=element_selection, implicit=implicit,
+        lattice_step=lattice_step)
+    if cache is None and disk_cache is None:
+        return _convert_dataset(filename, name, **options)
+
+    key = _file_cache_key(filename, name)
+    if region is not None:
+        key += (region.key, element_selection)
+    if implicit:
+        key += ('implicit',)
+    if lattice_step is not None:
+        key += (('step',) + tuple(lattice_step),)
+    if cache is not None:
+        vtk_cuds = cache.get(key)
+        if vtk_cuds is not None:
+            return vtk_cuds
+    vtk_cuds = None if disk_cache is None else disk_cache.get(key)
+    if vtk_cuds is None:
+        vtk_cuds = _convert_dataset(filename, name, **options)
+        if disk_cache is not None:
+            disk_cache.put(key, vtk_cuds)
+    if cache is not None:
+        cache.put(key, vtk_cuds)
+    return vtk_cuds
+
+
+def _convert_dataset(filename, name, **options):
+    """ Read a dataset from a CUDS file and convert it to a VTK container
+    (see :func:`_read_dataset`). """
+    _, build = _read_dataset(filename, name, **options)
+    return build()
+
+
+def _read_dataset(filename, name, memory_budget=None, region=None,
+                  element_selection='all', implicit=False,
+                  lattice_step=None):
+    """ Read a dataset from a CUDS file.
+
+    The tables of the dataset are read while the file is open in the
+    pool, and the VTK container is built after the file is released, so
+    only the HDF5 reads of concurrent loads are serialised. The datasets
+    that are streamed within a ``memory_budget`` are converted while the
+    file is open.
+
+    Returns
+    -------
+    cuds : H5Particles, H5Mesh or H5Lattice
+        The dataset in the file, which is only readable while the file
+        is held in the pool.
+
+    build : callable
+        Called without arguments to build the VTK container.
+
+    """
+    with h5_file_pool.open(filename) as handle:
+        cuds = handle.get_dataset(name)
+        if isinstance(cuds, H5Lattice) or (
+                isinstance(cuds, (H5Particles, H5Mesh)) and
+                (memory_budget is None or region is not None)):
+            read = read_h5_tables(
+                cuds, region=region, element_selection=element_selection,
+                implicit=implicit)
+        else:
+            vtk_cuds = cuds_to_vtk(
+                cuds, memory_budget=memory_budget, region=region,
+                element_selection=element_selection, implicit=implicit,
+                lattice_step=lattice_step)
+            return cuds, lambda: vtk_cuds
+
+    def build():
+        vtk_cuds = read()
+        if lattice_step is not None and isinstance(vtk_cuds, VTKLattice):
+            vtk_cuds = vtk_cuds.sub_lattice(step=lattice_step)
+        return vtk_cuds
+
+    return cuds, build
+
+
+def _file_cache_key(filename, name):
+    """ Return the conversion cache key of a dataset in a CUDS file. """
+    stat = os.stat(filename)
+    return ('file', os.path.abspath(filename), stat.st_mtime, stat.st_size,
+            name)
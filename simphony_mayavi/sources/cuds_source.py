@@ -1,15 +1,25 @@
 import logging
 
-from traits.api import Either, Instance, TraitError, Property
+from traits.api import (
+    Either, Instance, TraitError, Property, Int, Bool, Dict, Enum, Tuple)
 from traitsui.api import View, Group, Item
 from mayavi.core.api import PipelineInfo
 from mayavi.sources.vtk_data_source import VTKDataSource
 from simphony.cuds.abc_mesh import ABCMesh
 from simphony.cuds.abc_particles import ABCParticles
 from simphony.cuds.abc_lattice import ABCLattice
+from simphony.io.h5_lattice import H5Lattice
 from simphony.io.h5_mesh import H5Mesh
+from simphony.io.h5_particles import H5Particles
 
-from simphony_mayavi.cuds.api import VTKParticles, VTKLattice, VTKMesh
+from simphony_mayavi.core.api import (
+    ConversionCache, cuds_cache_key, Region, ELEMENT_SELECTIONS)
+from simphony_mayavi.cuds.api import (
+    VTKParticles, VTKLattice, VTKMesh, stream_mesh, stream_particles)
+from simphony_mayavi.cuds.streaming_conversion import DEFAULT_MEMORY_BUDGET
+from simphony_mayavi.cuds.vtk_lattice import ORTHOGONAL_LATTICES
+from .background_conversion import BackgroundConversion
+from .h5_column_reader import read_h5_dataset
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +38,38 @@ class CUDSSource(VTKDataSource):
     and divert from the VTK data source.  The ``update`` function can be
     called to update the visualisation.
 
+    When ``asynchronous`` is True the conversion to a VTK container runs
+    on a worker thread and the previous dataset is shown until the result
+    is swapped in on the GUI thread. A new conversion supersedes the
+    pending one.
+
+    When a ``conversion_cache`` is set, the converted VTK containers are
+    stored in it and reused when a dataset with the same content (see
+    :func:`~simphony_mayavi.core.conversion_cache.cuds_cache_key`) is
+    shown again. A cache can be shared by several sources. The content
+    is compared through a checksum of ``cache_key_sample_size`` items of
+    each type, so a cached dataset can be reused after modifications of
+    the items that are not sampled. Set it to None to checksum all the
+    items.
+
+    When ``memory_budget`` is set, particles and meshes are converted in
+    bounded chunks (see
+    :func:`~simphony_mayavi.cuds.streaming_conversion.stream_particles`),
+    so that datasets larger than the available memory can be shown.
+
+    When a ``region`` is set only the particles or mesh points inside
+    the region are converted (see :mod:`simphony_mayavi.core.regions`),
+    together with the bonds or elements that have all (or any, see
+    ``element_selection``) of their points inside. The retained points
+    are numbered consecutively. The region does not apply to lattices,
+    ``lattice_step`` shows every n-th node along each axis instead (see
+    :meth:`~simphony_mayavi.cuds.vtk_lattice.VTKLattice.sub_lattice`).
+
+    When ``implicit`` is True the nodes of non-orthogonal lattices are
+    converted without their coordinates (see
+    :attr:`~simphony_mayavi.cuds.vtk_lattice.VTKLattice.implicit`) and
+    they are computed by the vtk pipeline for rendering.
+
     """
 
     #: The version of this class. Used for persistence.
@@ -36,9 +78,43 @@ class CUDSSource(VTKDataSource):
     #: The CUDS container
     cuds = Property(depends_on='_cuds')
 
+    #: Convert the CUDS container in the background.
+    asynchronous = Bool(False)
+
+    #: True while a conversion is running in the background.
+    loading = Bool(False)
+
+    #: The cache of converted VTK containers. Default is None (no cache).
+    conversion_cache = Instance(ConversionCache)
+
+    #: The number of items of each type in the checksum of the datasets
+    #: looked up in the ``conversion_cache``. None checksums all the
+    #: items. VTK containers are looked up by their id and version.
+    cache_key_sample_size = Either(Int(1000), None)
+
+    #: The memory in bytes to use while converting particles and meshes.
+    #: Default is None which converts them in one go.
+    memory_budget = Either(None, Int)
+
+    #: The region of the items to convert. Default is None which
+    #: converts all the items.
+    region = Instance(Region)
+
+    #: Keep the bonds and elements with all or with any of their points
+    #: in the region.
+    element_selection = Enum(*ELEMENT_SELECTIONS)
+
+    #: Convert non-orthogonal lattices with implicit node coordinates.
+    implicit = Bool(False)
+
+    #: The stride of the shown lattice nodes along each axis. Default is
+    #: None which shows all the nodes.
+    lattice_step = Either(None, Tuple(Int, Int, Int))
+
     #: Output information for the processing pipeline.
     output_info = PipelineInfo(
-        datasets=['image_data', 'poly_data', 'unstructured_grid'],
+        datasets=['image_data', 'poly_data', 'unstructured_grid',
+                  'structured_grid'],
         attribute_types=['any'],
         attributes=['scalars', 'vectors'])
 
@@ -55,6 +131,19 @@ class CUDSSource(VTKDataSource):
         Instance(VTKParticles),
         Instance(VTKLattice))
 
+    #: The version of the shadow VTK container that is in the pipeline
+    _vtk_cuds_version = Int(0)
+
+    #: The conversions running in the background
+    _conversion = Instance(BackgroundConversion, ())
+
+    #: True when a background conversion has been cancelled by stop
+    _interrupted = Bool(False)
+
+    #: The data attributes to select once the background conversion
+    #: is done
+    _pending_attributes = Dict
+
     view = View(
         Group(
             Item(name='point_scalars_name'),
@@ -75,7 +164,25 @@ class CUDSSource(VTKDataSource):
     # Traits change handlers ###############################################
 
     def __vtk_cuds_changed(self, value):
-        self.data = value.data_set
+        if isinstance(value, VTKLattice):
+            self.data = value.render_data_set
+        else:
+            self.data = value.data_set
+
+    def _region_changed(self):
+        self._region_updated()
+
+    def _element_selection_changed(self):
+        if self.region is not None:
+            self._region_updated()
+
+    def _implicit_changed(self):
+        # Lattices are converted again (see _update_vtk_cuds_in_place)
+        self._region_updated()
+
+    def _lattice_step_changed(self):
+        # The whole lattices cannot be updated in place to the new stride
+        self._region_updated()
 
     # Public method ########################################################
 
@@ -142,6 +249,25 @@ class CUDSSource(VTKDataSource):
                                 cell_scalars=cell_scalars,
                                 cell_vectors=cell_vectors)
 
+    def start(self):
+        """ Start the source, converting the CUDS dataset again if its
+        conversion has been interrupted by :meth:`stop`.
+        """
+        if not self.running and self._interrupted:
+            self._interrupted = False
+            if not self.loading and self._cuds is not None:
+                self._update_vtk_cuds_from_cuds(self._cuds)
+        super(CUDSSource, self).start()
+
+    def stop(self):
+        """ Stop the source and cancel any background conversion.
+        """
+        super(CUDSSource, self).stop()
+        if self.loading:
+            self._interrupted = True
+            self.loading = False
+        self._conversion.close()
+
     def update(self):
         """ Recalculate the VTK data from the CUDS dataset.
         Useful when ``cuds`` is modified after assignment.
@@ -153,8 +279,32 @@ class CUDSSource(VTKDataSource):
 
         >>> # update the scene!
         >>> source.update()
+
+        Notes
+        -----
+        When the points, elements or lattice geometry of ``cuds`` have not
+        changed the existing VTK container is updated in place and only
+        the data arrays are overwritten. Otherwise the VTK container is
+        recreated.
+
+        After an in place update only the VTK arrays that have changed
+        are marked as modified and the pipeline is not notified at all
+        if nothing has changed. Note that VTK filters check the
+        modification time of the whole input dataset, thus the filters
+        directly connected to the source will still re-execute when any
+        of the arrays has changed.
+
         """
-        self._update_vtk_cuds_from_cuds(self.cuds)
+        cuds = self.cuds
+        # The items in a region have to be selected again
+        in_place = self.region is None or cuds is self._vtk_cuds
+        if not self.loading and in_place and \
+                self._update_vtk_cuds_in_place(cuds):
+            # Changes made directly on the tvtk dataset of a VTK
+            # container are not tracked, so they are always flushed.
+            self._refresh_pipeline(flush=cuds is self._vtk_cuds)
+        else:
+            self._update_vtk_cuds_from_cuds(cuds)
 
     # Private interface ####################################################
 
@@ -165,7 +315,15 @@ class CUDSSource(VTKDataSource):
 
         If point_scalars/... is undefined, the first available attribute
         is selected by mayavi.core.trait_defs.DEnum (see VTKDataSource)
+
+        The selection is deferred while the data are loading.
         """
+        if self.loading:
+            self._pending_attributes = dict(
+                point_scalars=point_scalars, point_vectors=point_vectors,
+                cell_scalars=cell_scalars, cell_vectors=cell_vectors)
+            return
+
         if self._point_scalars_list and point_scalars is not None:
             self.point_scalars_name = point_scalars
 
@@ -199,26 +357,144 @@ class CUDSSource(VTKDataSource):
 
     def _update_vtk_cuds_from_cuds(self, cuds):
         """ update _vtk_cuds. """
-        if isinstance(cuds, (VTKMesh, VTKParticles, VTKLattice)):
-            vtk_cuds = cuds
+        if _shown_as_is(cuds, self.region, self.lattice_step):
+            self._set_vtk_cuds(cuds)
+        elif not isinstance(cuds, (ABCMesh, H5Mesh, ABCParticles,
+                                   ABCLattice)):
+            msg = 'Provided object {} is not of any known cuds type'
+            raise TraitError(msg.format(type(cuds)))
+        elif self.asynchronous:
+            self._start_conversion(self._convert, cuds)
         else:
-            if isinstance(cuds, (ABCMesh, H5Mesh)):
-                vtk_cuds = VTKMesh.from_mesh(cuds)
-            elif isinstance(cuds, ABCParticles):
-                vtk_cuds = VTKParticles.from_particles(cuds)
-            elif isinstance(cuds, ABCLattice):
-                vtk_cuds = VTKLattice.from_lattice(cuds)
-            else:
-                msg = 'Provided object {} is not of any known cuds type'
-                raise TraitError(msg.format(type(cuds)))
+            self._set_vtk_cuds(self._convert(cuds))
+
+    def _convert(self, cuds):
+        """ Convert ``cuds`` to a VTK container, reusing the cached
+        container if available. Called on the worker thread in
+        asynchronous mode. """
+        cache = self.conversion_cache
+        options = dict(
+            memory_budget=self.memory_budget, region=self.region,
+            element_selection=self.element_selection, implicit=self.implicit,
+            lattice_step=self.lattice_step)
+        if cache is None:
+            return cuds_to_vtk(cuds, **options)
+        key = self._conversion_key(cuds)
+        vtk_cuds = cache.get(key)
+        if vtk_cuds is None:
+            vtk_cuds = cuds_to_vtk(cuds, **options)
+            cache.put(key, vtk_cuds)
+        return vtk_cuds
+
+    def _conversion_key(self, cuds):
+        """ Return the key of ``cuds`` in the conversion cache. """
+        return cuds_cache_key(
+            cuds, sample_size=self.cache_key_sample_size, region=self.region,
+            element_selection=self.element_selection, implicit=self.implicit,
+            lattice_step=self.lattice_step)
+
+    def _region_updated(self):
+        """ Convert the items in the new region. """
+        if self._cuds is not None:
+            self.update()
+
+    def _set_vtk_cuds(self, vtk_cuds):
+        """ Put a VTK container in the pipeline, discarding any pending
+        conversion. """
+        self._conversion.cancel()
+        self.loading = False
+        self._vtk_cuds_version = vtk_cuds.version
         self._vtk_cuds = vtk_cuds
 
+    def _start_conversion(self, function, *args):
+        """ Evaluate ``function(*args)`` in the background and put the
+        resulting VTK container in the pipeline. """
+        self.loading = True
+        self._conversion.submit(self._conversion_done, function, *args)
+
+    def _conversion_done(self, vtk_cuds, error):
+        """ Called on the GUI thread when the background conversion is
+        done. """
+        if error is not None:
+            self.loading = False
+            logger.error("Failed to convert the CUDS dataset: %s", error)
+            return
+        self._set_vtk_cuds(vtk_cuds)
+        attributes, self._pending_attributes = self._pending_attributes, {}
+        if attributes:
+            self._select_attributes(**attributes)
+
+    def _update_vtk_cuds_in_place(self, cuds):
+        """ Try to update _vtk_cuds in place.
+
+        Returns
+        -------
+        updated : bool
+            True if _vtk_cuds is up to date with ``cuds``.
+
+        """
+        vtk_cuds = self._vtk_cuds
+        if vtk_cuds is None:
+            return False
+        elif cuds is vtk_cuds:
+            return True
+        elif isinstance(vtk_cuds, VTKMesh) and \
+                isinstance(cuds, (ABCMesh, H5Mesh)):
+            return vtk_cuds.update_from_mesh(cuds)
+        elif isinstance(vtk_cuds, VTKParticles) and \
+                isinstance(cuds, ABCParticles):
+            return vtk_cuds.update_from_particles(cuds)
+        elif isinstance(vtk_cuds, VTKLattice) and \
+                isinstance(cuds, ABCLattice):
+            return (
+                _converted_as_implicit(vtk_cuds, self.implicit) and
+                vtk_cuds.update_from_lattice(cuds))
+        else:
+            return False
+
+    def _refresh_pipeline(self, flush=False):
+        """ Notify the pipeline of the changes of _vtk_cuds since the
+        last refresh.
+
+        Parameters
+        ----------
+        flush : bool
+            When True the attribute arrays are listed again even if
+            there are no tracked changes.
+
+        """
+        vtk_cuds = self._vtk_cuds
+        changes = vtk_cuds.changes_since(self._vtk_cuds_version)
+        self._vtk_cuds_version = vtk_cuds.version
+        changed = any(changes.values())
+        if changes['arrays'] or (flush and not changed):
+            # The attribute arrays need to be listed again.
+            if isinstance(vtk_cuds, VTKLattice):
+                # share any new point data arrays with the render dataset
+                self.data = vtk_cuds.render_data_set
+            super(CUDSSource, self).update()
+        elif changed:
+            # The modified arrays are already marked by the container
+            self.data_changed = True
+
+    def _fire_data_changed(self, *args):
+        """ Fire the `data_changed` event unless the VTK container is
+        inside a batch of modifications (see :meth:`VTKMesh.batch`).
+        """
+        vtk_cuds = self._vtk_cuds
+        if vtk_cuds is not None and vtk_cuds.batching:
+            return
+        super(CUDSSource, self)._fire_data_changed(*args)
+
     def __get_pure_state__(self):
         state = super(CUDSSource, self).__get_pure_state__()
 
         # Skip pickling CUDS dataset
         state.pop("_cuds", None)
         state.pop("_vtk_cuds", None)
+        state.pop("_conversion", None)
+        state.pop("conversion_cache", None)
+        state.pop("region", None)
 
         logger.warning("The data is pickled but original CUDS dataset is not.")
         return state
@@ -228,3 +504,135 @@ class CUDSSource(VTKDataSource):
                         "CUDS dataset is not. "
                         "Please assign the data source `cuds` attribute."))
         super(CUDSSource, self).__set_pure_state__(state)
+
+
+def cuds_to_vtk(cuds, point_keys=None, cell_keys=None, memory_budget=None,
+                region=None, element_selection='all', implicit=False,
+                lattice_step=None):
+    """ Convert a CUDS container to the matching VTK container.
+
+    Parameters
+    ----------
+    cuds : ABCMesh, H5Mesh, ABCParticles or ABCLattice
+        The container to convert.
+
+    point_keys : list
+        The point (or node) CUBA keys to copy. Default is None which
+        copies all the available keys.
+
+    cell_keys : list
+        The cell (or bond) CUBA keys to copy. Default is None which
+        copies all the available keys.
+
+    memory_budget : int
+        When set, particles and meshes are converted in chunks within
+        this number of bytes (see
+        :func:`~simphony_mayavi.cuds.streaming_conversion.stream_mesh`).
+        Default is None.
+
+    region : Region
+        When set, only the particles or mesh points inside the region
+        are converted, in chunks within ``memory_budget`` (see
+        :func:`~simphony_mayavi.cuds.streaming_conversion.stream_mesh`).
+        Lattices are converted whole. Default is None.
+
+    element_selection : str
+        Keep the bonds and mesh elements with ``'all'`` or with ``'any'``
+        of their points in ``region``.
+
+    implicit : bool
+        If True non-orthogonal lattices do not store the node coordinates
+        (see :attr:`~simphony_mayavi.cuds.vtk_lattice.VTKLattice.implicit`).
+        Default is False.
+
+    lattice_step : tuple
+        When set, only every n-th node along each axis of a lattice is
+        kept (see
+        :meth:`~simphony_mayavi.cuds.vtk_lattice.VTKLattice.sub_lattice`).
+        Default is None.
+
+    Returns
+    -------
+    vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+
+    Raises
+    ------
+    TraitError :
+        When ``cuds`` is not of any known type.
+
+    ValueError :
+        When ``element_selection`` is not one of
+        :data:`~simphony_mayavi.core.regions.ELEMENT_SELECTIONS`.
+
+    Notes
+    -----
+    The particles, meshes and lattices of CUDS files are read column by
+    column (see
+    :func:`~simphony_mayavi.sources.h5_column_reader.read_h5_dataset`).
+
+    """
+    if lattice_step is not None and isinstance(cuds, ABCLattice):
+        if isinstance(cuds, VTKLattice) and point_keys is None:
+            # only the selected nodes are copied
+            vtk_lattice = cuds
+        else:
+            vtk_lattice = cuds_to_vtk(cuds, point_keys, implicit=implicit)
+        return vtk_lattice.sub_lattice(step=lattice_step)
+    if region is not None and not isinstance(cuds, ABCLattice):
+        if element_selection not in ELEMENT_SELECTIONS:
+            message = 'Expected an element selection in {}, got {!r}'
+            raise ValueError(
+                message.format(ELEMENT_SELECTIONS, element_selection))
+        if isinstance(cuds, (H5Particles, H5Mesh)):
+            # only the rows inside the region are read from the tables
+            return read_h5_dataset(
+                cuds, point_keys, cell_keys, region, element_selection)
+        if memory_budget is None:
+            memory_budget = DEFAULT_MEMORY_BUDGET
+        if isinstance(cuds, (ABCMesh, H5Mesh)):
+            return stream_mesh(
+                cuds, point_keys, cell_keys, memory_budget, region=region,
+                element_selection=element_selection)
+        elif isinstance(cuds, ABCParticles):
+            return stream_particles(
+                cuds, point_keys, cell_keys, memory_budget, region=region,
+                element_selection=element_selection)
+    elif memory_budget is not None:
+        # The bulk reads of the file based containers are not bounded
+        if isinstance(cuds, (ABCMesh, H5Mesh)):
+            return stream_mesh(cuds, point_keys, cell_keys, memory_budget)
+        elif isinstance(cuds, ABCParticles):
+            return stream_particles(
+                cuds, point_keys, cell_keys, memory_budget)
+    elif isinstance(cuds, (H5Particles, H5Mesh, H5Lattice)):
+        return read_h5_dataset(
+            cuds, point_keys, cell_keys, implicit=implicit)
+    if isinstance(cuds, (ABCMesh, H5Mesh)):
+        return VTKMesh.from_mesh(cuds, point_keys, cell_keys)
+    elif isinstance(cuds, ABCParticles):
+        return VTKParticles.from_particles(cuds, point_keys, cell_keys)
+    elif isinstance(cuds, ABCLattice):
+        return VTKLattice.from_lattice(cuds, point_keys, implicit=implicit)
+    else:
+        msg = 'Provided object {} is not of any known cuds type'
+        raise TraitError(msg.format(type(cuds)))
+
+
+def _shown_as_is(cuds, region=None, lattice_step=None):
+    """ Return True if ``cuds`` is a VTK container that the sources put
+    in the pipeline without a conversion. """
+    if isinstance(cuds, VTKLattice):
+        return lattice_step is None
+    return isinstance(cuds, (VTKMesh, VTKParticles)) and region is None
+
+
+def _converted_as_implicit(vtk_lattice, implicit):
+    """ Return True if ``vtk_lattice`` is what :func:`cuds_to_vtk`
+    returns for the ``implicit`` option.
+
+    Only non-orthogonal lattices can be implicit.
+
+    """
+    orthogonal = \
+        vtk_lattice.primitive_cell.bravais_lattice in ORTHOGONAL_LATTICES
+    return vtk_lattice.implicit == (implicit and not orthogonal)
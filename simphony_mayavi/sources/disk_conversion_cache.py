@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from simphony_mayavi.cuds.vtk_cuds_io import save_vtk_cuds, load_vtk_cuds
+
+logger = logging.getLogger(__name__)
+
+#: The default size limit of a DiskConversionCache in bytes.
+DEFAULT_DISK_CACHE_SIZE = 4 * 1024 ** 3
+
+
+class DiskConversionCache(object):
+    """ A persistent cache of converted VTK containers.
+
+    Each container is stored (see
+    :func:`~simphony_mayavi.cuds.vtk_cuds_io.save_vtk_cuds`) in a
+    sub-directory of ``directory`` named after the digest of its key, so
+    the cache is reused by later sessions. The least recently used
+    containers are removed when the stored size exceeds ``max_size``.
+
+    Keys should identify the content of the container (e.g. the path,
+    modification time and size of the file it is loaded from), since
+    there is no other validation of the stored containers.
+
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_DISK_CACHE_SIZE):
+        """ Constructor
+
+        Parameters
+        ----------
+        directory : str
+            The cache directory. It is created if it does not exist.
+
+        max_size : int
+            The size limit of the stored containers in bytes.
+
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """ The size of the stored containers in bytes.
+        """
+        return sum(size for _, _, size in self._entries())
+
+    @property
+    def statistics(self):
+        """ A dictionary with the number of ``hits``, ``misses`` and
+        ``evictions``, the number of stored ``items`` and their ``size``.
+        """
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'items': len(entries),
+            'size': sum(size for _, _, size in entries)}
+
+    def get(self, key):
+        """ Return the stored container of ``key``.
+
+        Parameters
+        ----------
+        key : hashable
+            The cache key. Its ``repr`` is used to name the entry.
+
+        Returns
+        -------
+        vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+            A new container loaded from the cache or None.
+
+        """
+        path = self._entry_path(key)
+        vtk_cuds = None
+        if os.path.isdir(path):
+            try:
+                vtk_cuds = load_vtk_cuds(path)
+            except Exception:
+                logger.exception('Removing unreadable cache entry %s', path)
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                # mark the entry as recently used
+                os.utime(path, None)
+        with self._lock:
+            if vtk_cuds is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return vtk_cuds
+
+    def put(self, key, vtk_cuds):
+        """ Store a converted container.
+
+        Containers larger than ``max_size`` are not stored.
+
+        Parameters
+        ----------
+        key : hashable
+            The cache key. Its ``repr`` is used to name the entry.
+
+        vtk_cuds : VTKMesh, VTKParticles or VTKLattice
+            The container to store.
+
+        """
+        path = self._entry_path(key)
+        # write in a temporary directory so that the entry is complete
+        # when it appears.
+        temp = tempfile.mkdtemp(prefix='.', dir=self.directory)
+        try:
+            save_vtk_cuds(vtk_cuds, temp)
+            if _directory_size(temp) > self.max_size:
+                return
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            os.rename(temp, path)
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            logger.exception('Failed to store %s in the cache', key)
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+        self._evict()
+
+    def clear(self):
+        """ Remove all the stored containers.
+        """
+        with self._lock:
+            for path, _, _ in self._entries():
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _entry_path(self, key):
+        digest = hashlib.sha1(repr(key)).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def _entries(self):
+        """ Return the (path, mtime, size) of the stored containers.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                # skip the entries being written
+                continue
+            try:
+                entries.append(
+                    (path, os.path.getmtime(path), _directory_size(path)))
+            except OSError:
+                # removed in the meantime
+                continue
+        return entries
+
+    def _evict(self):
+        """ Remove the least recently used containers above the limit.
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            size = sum(entry[2] for entry in entries)
+            for path, _, entry_size in entries:
+                if size <= self.max_size:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                size -= entry_size
+                self.evictions += 1
+
+
+def _directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in os.listdir(path))
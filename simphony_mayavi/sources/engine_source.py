@@ -1,12 +1,15 @@
 import logging
 
 from traits.api import (HasTraits, Instance, Enum, Str, ListStr,
-                        cached_property, Property)
+                        cached_property, Property, Int, Any, Either, List)
 from traitsui.api import View, Group, Item, VGroup
 from apptools.persistence.state_pickler import set_state
 
+from simphony.core.cuba import CUBA
 from simphony.cuds.abc_modeling_engine import ABCModelingEngine
 
+from simphony_mayavi.core.api import cuds_fingerprint, cuds_cache_key
+from simphony_mayavi.cuds.api import VTKParticles, VTKLattice, VTKMesh
 from .cuds_source import CUDSSource
 
 logger = logging.getLogger(__name__)
@@ -15,6 +18,34 @@ logger = logging.getLogger(__name__)
 class EngineSource(CUDSSource):
     """A mayavi source for reading data from a SimPhoNy Engine
 
+    Engines can optionally report the changes of their datasets so that
+    ``update`` only copies the modified items into the VTK dataset. Such
+    an engine provides a ``get_dataset_changes(name, token)`` method
+    that returns a ``(changes, token)`` tuple:
+
+    - ``token`` is an opaque object identifying the current state of the
+      dataset, which is passed back in the next call. When called with a
+      ``None`` token the engine only returns a new token.
+    - ``changes`` describes the modifications after the given token. It
+      is None when the engine cannot tell, otherwise it is a dictionary
+      with the following items:
+
+      - ``uids``: the uids of the modified items (lattice node indices
+        for lattices), or None for all the items.
+      - ``keys``: the CUBA keys of the modified data, or None for all
+        the keys.
+      - ``coordinates``: True if the coordinates of the modified items
+        have changed.
+
+    Changes that add or remove items or modify the connectivity must be
+    reported as None.
+
+    With a ``conversion_cache`` the converted datasets are found through
+    the fingerprint of ``change_detection``, so switching back to a
+    dataset that has not changed is instant. Note that with 'sampled'
+    detection a cached dataset can be reused after modifications of the
+    items that are not sampled.
+
     """
     #: The version of this class.  Used for persistence.
     __version__ = 0
@@ -32,6 +63,27 @@ class EngineSource(CUDSSource):
     #: datasets in the engine.  This should be read-only.
     datasets = Property(ListStr, depends_on="engine")
 
+    #: How ``update`` detects that a (non VTK) dataset has not changed
+    #: so that the conversion can be skipped. 'none' always converts,
+    #: 'sampled' compares the item counts and a checksum of
+    #: ``sample_size`` items of each type spread evenly over the items,
+    #: 'full' a checksum of all the items.
+    change_detection = Enum('none', 'sampled', 'full')
+
+    #: The number of items of each type checked by the 'sampled'
+    #: change detection.
+    sample_size = Int(1000)
+
+    #: The CUBA keys of the item data checked by the change detection.
+    #: Default is None which checks all the item data.
+    change_detection_keys = Either(None, List(Instance(CUBA)))
+
+    #: The fingerprint of the dataset when it was last converted.
+    _fingerprint = Any
+
+    #: The token of the engine changes that are in the VTK dataset.
+    _changes_token = Any
+
     view = View(
         VGroup(
             Group(Item(name="dataset")),
@@ -125,6 +177,25 @@ class EngineSource(CUDSSource):
                                     cell_scalars=cell_scalars,
                                     cell_vectors=cell_vectors)
 
+    def update(self):
+        """ Recalculate the VTK data from the CUDS dataset.
+
+        When the engine reports the changes of the dataset (see
+        :class:`EngineSource`) only the modified items are copied.
+        Otherwise, when ``change_detection`` is enabled, the conversion
+        is skipped if the fingerprint of the dataset (see
+        :func:`~simphony_mayavi.core.cuds_fingerprint.cuds_fingerprint`)
+        is the same as at the last conversion.
+
+        """
+        if self._patch_vtk_cuds():
+            self._fingerprint = None
+            self._refresh_pipeline()
+            return
+        if self._is_unchanged():
+            return
+        super(EngineSource, self).update()
+
     def start(self):
         """ Load dataset from the engine and start the visualisation """
         # if the EngineSource is restored from saved visualisation
@@ -143,14 +214,129 @@ class EngineSource(CUDSSource):
     def _dataset_changed(self):
         self._update_cuds()
 
+    def _change_detection_changed(self):
+        self._fingerprint = None
+
+    def _sample_size_changed(self):
+        self._fingerprint = None
+
+    def _change_detection_keys_changed(self):
+        self._fingerprint = None
+
     # Private interface ####################################################
 
     def _update_cuds(self):
         if self.datasets:
-            self.cuds = self.engine.get_dataset(self.dataset)
+            self._changes_token = self._get_dataset_changes(None)[1]
+            cuds = self.engine.get_dataset(self.dataset)
+            # store the fingerprint of the converted dataset
+            self._fingerprint = self._compute_fingerprint(cuds)
+            self.cuds = cuds
         else:
             logger.warning("No dataset is available from the engine")
 
+    def _is_unchanged(self):
+        """ Compute and store the fingerprint of the current dataset.
+
+        Returns
+        -------
+        unchanged : bool
+            True if change detection is enabled and the fingerprint is
+            the same as the stored one.
+
+        """
+        fingerprint = self._compute_fingerprint(self._cuds)
+        if fingerprint is None:
+            return False
+        unchanged = fingerprint == self._fingerprint
+        self._fingerprint = fingerprint
+        return unchanged
+
+    def _compute_fingerprint(self, cuds):
+        """ Return the fingerprint of ``cuds`` for the change detection,
+        or None if it is not used. """
+        if self.change_detection == 'none' or cuds is None or \
+                isinstance(cuds, (VTKMesh, VTKParticles, VTKLattice)):
+            # VTK containers keep track of their own changes
+            return None
+        if self.change_detection == 'sampled':
+            sample_size = self.sample_size
+        else:
+            sample_size = None
+        return cuds_fingerprint(
+            cuds, keys=self.change_detection_keys, sample_size=sample_size)
+
+    def _conversion_key(self, cuds):
+        """ Return the key of ``cuds`` in the conversion cache, reusing
+        the fingerprint of the change detection. """
+        fingerprint = self._fingerprint
+        if fingerprint is None or cuds is not self._cuds:
+            return super(EngineSource, self)._conversion_key(cuds)
+        return cuds_cache_key(
+            cuds, fingerprint=fingerprint, region=self.region,
+            element_selection=self.element_selection, implicit=self.implicit,
+            lattice_step=self.lattice_step)
+
+    def _region_updated(self):
+        # the unchanged dataset is converted for the new region
+        self._fingerprint = None
+        super(EngineSource, self)._region_updated()
+
+    def _get_dataset_changes(self, token):
+        """ Query the engine for the changes of the dataset after token.
+
+        Returns
+        -------
+        changes : dict
+            The reported changes or None.
+
+        token : object
+            The new token, None if the engine does not report changes.
+
+        """
+        get_changes = getattr(self.engine, 'get_dataset_changes', None)
+        if get_changes is None:
+            return None, None
+        return get_changes(self.dataset, token)
+
+    def _patch_vtk_cuds(self):
+        """ Copy the items reported as changed by the engine.
+
+        Returns
+        -------
+        patched : bool
+            True if _vtk_cuds is up to date with the dataset.
+
+        """
+        cuds = self._cuds
+        vtk_cuds = self._vtk_cuds
+        if self._changes_token is None or vtk_cuds is None or \
+                cuds is vtk_cuds or self.loading or self.region is not None \
+                or self.lattice_step is not None:
+            # the changed items may have moved into or out of the region
+            # and the nodes of a sub-lattice have other indices
+            return False
+        changes, self._changes_token = self._get_dataset_changes(
+            self._changes_token)
+        if changes is None:
+            return False
+
+        uids = changes.get('uids')
+        keys = changes.get('keys')
+        if uids is None:
+            # every item is affected, use the bulk update
+            return self._update_vtk_cuds_in_place(cuds)
+        elif isinstance(vtk_cuds, VTKParticles):
+            return vtk_cuds.patch_from_particles(
+                cuds, uids, particle_keys=keys, bond_keys=keys,
+                coordinates=changes.get('coordinates', True))
+        elif isinstance(vtk_cuds, VTKMesh):
+            return vtk_cuds.patch_from_mesh(
+                cuds, uids, point_keys=keys, cell_keys=keys,
+                coordinates=changes.get('coordinates', True))
+        else:
+            return vtk_cuds.patch_from_lattice(cuds, uids, node_keys=keys)
+
     def _get_name(self):
         """ Returns the name to display on the tree view.  Note that
         this is not a property getter.
@@ -0,0 +1,137 @@
+import logging
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+logger = logging.getLogger(__name__)
+
+
+class FramePrefetcher(object):
+    """ Load the frames of a time series ahead on a pool of worker threads.
+
+    The requested frames are kept in a bounded buffer of ``capacity``
+    frames. Every request replaces the window of frames to keep, so the
+    frames that fall out of the window are dropped and the loads of
+    dropped frames that have not started yet are skipped.
+
+    """
+
+    def __init__(self, load, capacity=8, workers=2, callback=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        load : callable
+            Called on a worker thread as ``load(step)`` to load a frame.
+
+        capacity : int
+            The maximum number of frames kept in the buffer.
+
+        workers : int
+            The number of worker threads.
+
+        callback : callable
+            Called on the worker thread as ``callback(step)`` when a
+            frame is loaded (or has failed to load). Default is None.
+
+        """
+        self.capacity = capacity
+        self._load = load
+        self._callback = callback
+        self._pool = ThreadPool(workers)
+        self._lock = threading.Lock()
+        # step -> AsyncResult, in the order of the latest request
+        self._frames = OrderedDict()
+        # the tokens of the loads of the latest request
+        self._tokens = {}
+        # the tokens of the taken frames that are waited for
+        self._taken = set()
+
+    def request(self, steps):
+        """ Load the frames of ``steps`` in order of priority.
+
+        Only the first ``capacity`` steps are kept, the frames of the
+        previous requests that are not in ``steps`` are dropped.
+
+        """
+        steps = list(steps)[:self.capacity]
+        with self._lock:
+            frames = OrderedDict()
+            tokens = {}
+            for step in steps:
+                frame = self._frames.get(step)
+                if frame is None:
+                    token = object()
+                    frame = self._pool.apply_async(self._run, (step, token))
+                else:
+                    token = self._tokens[step]
+                frames[step] = frame
+                tokens[step] = token
+            self._frames = frames
+            self._tokens = tokens
+
+    def ready(self, step):
+        """ True if the frame of ``step`` is loaded.
+        """
+        with self._lock:
+            frame = self._frames.get(step)
+        return frame is not None and frame.ready()
+
+    def take(self, step, timeout=None):
+        """ Remove the frame of ``step`` from the buffer and return it.
+
+        Waits for the frame to load if needed.
+
+        Raises
+        ------
+        KeyError :
+            When the frame of ``step`` has not been requested.
+
+        Exception :
+            The error raised while loading the frame.
+
+        """
+        with self._lock:
+            frame = self._frames.pop(step)
+            token = self._tokens.pop(step)
+            # The load is not skipped if it has not started yet, even
+            # when a later request drops the step.
+            self._taken.add(token)
+        try:
+            return frame.get(timeout)
+        finally:
+            with self._lock:
+                self._taken.discard(token)
+
+    def steps(self):
+        """ Return the steps in the buffer.
+        """
+        with self._lock:
+            return list(self._frames)
+
+    def clear(self):
+        """ Drop all the frames.
+        """
+        with self._lock:
+            self._frames = OrderedDict()
+            self._tokens = {}
+
+    def close(self):
+        """ Drop all the frames and stop the workers once the running
+        loads are done. """
+        self.clear()
+        self._pool.close()
+
+    def _run(self, step, token):
+        with self._lock:
+            dropped = (
+                token not in self._taken and
+                token not in self._tokens.values())
+        if dropped:
+            # dropped before it has started
+            return None
+        try:
+            return self._load(step)
+        finally:
+            if self._callback is not None:
+                self._callback(step)
@@ -0,0 +1,524 @@
+import uuid
+from functools import partial
+from itertools import izip
+
+import numpy
+import tables
+from tvtk.api import tvtk
+
+from simphony.core.cuba import CUBA
+from simphony.io.h5_lattice import H5Lattice
+from simphony.io.h5_mesh import H5Mesh
+from simphony.io.h5_particles import H5Particles
+
+from simphony_mayavi.core.api import (
+    supported_cuba, chunk_slices, cell_connectivity, EDGE2VTKCELL,
+    FACE2VTKCELL, CELL2VTKCELL)
+from simphony_mayavi.cuds.api import (
+    VTKParticles, VTKLattice, VTKMesh, UIDToIndex, IndexToUID)
+from simphony_mayavi.cuds.uid_mappings import UID_SIZE, hex_to_array
+
+#: The tables of the items in the group of a file based dataset, as
+#: laid out by :mod:`simphony.io`, and their expected columns. The
+#: ``data`` column is a nested column with one column per CUBA key and
+#: ``mask`` flags which of them are set in each row.
+PARTICLES_TABLE = 'particles'
+BONDS_TABLE = 'bonds'
+LATTICE_TABLE = 'lattice'
+POINTS_TABLE = 'points'
+EDGES_TABLE = 'edges'
+FACES_TABLE = 'faces'
+CELLS_TABLE = 'cells'
+TABLE_COLUMNS = {
+    PARTICLES_TABLE: ('uid', 'data', 'mask', 'coordinates'),
+    BONDS_TABLE: ('uid', 'data', 'mask', 'n_particles', 'particles'),
+    LATTICE_TABLE: ('data', 'mask'),
+    POINTS_TABLE: ('uid', 'data', 'mask', 'coordinates'),
+    EDGES_TABLE: ('uid', 'data', 'mask', 'n_points', 'points'),
+    FACES_TABLE: ('uid', 'data', 'mask', 'n_points', 'points'),
+    CELLS_TABLE: ('uid', 'data', 'mask', 'n_points', 'points')}
+
+#: The element tables of a mesh in the order of the vtk cells and the
+#: vtk cell type of their elements by point count.
+ELEMENT_TABLES = (
+    (EDGES_TABLE, EDGE2VTKCELL),
+    (FACES_TABLE, FACE2VTKCELL),
+    (CELLS_TABLE, CELL2VTKCELL))
+
+
+def read_h5_dataset(cuds, point_keys=None, cell_keys=None, region=None,
+                    element_selection='all', implicit=False):
+    """ Convert a file based CUDS container reading its tables in bulk.
+
+    The coordinates, the connectivity of the bonds and mesh elements
+    and the requested CUBA columns of the particles, points, bonds,
+    elements and lattice nodes are read column by column from the
+    PyTables tables of the container (see :data:`TABLE_COLUMNS`),
+    instead of iterating over the items. The uids are kept in arrays
+    (see :class:`~simphony_mayavi.cuds.uid_mappings.UIDToIndex`). The
+    lattice rows are stored in C order by :mod:`simphony.io` and they
+    are reordered for the vtk dataset.
+
+    With a ``region`` the coordinates of the particles (or points) are
+    read in chunks and tested against the region first, then only the
+    rows of the items inside the region are read.
+
+    Parameters
+    ----------
+    cuds : H5Particles, H5Mesh or H5Lattice
+        The container to convert.
+
+    point_keys : iterable
+        The particle (or point, or node) CUBA keys to read. Default is
+        None which reads all the available keys.
+
+    cell_keys : iterable
+        The bond (or element) CUBA keys to read. Default is None which
+        reads all the available keys.
+
+    region : Region
+        The region of the particles (or points) to read. Default is None
+        which reads all the items. Lattices are always read whole.
+
+    element_selection : str
+        ``'all'`` keeps the bonds (or elements) with all their points in
+        ``region`` while ``'any'`` keeps the bonds with at least one
+        point in ``region`` together with their other points.
+
+    implicit : bool
+        If True non-orthogonal lattices do not store the node coordinates
+        (see :attr:`~simphony_mayavi.cuds.vtk_lattice.VTKLattice.implicit`).
+        Default is False.
+
+    Returns
+    -------
+    vtk_cuds : VTKParticles, VTKMesh or VTKLattice
+        The converted container.
+
+    Raises
+    ------
+    TypeError :
+        When ``cuds`` is not an ``H5Particles``, ``H5Mesh`` or
+        ``H5Lattice``.
+
+    ValueError :
+        When the tables of ``cuds`` do not have the expected layout.
+
+    """
+    return read_h5_tables(
+        cuds, point_keys, cell_keys, region, element_selection, implicit)()
+
+
+def read_h5_tables(cuds, point_keys=None, cell_keys=None, region=None,
+                   element_selection='all', implicit=False):
+    """ Read the tables of a file based CUDS container, deferring the
+    construction of the VTK container.
+
+    The arguments are the same as for :func:`read_h5_dataset`. Only
+    this call accesses the file, so the returned callable can build the
+    container after the file is released (e.g. outside of
+    :meth:`~simphony_mayavi.sources.h5_file_pool.H5FilePool.open`) and
+    in parallel with other reads.
+
+    Returns
+    -------
+    build : callable
+        Returns the VTK container when called without arguments.
+
+    Raises
+    ------
+    TypeError :
+        When ``cuds`` is not an ``H5Particles``, ``H5Mesh`` or
+        ``H5Lattice``.
+
+    ValueError :
+        When the tables of ``cuds`` do not have the expected layout.
+
+    """
+    if isinstance(cuds, H5Particles):
+        return partial(
+            _build_particles, cuds.name, cuds.data,
+            *_read_particles(
+                cuds, point_keys, cell_keys, region, element_selection))
+    elif isinstance(cuds, H5Mesh):
+        return partial(
+            _build_mesh, cuds.name, cuds.data,
+            *_read_mesh(
+                cuds, point_keys, cell_keys, region, element_selection))
+    elif isinstance(cuds, H5Lattice):
+        return partial(
+            _build_lattice, cuds.name, cuds.data, cuds.primitive_cell,
+            tuple(cuds.size), cuds.origin, _read_lattice(cuds, point_keys),
+            implicit)
+    message = 'Reading the tables of {} is not supported'
+    raise TypeError(message.format(type(cuds)))
+
+
+def _read_particles(particles, particle_keys, bond_keys, region=None,
+                    element_selection='all'):
+    """ Return the points of the particles and the elements of the
+    bonds (see :func:`_read_items`). """
+    points, (bonds,) = _read_items(
+        _item_table(particles, PARTICLES_TABLE),
+        [_item_table(particles, BONDS_TABLE)], 'n_particles', 'particles',
+        particle_keys, bond_keys, region, element_selection)
+    return points, bonds
+
+
+def _build_particles(name, data, points, bonds):
+    uids, coordinates, columns = points
+    bond_uids, counts, links, bond_columns = bonds
+    particle2index = UIDToIndex(uids)
+    connectivity = _connectivity(name, particle2index, counts, links)
+
+    if len(uids) != 0:
+        data_set = tvtk.PolyData(points=coordinates)
+        lines = tvtk.CellArray()
+        lines.set_cells(len(counts), connectivity)
+        data_set.lines = lines
+    else:
+        data_set = None
+    container = VTKParticles(
+        name=name, data=data, data_set=data_set,
+        mappings={
+            'index2particle': IndexToUID(uids),
+            'particle2index': particle2index,
+            'index2bond': IndexToUID(bond_uids),
+            'bond2index': UIDToIndex(bond_uids)})
+    if data_set is not None:
+        _set_columns(container.point_data, columns)
+        _set_columns(container.bond_data, bond_columns)
+    return container
+
+
+def _read_mesh(mesh, point_keys, cell_keys, region=None,
+               element_selection='all'):
+    """ Return the points of the mesh and the elements of its edges,
+    faces and cells tables (see :func:`_read_items`). """
+    return _read_items(
+        _item_table(mesh, POINTS_TABLE),
+        [_item_table(mesh, name) for name, _ in ELEMENT_TABLES],
+        'n_points', 'points', point_keys, cell_keys, region,
+        element_selection)
+
+
+def _build_mesh(name, data, points, elements):
+    uids, coordinates, columns = points
+    point2index = UIDToIndex(uids)
+    connectivity = []
+    cell_types = []
+    element_uids = []
+    for (item_uids, counts, links, _), (_, mapping) in izip(
+            elements, ELEMENT_TABLES):
+        connectivity.append(
+            _connectivity(name, point2index, counts, links))
+        cell_types.append(_cell_types(name, counts, mapping))
+        element_uids.append(item_uids)
+    counts = numpy.concatenate([element[1] for element in elements])
+    element_uids = numpy.concatenate(element_uids)
+
+    if len(uids) != 0:
+        data_set = tvtk.UnstructuredGrid(points=coordinates)
+        cells = tvtk.CellArray()
+        cells.set_cells(len(counts), numpy.concatenate(connectivity))
+        # every element is stored as its point count and point ids
+        locations = numpy.cumsum(counts + 1) - (counts + 1)
+        data_set.set_cells(numpy.concatenate(cell_types), locations, cells)
+    else:
+        data_set = None
+    container = VTKMesh(
+        name=name, data=data, data_set=data_set,
+        mappings={
+            'index2point': IndexToUID(uids),
+            'point2index': point2index,
+            'index2element': IndexToUID(element_uids),
+            'element2index': UIDToIndex(element_uids)})
+    if data_set is not None:
+        _set_columns(container.point_data, columns)
+        _set_columns(
+            container.element_data, _concatenate_columns(
+                [element[3] for element in elements],
+                [len(element[1]) for element in elements]))
+    return container
+
+
+def _read_lattice(lattice, node_keys):
+    """ Return the columns of the lattice nodes in C order. """
+    table = _item_table(lattice, LATTICE_TABLE)
+    count = int(numpy.prod(tuple(lattice.size)))
+    if table.nrows != count:
+        message = 'The {} table of {} has {} rows, expected {}'
+        raise ValueError(
+            message.format(LATTICE_TABLE, lattice.name, table.nrows, count))
+    return _data_columns(table, node_keys)
+
+
+def _build_lattice(name, data, primitive_cell, size, origin, columns,
+                   implicit=False):
+    vtk_lattice = VTKLattice.empty(
+        name, primitive_cell, size, origin, data=data, implicit=implicit)
+    # reorder the rows in the node order of the vtk dataset (i.e. the
+    # first index varies fastest)
+    count = int(numpy.prod(size))
+    rows = numpy.ravel_multi_index(
+        numpy.unravel_index(numpy.arange(count), size, order='F'), size)
+    _set_columns(vtk_lattice.point_data, columns, rows)
+    return vtk_lattice
+
+
+def _item_table(cuds, name):
+    """ Return the ``name`` table of a file based container.
+
+    Raises
+    ------
+    ValueError :
+        When the table is missing or does not have the expected columns.
+
+    """
+    # simphony.io keeps the HDF5 group of the dataset in ``_group``
+    group = getattr(cuds, '_group', None)
+    if not isinstance(group, tables.Group):
+        message = 'The dataset {} has no HDF5 group'
+        raise ValueError(message.format(cuds.name))
+    try:
+        table = group._f_get_child(name)
+    except tables.NoSuchNodeError:
+        message = 'The dataset {} has no {} table'
+        raise ValueError(message.format(cuds.name, name))
+    expected = TABLE_COLUMNS[name]
+    if not isinstance(table, tables.Table) or \
+            not all(column in table.colnames for column in expected):
+        message = 'The {} table of {} does not have the columns {}'
+        raise ValueError(message.format(name, cuds.name, expected))
+    return table
+
+
+def _data_columns(table, keys, rows=None):
+    """ Read the CUBA columns of a table of serialised DataContainers.
+
+    Only the ``rows`` are read when they are not None.
+
+    Returns
+    -------
+    columns : dict
+        The mapping from CUBA key to the (values, present) arrays.
+
+    Raises
+    ------
+    ValueError :
+        When the mask does not match the data columns.
+
+    """
+    names = list(table.description.data._v_names)
+    mask = _read_field(table, 'mask', rows)
+    if mask.ndim != 2 or mask.shape[1] != len(names):
+        message = 'The mask of the {} table has shape {}, expected (N, {})'
+        raise ValueError(
+            message.format(table._v_pathname, mask.shape, len(names)))
+    positions = {
+        CUBA[name.upper()]: position for position, name in enumerate(names)
+        if name.upper() in CUBA.__members__}
+    stored = supported_cuba()
+    if keys is None:
+        keys = [cuba for cuba, position in positions.iteritems()
+                if mask[:, position].any()]
+    columns = {}
+    for cuba in keys:
+        if cuba not in stored or cuba not in positions:
+            continue
+        position = positions[cuba]
+        values = _read_field(table, 'data/' + names[position], rows)
+        columns[cuba] = values, mask[:, position].astype(bool)
+    return columns
+
+
+def _read_field(table, field, rows=None):
+    """ Read a column of a table, or only the ``rows`` when not None. """
+    if rows is None:
+        return table.col(field)
+    elif len(rows) == 0:
+        return table.read(0, 0, field=field)
+    return table.read_coordinates(rows, field=field)
+
+
+def _read_items(table, element_tables, count_field, link_field,
+                point_keys, cell_keys, region=None, element_selection='all'):
+    """ Read the points of ``table`` and the elements of the
+    ``element_tables`` that link them.
+
+    With a ``region`` only the points inside the region and the
+    elements with all (or any) of their points inside are read,
+    together with the other points of these elements.
+
+    Returns
+    -------
+    points : tuple
+        The uids, the coordinates and the CUBA columns of the points,
+        where the uids are a (N, 16) uint8 array of their bytes.
+
+    elements : list
+        The uids, the point counts, the point uids and the CUBA columns
+        of the elements of each table, where the point uids of the
+        elements are one after the other in a (M, 16) uint8 array.
+
+    """
+    rows = None if region is None else _rows_in_region(table, region)
+    uids = _read_uids(table, rows)
+    coordinates = _read_field(table, 'coordinates', rows)
+    columns = _data_columns(table, point_keys, rows)
+
+    selected = None if region is None else UIDToIndex(uids)
+    elements = []
+    outside = [numpy.empty((0, UID_SIZE), dtype=numpy.uint8)]
+    for element_table in element_tables:
+        counts, links = _read_links(element_table, count_field, link_field)
+        element_rows = None
+        if selected is not None:
+            inside = selected.indices(links) >= 0
+            owners = numpy.repeat(numpy.arange(len(counts)), counts)
+            inside_counts = numpy.bincount(
+                owners[inside], minlength=len(counts))
+            if element_selection == 'all':
+                keep = inside_counts == counts
+            else:
+                keep = inside_counts > 0
+            element_rows = numpy.flatnonzero(keep)
+            kept = numpy.repeat(keep, counts)
+            counts, links, inside = counts[keep], links[kept], inside[kept]
+            outside.append(links[~inside])
+        elements.append((
+            _read_uids(element_table, element_rows), counts, links,
+            _data_columns(element_table, cell_keys, element_rows)))
+
+    # the points outside of the region of the selected elements
+    outside = _unique_uids(numpy.concatenate(outside))
+    if len(outside) != 0:
+        outside_rows = _find_rows(table, outside)
+        uids = numpy.concatenate([uids, outside])
+        coordinates = numpy.concatenate(
+            [coordinates, _read_field(table, 'coordinates', outside_rows)])
+        columns = _concatenate_columns(
+            [columns, _data_columns(table, list(columns), outside_rows)],
+            [len(rows), len(outside_rows)])
+    return (uids, coordinates, columns), elements
+
+
+def _read_uids(table, rows=None):
+    """ Return the uids of a table as a (N, 16) uint8 array. """
+    return hex_to_array(_read_field(table, 'uid', rows))
+
+
+def _read_links(table, count_field, link_field):
+    """ Return the point counts and the point uids of the rows of a table
+    of elements. """
+    counts = [numpy.empty(0, dtype=numpy.int64)]
+    links = [numpy.empty((0, UID_SIZE), dtype=numpy.uint8)]
+    for chunk in chunk_slices(table.nrows):
+        chunk_counts = table.read(
+            chunk.start, chunk.stop, field=count_field).astype(numpy.int64)
+        values = table.read(chunk.start, chunk.stop, field=link_field)
+        used = numpy.arange(values.shape[1]) < chunk_counts[:, numpy.newaxis]
+        counts.append(chunk_counts)
+        links.append(hex_to_array(values[used]))
+    return numpy.concatenate(counts), numpy.concatenate(links)
+
+
+def _connectivity(name, item2index, counts, links):
+    """ Return the vtk connectivity of elements from their point uids.
+
+    Raises
+    ------
+    ValueError :
+        When an element refers to a point that is not in ``item2index``.
+
+    """
+    indices = item2index.indices(links)
+    missing = numpy.flatnonzero(indices < 0)
+    if len(missing) != 0:
+        message = 'An element of {} refers to the missing point {}'
+        raise ValueError(message.format(
+            name, uuid.UUID(bytes=links[missing[0]].tobytes())))
+    return cell_connectivity(counts, indices)
+
+
+def _cell_types(name, counts, mapping):
+    """ Return the vtk cell types of elements with ``counts`` points. """
+    cell_types = numpy.empty(len(counts), dtype=numpy.uint8)
+    for count in numpy.unique(counts):
+        try:
+            cell_types[counts == count] = mapping[count]
+        except KeyError:
+            message = 'An element of {} has an unsupported point count {}'
+            raise ValueError(message.format(name, count))
+    return cell_types
+
+
+def _unique_uids(uids):
+    """ Return the distinct rows of a (N, 16) uid array in the order of
+    their first occurrence. """
+    if len(uids) == 0:
+        return uids
+    keys = numpy.ascontiguousarray(uids).view('V{}'.format(UID_SIZE))
+    _, first = numpy.unique(keys.ravel(), return_index=True)
+    return uids[numpy.sort(first)]
+
+
+def _find_rows(table, uids):
+    """ Return the rows of the items with the given (N, 16) uids. """
+    positions = UIDToIndex(uids)
+    rows = numpy.full(len(uids), -1, dtype=numpy.int64)
+    for chunk in chunk_slices(table.nrows):
+        found = positions.indices(hex_to_array(
+            table.read(chunk.start, chunk.stop, field='uid')))
+        matched = numpy.flatnonzero(found >= 0)
+        rows[found[matched]] = matched + chunk.start
+    missing = numpy.flatnonzero(rows < 0)
+    if len(missing) != 0:
+        message = 'The {} table has no rows for {}'
+        raise ValueError(message.format(
+            table._v_pathname,
+            [uuid.UUID(bytes=uids[index].tobytes()) for index in missing]))
+    return rows
+
+
+def _rows_in_region(table, region):
+    """ Return the rows of the items with coordinates inside ``region``.
+    """
+    rows = [numpy.empty(0, dtype=numpy.int64)]
+    for chunk in chunk_slices(table.nrows):
+        coordinates = table.read(chunk.start, chunk.stop, field='coordinates')
+        inside = numpy.flatnonzero(region.contains(coordinates))
+        rows.append(inside + chunk.start)
+    return numpy.concatenate(rows)
+
+
+def _concatenate_columns(parts, lengths):
+    """ Join the rows of the (values, present) columns of consecutive
+    blocks of ``lengths`` rows. The keys that are missing in a block
+    are marked as missing in its rows. """
+    columns = {}
+    for cuba in set().union(*parts):
+        values = []
+        present = []
+        for part, length in izip(parts, lengths):
+            if cuba in part:
+                values.append(part[cuba][0])
+                present.append(part[cuba][1])
+            else:
+                template = next(
+                    other[cuba][0] for other in parts if cuba in other)
+                values.append(numpy.zeros(
+                    (length,) + template.shape[1:], dtype=template.dtype))
+                present.append(numpy.zeros(length, dtype=bool))
+        columns[cuba] = numpy.concatenate(values), numpy.concatenate(present)
+    return columns
+
+
+def _set_columns(cuba_data, columns, rows=None):
+    """ Store the (values, present) columns, reordered by ``rows`` when
+    not None. """
+    with cuba_data.batch():
+        for cuba, (values, present) in columns.iteritems():
+            if rows is not None:
+                values, present = values[rows], present[rows]
+            cuba_data.set_column(cuba, values, missing=~present)
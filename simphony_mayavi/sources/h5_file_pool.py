@@ -0,0 +1,95 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from simphony.io.h5_cuds import H5CUDS
+
+
+class H5FilePool(object):
+    """ A pool of reference counted CUDS file handles.
+
+    Every file is opened once while it is in use and closed when the
+    last reference is released. Since the HDF5 library is not thread
+    safe, the handles should only be accessed inside :meth:`open`, which
+    serialises the access to all the files of the pool with a single
+    lock. The threads reading different files therefore take turns, so
+    the work that does not access the files (e.g. building the VTK
+    datasets) should be done after leaving :meth:`open`.
+
+    """
+
+    def __init__(self):
+        # Guards the entries.
+        self._lock = threading.Lock()
+        # Serialises the HDF5 calls, taken before ``_lock`` when both
+        # are needed.
+        self._hdf5_lock = threading.RLock()
+        # path -> [handle, reference count]
+        self._entries = {}
+
+    def acquire(self, filename):
+        """ Return the handle of a file, opening it if needed.
+
+        Every call should be matched by a call to :meth:`release`.
+
+        """
+        path = os.path.abspath(filename)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                entry[1] += 1
+                return entry[0]
+        with self._hdf5_lock:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None:
+                    entry = [H5CUDS.open(path), 0]
+                    self._entries[path] = entry
+                entry[1] += 1
+                return entry[0]
+
+    def release(self, filename):
+        """ Release a reference to a file, closing it if it is the last.
+        """
+        path = os.path.abspath(filename)
+        with self._lock:
+            entry = self._entries[path]
+            if entry[1] > 1:
+                entry[1] -= 1
+                return
+        with self._hdf5_lock:
+            with self._lock:
+                entry = self._entries[path]
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._entries[path]
+                    entry[0].close()
+
+    @contextmanager
+    def open(self, filename):
+        """ Context manager giving exclusive access to a file handle.
+
+        No other file of the pool is accessed until the context exits.
+
+        Example
+        -------
+        >>> with pool.open(filename) as handle:
+        ...     names = handle.get_dataset_names()
+
+        """
+        with self._hdf5_lock:
+            handle = self.acquire(filename)
+            try:
+                yield handle
+            finally:
+                self.release(filename)
+
+    def references(self, filename):
+        """ Return the number of references to a file.
+        """
+        entry = self._entries.get(os.path.abspath(filename))
+        return 0 if entry is None else entry[1]
+
+
+#: The pool used by the CUDS file sources.
+h5_file_pool = H5FilePool()
@@ -0,0 +1,253 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy
+import tables
+
+from simphony.core.cuba import CUBA
+
+from .h5_column_reader import (
+    PARTICLES_TABLE, BONDS_TABLE, LATTICE_TABLE, POINTS_TABLE, EDGES_TABLE,
+    FACES_TABLE, CELLS_TABLE)
+from .h5_file_pool import h5_file_pool
+
+logger = logging.getLogger(__name__)
+
+#: The description of a dataset in a CUDS file.
+#:
+#: - ``name`` -- the name of the dataset.
+#: - ``kind`` -- one of ``'Particles'``, ``'Mesh'`` or ``'Lattice'``.
+#: - ``item_counts`` -- the number of rows of each item table (e.g.
+#:   ``{'particles': 1000, 'bonds': 10}``), keyed by the table name.
+#: - ``cuba_keys`` -- the CUBA keys of the data columns of each item
+#:   table, keyed by the table name. The columns may hold no values,
+#:   see :func:`read_cuds_dataset_keys`.
+DatasetInfo = namedtuple(
+    'DatasetInfo', ['name', 'kind', 'item_counts', 'cuba_keys'])
+
+#: The groups of the CUDS files that hold the datasets of each kind, in
+#: the order of the datasets listed by ``H5CUDS``.
+DATASET_GROUPS = (
+    ('mesh', 'Mesh'), ('particle', 'Particles'), ('lattice', 'Lattice'))
+
+#: The table of each item type in the group of a dataset.
+ITEM_TABLES = {
+    CUBA.PARTICLE: PARTICLES_TABLE,
+    CUBA.BOND: BONDS_TABLE,
+    CUBA.NODE: LATTICE_TABLE,
+    CUBA.POINT: POINTS_TABLE,
+    CUBA.EDGE: EDGES_TABLE,
+    CUBA.FACE: FACES_TABLE,
+    CUBA.CELL: CELLS_TABLE}
+
+#: The number of rows of the mask columns read at a time.
+MASK_CHUNK_SIZE = 65536
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def read_cuds_file_metadata(filename):
+    """ Describe the datasets of a CUDS file without loading them.
+
+    The names and kinds of the datasets are read from the HDF5 groups
+    of the file, and their item counts and CUBA keys from the number of
+    rows and the descriptions of the tables, so no container is built
+    and no item is read. The result is cached per file (by path,
+    modification time and size). When the layout of the file is not
+    recognised the datasets are listed through the CUDS api and their
+    item counts and keys are left empty.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the CUDS file.
+
+    Returns
+    -------
+    datasets : list of DatasetInfo
+        The description of the datasets in the file.
+
+    """
+    return list(_cached(filename, (), _read_metadata))
+
+
+def read_cuds_dataset_keys(filename, name):
+    """ Return the CUBA keys with stored values in a dataset of a CUDS
+    file.
+
+    The mask columns of the item tables of the dataset are scanned, so
+    the call is deferred until the dataset is selected. The result is
+    cached per file and dataset.
+
+    Parameters
+    ----------
+    filename : str
+        The path to the CUDS file.
+
+    name : str
+        The name of the dataset.
+
+    Returns
+    -------
+    cuba_keys : dict
+        The frozenset of CUBA keys with at least one stored value in
+        each item table, keyed by the table name. It is empty when the
+        layout of the dataset is not recognised.
+
+    Raises
+    ------
+    ValueError :
+        When the file has no dataset ``name``.
+
+    """
+    def read(handle):
+        groups = _dataset_groups(handle)
+        if groups is None:
+            if name not in handle.get_dataset_names():
+                raise ValueError('Dataset {} does not exist'.format(name))
+            return {}
+        for group, _ in groups:
+            if group._v_name == name:
+                return {
+                    table._v_name: _available_keys(table)
+                    for table in group._f_iter_nodes('Table')}
+        raise ValueError('Dataset {} does not exist'.format(name))
+    return dict(_cached(filename, (name,), read))
+
+
+def read_cuds_item_keys(cuds, item_type):
+    """ Return the CUBA keys with stored values in the items of a file
+    based CUDS container.
+
+    Only the mask column of the table of ``item_type`` is scanned (see
+    :func:`read_cuds_dataset_keys`), so no item is built.
+
+    Parameters
+    ----------
+    cuds : H5Particles, H5Mesh or H5Lattice
+        The file based container.
+
+    item_type : CUBA
+        The type of the items.
+
+    Returns
+    -------
+    cuba_keys : frozenset
+        The CUBA keys with at least one stored value, or None when
+        ``cuds`` is not file based or the layout of its tables is not
+        recognised.
+
+    """
+    # simphony.io keeps the HDF5 group of the dataset in ``_group``
+    group = getattr(cuds, '_group', None)
+    name = ITEM_TABLES.get(item_type)
+    if not isinstance(group, tables.Group) or name not in group:
+        return None
+    table = group._f_get_child(name)
+    if not isinstance(table, tables.Table) or \
+            'data' not in table.colnames or 'mask' not in table.colnames:
+        return None
+    return _available_keys(table)
+
+
+def clear_metadata_cache():
+    """ Remove all the cached file descriptions.
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cached(filename, suffix, read):
+    """ Return ``read(handle)`` for a file, cached by the path,
+    modification time and size of the file and ``suffix``. """
+    stat = os.stat(filename)
+    version = (os.path.abspath(filename), stat.st_mtime, stat.st_size)
+    key = version + suffix
+    with _cache_lock:
+        value = _cache.get(key)
+    if value is None:
+        with h5_file_pool.open(filename) as handle:
+            value = read(handle)
+        with _cache_lock:
+            # forget older versions of the file
+            for stale in [item for item in _cache
+                          if item[0] == key[0] and item[:3] != version]:
+                del _cache[stale]
+            _cache[key] = value
+    return value
+
+
+def _read_metadata(handle):
+    """ Describe the datasets of an open CUDS file. """
+    groups = _dataset_groups(handle)
+    if groups is None:
+        return [
+            DatasetInfo(container.name, _kind(container), {}, {})
+            for container in handle.iter_datasets()]
+    datasets = []
+    for group, kind in groups:
+        item_counts = {}
+        cuba_keys = {}
+        for table in group._f_iter_nodes('Table'):
+            item_counts[table._v_name] = table.nrows
+            cuba_keys[table._v_name] = _column_keys(table)
+        datasets.append(
+            DatasetInfo(group._v_name, kind, item_counts, cuba_keys))
+    return datasets
+
+
+def _dataset_groups(handle):
+    """ Return the HDF5 group and the kind of each dataset of an open
+    CUDS file, or None when the layout is not recognised. """
+    # simphony.io keeps the pytables file of the H5CUDS in ``_handle``
+    root = getattr(getattr(handle, '_handle', None), 'root', None)
+    if not isinstance(root, tables.Group) or \
+            not any(name in root for name, _ in DATASET_GROUPS):
+        logger.debug('Unknown CUDS file layout')
+        return None
+    groups = []
+    for name, kind in DATASET_GROUPS:
+        if name in root:
+            groups.extend(
+                (group, kind)
+                for group in root._f_get_child(name)._f_iter_nodes('Group'))
+    return groups
+
+
+def _column_keys(table):
+    """ Return the CUBA keys of the data columns of a table of
+    serialised DataContainers. """
+    if 'data' not in table.colnames:
+        return frozenset()
+    return frozenset(
+        CUBA[name.upper()] for name in table.description.data._v_names
+        if name.upper() in CUBA.__members__)
+
+
+def _available_keys(table):
+    """ Return the CUBA keys with at least one stored value in a table
+    of serialised DataContainers. """
+    if 'data' not in table.colnames or 'mask' not in table.colnames:
+        return frozenset()
+    names = list(table.description.data._v_names)
+    found = numpy.zeros(len(names), dtype=bool)
+    for start in xrange(0, table.nrows, MASK_CHUNK_SIZE):
+        mask = table.read(start, start + MASK_CHUNK_SIZE, field='mask')
+        if mask.ndim != 2 or mask.shape[1] != len(names):
+            return frozenset()
+        found |= mask.any(axis=0)
+        if found.all():
+            break
+    return frozenset(
+        CUBA[name.upper()] for name, present in zip(names, found)
+        if present and name.upper() in CUBA.__members__)
+
+
+def _kind(container):
+    for _, kind in DATASET_GROUPS:
+        if kind in type(container).__name__:
+            return kind
+    return type(container).__name__
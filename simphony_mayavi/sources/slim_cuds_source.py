@@ -1,4 +1,5 @@
 import itertools
+import logging
 
 from mayavi.core.source import Source
 from mayavi.sources.vtk_data_source import has_attributes
@@ -11,16 +12,25 @@ from tvtk.common import is_old_pipeline
 from tvtk.api import tvtk
 from tvtk import messenger
 from traits.api import TraitError, Instance, Either, Property, List, Str, \
-    Int, Dict
-from traitsui.api import View, Group, Item
+    Int, Dict, Event, Bool, Any, Enum, Tuple
+from traitsui.api import View, Group, Item, ButtonEditor
 
 from simphony.core.cuba import CUBA
 from simphony.core.keywords import KEYWORDS
 from simphony.cuds import ABCMesh, ABCParticles, ABCLattice
 from simphony.io.h5_mesh import H5Mesh
+from simphony_mayavi.core.api import (
+    ConversionCache, cuds_cache_key, cuds_fingerprint, Region,
+    ELEMENT_SELECTIONS)
 from simphony_mayavi.cuds.vtk_lattice import VTKLattice
 from simphony_mayavi.cuds.vtk_mesh import VTKMesh
 from simphony_mayavi.cuds.vtk_particles import VTKParticles
+from .background_conversion import BackgroundConversion
+from .h5_metadata import read_cuds_item_keys
+from .cuds_source import (
+    cuds_to_vtk, _converted_as_implicit, _shown_as_is)
+
+logger = logging.getLogger(__name__)
 
 
 def data_type_attrs():
@@ -35,6 +45,26 @@ class SlimCUDSSource(Source):
     consumption, sacrificing access speed.
     This is achieved by retrieving data as they are requested by the user,
     instead of preemptively load all available data.
+
+    The CUBA keys offered for selection are the stored arrays of VTK
+    backed containers. The keys of file based containers are read from
+    the mask columns of their tables (see
+    :func:`~simphony_mayavi.sources.h5_metadata.read_cuds_item_keys`),
+    otherwise the data of the items are inspected (up to
+    ``key_sample_size`` items per type).
+
+    When ``asynchronous`` is True the conversion to a VTK container runs
+    on a worker thread (see :class:`CUDSSource`).
+
+    When a ``conversion_cache`` is set, the VTK backed containers of
+    each selection are cached (see :class:`CUDSSource`). A selection
+    change then reuses or converts a container for the new selection
+    instead of loading the columns into the current one, so that going
+    back to a previous selection is instant.
+
+    A ``memory_budget`` bounds the memory used while converting and a
+    ``region`` restricts the conversion to the items inside it (see
+    :class:`CUDSSource`).
     """
     # More info:
     # This class basic working mechanics performs the following transformation:
@@ -67,10 +97,52 @@ class SlimCUDSSource(Source):
     cell_vectors_name = DEnum(values_name='_cell_vectors_list',
                               desc='vectors cell data attribute to use')
 
+    #: The maximum number of items of each type that are inspected to
+    #: find the available CUBA keys. None inspects all the items.
+    key_sample_size = Either(Int(1000), None)
+
+    #: Event to inspect all the items for available CUBA keys (e.g.
+    #: after a sampled scan).
+    rescan = Event
+
+    #: Convert the CUDS container in the background.
+    asynchronous = Bool(False)
+
+    #: True while a conversion is running in the background.
+    loading = Bool(False)
+
+    #: The cache of converted VTK containers. Default is None (no cache).
+    conversion_cache = Instance(ConversionCache)
+
+    #: The number of items of each type in the checksum of the datasets
+    #: looked up in the ``conversion_cache`` (see :class:`CUDSSource`).
+    cache_key_sample_size = Either(Int(1000), None)
+
+    #: The memory in bytes to use while converting particles and meshes.
+    #: Default is None which converts them in one go.
+    memory_budget = Either(None, Int)
+
+    #: The region of the items to convert. Default is None which
+    #: converts all the items.
+    region = Instance(Region)
+
+    #: Keep the bonds and elements with all or with any of their points
+    #: in the region.
+    element_selection = Enum(*ELEMENT_SELECTIONS)
+
+    #: Convert non-orthogonal lattices with implicit node coordinates
+    #: (see :class:`CUDSSource`).
+    implicit = Bool(False)
+
+    #: The stride of the shown lattice nodes along each axis (see
+    #: :class:`CUDSSource`).
+    lattice_step = Either(None, Tuple(Int, Int, Int))
+
     #: Output information for the processing pipeline.
     #: Overridden from the base class for more specialized setup.
     output_info = PipelineInfo(
-        datasets=['image_data', 'poly_data', 'unstructured_grid'],
+        datasets=['image_data', 'poly_data', 'unstructured_grid',
+                  'structured_grid'],
         attribute_types=['any'],
         attributes=['scalars', 'vectors'])
 
@@ -81,6 +153,9 @@ class SlimCUDSSource(Source):
             Item(name='point_vectors_name'),
             Item(name='cell_scalars_name'),
             Item(name='cell_vectors_name'),
+            Item(name='rescan', show_label=False,
+                 enabled_when='_sampled_keys',
+                 editor=ButtonEditor(label='Rescan keys')),
             Item(name='data')))
 
     # The VTK dataset to manage. It is taken from the vtk_cuds.
@@ -100,6 +175,10 @@ class SlimCUDSSource(Source):
     _cell_vectors_list = List(Str)
     _cell_tensors_list = List(Str)
 
+    #: True when the available keys have been found by inspecting only
+    #: a sample of the items.
+    _sampled_keys = Bool(False)
+
     #: This dictionary stores the user selected defaults as specified
     #: at constructor. Differently from CUDSSource, this information is
     #: required so that we can distinguish between an empty name that is empty
@@ -122,6 +201,9 @@ class SlimCUDSSource(Source):
         Instance(VTKParticles),
         Instance(VTKLattice))
 
+    #: The version of the VTK backed CUDS container that is in the pipeline
+    _vtk_cuds_version = Int(0)
+
     # This filter allows us to change the attributes of the data
     # object and will ensure that the pipeline is properly taken care
     # of.  Directly setting the array in the VTK object will not do
@@ -132,6 +214,16 @@ class SlimCUDSSource(Source):
     # The ID of the observer for the data.
     _observer_id = Int(-1)
 
+    #: The conversions running in the background
+    _conversion = Instance(BackgroundConversion, ())
+
+    #: True when a background conversion has been cancelled by stop
+    _interrupted = Bool(False)
+
+    #: The fingerprint of the cuds for the conversion cache keys. It is
+    #: reset when the cuds is assigned or updated.
+    _fingerprint = Any
+
     def __init__(self, cuds=None, point_scalars=None, point_vectors=None,
                  cell_scalars=None, cell_vectors=None, **traits):
         """ Constructor
@@ -206,15 +298,32 @@ class SlimCUDSSource(Source):
         if self.running:
             return
 
-        self._do_full_refresh()
+        # The keys and the vtk cuds are already in place (or loading)
+        # when the cuds has been assigned.
+        interrupted, self._interrupted = self._interrupted, False
+        if (self._vtk_cuds is None or interrupted) and not self.loading:
+            self._do_full_refresh()
 
         super(SlimCUDSSource, self).start()
 
+    def stop(self):
+        """ Stop the source and cancel any background conversion.
+        """
+        super(SlimCUDSSource, self).stop()
+        if self.loading:
+            self._interrupted = True
+            self.loading = False
+        self._conversion.close()
+
     def update(self):
         """ Recalculate the VTK data from the CUDS dataset
         Useful when ``cuds`` is modified after assignment
+
+        The VTK backed container is updated in place (see
+        :meth:`CUDSSource.update`) when the selected keys, the
+        points, elements or lattice geometry have not changed.
         """
-        self._do_full_refresh()
+        self._do_full_refresh(in_place=True)
 
     # Properties
     # -------------------------------------------------------------------------
@@ -232,23 +341,51 @@ class SlimCUDSSource(Source):
         self.name = self._get_name()
 
     def _get_data(self):
-        return self._vtk_cuds.data_set
+        vtk_cuds = self._vtk_cuds
+        if vtk_cuds is None:
+            return None
+        if isinstance(vtk_cuds, VTKLattice):
+            return vtk_cuds.render_data_set
+        return vtk_cuds.data_set
 
     # Change handlers
     # -------------------------------------------------------------------------
 
     # Triggered when the user selects a new entry from the comboboxes
     def _point_scalars_name_changed(self, value):
-        self._update_vtk_cuds_from_cuds()
+        self._update_selected_columns()
 
     def _point_vectors_name_changed(self, value):
-        self._update_vtk_cuds_from_cuds()
+        self._update_selected_columns()
 
     def _cell_scalars_name_changed(self, value):
-        self._update_vtk_cuds_from_cuds()
+        self._update_selected_columns()
 
     def _cell_vectors_name_changed(self, value):
-        self._update_vtk_cuds_from_cuds()
+        self._update_selected_columns()
+
+    def _rescan_fired(self):
+        if self.cuds is not None:
+            self._do_full_refresh(in_place=True, full_scan=True)
+
+    def _region_changed(self):
+        if self.cuds is not None:
+            self._update_vtk_cuds_from_cuds()
+
+    def _element_selection_changed(self):
+        if self.cuds is not None and self.region is not None:
+            self._update_vtk_cuds_from_cuds()
+
+    def _cache_key_sample_size_changed(self):
+        self._fingerprint = None
+
+    def _implicit_changed(self):
+        if isinstance(self.cuds, ABCLattice):
+            self._update_vtk_cuds_from_cuds()
+
+    def _lattice_step_changed(self):
+        if isinstance(self.cuds, ABCLattice):
+            self._update_vtk_cuds_from_cuds()
     ###
 
     def _data_changed(self, old, new):
@@ -286,23 +423,30 @@ class SlimCUDSSource(Source):
     # Private
     # -------------------------------------------------------------------------
 
-    def _do_full_refresh(self):
+    def _do_full_refresh(self, in_place=False, full_scan=False):
         """Performs appropriate refresh against the current cuds data,
         and chooses the appropriate defaults considering the current
         selected combobox names (if present), or the defaults specified
-        at construction"""
+        at construction. When ``in_place`` is True the current vtk cuds
+        is updated in place if possible. When ``full_scan`` is True all
+        the items are inspected for available keys, regardless of
+        ``key_sample_size``"""
 
+        self._fingerprint = None
         current_names = self._collect_current_names()
 
-        self._fill_datatype_enums()
+        sample_size = None if full_scan else self.key_sample_size
+        self._fill_datatype_enums(sample_size)
         self._select_names_silently(
             default_names=self._constructor_default_names,
             current_names=current_names,
         )
-        self._update_vtk_cuds_from_cuds()
+        if not (in_place and self._update_vtk_cuds_in_place()):
+            self._update_vtk_cuds_from_cuds()
 
-    def _fill_datatype_enums(self):
-        """Fills the "comboboxes" enumeration options from the current cuds.
+    def _fill_datatype_enums(self, sample_size=None):
+        """Fills the "comboboxes" enumeration options from the current cuds,
+        inspecting at most ``sample_size`` items of each type.
         Works appropriately if the cuds is None.
 
         Note that after filling the comboboxes, the selected entry is enforced
@@ -311,7 +455,11 @@ class SlimCUDSSource(Source):
         as much as possible.
         """
         cuds = self.cuds
-        available_keys = _available_keys(cuds) if cuds is not None else {}
+        if cuds is not None:
+            available_keys, self._sampled_keys = _scan_keys(
+                cuds, sample_size)
+        else:
+            available_keys, self._sampled_keys = {}, False
 
         # We go through the individual combobox lists, computing their names
         # and using reflection, populating each _list with the keys available,
@@ -387,6 +535,115 @@ class SlimCUDSSource(Source):
                 **{"{}_name".format(data_type_attr): selected}
             )
 
+    def _selected_keys(self):
+        """Returns the lists of the point and cell CUBA keys
+        currently selected via the comboboxes"""
+        points_keys = [CUBA[x]
+                       for x in [self.point_scalars_name,
+                                 self.point_vectors_name]
+                       if len(x) > 0]
+
+        cell_keys = [CUBA[x]
+                     for x in [self.cell_scalars_name,
+                               self.cell_vectors_name]
+                     if len(x) > 0]
+        return points_keys, cell_keys
+
+    def _update_vtk_cuds_in_place(self):
+        """Updates the current vtk cuds in place from the cuds and
+        notifies the pipeline about the changes.
+
+        Returns False if the vtk cuds needs to be recreated, i.e. the
+        selected keys or the topology have changed.
+        """
+        cuds = self.cuds
+        vtk_cuds = self._vtk_cuds
+        if vtk_cuds is None or self.loading:
+            return False
+
+        if cuds is not vtk_cuds:
+            if self.region is not None:
+                # The items in the region have to be selected again
+                return False
+            points_keys, cell_keys = self._selected_keys()
+            if (set(points_keys), set(cell_keys)) != _stored_keys(vtk_cuds):
+                return False
+            if isinstance(vtk_cuds, VTKMesh) and \
+                    isinstance(cuds, (ABCMesh, H5Mesh)):
+                updated = vtk_cuds.update_from_mesh(
+                    cuds, points_keys, cell_keys)
+            elif isinstance(vtk_cuds, VTKParticles) and \
+                    isinstance(cuds, ABCParticles):
+                updated = vtk_cuds.update_from_particles(
+                    cuds, points_keys, cell_keys)
+            elif isinstance(vtk_cuds, VTKLattice) and \
+                    isinstance(cuds, ABCLattice):
+                updated = (
+                    _converted_as_implicit(vtk_cuds, self.implicit) and
+                    vtk_cuds.update_from_lattice(cuds, points_keys))
+            else:
+                updated = False
+            if not updated:
+                return False
+
+        self._refresh_pipeline()
+        return True
+
+    def _update_selected_columns(self):
+        """Loads the newly selected columns into the current vtk cuds
+        and drops the deselected ones, keeping its geometry and topology.
+
+        It is used when the selection in the comboboxes change. The vtk
+        cuds is recreated if the cuds topology has changed.
+        """
+        cuds = self.cuds
+        vtk_cuds = self._vtk_cuds
+        if vtk_cuds is None or cuds is vtk_cuds or self.loading or \
+                self.conversion_cache is not None or self.region is not None:
+            self._update_vtk_cuds_from_cuds()
+            return
+
+        points_keys, cell_keys = self._selected_keys()
+        stored_points, stored_cells = _stored_keys(vtk_cuds)
+        new_points = [key for key in points_keys if key not in stored_points]
+        new_cells = [key for key in cell_keys if key not in stored_cells]
+        if len(new_points) != 0 or len(new_cells) != 0:
+            if isinstance(vtk_cuds, VTKMesh):
+                loaded = vtk_cuds.patch_from_mesh(
+                    cuds, point_keys=new_points, cell_keys=new_cells,
+                    coordinates=False)
+            elif isinstance(vtk_cuds, VTKParticles):
+                loaded = vtk_cuds.patch_from_particles(
+                    cuds, particle_keys=new_points, bond_keys=new_cells,
+                    coordinates=False)
+            else:
+                loaded = vtk_cuds.patch_from_lattice(
+                    cuds, node_keys=new_points)
+            if not loaded:
+                self._update_vtk_cuds_from_cuds()
+                return
+
+        point_data, cell_data = _attribute_data(vtk_cuds)
+        for key in stored_points.difference(points_keys):
+            point_data.remove_column(key)
+        for key in stored_cells.difference(cell_keys):
+            cell_data.remove_column(key)
+        self._refresh_pipeline()
+
+    def _refresh_pipeline(self):
+        """Notifies the pipeline about the changes of the vtk cuds since
+        the last refresh."""
+        vtk_cuds = self._vtk_cuds
+        changes = vtk_cuds.changes_since(self._vtk_cuds_version)
+        self._vtk_cuds_version = vtk_cuds.version
+        if changes['arrays']:
+            # Sync the pipeline against the new attribute arrays.
+            data = self.data
+            self._data_changed(data, data)
+        elif any(changes.values()):
+            # The modified arrays are already marked by the vtk cuds.
+            self.data_changed = True
+
     def _update_vtk_cuds_from_cuds(self):
         """This private method converts the CUDS into a VTKCUDS.
         The VTKCUDS contains a VTK DataSet (accessible through the
@@ -399,34 +656,71 @@ class SlimCUDSSource(Source):
         """
         cuds = self.cuds
         # Extract the requested data we want.
-        points_keys = [CUBA[x]
-                       for x in [self.point_scalars_name,
-                                 self.point_vectors_name]
-                       if len(x) > 0]
-
-        cell_keys = [CUBA[x]
-                     for x in [self.cell_scalars_name,
-                               self.cell_vectors_name]
-                     if len(x) > 0]
-
-        if isinstance(cuds, (VTKMesh, VTKParticles, VTKLattice)):
-            vtk_cuds = cuds
+        points_keys, cell_keys = self._selected_keys()
+
+        if _shown_as_is(cuds, self.region, self.lattice_step):
+            self._set_vtk_cuds(cuds)
+        elif not isinstance(cuds, (ABCMesh, H5Mesh, ABCParticles,
+                                   ABCLattice)):
+            msg = 'Provided object {} is not of any known cuds type'
+            raise TraitError(msg.format(type(cuds)))
+        elif self.asynchronous:
+            self.loading = True
+            self._conversion.submit(
+                self._conversion_done, self._convert, cuds, points_keys,
+                cell_keys, self._fingerprint)
         else:
-            if isinstance(cuds, (ABCMesh, H5Mesh)):
-                vtk_cuds = VTKMesh.from_mesh(cuds, points_keys, cell_keys)
-            elif isinstance(cuds, ABCParticles):
-                vtk_cuds = VTKParticles.from_particles(cuds, points_keys,
-                                                       cell_keys)
-            elif isinstance(cuds, ABCLattice):
-                vtk_cuds = VTKLattice.from_lattice(cuds, points_keys)
-            else:
-                msg = 'Provided object {} is not of any known cuds type'
-                raise TraitError(msg.format(type(cuds)))
-
-        # Finally set the vtk cuds. This will update self.data as a
-        # subsequent handler.
+            vtk_cuds, self._fingerprint = self._convert(
+                cuds, points_keys, cell_keys, self._fingerprint)
+            self._set_vtk_cuds(vtk_cuds)
+
+    def _convert(self, cuds, points_keys, cell_keys, fingerprint):
+        """Converts the cuds for the selected keys, reusing the cached
+        vtk cuds if available. Returns the vtk cuds and the fingerprint
+        of the cuds (None without a cache). Called on the worker thread
+        in asynchronous mode."""
+        cache = self.conversion_cache
+        region = self.region
+        options = dict(
+            memory_budget=self.memory_budget, region=region,
+            element_selection=self.element_selection, implicit=self.implicit,
+            lattice_step=self.lattice_step)
+        if cache is None:
+            vtk_cuds = cuds_to_vtk(cuds, points_keys, cell_keys, **options)
+            return vtk_cuds, None
+        if fingerprint is None and \
+                not isinstance(cuds, (VTKMesh, VTKParticles, VTKLattice)):
+            # VTK containers are looked up by their id and version
+            fingerprint = cuds_fingerprint(
+                cuds, sample_size=self.cache_key_sample_size)
+        key = cuds_cache_key(
+            cuds, points_keys, cell_keys, fingerprint=fingerprint,
+            region=region, element_selection=self.element_selection,
+            implicit=self.implicit, lattice_step=self.lattice_step)
+        vtk_cuds = cache.get(key)
+        if vtk_cuds is None:
+            vtk_cuds = cuds_to_vtk(cuds, points_keys, cell_keys, **options)
+            cache.put(key, vtk_cuds)
+        return vtk_cuds, fingerprint
+
+    def _set_vtk_cuds(self, vtk_cuds):
+        """Sets the vtk cuds, discarding any pending conversion. This will
+        update self.data as a subsequent handler."""
+        self._conversion.cancel()
+        self.loading = False
+        self._vtk_cuds_version = vtk_cuds.version
         self._vtk_cuds = vtk_cuds
 
+    def _conversion_done(self, result, error):
+        """Called on the GUI thread when the background conversion
+        is done."""
+        if error is not None:
+            self.loading = False
+            logger.error("Failed to convert the CUDS dataset: %s", error)
+        else:
+            vtk_cuds, self._fingerprint = result
+            self._set_vtk_cuds(vtk_cuds)
+
     def _get_name(self):
         """ Returns the name to display on the tree view.  Note that
         this is not a property getter.
@@ -447,7 +741,11 @@ class SlimCUDSSource(Source):
         return '{} ({})'.format(name, kind)
 
     def _fire_data_changed(self, *args):
-        """Simply fire the `data_changed` event."""
+        """Simply fire the `data_changed` event, unless the vtk cuds
+        is inside a batch of modifications."""
+        vtk_cuds = self._vtk_cuds
+        if vtk_cuds is not None and vtk_cuds.batching:
+            return
         self.data_changed = True
 
     ###########
@@ -512,7 +810,27 @@ class SlimCUDSSource(Source):
                                   "Operation not implemented.")
 
 
-def _available_keys(cuds):
+def _stored_keys(vtk_cuds):
+    """Returns the sets of the point and cell CUBA keys stored
+    in a vtk cuds."""
+    point_data, cell_data = _attribute_data(vtk_cuds)
+    cell_keys = cell_data.cubas if cell_data is not None else set()
+    return point_data.cubas, cell_keys
+
+
+def _attribute_data(vtk_cuds):
+    """Returns the point and cell CubaData of a vtk cuds. The cell
+    CubaData is None for lattices."""
+    if isinstance(vtk_cuds, VTKParticles):
+        cell_data = vtk_cuds.bond_data
+    elif isinstance(vtk_cuds, VTKMesh):
+        cell_data = vtk_cuds.element_data
+    else:
+        cell_data = None
+    return vtk_cuds.point_data, cell_data
+
+
+def _available_keys(cuds, sample_size=None):
     """Given a cuds, it returns a dict of sets, containing the available
     CUBA keys divided in classes:
 
@@ -521,78 +839,98 @@ def _available_keys(cuds):
         - cell_scalars
         - cell_vectors
 
+    The keys of VTK backed containers are the stored attribute arrays
+    and the keys of file based containers are read from the mask
+    columns of their tables. Otherwise the data of the items are
+    inspected.
+
     Parameters
     ----------
     cuds :
         A cuds data source
 
+    sample_size : int
+        The maximum number of items of each type to inspect. Default
+        is None which inspects all the items.
+
     Returns
     -------
     _ : dict(key: set)
         A dict of sets for each of the classes above, with the corresponding
         keys as above.
     """
+    return _scan_keys(cuds, sample_size)[0]
 
-    point_scalars = set()
-    point_vectors = set()
-    cell_scalars = set()
-    cell_vectors = set()
-
-    if isinstance(cuds, (ABCMesh, H5Mesh)):
-        for point in cuds.iter(item_type=CUBA.POINT):
-            scalar_keys, vector_keys = _extract_cuba_keys_per_data_types(
-                point.data)
-            point_scalars.update(scalar_keys)
-            point_vectors.update(vector_keys)
-
-        for element in itertools.chain(cuds.iter(item_type=CUBA.CELL),
-                                       cuds.iter(item_type=CUBA.EDGE),
-                                       cuds.iter(item_type=CUBA.FACE)):
-            scalar_keys, vector_keys = _extract_cuba_keys_per_data_types(
-                element.data)
-            cell_scalars.update(scalar_keys)
-            cell_vectors.update(vector_keys)
-
-    elif isinstance(cuds, ABCParticles):
-        for particle in cuds.iter(item_type=CUBA.PARTICLE):
-            scalar_keys, vector_keys = _extract_cuba_keys_per_data_types(
-                particle.data)
-            point_scalars.update(scalar_keys)
-            point_vectors.update(vector_keys)
-
-        for bond in cuds.iter(item_type=CUBA.BOND):
-            scalar_keys, vector_keys = _extract_cuba_keys_per_data_types(
-                bond.data)
-            cell_scalars.update(scalar_keys)
-            cell_vectors.update(vector_keys)
 
-    elif isinstance(cuds, ABCLattice):
-        for node in cuds.iter(item_type=CUBA.NODE):
-            scalar_keys, vector_keys = _extract_cuba_keys_per_data_types(
-                node.data)
-            point_scalars.update(scalar_keys)
-            point_vectors.update(vector_keys)
+def _scan_keys(cuds, sample_size=None):
+    """Returns the available keys of a cuds (see :func:`_available_keys`)
+    and True if only a sample of its items was inspected."""
+    point_types, cell_types = _item_types(cuds)
 
+    sampled = False
+    if isinstance(cuds, (VTKMesh, VTKParticles, VTKLattice)):
+        point_data, cell_data = _attribute_data(cuds)
+        point_keys = point_data.cubas
+        cell_keys = cell_data.cubas if cell_data is not None else set()
     else:
-        msg = 'Provided object {} is not of any known cuds type'
-        raise TraitError(msg.format(type(cuds)))
+        point_keys = set()
+        cell_keys = set()
+        for item_type in point_types + cell_types:
+            keys = read_cuds_item_keys(cuds, item_type)
+            if keys is None:
+                keys = _item_data_keys(cuds, item_type, sample_size)
+                sampled |= (sample_size is not None and
+                            cuds.count_of(item_type) > sample_size)
+            if item_type in point_types:
+                point_keys.update(keys)
+            else:
+                cell_keys.update(keys)
 
+    point_scalars, point_vectors = _extract_cuba_keys_per_data_types(
+        point_keys)
+    cell_scalars, cell_vectors = _extract_cuba_keys_per_data_types(
+        cell_keys)
     return {
         "point_scalars": point_scalars,
         "point_vectors": point_vectors,
         "cell_scalars": cell_scalars,
         "cell_vectors": cell_vectors
-    }
+    }, sampled
+
+
+def _item_types(cuds):
+    """Returns the point and the cell item types of a cuds."""
+    if isinstance(cuds, (ABCMesh, H5Mesh)):
+        return [CUBA.POINT], [CUBA.CELL, CUBA.EDGE, CUBA.FACE]
+    elif isinstance(cuds, ABCParticles):
+        return [CUBA.PARTICLE], [CUBA.BOND]
+    elif isinstance(cuds, ABCLattice):
+        return [CUBA.NODE], []
+    else:
+        msg = 'Provided object {} is not of any known cuds type'
+        raise TraitError(msg.format(type(cuds)))
+
+
+def _item_data_keys(cuds, item_type, sample_size=None):
+    """Returns the set of CUBA keys in the data of the cuds items
+    of ``item_type``, inspecting at most ``sample_size`` items."""
+    items = cuds.iter(item_type=item_type)
+    if sample_size is not None:
+        items = itertools.islice(items, sample_size)
+    keys = set()
+    for item in items:
+        keys.update(item.data.keys())
+    return keys
 
 
-def _extract_cuba_keys_per_data_types(data_container):
-    """Given a DataContainer, gets the scalar and vector CUBA types
+def _extract_cuba_keys_per_data_types(keys):
+    """Given a set of CUBA keys, gets the scalar and vector CUBA types
     it contains, as two independent sets
 
     Parameters
     ----------
-    data_container : DataContainer
-        A data container.
+    keys : iterable
+        The CUBA keys (e.g. of a DataContainer).
 
     Returns
     -------
@@ -602,7 +940,7 @@ def _extract_cuba_keys_per_data_types(data_container):
     scalars = set()
     vectors = set()
 
-    for cuba_key in data_container.keys():
+    for cuba_key in keys:
         shape = KEYWORDS[cuba_key.name].shape
 
         if shape == [1]:
@@ -0,0 +1,189 @@
+import threading
+import unittest
+
+from mock import patch
+
+from simphony_mayavi.core.api import chunk_slices
+from simphony_mayavi.sources.background_conversion import (
+    BackgroundConversion)
+
+
+class TestBackgroundConversion(unittest.TestCase):
+
+    def setUp(self):
+        self.invoked = []
+        patcher = patch(
+            'simphony_mayavi.sources.background_conversion.GUI')
+        gui = patcher.start()
+        gui.invoke_later.side_effect = (
+            lambda *args: self.invoked.append(args))
+        self.addCleanup(patcher.stop)
+        self.results = []
+        self.conversion = BackgroundConversion()
+        self.addCleanup(self.conversion.close)
+
+    def test_submit(self):
+        # when
+        self.conversion.submit(self.callback, sum, [1, 2, 3])
+
+        # then
+        self.assertTrue(self.conversion.pending)
+        self.process_events()
+        self.assertEqual(self.results, [(6, None)])
+        self.assertFalse(self.conversion.pending)
+
+    def test_superseded_request(self):
+        # given
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking(value):
+            started.set()
+            release.wait()
+            return value
+
+        self.conversion.submit(self.callback, blocking, 1)
+        started.wait()
+
+        # when
+        self.conversion.submit(self.callback, blocking, 2)
+        release.set()
+
+        # then
+        self.process_events()
+        self.assertEqual(self.results, [(2, None)])
+
+    def test_only_the_latest_request_waits(self):
+        # given
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        threads = set()
+
+        def blocking(value):
+            calls.append(value)
+            threads.add(threading.current_thread())
+            started.set()
+            release.wait()
+            return value
+
+        self.conversion.submit(self.callback, blocking, 1)
+        started.wait()
+
+        # when
+        self.conversion.submit(self.callback, blocking, 2)
+        self.conversion.submit(self.callback, blocking, 3)
+        release.set()
+
+        # then
+        self.process_events()
+        self.assertEqual(calls, [1, 3])
+        self.assertEqual(self.results, [(3, None)])
+        self.assertEqual(len(threads), 1)
+
+    def test_cancel(self):
+        # given
+        self.conversion.submit(self.callback, sum, [1, 2, 3])
+
+        # when
+        self.conversion.cancel()
+
+        # then
+        self.assertFalse(self.conversion.pending)
+        self.process_events()
+        self.assertEqual(self.results, [])
+
+    def test_cancel_running_conversion(self):
+        # given
+        started = threading.Event()
+        release = threading.Event()
+        chunks = []
+
+        def chunked(length):
+            for rows in chunk_slices(length, 1):
+                chunks.append(rows)
+                started.set()
+                release.wait()
+            return length
+
+        self.conversion.submit(self.callback, chunked, 10)
+        started.wait()
+
+        # when
+        self.conversion.cancel()
+        release.set()
+
+        # then
+        self.process_events()
+        self.assertEqual(chunks, [slice(0, 1)])
+        self.assertEqual(self.results, [])
+
+    def test_idle_worker_exits(self):
+        # given
+        threads = []
+
+        def convert(values):
+            threads.append(threading.current_thread())
+            return sum(values)
+
+        self.conversion.submit(self.callback, convert, [1, 2, 3])
+
+        # when
+        self.process_events()
+
+        # then
+        threads[0].join(5.0)
+        self.assertFalse(threads[0].is_alive())
+        self.assertIsNone(self.conversion._worker)
+
+        # when
+        self.conversion.submit(self.callback, convert, [1, 2])
+
+        # then
+        self.process_events()
+        self.assertEqual(self.results, [(6, None), (3, None)])
+        self.assertIsNot(threads[1], threads[0])
+
+    def test_close(self):
+        # given
+        self.conversion.submit(self.callback, sum, [1, 2, 3])
+
+        # when
+        self.conversion.close()
+
+        # then
+        self.assertFalse(self.conversion.pending)
+        self.process_events()
+        self.assertEqual(self.results, [])
+
+    def test_error(self):
+        # given
+        def failing():
+            raise ValueError('failed')
+
+        # when
+        with patch(
+                'simphony_mayavi.sources.background_conversion.logger'):
+            self.conversion.submit(self.callback, failing)
+            self.process_events()
+
+        # then
+        self.assertEqual(len(self.results), 1)
+        result, error = self.results[0]
+        self.assertIsNone(result)
+        self.assertIsInstance(error, ValueError)
+
+    def callback(self, result, error):
+        self.results.append((result, error))
+
+    def process_events(self):
+        """ Wait for the worker and run the callbacks as the GUI would.
+        """
+        self.conversion.wait()
+        for args in self.invoked:
+            args[0](*args[1:])
+        del self.invoked[:]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,8 @@ import shutil
 import os
 from contextlib import closing
 
+from mock import patch
+
 from traits.testing.api import UnittestTools
 from tvtk.api import tvtk
 from mayavi.core.api import NullEngine
@@ -15,7 +17,9 @@ from simphony.io.h5_lattice import H5Lattice
 from simphony.io.h5_mesh import H5Mesh
 from simphony.io.h5_particles import H5Particles
 
-from simphony_mayavi.sources.api import CUDSFileSource
+from simphony_mayavi.core.api import ConversionCache
+from simphony_mayavi.sources.api import CUDSFileSource, DiskConversionCache
+from simphony_mayavi.sources.h5_file_pool import h5_file_pool
 from simphony_mayavi.cuds.api import VTKParticles, VTKLattice, VTKMesh
 
 
@@ -42,6 +46,46 @@ class TestLatticeSource(unittest.TestCase, UnittestTools):
             source.datasets, ['mesh1', 'particles1', 'particles3', 'lattice0'])
         self.assertIn(source.dataset, source.datasets)
 
+    def test_datasets_info(self):
+        # when
+        source = CUDSFileSource()
+        source.initialize(self.filename)
+
+        # then
+        self.assertEqual(
+            [info.name for info in source.datasets_info], source.datasets)
+        self.assertItemsEqual(
+            [info.kind for info in source.datasets_info],
+            ['Mesh', 'Particles', 'Particles', 'Lattice'])
+
+    def test_dataset_keys_are_read_on_access(self):
+        # given
+        source = CUDSFileSource()
+        with patch(
+                'simphony_mayavi.sources.cuds_file_source.'
+                'read_cuds_dataset_keys', return_value={}) as read:
+            source.initialize(self.filename)
+            source.dataset = 'lattice0'
+            self.assertFalse(read.called)
+
+            # when
+            source.dataset_keys
+
+        # then
+        read.assert_called_once_with(self.filename, 'lattice0')
+
+    def test_dataset_keys(self):
+        # given
+        source = CUDSFileSource()
+        source.initialize(self.filename)
+
+        # when
+        source.dataset = 'particles1'
+
+        # then
+        self.assertIn('particles', source.dataset_keys)
+        self.assertEqual(source.dataset_keys['particles'], frozenset())
+
     def test_update(self):
         source = CUDSFileSource()
         source.initialize(self.filename)
@@ -69,6 +113,76 @@ class TestLatticeSource(unittest.TestCase, UnittestTools):
         self.assertIsInstance(source._vtk_cuds, VTKMesh)
         self.assertIsInstance(source.outputs[0], tvtk.UnstructuredGrid)
 
+    def test_dataset_change_with_conversion_cache(self):
+        # given
+        cache = ConversionCache()
+        source = CUDSFileSource(conversion_cache=cache)
+        source.initialize(self.filename)
+        source.dataset = 'particles1'
+        source.dataset = 'lattice0'
+        vtk_cuds = source._vtk_cuds
+        source.dataset = 'mesh1'
+
+        # when
+        with self.assertTraitChanges(source, 'data_changed'):
+            source.dataset = 'lattice0'
+
+        # then
+        self.assertIs(source._vtk_cuds, vtk_cuds)
+        self.assertIs(source.cuds, vtk_cuds)
+        self.assertEqual(cache.hits, 1)
+        self.assertIsInstance(source.outputs[0], tvtk.ImageData)
+
+    def test_reopen_with_disk_cache(self):
+        # given
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        source = CUDSFileSource(disk_cache=DiskConversionCache(cache_dir))
+        source.initialize(self.filename)
+        source.dataset = 'particles1'
+        source.dataset = 'lattice0'
+
+        # when
+        disk_cache = DiskConversionCache(cache_dir)
+        source = CUDSFileSource(disk_cache=disk_cache)
+        source.initialize(self.filename)
+        source.dataset = 'particles1'
+        with self.assertTraitChanges(source, 'data_changed'):
+            source.dataset = 'lattice0'
+
+        # then
+        self.assertEqual(disk_cache.misses, 0)
+        self.assertGreaterEqual(disk_cache.hits, 1)
+        self.assertIsInstance(source._vtk_cuds, VTKLattice)
+        self.assertIsInstance(source.outputs[0], tvtk.ImageData)
+        self.assertEqual(source._vtk_cuds.size, (5, 10, 15))
+
+    def test_file_handle_is_pooled(self):
+        # given
+        source = CUDSFileSource()
+        other = CUDSFileSource()
+        engine = NullEngine()
+
+        # when
+        source.initialize(self.filename)
+        other.initialize(self.filename)
+
+        # then
+        # the file is only held by running sources
+        self.assertEqual(h5_file_pool.references(self.filename), 0)
+
+        # when
+        engine.add_source(source)
+        engine.add_source(other)
+
+        # then
+        self.assertEqual(h5_file_pool.references(self.filename), 2)
+
+        # when
+        engine.stop()
+
+        # then
+        self.assertEqual(h5_file_pool.references(self.filename), 0)
+
     def test_source_name(self):
         # given
         source = CUDSFileSource()
@@ -5,9 +5,11 @@ import shutil
 import os
 
 import numpy
-from numpy.testing import assert_array_equal
+from mock import patch
+from numpy.testing import assert_array_equal, assert_array_almost_equal
 from mayavi.core.api import NullEngine
 from mayavi import mlab
+from tvtk.api import tvtk
 
 from simphony.cuds.mesh import Mesh, Point, Cell, Edge, Face
 from simphony.cuds.particles import Particle, Particles, Bond
@@ -18,9 +20,10 @@ from simphony.cuds.lattice import (
 from simphony.core.data_container import DataContainer
 from simphony.core.cuba import CUBA
 
-from simphony_mayavi.cuds.api import VTKMesh, VTKLattice, VTKParticles
+from simphony_mayavi.cuds.api import (
+    VTKMesh, VTKLattice, VTKParticles, stream_particles)
 from simphony_mayavi.core.api import (
-    cell_array_slicer,
+    cell_array_slicer, BoxRegion, ConversionCache, cuds_cache_key,
     CELL2VTKCELL, FACE2VTKCELL, EDGE2VTKCELL)
 from simphony_mayavi.sources.api import CUDSSource
 from simphony_mayavi.tests.testing_utils import is_mayavi_older
@@ -71,6 +74,33 @@ class TestMeshSource(unittest.TestCase):
             assert_array_equal(points[index], point.coordinates)
             self.assertEqual(temperature[index], point.data[CUBA.TEMPERATURE])
 
+    def test_region(self):
+        # given
+        container = self.container
+        container.add(
+            Cell(points=[self.point_uids[index] for index in cell])
+            for cell in self.cells)
+        region = BoxRegion((-0.5, -0.5, -0.5), (1.5, 1.5, 1.5))
+
+        # when
+        source = self.tested_class(cuds=container, region=region)
+
+        # then
+        vtk_cuds = source._vtk_cuds
+        self.assertEqual(source.data.number_of_points, 4)
+        self.assertEqual(source.data.number_of_cells, 1)
+        self.assertEqual(
+            sorted(vtk_cuds.point2index.values()), [0, 1, 2, 3])
+        self.assertEqual(
+            set(vtk_cuds.point2index), set(self.point_uids[:4]))
+
+        # when
+        source.region = None
+
+        # then
+        self.assertEqual(source.data.number_of_points, len(self.points))
+        self.assertEqual(source.data.number_of_cells, len(self.cells))
+
     def test_cells(self):
         # given
         container = self.container
@@ -326,6 +356,54 @@ class TestLatticeSource(unittest.TestCase):
             point_id = data.find_point(position)
             assert_array_equal(vectors[point_id], node.index)
 
+    def test_source_from_an_implicit_hexagonal_lattice(self):
+        # given
+        lattice = make_hexagonal_lattice('test', 0.1, 0.2, (5, 4, 3))
+        self.add_velocity(lattice)
+
+        # when
+        source = self.tested_class(cuds=lattice, implicit=True)
+
+        # then
+        vtk_lattice = source._vtk_cuds
+        self.assertTrue(vtk_lattice.implicit)
+        data = source.data
+        self.assertIsInstance(data, tvtk.StructuredGrid)
+        point_ids = vtk_lattice.get_point_ids(
+            [node.index for node in lattice.iter(item_type=CUBA.NODE)])
+        for point_id, node in zip(
+                point_ids, lattice.iter(item_type=CUBA.NODE)):
+            assert_array_almost_equal(
+                data.get_point(point_id), lattice.get_coordinate(node.index))
+
+        # when
+        source.implicit = False
+
+        # then
+        self.assertFalse(source._vtk_cuds.implicit)
+        self.assertIsInstance(source.data, tvtk.PolyData)
+
+    def test_source_with_a_lattice_step(self):
+        # given
+        lattice = make_cubic_lattice('test', 0.1, (5, 4, 3), (0, 0, 0))
+        self.add_velocity(lattice)
+
+        # when
+        source = self.tested_class(cuds=lattice, lattice_step=(2, 2, 2))
+
+        # then
+        vtk_lattice = source._vtk_cuds
+        self.assertEqual(vtk_lattice.size, (3, 2, 2))
+        self.assertEqual(source.data.number_of_points, 12)
+        self.assertEqual(
+            vtk_lattice.get((1, 1, 1)).data, lattice.get((2, 2, 2)).data)
+
+        # when
+        source.lattice_step = None
+
+        # then
+        self.assertEqual(source.data.number_of_points, 60)
+
     def test_source_from_unknown(self):
         primitive_cell = PrimitiveCell((1, 0, 0), (0, 1, 0), (0, 0, 1),
                                        bravais_lattice="Cubic")
@@ -461,6 +539,214 @@ class TestParticlesSource(unittest.TestCase):
             self.assertEqual(bonds[index], particles)
             self.assertEqual(temperature[index], bond.data[CUBA.TEMPERATURE])
 
+    def test_update_after_moving_particles(self):
+        # given
+        container = self.container
+        source = self.tested_class(cuds=container)
+        particles = []
+        for particle in container.iter(item_type=CUBA.PARTICLE):
+            particle.coordinates = numpy.add(particle.coordinates, 1.0)
+            particles.append(particle)
+        container.update(particles)
+
+        # when
+        source.update()
+
+        # then
+        points = source.data.points.to_array()
+        vtk_cuds = source._vtk_cuds
+        for key, index in vtk_cuds.particle2index.iteritems():
+            assert_array_equal(
+                points[index], container.get(key).coordinates)
+
+    def test_update_after_adding_particles(self):
+        # given
+        container = self.container
+        source = self.tested_class(cuds=container)
+        uid = container.add([Particle(coordinates=(2.0, 2.0, 2.0))])[0]
+
+        # when
+        source.update()
+
+        # then
+        vtk_cuds = source._vtk_cuds
+        self.assertEqual(
+            source.data.number_of_points, len(self.points) + 1)
+        assert_array_equal(
+            source.data.points[vtk_cuds.particle2index[uid]], (2.0, 2.0, 2.0))
+
+    def test_update_without_changes(self):
+        # given
+        source = self.tested_class(cuds=self.container)
+        events = []
+        source.on_trait_change(
+            lambda: events.append(True), 'data_changed')
+
+        # when
+        source.update()
+
+        # then
+        self.assertEqual(events, [])
+
+    def test_batch_notifies_once(self):
+        # given
+        container = VTKParticles('test')
+        source = self.tested_class(cuds=container)
+        events = []
+        source.on_trait_change(
+            lambda: events.append(True), 'data_changed')
+
+        # when
+        with container.batch():
+            for point in self.points:
+                container.add([Particle(coordinates=point)])
+            batch_events = len(events)
+
+        # then
+        self.assertEqual(batch_events, 0)
+        self.assertEqual(len(events), 1)
+
+    def test_memory_budget(self):
+        # given
+        target = 'simphony_mayavi.sources.cuds_source.stream_particles'
+
+        # when
+        with patch(target, wraps=stream_particles) as stream:
+            source = self.tested_class(
+                cuds=self.container, memory_budget=1024 ** 2)
+
+        # then
+        self.assertTrue(stream.called)
+        self.assertEqual(
+            source.data.number_of_points, len(self.point_uids))
+        self.assertEqual(
+            source.data.number_of_cells, len(self.bond_uids))
+
+    def test_region(self):
+        # given
+        region = BoxRegion((-0.5, -0.5, -0.5), (1.5, 0.5, 0.5))
+
+        # when
+        source = self.tested_class(cuds=self.container, region=region)
+
+        # then
+        vtk_cuds = source._vtk_cuds
+        self.assertEqual(source.data.number_of_points, 2)
+        self.assertEqual(source.data.number_of_cells, 1)
+        self.assertEqual(sorted(vtk_cuds.particle2index.values()), [0, 1])
+        self.assertEqual(list(vtk_cuds.bond2index), [self.bond_uids[0]])
+
+        # when
+        source.element_selection = 'any'
+
+        # then
+        self.assertEqual(source.data.number_of_points, len(self.point_uids))
+        self.assertEqual(source.data.number_of_cells, len(self.bond_uids))
+
+        # when
+        source.region = BoxRegion((5.0, 5.0, 5.0), (6.0, 6.0, 6.0))
+
+        # then
+        self.assertEqual(len(source._vtk_cuds.particle2index), 0)
+
+    def test_asynchronous_conversion(self):
+        # given
+        invoked = []
+        with patch('simphony_mayavi.sources.background_conversion.GUI') \
+                as gui:
+            gui.invoke_later.side_effect = lambda *args: invoked.append(args)
+
+            # when
+            source = self.tested_class(
+                cuds=self.container, asynchronous=True,
+                point_scalars="TEMPERATURE")
+
+            # then
+            self.assertTrue(source.loading)
+            self.assertIsNone(source._vtk_cuds)
+
+            # when
+            source._conversion.wait()
+            for args in invoked:
+                args[0](*args[1:])
+
+        # then
+        self.assertFalse(source.loading)
+        self.assertIsInstance(source._vtk_cuds, VTKParticles)
+        self.assertEqual(source.point_scalars_name, "TEMPERATURE")
+        self.assertEqual(
+            source.data.number_of_points, len(self.point_uids))
+
+    def test_sampled_conversion_cache_key(self):
+        # given
+        cache = ConversionCache()
+
+        # when
+        with patch('simphony_mayavi.sources.cuds_source.cuds_cache_key',
+                   wraps=cuds_cache_key) as cache_key:
+            self.tested_class(cuds=self.container, conversion_cache=cache)
+            self.tested_class(cuds=self.container, conversion_cache=cache,
+                              cache_key_sample_size=None)
+
+        # then
+        self.assertEqual(
+            [kwargs['sample_size']
+             for _, kwargs in cache_key.call_args_list], [1000, None])
+        # all the items are sampled in both keys
+        self.assertEqual(cache.hits, 1)
+
+    def test_superseded_asynchronous_conversion(self):
+        # given
+        invoked = []
+        container = Particles('other')
+        container.add([Particle(coordinates=(0.0, 0.0, 0.0))])
+        with patch('simphony_mayavi.sources.background_conversion.GUI') \
+                as gui:
+            gui.invoke_later.side_effect = lambda *args: invoked.append(args)
+            source = self.tested_class(
+                cuds=self.container, asynchronous=True)
+            source._conversion.wait()
+
+            # when
+            source.cuds = container
+            source._conversion.wait()
+            for args in invoked:
+                args[0](*args[1:])
+
+        # then
+        self.assertFalse(source.loading)
+        self.assertEqual(source.data.number_of_points, 1)
+
+    def test_stop_cancels_asynchronous_conversion(self):
+        # given
+        invoked = []
+        with patch('simphony_mayavi.sources.background_conversion.GUI') \
+                as gui:
+            gui.invoke_later.side_effect = lambda *args: invoked.append(args)
+            source = self.tested_class(
+                cuds=self.container, asynchronous=True)
+            source.start()
+
+            # when
+            source.stop()
+            source._conversion.wait()
+            for args in invoked:
+                args[0](*args[1:])
+
+            # then
+            self.assertFalse(source.loading)
+            self.assertIsNone(source._vtk_cuds)
+
+            # when
+            source.start()
+            source._conversion.wait()
+            for args in invoked:
+                args[0](*args[1:])
+
+        # then
+        self.assertIsInstance(source._vtk_cuds, VTKParticles)
+        self.assertFalse(source.loading)
+
     def test_particles_source_name(self):
         # given
         particles = Particles(name='my_particles')
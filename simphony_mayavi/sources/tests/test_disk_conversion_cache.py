@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particles, Particle
+
+from simphony_mayavi.cuds.api import VTKParticles
+from simphony_mayavi.sources.api import DiskConversionCache
+
+
+def create_container(name, count=10):
+    particles = Particles(name)
+    particles.add([
+        Particle(coordinates=(index, 0.0, 0.0),
+                 data=DataContainer(TEMPERATURE=index))
+        for index in range(count)])
+    return VTKParticles.from_particles(particles)
+
+
+class TestDiskConversionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.directory = os.path.join(self.temp_dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_and_put(self):
+        # given
+        cache = DiskConversionCache(self.directory)
+        container = create_container('a')
+
+        # when
+        missing = cache.get('a')
+        cache.put('a', container)
+        loaded = cache.get('a')
+
+        # then
+        self.assertIsNone(missing)
+        self.assertIsInstance(loaded, VTKParticles)
+        self.assertEqual(loaded.name, 'a')
+        self.assertEqual(
+            set(loaded.iter(item_type=CUBA.PARTICLE)),
+            set(container.iter(item_type=CUBA.PARTICLE)))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertGreater(cache.size, 0)
+
+    def test_reuse_directory(self):
+        # given
+        DiskConversionCache(self.directory).put('a', create_container('a'))
+
+        # when
+        cache = DiskConversionCache(self.directory)
+
+        # then
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.statistics['items'], 1)
+
+    def test_evict_least_recently_used(self):
+        # given
+        cache = DiskConversionCache(self.directory)
+        cache.put('a', create_container('a'))
+        size = cache.size
+        # room for two containers
+        cache.max_size = 2 * size + size // 2
+        cache.put('b', create_container('b'))
+        # make sure that the access times differ
+        path = cache._entry_path('a')
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime - 10, stat.st_mtime - 10))
+
+        # when
+        cache.put('c', create_container('c'))
+
+        # then
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, cache.max_size)
+
+    def test_container_larger_than_limit(self):
+        # given
+        cache = DiskConversionCache(self.directory, max_size=0)
+
+        # when
+        cache.put('a', create_container('a'))
+
+        # then
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unreadable_entry(self):
+        # given
+        cache = DiskConversionCache(self.directory)
+        cache.put('a', create_container('a'))
+        path = cache._entry_path('a')
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), 'wb') as handle:
+                handle.write(b'corrupted')
+
+        # when
+        loaded = cache.get('a')
+
+        # then
+        self.assertIsNone(loaded)
+        self.assertFalse(os.path.exists(path))
+
+    def test_clear(self):
+        # given
+        cache = DiskConversionCache(self.directory)
+        cache.put('a', create_container('a'))
+
+        # when
+        cache.clear()
+
+        # then
+        self.assertEqual(cache.size, 0)
+        self.assertIsNone(cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
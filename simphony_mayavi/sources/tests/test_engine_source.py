@@ -10,12 +10,44 @@ from mayavi.core.api import NullEngine
 from simphony.cuds.mesh import Mesh
 from simphony.cuds.particles import Particles
 from simphony.cuds.lattice import Lattice
+from simphony.core.cuba import CUBA
 
+from simphony_mayavi.core.api import ConversionCache
 from simphony_mayavi.cuds.api import VTKParticles, VTKLattice, VTKMesh
 from simphony_mayavi.sources.api import EngineSource
 from simphony_mayavi.tests.testing_utils import DummyEngine
 
 
+class ChangeReportingEngine(DummyEngine):
+    """ An engine that reports the changes of the particles dataset.
+    """
+
+    def __init__(self):
+        super(ChangeReportingEngine, self).__init__()
+        self.step = 0
+        self.changes = {}
+        self.reported_dataset = "particles"
+
+    def report(self, uids, keys=None, coordinates=True):
+        self.step += 1
+        self.changes[self.step] = {
+            'uids': uids, 'keys': keys, 'coordinates': coordinates}
+
+    def get_dataset_changes(self, name, token):
+        if token is None or name != self.reported_dataset:
+            return None, self.step
+        uids = set()
+        keys = set()
+        coordinates = False
+        for step in range(token + 1, self.step + 1):
+            changes = self.changes[step]
+            uids.update(changes['uids'])
+            keys.update(changes['keys'])
+            coordinates |= changes['coordinates']
+        return {'uids': uids, 'keys': keys,
+                'coordinates': coordinates}, self.step
+
+
 class TestEngineSource(unittest.TestCase, UnittestTools):
     def setUp(self):
         self.engine = DummyEngine()
@@ -53,6 +85,123 @@ class TestEngineSource(unittest.TestCase, UnittestTools):
         self.assertIsInstance(source._vtk_cuds, VTKMesh)
         self.assertIsInstance(source.outputs[0], tvtk.UnstructuredGrid)
 
+    def test_update_with_change_detection(self):
+        for change_detection in ('sampled', 'full'):
+            for dataset in self.datasets:
+                # given
+                source = EngineSource(engine=self.engine, dataset=dataset,
+                                      change_detection=change_detection)
+
+                # when/then
+                with self.assertTraitDoesNotChange(source, "data_changed"):
+                    source.update()
+
+                # when/then
+                self.engine.run()
+                with self.assertTraitChanges(source, "data_changed"):
+                    source.update()
+
+    def test_update_with_change_detection_keys(self):
+        # given
+        source = EngineSource(engine=self.engine, dataset="particles",
+                              change_detection='full',
+                              change_detection_keys=[CUBA.MASS])
+        particles = source.cuds
+        particle = next(particles.iter(item_type=CUBA.PARTICLE))
+
+        # when/then
+        particle.data[CUBA.TEMPERATURE] = -1.0
+        particles.update([particle])
+        with self.assertTraitDoesNotChange(source, "data_changed"):
+            source.update()
+
+        # when/then
+        particle.data[CUBA.MASS] = -1.0
+        particles.update([particle])
+        with self.assertTraitChanges(source, "data_changed"):
+            source.update()
+
+    def test_update_with_reported_changes(self):
+        # given
+        engine = ChangeReportingEngine()
+        source = EngineSource(engine=engine, dataset="particles")
+        particles = source.cuds
+        modified, reported = list(particles.iter(item_type=CUBA.PARTICLE))[:2]
+        for particle in (modified, reported):
+            particle.data[CUBA.TEMPERATURE] = -1.0
+        particles.update([modified, reported])
+        engine.report([reported.uid], keys=[CUBA.TEMPERATURE],
+                      coordinates=False)
+
+        # when
+        with self.assertTraitChanges(source, "data_changed"):
+            source.update()
+
+        # then
+        vtk_cuds = source._vtk_cuds
+        self.assertEqual(
+            vtk_cuds.get(reported.uid).data[CUBA.TEMPERATURE], -1.0)
+        # only the reported particle is copied
+        self.assertNotEqual(
+            vtk_cuds.get(modified.uid).data[CUBA.TEMPERATURE], -1.0)
+
+        # when/then
+        with self.assertTraitDoesNotChange(source, "data_changed"):
+            source.update()
+
+    def test_update_sub_lattice_with_reported_changes(self):
+        # given
+        engine = ChangeReportingEngine()
+        engine.reported_dataset = "lattice"
+        source = EngineSource(
+            engine=engine, dataset="lattice", lattice_step=(2, 2, 2))
+        lattice = source.cuds
+        nodes = [lattice.get((1, 1, 1)), lattice.get((2, 2, 2))]
+        for node, value in zip(nodes, (-2.0, -1.0)):
+            node.data[CUBA.TEMPERATURE] = value
+        lattice.update(nodes)
+        engine.report([node.index for node in nodes],
+                      keys=[CUBA.TEMPERATURE], coordinates=False)
+
+        # when
+        source.update()
+
+        # then
+        vtk_cuds = source._vtk_cuds
+        self.assertEqual(vtk_cuds.size, (2, 3, 3))
+        # the node (1, 1, 1) of the sub-lattice is the node (2, 2, 2)
+        self.assertEqual(
+            vtk_cuds.get((1, 1, 1)).data[CUBA.TEMPERATURE], -1.0)
+        self.assertEqual(
+            vtk_cuds.get((0, 0, 0)).data[CUBA.TEMPERATURE],
+            lattice.get((0, 0, 0)).data[CUBA.TEMPERATURE])
+
+    def test_dataset_change_with_conversion_cache(self):
+        for change_detection in ('none', 'sampled', 'full'):
+            # given
+            cache = ConversionCache()
+            source = EngineSource(engine=self.engine, dataset="particles",
+                                  change_detection=change_detection,
+                                  conversion_cache=cache)
+            vtk_cuds = source._vtk_cuds
+            source.dataset = "mesh"
+
+            # when
+            with self.assertTraitChanges(source, "data_changed"):
+                source.dataset = "particles"
+
+            # then
+            self.assertIs(source._vtk_cuds, vtk_cuds)
+            self.assertEqual(cache.hits, 1)
+
+            # when
+            self.engine.run()
+            source.dataset = "mesh"
+            source.dataset = "particles"
+
+            # then
+            self.assertIsNot(source._vtk_cuds, vtk_cuds)
+
     def test_initialization(self):
         source = EngineSource(engine=self.engine)
         # cuds is not yet obtained from the engine on init
@@ -0,0 +1,127 @@
+import threading
+import unittest
+
+from simphony_mayavi.sources.frame_prefetcher import FramePrefetcher
+
+
+class TestFramePrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.loaded = []
+        self.lock = threading.Lock()
+
+    def load(self, step):
+        with self.lock:
+            self.loaded.append(step)
+        return step * 10
+
+    def test_request_and_take(self):
+        # given
+        prefetcher = FramePrefetcher(self.load, capacity=3)
+        self.addCleanup(prefetcher.close)
+
+        # when
+        prefetcher.request([4, 5, 6])
+
+        # then
+        self.assertEqual(prefetcher.take(5, timeout=5), 50)
+        self.assertEqual(prefetcher.take(4, timeout=5), 40)
+        self.assertEqual(prefetcher.steps(), [6])
+        with self.assertRaises(KeyError):
+            prefetcher.take(5)
+
+    def test_capacity(self):
+        # given
+        prefetcher = FramePrefetcher(self.load, capacity=2)
+        self.addCleanup(prefetcher.close)
+
+        # when
+        prefetcher.request(range(10))
+
+        # then
+        self.assertEqual(prefetcher.steps(), [0, 1])
+
+    def test_dropped_frames_are_not_loaded(self):
+        # given
+        release = threading.Event()
+
+        def load(step):
+            release.wait(5)
+            return self.load(step)
+
+        prefetcher = FramePrefetcher(load, capacity=4, workers=1)
+        self.addCleanup(prefetcher.close)
+        prefetcher.request([0, 1, 2])
+
+        # when
+        prefetcher.request([0, 3])
+        release.set()
+        result = prefetcher.take(3, timeout=5)
+        prefetcher.take(0, timeout=5)
+
+        # then
+        self.assertEqual(result, 30)
+        self.assertNotIn(1, self.loaded)
+        self.assertNotIn(2, self.loaded)
+
+    def test_taken_frames_are_loaded(self):
+        # given
+        release = threading.Event()
+        results = []
+
+        def load(step):
+            release.wait(5)
+            return self.load(step)
+
+        prefetcher = FramePrefetcher(load, capacity=4, workers=1)
+        self.addCleanup(prefetcher.close)
+        prefetcher.request([0, 1])
+        taking = threading.Thread(
+            target=lambda: results.append(prefetcher.take(1, timeout=5)))
+        taking.start()
+        while 1 in prefetcher.steps():
+            taking.join(0.01)
+
+        # when
+        prefetcher.request([2])
+        release.set()
+        taking.join(5)
+
+        # then
+        self.assertEqual(results, [10])
+        self.assertIn(1, self.loaded)
+
+    def test_ready_and_callback(self):
+        # given
+        done = threading.Event()
+        prefetcher = FramePrefetcher(
+            self.load, callback=lambda step: done.set())
+        self.addCleanup(prefetcher.close)
+
+        # when
+        prefetcher.request([1])
+        done.wait(5)
+        frame = prefetcher.take(1, timeout=5)
+
+        # then
+        self.assertEqual(frame, 10)
+        self.assertFalse(prefetcher.ready(1))
+
+    def test_failed_load(self):
+        # given
+        def load(step):
+            raise ValueError(step)
+
+        prefetcher = FramePrefetcher(load)
+        self.addCleanup(prefetcher.close)
+
+        # when
+        prefetcher.request([1])
+
+        # then
+        with self.assertRaises(ValueError):
+            prefetcher.take(1, timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
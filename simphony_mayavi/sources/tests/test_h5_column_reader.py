@@ -0,0 +1,231 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import closing
+
+from mock import patch
+
+from numpy.testing import assert_array_almost_equal
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.lattice import make_cubic_lattice
+from simphony.cuds.mesh import Mesh, Point, Edge, Face, Cell
+from simphony.cuds.particles import Particles, Particle, Bond
+from simphony.io.h5_cuds import H5CUDS
+
+from simphony_mayavi.core.api import BoxRegion
+from simphony_mayavi.cuds.api import VTKParticles, VTKLattice, VTKMesh
+from simphony_mayavi.sources.h5_column_reader import (
+    read_h5_dataset, read_h5_tables, TABLE_COLUMNS, PARTICLES_TABLE)
+
+
+class TestReadH5Dataset(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'test.cuds')
+        particles = Particles('particles')
+        uids = particles.add([
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index,
+                                        VELOCITY=(index, 1.0, 0.0)))
+            for index in range(10)])
+        particles.add([Particle(coordinates=(10.0, 0.0, 0.0))])
+        particles.add([
+            Bond(particles=uids[:2], data=DataContainer(MASS=1.0))])
+        lattice = make_cubic_lattice('lattice', 0.1, (3, 4, 5))
+        for node in lattice.iter(item_type=CUBA.NODE):
+            node.data = DataContainer(TEMPERATURE=sum(node.index))
+            lattice.update([node])
+        mesh = Mesh('mesh')
+        point_uids = mesh.add([
+            Point(coordinates=(index % 3, index // 3, 0.0),
+                  data=DataContainer(TEMPERATURE=index))
+            for index in range(9)])
+        mesh.add([
+            Edge(points=point_uids[:2], data=DataContainer(MASS=1.0))])
+        mesh.add([
+            Face(points=[point_uids[index] for index in (0, 1, 4, 3)],
+                 data=DataContainer(TEMPERATURE=2.0)),
+            Face(points=[point_uids[index] for index in (4, 5, 8)])])
+        mesh.add([
+            Cell(points=[point_uids[index] for index in (0, 1, 3, 4)],
+                 data=DataContainer(MASS=3.0))])
+        self.particles = particles
+        self.lattice = lattice
+        self.mesh = mesh
+        self.handle = H5CUDS.open(self.filename, mode='w')
+        self.handle.add_dataset(particles)
+        self.handle.add_dataset(lattice)
+        self.handle.add_dataset(mesh)
+
+    def tearDown(self):
+        self.handle.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_read_particles(self):
+        # when
+        container = read_h5_dataset(self.handle.get_dataset('particles'))
+
+        # then
+        self.assertIsInstance(container, VTKParticles)
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 11)
+        self.assertEqual(container.count_of(CUBA.BOND), 1)
+        for particle in self.particles.iter(item_type=CUBA.PARTICLE):
+            result = container.get(particle.uid)
+            assert_array_almost_equal(
+                result.coordinates, particle.coordinates)
+            self.assertEqual(result.data, particle.data)
+
+    def test_read_selected_columns(self):
+        # when
+        container = read_h5_dataset(
+            self.handle.get_dataset('particles'),
+            point_keys=[CUBA.TEMPERATURE], cell_keys=[])
+
+        # then
+        point_data = container.data_set.point_data
+        self.assertEqual(
+            [point_data.get_array_name(index)
+             for index in range(point_data.number_of_arrays)],
+            ['TEMPERATURE'])
+        self.assertEqual(container.data_set.cell_data.number_of_arrays, 0)
+
+    def test_read_particles_in_region(self):
+        # given
+        region = BoxRegion((0.5, -1.0, -1.0), (4.5, 1.0, 1.0))
+        particles = self.handle.get_dataset('particles')
+
+        # when
+        container = read_h5_dataset(particles, region=region)
+
+        # then
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 4)
+        self.assertEqual(container.count_of(CUBA.BOND), 0)
+        self.assertEqual(
+            sorted(container.index2particle), [0, 1, 2, 3])
+        for particle in container.iter(item_type=CUBA.PARTICLE):
+            self.assertEqual(
+                particle.data, self.particles.get(particle.uid).data)
+
+    def test_read_particles_in_region_with_any_bond_particle(self):
+        # given
+        region = BoxRegion((0.5, -1.0, -1.0), (4.5, 1.0, 1.0))
+        particles = self.handle.get_dataset('particles')
+
+        # when
+        container = read_h5_dataset(
+            particles, region=region, element_selection='any')
+
+        # then
+        self.assertEqual(container.count_of(CUBA.PARTICLE), 5)
+        self.assertEqual(container.count_of(CUBA.BOND), 1)
+        bond = next(self.particles.iter(item_type=CUBA.BOND))
+        for uid in bond.particles:
+            self.assertEqual(
+                container.get(uid).data, self.particles.get(uid).data)
+
+    def test_read_mesh(self):
+        # when
+        container = read_h5_dataset(self.handle.get_dataset('mesh'))
+
+        # then
+        self.assertIsInstance(container, VTKMesh)
+        self.assertEqual(container.count_of(CUBA.POINT), 9)
+        self.assertEqual(container.count_of(CUBA.EDGE), 1)
+        self.assertEqual(container.count_of(CUBA.FACE), 2)
+        self.assertEqual(container.count_of(CUBA.CELL), 1)
+        for point in self.mesh.iter(item_type=CUBA.POINT):
+            result = container.get(point.uid)
+            assert_array_almost_equal(result.coordinates, point.coordinates)
+            self.assertEqual(result.data, point.data)
+        for item_type in (CUBA.EDGE, CUBA.FACE, CUBA.CELL):
+            for element in self.mesh.iter(item_type=item_type):
+                result = container.get(element.uid)
+                self.assertEqual(result.points, element.points)
+                self.assertEqual(result.data, element.data)
+
+    def test_read_mesh_in_region(self):
+        # given
+        region = BoxRegion((-0.5, -0.5, -1.0), (1.5, 0.5, 1.0))
+        mesh = self.handle.get_dataset('mesh')
+
+        # when
+        container = read_h5_dataset(mesh, region=region)
+        other = read_h5_dataset(
+            mesh, region=region, element_selection='any')
+
+        # then
+        self.assertEqual(container.count_of(CUBA.POINT), 2)
+        self.assertEqual(container.count_of(CUBA.EDGE), 1)
+        self.assertEqual(container.count_of(CUBA.FACE), 0)
+        self.assertEqual(container.count_of(CUBA.CELL), 0)
+        self.assertEqual(other.count_of(CUBA.POINT), 4)
+        self.assertEqual(other.count_of(CUBA.FACE), 1)
+        self.assertEqual(other.count_of(CUBA.CELL), 1)
+        for point in other.iter(item_type=CUBA.POINT):
+            self.assertEqual(point.data, self.mesh.get(point.uid).data)
+
+    def test_read_lattice(self):
+        # when
+        container = read_h5_dataset(self.handle.get_dataset('lattice'))
+
+        # then
+        self.assertIsInstance(container, VTKLattice)
+        self.assertEqual(container.size, (3, 4, 5))
+        for node in self.lattice.iter(item_type=CUBA.NODE):
+            self.assertEqual(container.get(node.index).data, node.data)
+
+    def test_read_lattice_with_missing_values(self):
+        # given
+        lattice = make_cubic_lattice('other', 0.1, (2, 3, 4))
+        node = lattice.get((1, 2, 3))
+        node.data = DataContainer(MASS=2.0)
+        lattice.update([node])
+        self.handle.add_dataset(lattice)
+
+        # when
+        container = read_h5_dataset(self.handle.get_dataset('other'))
+
+        # then
+        self.assertEqual(container.get((1, 2, 3)).data, node.data)
+        self.assertEqual(container.get((0, 2, 3)).data, DataContainer())
+
+    def test_build_after_the_file_is_closed(self):
+        # given
+        self.handle.close()
+
+        # when
+        with closing(H5CUDS.open(self.filename, mode='r')) as handle:
+            build_particles = read_h5_tables(handle.get_dataset('particles'))
+            build_lattice = read_h5_tables(handle.get_dataset('lattice'))
+        particles = build_particles()
+        lattice = build_lattice()
+
+        # then
+        self.handle = H5CUDS.open(self.filename)
+        self.assertEqual(particles.count_of(CUBA.PARTICLE), 11)
+        for particle in self.particles.iter(item_type=CUBA.PARTICLE):
+            self.assertEqual(
+                particles.get(particle.uid).data, particle.data)
+        for node in self.lattice.iter(item_type=CUBA.NODE):
+            self.assertEqual(lattice.get(node.index).data, node.data)
+
+    def test_unexpected_layout(self):
+        # given
+        columns = TABLE_COLUMNS[PARTICLES_TABLE] + ('radius',)
+
+        # when/then
+        with patch.dict(TABLE_COLUMNS, {PARTICLES_TABLE: columns}):
+            with self.assertRaises(ValueError):
+                read_h5_dataset(self.handle.get_dataset('particles'))
+
+    def test_unsupported_container(self):
+        with self.assertRaises(TypeError):
+            read_h5_dataset(self.particles)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import closing
+
+from simphony.cuds.particles import Particles
+from simphony.io.h5_cuds import H5CUDS
+
+from simphony_mayavi.sources.api import H5FilePool
+
+
+class TestH5FilePool(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'test.cuds')
+        self.other = os.path.join(self.temp_dir, 'other.cuds')
+        for filename in (self.filename, self.other):
+            with closing(H5CUDS.open(filename, mode='w')) as handle:
+                handle.add_dataset(Particles(name='particles'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_shared_handle(self):
+        # given
+        pool = H5FilePool()
+
+        # when
+        handle = pool.acquire(self.filename)
+        other = pool.acquire(
+            os.path.relpath(self.filename))
+
+        # then
+        self.assertIs(handle, other)
+        self.assertEqual(pool.references(self.filename), 2)
+        self.assertTrue(handle.valid())
+        pool.release(self.filename)
+        pool.release(self.filename)
+
+    def test_close_on_last_release(self):
+        # given
+        pool = H5FilePool()
+        handle = pool.acquire(self.filename)
+        pool.acquire(self.filename)
+
+        # when
+        pool.release(self.filename)
+
+        # then
+        self.assertTrue(handle.valid())
+
+        # when
+        pool.release(self.filename)
+
+        # then
+        self.assertFalse(handle.valid())
+        self.assertEqual(pool.references(self.filename), 0)
+
+    def test_open(self):
+        # given
+        pool = H5FilePool()
+        held = pool.acquire(self.filename)
+
+        # when
+        with pool.open(self.filename) as handle:
+            names = [dataset.name for dataset in handle.iter_datasets()]
+            references = pool.references(self.filename)
+
+        # then
+        self.assertIs(handle, held)
+        self.assertEqual(names, ['particles'])
+        self.assertEqual(references, 2)
+        self.assertEqual(pool.references(self.filename), 1)
+        pool.release(self.filename)
+
+    def test_open_closes_unreferenced_file(self):
+        # given
+        pool = H5FilePool()
+
+        # when
+        with pool.open(self.filename) as handle:
+            pass
+
+        # then
+        self.assertFalse(handle.valid())
+        self.assertEqual(pool.references(self.filename), 0)
+
+    def test_open_serialises_all_files(self):
+        # given
+        pool = H5FilePool()
+        opened = threading.Event()
+
+        def read_other():
+            with pool.open(self.other):
+                opened.set()
+
+        # when
+        with pool.open(self.filename):
+            thread = threading.Thread(target=read_other)
+            thread.start()
+            # then
+            self.assertFalse(opened.wait(0.2))
+        thread.join(5.0)
+        self.assertTrue(opened.is_set())
+        self.assertEqual(pool.references(self.other), 0)
+
+    def test_acquire_while_another_file_is_open(self):
+        # given
+        pool = H5FilePool()
+        held = pool.acquire(self.other)
+        handles = []
+
+        def acquire_held():
+            handles.append(pool.acquire(self.other))
+
+        # when
+        with pool.open(self.filename):
+            thread = threading.Thread(target=acquire_held)
+            thread.start()
+            thread.join(5.0)
+
+            # then
+            self.assertEqual(handles, [held])
+
+        pool.release(self.other)
+        pool.release(self.other)
+
+
+if __name__ == '__main__':
+    unittest.main()
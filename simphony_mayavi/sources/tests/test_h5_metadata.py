@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import closing
+
+import mock
+import tables
+
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.lattice import make_cubic_lattice
+from simphony.cuds.mesh import Mesh
+from simphony.cuds.particles import Particles, Particle
+from simphony.io.h5_cuds import H5CUDS
+
+from simphony_mayavi.sources.api import read_cuds_file_metadata
+from simphony_mayavi.sources.h5_metadata import (
+    clear_metadata_cache, read_cuds_dataset_keys, read_cuds_item_keys)
+
+
+class TestReadCUDSFileMetadata(unittest.TestCase):
+
+    def setUp(self):
+        clear_metadata_cache()
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'test.cuds')
+        particles = Particles('particles')
+        particles.add([
+            Particle(coordinates=(index, 0.0, 0.0),
+                     data=DataContainer(TEMPERATURE=index))
+            for index in range(5)])
+        with closing(H5CUDS.open(self.filename, mode='w')) as handle:
+            handle.add_dataset(particles)
+            handle.add_dataset(Mesh('mesh'))
+            handle.add_dataset(make_cubic_lattice('lattice', 0.1, (2, 3, 4)))
+
+    def tearDown(self):
+        clear_metadata_cache()
+        shutil.rmtree(self.temp_dir)
+
+    def test_names_and_kinds(self):
+        # when
+        datasets = read_cuds_file_metadata(self.filename)
+
+        # then
+        self.assertItemsEqual(
+            [(info.name, info.kind) for info in datasets],
+            [('particles', 'Particles'), ('mesh', 'Mesh'),
+             ('lattice', 'Lattice')])
+
+    def test_item_counts_and_keys(self):
+        # when
+        datasets = {
+            info.name: info for info in read_cuds_file_metadata(self.filename)}
+
+        # then
+        particles = datasets['particles']
+        self.assertIn(5, particles.item_counts.values())
+        self.assertIn(CUBA.TEMPERATURE, particles.cuba_keys['particles'])
+        self.assertIn(24, datasets['lattice'].item_counts.values())
+
+    def test_items_are_not_read(self):
+        # when
+        with mock.patch.object(tables.Table, 'read') as read, \
+                mock.patch.object(tables.Table, 'col') as col:
+            read_cuds_file_metadata(self.filename)
+
+        # then
+        self.assertFalse(read.called)
+        self.assertFalse(col.called)
+
+    def test_dataset_keys(self):
+        # when
+        cuba_keys = read_cuds_dataset_keys(self.filename, 'particles')
+
+        # then
+        self.assertEqual(cuba_keys['particles'], frozenset([CUBA.TEMPERATURE]))
+
+    def test_item_keys(self):
+        # given
+        with closing(H5CUDS.open(self.filename)) as handle:
+            particles = handle.get_dataset('particles')
+
+            # when
+            particle_keys = read_cuds_item_keys(particles, CUBA.PARTICLE)
+            bond_keys = read_cuds_item_keys(particles, CUBA.BOND)
+
+        # then
+        self.assertEqual(particle_keys, frozenset([CUBA.TEMPERATURE]))
+        self.assertEqual(bond_keys, frozenset())
+        self.assertIsNone(
+            read_cuds_item_keys(Particles('other'), CUBA.PARTICLE))
+
+    def test_dataset_keys_of_unknown_dataset(self):
+        with self.assertRaises(ValueError):
+            read_cuds_dataset_keys(self.filename, 'foo')
+
+    def test_containers_are_not_loaded(self):
+        # when
+        with mock.patch.object(H5CUDS, 'iter_datasets') as iter_datasets, \
+                mock.patch.object(H5CUDS, 'get_dataset') as get_dataset:
+            read_cuds_file_metadata(self.filename)
+            read_cuds_dataset_keys(self.filename, 'particles')
+
+        # then
+        self.assertFalse(iter_datasets.called)
+        self.assertFalse(get_dataset.called)
+
+    def test_cached_per_file(self):
+        # given
+        read_cuds_file_metadata(self.filename)
+
+        # when
+        with mock.patch(
+                'simphony_mayavi.sources.h5_metadata._read_metadata') as read:
+            datasets = read_cuds_file_metadata(self.filename)
+
+        # then
+        self.assertFalse(read.called)
+        self.assertEqual(len(datasets), 3)
+
+    def test_fallback_for_unknown_layout(self):
+        # when
+        with mock.patch(
+                'simphony_mayavi.sources.h5_metadata._dataset_groups',
+                return_value=None):
+            datasets = read_cuds_file_metadata(self.filename)
+            cuba_keys = read_cuds_dataset_keys(self.filename, 'particles')
+
+        # then
+        self.assertItemsEqual(
+            [(info.name, info.kind) for info in datasets],
+            [('particles', 'Particles'), ('mesh', 'Mesh'),
+             ('lattice', 'Lattice')])
+        for info in datasets:
+            self.assertEqual(info.item_counts, {})
+        self.assertEqual(cuba_keys, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,13 @@
 import itertools
+import os
+import shutil
 import unittest
 import tempfile
 
 import numpy
 from mayavi.sources.vtk_xml_file_reader import get_all_attributes
 from numpy.testing import assert_array_equal
+from mock import patch
 
 from simphony.cuds.mesh import Cell, Edge, Face
 from simphony.cuds.particles import Particle, Particles, Bond
@@ -13,10 +16,12 @@ from simphony.cuds.lattice import (
     make_orthorhombic_lattice)
 from simphony.core.data_container import DataContainer
 from simphony.core.cuba import CUBA
+from simphony.io.h5_cuds import H5CUDS
 
 from simphony_mayavi.core.api import (
-    cell_array_slicer,
+    cell_array_slicer, ConversionCache,
     CELL2VTKCELL, FACE2VTKCELL, EDGE2VTKCELL)
+from simphony_mayavi.cuds.api import VTKParticles
 from simphony_mayavi.sources.slim_cuds_source import SlimCUDSSource, \
     _available_keys
 from simphony_mayavi.sources.tests.test_cuds_source import (
@@ -329,6 +334,74 @@ class TestParticlesSlimSource(TestParticlesSource):
         self.assertEqual(available_keys["cell_scalars"], {CUBA.TEMPERATURE})
         self.assertEqual(available_keys["cell_vectors"], set())
 
+    def test_available_keys_of_vtk_cuds(self):
+        vtk_cuds = VTKParticles.from_particles(
+            self.container, particle_keys=[CUBA.MASS], bond_keys=[])
+
+        available_keys = _available_keys(vtk_cuds)
+
+        self.assertEqual(available_keys["point_scalars"], {CUBA.MASS})
+        self.assertEqual(available_keys["cell_scalars"], set())
+
+    def test_available_keys_of_file_based_container(self):
+        # given
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        handle = H5CUDS.open(os.path.join(temp_dir, 'test.cuds'), mode='w')
+        self.addCleanup(handle.close)
+        handle.add_dataset(self.container)
+        container = handle.get_dataset('test')
+
+        # when
+        with patch.object(type(container), 'iter') as iter_items:
+            available_keys = _available_keys(container, sample_size=1)
+
+        # then
+        self.assertFalse(iter_items.called)
+        self.assertEqual(available_keys["point_scalars"],
+                         {CUBA.TEMPERATURE, CUBA.RADIUS, CUBA.MASS})
+        self.assertEqual(available_keys["cell_scalars"], {CUBA.TEMPERATURE})
+
+    def test_available_keys_with_sampling(self):
+        inspected = []
+        iter_items = self.container.iter
+
+        def counting_iter(*args, **kwargs):
+            for item in iter_items(*args, **kwargs):
+                inspected.append(item)
+                yield item
+        self.container.iter = counting_iter
+
+        available_keys = _available_keys(self.container, sample_size=2)
+
+        # two particles and two bonds
+        self.assertEqual(len(inspected), 4)
+        self.assertEqual(available_keys["point_scalars"],
+                         {CUBA.TEMPERATURE, CUBA.RADIUS, CUBA.MASS})
+        self.assertEqual(available_keys["cell_scalars"], {CUBA.TEMPERATURE})
+
+    def test_small_container_is_not_sampled(self):
+        # when
+        source = SlimCUDSSource(cuds=self.container)
+
+        # then
+        self.assertEqual(source.key_sample_size, 1000)
+        self.assertFalse(source._sampled_keys)
+
+    def test_rescan(self):
+        # given
+        source = SlimCUDSSource(cuds=self.container, key_sample_size=0)
+        self.assertEqual(source._point_scalars_list, [''])
+        self.assertTrue(source._sampled_keys)
+
+        # when
+        source.rescan = True
+
+        # then
+        self.assertEqual(len(source._point_scalars_list), 4)
+        self.assertEqual(source._cell_scalars_list, ['TEMPERATURE', ''])
+        self.assertFalse(source._sampled_keys)
+
     def test_bonds(self):
         source = SlimCUDSSource(cuds=self.container)
 
@@ -415,6 +488,76 @@ class TestParticlesSlimSource(TestParticlesSource):
         point_attrs, cell_attrs = get_all_attributes(source.data)
         self.assertEqual(len(point_attrs["scalars"]), 0)
 
+    def test_changing_names_keeps_the_dataset(self):
+        # given
+        source = SlimCUDSSource(cuds=self.container,
+                                point_scalars="TEMPERATURE")
+        vtk_cuds = source._vtk_cuds
+        dataset = source.data
+        geometry = vtk_cuds.geometry_version
+        topology = vtk_cuds.topology_version
+
+        # when
+        source.point_scalars_name = "RADIUS"
+        source.cell_scalars_name = ""
+
+        # then
+        self.assertIs(source._vtk_cuds, vtk_cuds)
+        self.assertIs(source.data, dataset)
+        self.assertEqual(vtk_cuds.geometry_version, geometry)
+        self.assertEqual(vtk_cuds.topology_version, topology)
+        self.assertEqual(vtk_cuds.point_data.cubas, {CUBA.RADIUS})
+        self.assertEqual(vtk_cuds.bond_data.cubas, set())
+        for uid, index in vtk_cuds.particle2index.iteritems():
+            self.assertEqual(
+                vtk_cuds.point_data[index],
+                DataContainer(RADIUS=self.container.get(uid).data[
+                    CUBA.RADIUS]))
+        point_attrs, cell_attrs = get_all_attributes(source.data)
+        self.assertEqual(point_attrs["scalars"], ["RADIUS"])
+        self.assertEqual(cell_attrs["scalars"], [])
+
+    def test_changing_names_after_topology_change(self):
+        # given
+        source = SlimCUDSSource(cuds=self.container,
+                                point_scalars="TEMPERATURE")
+        vtk_cuds = source._vtk_cuds
+        self.container.add([Particle(coordinates=(1.0, 1.0, 1.0),
+                                     data=DataContainer(RADIUS=5.0))])
+
+        # when
+        source.point_scalars_name = "RADIUS"
+
+        # then
+        self.assertIsNot(source._vtk_cuds, vtk_cuds)
+        self.assertEqual(source.data.number_of_points, 5)
+
+    def test_changing_names_with_conversion_cache(self):
+        # given
+        cache = ConversionCache()
+        source = SlimCUDSSource(cuds=self.container,
+                                point_scalars="TEMPERATURE",
+                                conversion_cache=cache)
+        vtk_cuds = source._vtk_cuds
+
+        # when
+        source.point_scalars_name = "RADIUS"
+
+        # then
+        self.assertIsNot(source._vtk_cuds, vtk_cuds)
+        self.assertEqual(vtk_cuds.point_data.cubas, {CUBA.TEMPERATURE})
+        point_attrs, cell_attrs = get_all_attributes(source.data)
+        self.assertEqual(point_attrs["scalars"], ["RADIUS"])
+
+        # when
+        source.point_scalars_name = "TEMPERATURE"
+
+        # then
+        self.assertIs(source._vtk_cuds, vtk_cuds)
+        self.assertEqual(cache.hits, 1)
+        point_attrs, cell_attrs = get_all_attributes(source.data)
+        self.assertEqual(point_attrs["scalars"], ["TEMPERATURE"])
+
     def test_unexistent_choice(self):
         # This should work and trigger no error
         source = SlimCUDSSource(point_scalars="TEMPERATURE")
@@ -0,0 +1,251 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import closing
+
+from mock import patch
+from tvtk.api import tvtk
+from mayavi.core.api import NullEngine
+from simphony.core.cuba import CUBA
+from simphony.core.data_container import DataContainer
+from simphony.cuds.particles import Particles, Particle
+from simphony.io.h5_cuds import H5CUDS
+
+from simphony_mayavi.cuds.api import VTKParticles
+from simphony_mayavi.sources.api import TimeSeriesSource
+from simphony_mayavi.sources.h5_file_pool import h5_file_pool
+
+
+def create_particles(name, step, count=5):
+    particles = Particles(name)
+    particles.add([
+        Particle(uid=uid, coordinates=(index, step, 0.0),
+                 data=DataContainer(TEMPERATURE=step))
+        for index, uid in enumerate(UIDS[:count])])
+    return particles
+
+
+UIDS = [Particle().uid for _ in range(10)]
+
+
+class TestTimeSeriesSource(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, 'series.cuds')
+        with closing(H5CUDS.open(self.filename, mode='w')) as handle:
+            for step in range(12):
+                handle.add_dataset(
+                    create_particles('step_{}'.format(step), step))
+        self.invoked = []
+        patcher = patch('simphony_mayavi.sources.time_series_source.GUI')
+        gui = patcher.start()
+        gui.invoke_later.side_effect = (
+            lambda *args: self.invoked.append(args))
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_initialize_from_file(self):
+        # given
+        source = self.create_source()
+
+        # when
+        source.initialize(self.filename)
+
+        # then
+        self.assertEqual(
+            [name for _, name in source.steps],
+            ['step_{}'.format(step) for step in range(12)])
+        self.assertEqual(source.step, 0)
+
+    def test_initialize_from_directory(self):
+        # given
+        directory = os.path.join(self.temp_dir, 'steps')
+        os.mkdir(directory)
+        for step in (2, 10, 1):
+            filename = os.path.join(directory, 'run_{}.cuds'.format(step))
+            with closing(H5CUDS.open(filename, mode='w')) as handle:
+                handle.add_dataset(create_particles('particles', step))
+        source = self.create_source()
+
+        # when
+        source.initialize(directory)
+
+        # then
+        self.assertEqual(
+            [os.path.basename(path) for path, _ in source.steps],
+            ['run_1.cuds', 'run_2.cuds', 'run_10.cuds'])
+        self.assertEqual(
+            [name for _, name in source.steps], ['particles'] * 3)
+
+    def test_show_first_step(self):
+        # given
+        source = self.create_source()
+
+        # when
+        source.initialize(self.filename)
+        source.start()
+        self.process_events(source)
+
+        # then
+        self.assertFalse(source.loading)
+        self.assertIsInstance(source._vtk_cuds, VTKParticles)
+        self.assertIsInstance(source.outputs[0], tvtk.PolyData)
+        self.assert_step_shown(source, 0)
+
+    def test_scrub(self):
+        # given
+        source = self.create_source()
+        source.initialize(self.filename)
+        source.start()
+        self.process_events(source)
+        data_set = source._vtk_cuds.data_set
+
+        # when
+        source.step = 9
+        self.process_events(source)
+
+        # then
+        self.assert_step_shown(source, 9)
+        # the same particles, so the container is updated in place
+        self.assertIs(source._vtk_cuds.data_set, data_set)
+        self.assertEqual(source._vtk_cuds.name, 'step_9')
+
+    def test_step_forward_and_backward(self):
+        # given
+        source = self.create_source(loop=True)
+        source.initialize(self.filename)
+        source.start()
+        self.process_events(source)
+
+        # when
+        source.previous_step = True
+        self.process_events(source)
+
+        # then
+        self.assert_step_shown(source, 11)
+
+        # when
+        source.next_step = True
+        source.next_step = True
+        self.process_events(source)
+
+        # then
+        self.assert_step_shown(source, 1)
+
+    def test_prefetch(self):
+        # given
+        source = self.create_source(prefetch=4)
+
+        # when
+        source.initialize(self.filename)
+        source.start()
+        source.step = 10
+        self.process_events(source)
+
+        # then
+        self.assertEqual(source._prefetcher.steps(), [11, 0, 1])
+
+    def test_playback(self):
+        # given
+        source = self.create_source(loop=False)
+        source.initialize(self.filename)
+        source.start()
+        self.process_events(source)
+
+        # when
+        with patch(
+                'simphony_mayavi.sources.time_series_source.Timer') as timer:
+            source.play()
+            for _ in range(20):
+                self.process_events(source)
+                source._advance()
+
+        # then
+        self.assertTrue(timer.called)
+        self.assertFalse(source.playing)
+        self.assert_step_shown(source, 11)
+
+    def test_different_topology(self):
+        # given
+        with closing(H5CUDS.open(self.filename)) as handle:
+            handle.add_dataset(create_particles('step_12', 12, count=10))
+        source = self.create_source()
+        source.initialize(self.filename)
+        source.start()
+        self.process_events(source)
+        container = source._vtk_cuds
+
+        # when
+        source.step = 12
+        self.process_events(source)
+
+        # then
+        self.assertIsNot(source._vtk_cuds, container)
+        self.assertEqual(source.data.number_of_points, 10)
+
+    def test_no_loading_until_started(self):
+        # given
+        source = self.create_source()
+
+        # when
+        source.initialize(self.filename)
+        source.step = 3
+
+        # then
+        self.assertIsNone(source._prefetcher)
+        self.assertEqual(h5_file_pool.references(self.filename), 0)
+        self.assertIsNone(source._vtk_cuds)
+
+        # when
+        source.start()
+        self.process_events(source)
+
+        # then
+        self.assert_step_shown(source, 3)
+        self.assertEqual(h5_file_pool.references(self.filename), 1)
+
+    def test_release_files_on_stop(self):
+        # given
+        source = self.create_source()
+        source.initialize(self.filename)
+        engine = NullEngine()
+        engine.add_source(source)
+        self.process_events(source)
+
+        # when
+        engine.stop()
+
+        # then
+        self.assertEqual(h5_file_pool.references(self.filename), 0)
+        self.assertIsNone(source._prefetcher)
+
+    def create_source(self, **traits):
+        source = TimeSeriesSource(**traits)
+        self.addCleanup(source.stop)
+        return source
+
+    def process_events(self, source):
+        """ Wait for the requested frames and run the callbacks as the GUI
+        would. """
+        prefetcher = source._prefetcher
+        if prefetcher is not None:
+            for step in prefetcher.steps():
+                frame = prefetcher._frames[step]
+                frame.wait(5)
+        while self.invoked:
+            args = self.invoked.pop(0)
+            args[0](*args[1:])
+
+    def assert_step_shown(self, source, step):
+        self.assertEqual(source.step, step)
+        for particle in source._vtk_cuds.iter(item_type=CUBA.PARTICLE):
+            self.assertEqual(particle.data[CUBA.TEMPERATURE], step)
+            self.assertEqual(particle.coordinates[1], step)
+
+
+if __name__ == '__main__':
+    unittest.main()
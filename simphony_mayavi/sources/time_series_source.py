@@ -0,0 +1,365 @@
+import glob
+import logging
+import os
+import re
+
+from traits.api import (
+    Bool, Event, Float, Instance, Int, List, Range, Str, Tuple, Any)
+from traitsui.api import View, Group, HGroup, Item, ButtonEditor
+from pyface.api import GUI
+from pyface.timer.api import Timer
+
+from .cuds_file_source import _load_dataset
+from .cuds_source import CUDSSource
+from .frame_prefetcher import FramePrefetcher
+from .h5_file_pool import h5_file_pool
+from .h5_metadata import read_cuds_file_metadata
+
+logger = logging.getLogger(__name__)
+
+
+class TimeSeriesSource(CUDSSource):
+    """ A mayavi source playing a series of CUDS datasets.
+
+    Every time step is a dataset in a CUDS file, either all the datasets
+    of a single file or one dataset per file of a directory (see
+    :meth:`initialize`). The current ``step`` can be set directly (e.g.
+    scrubbing with the slider), stepped with ``next_step`` and
+    ``previous_step`` or played at ``frame_rate`` frames per second.
+
+    The next ``prefetch`` steps are loaded and converted ahead on
+    ``workers`` background threads and kept in a bounded buffer. The
+    workers take turns reading the files, since the HDF5 library is not
+    thread safe (see :class:`~.H5FilePool`), while the VTK datasets are
+    built in parallel. During playback a step is shown once it is
+    loaded, so slow steps delay the playback instead of blocking the
+    GUI. When consecutive steps have the same items and connectivity,
+    the VTK container in the pipeline is updated in place instead of
+    being replaced. The ``region``, ``lattice_step`` and
+    ``memory_budget`` apply to every step (see :class:`CUDSSource`).
+
+    The steps are only loaded, and their files held open, while the
+    source is running.
+
+    """
+
+    #: The version of this class. Used for persistence.
+    __version__ = 0
+
+    #: The (file path, dataset name) of each time step.
+    steps = List(Tuple(Str, Str))
+
+    #: The current time step.
+    step = Range(low=0, high='_last_step', value=0, mode='slider')
+
+    #: Play the time steps in order.
+    playing = Bool(False)
+
+    #: Restart from the first step at the end of the series.
+    loop = Bool(True)
+
+    #: The number of steps shown per second while playing.
+    frame_rate = Float(25.0)
+
+    #: The number of steps loaded ahead of the current one.
+    prefetch = Int(8)
+
+    #: The number of threads loading the time steps.
+    workers = Int(2)
+
+    #: Event to show the next time step.
+    next_step = Event
+
+    #: Event to show the previous time step.
+    previous_step = Event
+
+    #: The index of the last time step.
+    _last_step = Int(0)
+
+    #: The buffer of the loaded time steps.
+    _prefetcher = Instance(FramePrefetcher)
+
+    #: The timer driving the playback.
+    _timer = Any
+
+    #: The step that is shown as soon as it is loaded.
+    _waiting_for = Any
+
+    #: The files whose pooled handles are held by the source.
+    _held_files = List(Str)
+
+    view = View(
+        Group(
+            Item(name='step'),
+            HGroup(
+                Item(name='previous_step', show_label=False,
+                     editor=ButtonEditor(label='Previous')),
+                Item(name='playing'),
+                Item(name='next_step', show_label=False,
+                     editor=ButtonEditor(label='Next')),
+                Item(name='loop')),
+            Item(name='frame_rate'),
+            Item(name='prefetch'),
+            Group(
+                Item(name='point_scalars_name'),
+                Item(name='point_vectors_name'),
+                Item(name='cell_scalars_name'),
+                Item(name='cell_vectors_name'),
+                Item(name='data'))))
+
+    # Public interface #####################################################
+
+    def initialize(self, path, dataset=None):
+        """ Set up the time steps from a CUDS file or a directory.
+
+        Parameters
+        ----------
+        path : str
+            A CUDS file, where every dataset is a time step, or a
+            directory of CUDS files with one time step per file. The
+            datasets and the files are ordered by their names, where
+            numbers are compared by value (e.g. 'step_9' < 'step_10').
+
+        dataset : str
+            The name of the dataset to use in each file of a directory.
+            Default is None which uses the first dataset of each file.
+
+        """
+        if os.path.isdir(path):
+            filenames = sorted(
+                glob.glob(os.path.join(path, '*.cuds')), key=_natural_key)
+            steps = []
+            for filename in filenames:
+                if dataset is not None:
+                    steps.append((filename, dataset))
+                    continue
+                names = sorted(
+                    (info.name for info in read_cuds_file_metadata(filename)),
+                    key=_natural_key)
+                if len(names) == 0:
+                    logger.warning('No datasets found in: %s', filename)
+                else:
+                    steps.append((filename, names[0]))
+        else:
+            names = sorted(
+                (info.name for info in read_cuds_file_metadata(path)),
+                key=_natural_key)
+            steps = [(path, name) for name in names]
+        if len(steps) == 0:
+            logger.warning('No time steps found in: %s', path)
+        self.steps = steps
+
+    def play(self):
+        """ Start the playback from the current step.
+        """
+        self.playing = True
+
+    def pause(self):
+        """ Stop the playback at the current step.
+        """
+        self.playing = False
+
+    def start(self):
+        running = self.running
+        # the current step is loaded below
+        self._interrupted = False
+        super(TimeSeriesSource, self).start()
+        if not running and len(self.steps) != 0:
+            self._show_step(self.step)
+
+    def stop(self):
+        self.pause()
+        self._waiting_for = None
+        super(TimeSeriesSource, self).stop()
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+        self._hold_files([])
+
+    # Trait Change Handlers ################################################
+
+    def _steps_changed(self):
+        if self._prefetcher is not None:
+            self._prefetcher.clear()
+        self._last_step = max(len(self.steps) - 1, 0)
+        if self.step != 0:
+            # shows the first step
+            self.step = 0
+        elif len(self.steps) != 0:
+            self._show_step(0)
+
+    def _step_changed(self, step):
+        self._show_step(step)
+
+    def _next_step_fired(self):
+        step = self._following(self.step)
+        if step is not None:
+            self.step = step
+
+    def _previous_step_fired(self):
+        if self.step > 0:
+            self.step -= 1
+        elif self.loop:
+            self.step = self._last_step
+
+    def _playing_changed(self, playing):
+        if self._timer is not None:
+            self._timer.Stop()
+            self._timer = None
+        if playing and len(self.steps) != 0:
+            interval = max(int(1000.0 / self.frame_rate), 1)
+            self._timer = Timer(interval, self._advance)
+
+    def _frame_rate_changed(self):
+        if self.playing:
+            # restart the timer with the new interval
+            self._playing_changed(True)
+
+    def _prefetch_changed(self, prefetch):
+        if self._prefetcher is not None:
+            self._prefetcher.capacity = max(prefetch, 1)
+            self._request_frames(self.step)
+
+    def _workers_changed(self):
+        # The pool is created again with the new number of workers
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
+    # Private interface ####################################################
+
+    def _load_step(self, step):
+        """ Load a time step into a VTK container. Called on a worker
+        thread. """
+        filename, name = self.steps[step]
+        return _load_dataset(
+            filename, name, memory_budget=self.memory_budget,
+            region=self.region, element_selection=self.element_selection,
+            implicit=self.implicit, lattice_step=self.lattice_step)
+
+    def _region_updated(self):
+        # The buffered steps are loaded again for the new region
+        if self._prefetcher is not None:
+            self._prefetcher.clear()
+        if len(self.steps) != 0:
+            self._show_step(self.step)
+
+    def _get_prefetcher(self):
+        if self._prefetcher is None:
+            self._prefetcher = FramePrefetcher(
+                self._load_step, capacity=max(self.prefetch, 1),
+                workers=max(self.workers, 1), callback=self._frame_loaded)
+        return self._prefetcher
+
+    def _following(self, step):
+        """ Return the step after ``step`` or None at the end of the series.
+        """
+        if step < self._last_step:
+            return step + 1
+        elif self.loop and len(self.steps) > 1:
+            return 0
+        return None
+
+    def _window(self, step):
+        """ Return the steps to keep in the buffer, starting at ``step``.
+        """
+        window = []
+        while step is not None and step not in window and \
+                len(window) < max(self.prefetch, 1):
+            window.append(step)
+            step = self._following(step)
+        return window
+
+    def _request_frames(self, step):
+        window = self._window(step)
+        self._hold_files([self.steps[index][0] for index in window])
+        self._get_prefetcher().request(window)
+
+    def _show_step(self, step):
+        """ Show ``step`` as soon as it is loaded. The steps are loaded
+        once the source is started. """
+        if step >= len(self.steps) or not self.running:
+            return
+        self._request_frames(step)
+        if self._prefetcher.ready(step):
+            self._show_frame(step)
+        else:
+            self._waiting_for = step
+            self.loading = True
+
+    def _frame_loaded(self, step):
+        """ Called on a worker thread when a frame is loaded. """
+        GUI.invoke_later(self._deliver_frame, step)
+
+    def _deliver_frame(self, step):
+        if step == self._waiting_for == self.step:
+            self._show_frame(step)
+
+    def _show_frame(self, step):
+        """ Put the loaded frame of ``step`` in the pipeline. """
+        self._waiting_for = None
+        try:
+            frame = self._prefetcher.take(step)
+        except Exception as exception:
+            self.loading = False
+            logger.error("Failed to load the time step %s: %s",
+                         step, exception)
+            return
+        if frame is None:
+            # the load has been skipped, so the step is requested again
+            self._show_step(step)
+            return
+        # the same items: only the coordinates and data are copied
+        if self._update_vtk_cuds_in_place(frame):
+            self.loading = False
+            self._vtk_cuds.name = frame.name
+            self._vtk_cuds.data = frame.data
+            self._refresh_pipeline()
+        else:
+            self._set_vtk_cuds(frame)
+        # the loaded data are used as the CUDS dataset.
+        self._cuds = self._vtk_cuds
+        self.name = self._get_name()
+
+    def _advance(self):
+        """ Show the next step if it is already loaded. Called by the
+        playback timer. """
+        step = self._following(self.step)
+        if step is None:
+            self.playing = False
+        elif self._prefetcher is not None and self._prefetcher.ready(step):
+            self.step = step
+
+    def _hold_files(self, filenames):
+        """ Keep the pooled handles of ``filenames`` open, releasing the
+        other held files. """
+        filenames = sorted(set(filenames))
+        held = self._held_files
+        for filename in filenames:
+            if filename not in held:
+                h5_file_pool.acquire(filename)
+        for filename in held:
+            if filename not in filenames:
+                h5_file_pool.release(filename)
+        self._held_files = filenames
+
+    def _get_name(self):
+        """ Returns the name to display on the tree view.  Note that
+        this is not a property getter.
+        """
+        name = super(TimeSeriesSource, self)._get_name()
+        return 'CUDS Time Series: step {} of {}, {}'.format(
+            self.step + 1, len(self.steps), name)
+
+    def __get_pure_state__(self):
+        state = super(TimeSeriesSource, self).__get_pure_state__()
+        for name in ('_prefetcher', '_timer', '_waiting_for', '_held_files',
+                     'playing'):
+            state.pop(name, None)
+        return state
+
+
+def _natural_key(text):
+    """ Sort key comparing the numbers in ``text`` by value. """
+    return [int(part) if part.isdigit() else part
+            for part in re.split(r'(\d+)', text)]